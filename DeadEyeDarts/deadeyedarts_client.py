@@ -1,15 +1,150 @@
 #!/usr/bin/env python3
 """
 DeadEyeDarts Client - Connects to darts-caller and displays dart throws
+
+    python3 deadeyedarts_client.py                       # zombie demo output
+    python3 deadeyedarts_client.py --jsonl               # one JSON line per throw on stdout
+    python3 deadeyedarts_client.py --jsonl -o throws.jsonl --player Alice --event dart3-thrown
+
+In --jsonl (headless) mode every normalized throw is written as one JSON line
+through a block buffer (flushed at least every --flush-interval seconds), and
+connection messages plus a rate/lag summary go to stderr on exit.
 """
-import socketio
+import argparse
+import asyncio
 import json
+import os
+import signal
+import socketio
 import sys
+import threading
+import time
 from datetime import datetime
 
+# The dart event decoder is shared with the DeadEyeGames server
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'DeadEyeGames'))
+from dart_events import THROW_EVENTS, MalformedMessage, decode_message  # noqa: E402
+from metrics import Histogram  # noqa: E402
+
+DARTS_CALLER_URL = "https://localhost:8079"
+
+# Example zombie game logic: numbers a zombie can be standing on
+ZOMBIE_TARGETS = frozenset((20, 19, 18, 17, 16, 15, 14, 13, 12, 11))
+
+# Headless output: bytes buffered before a write, and the longest a line waits in the buffer
+DEFAULT_BUFFER = 64 * 1024
+DEFAULT_FLUSH_INTERVAL = 0.5
+
 # Create Socket.IO client (disable SSL verification for self-signed cert)
 sio = socketio.Client(ssl_verify=False)
 
+
+class ThrowTap:
+    """
+    Headless mode: one JSON line per normalized throw, block-buffered
+
+    Lag is measured per written throw, from the message reaching the client
+    to its line being in the output buffer. A consumer that can't keep up
+    (a slow pipe or terminal) blocks the flushes and shows up as lag.
+    """
+
+    def __init__(self, out, events=None, players=None, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 clock=time.perf_counter, wall_clock=time.time):
+        self.out = out
+        self.events = frozenset(events) if events else None
+        self.players = frozenset(players) if players else None
+        self.flush_interval = flush_interval
+        self.clock = clock
+        self.wall_clock = wall_clock
+        self.lock = threading.Lock()
+        self.lag = Histogram()
+        self.counts = {'messages': 0, 'throws': 0, 'written': 0, 'filtered': 0, 'malformed': 0}
+        self.started = clock()
+        self.first = None
+        self.last = None
+        self.dirty = False
+        self.stopped = threading.Event()
+        self.player_json = {}  # player name -> its JSON string
+
+    def on_message(self, data):
+        received = self.clock()
+        counts = self.counts
+        counts['messages'] += 1
+        if self.first is None:
+            self.first = received
+        self.last = received
+        try:
+            dart = decode_message(data)
+        except MalformedMessage as e:
+            counts['malformed'] += 1
+            print(f"Ignoring malformed dart message: {e}", file=sys.stderr)
+            return
+        if dart is None:
+            return
+        counts['throws'] += 1
+        if (self.events is not None and dart.event not in self.events) or \
+                (self.players is not None and dart.player not in self.players):
+            counts['filtered'] += 1
+            return
+
+        line = self.line(dart, self.wall_clock())
+        with self.lock:
+            self.out.write(line)
+            self.dirty = True
+        counts['written'] += 1
+        self.lag.observe(self.clock() - received)
+
+    def line(self, dart, now):
+        """The JSON line for a throw: dart.to_dict() plus 't' (receive time), formatted without json.dumps"""
+        player = self.player_json.get(dart.player)
+        if player is None:
+            if len(self.player_json) > 1000:
+                self.player_json.clear()
+            player = self.player_json[dart.player] = json.dumps(dart.player)
+        dart_number = dart.dart_number
+        if dart_number.__class__ is not int:
+            dart_number = json.dumps(dart_number)
+        return (f'{{"event":"{dart.event}","segment":{dart.segment},"multiplier":{dart.multiplier},'
+                f'"value":{dart.value},"dartNumber":{dart_number},"player":{player},"t":{now:.3f}}}\n')
+
+    def flush(self):
+        with self.lock:
+            if self.dirty:
+                self.out.flush()
+                self.dirty = False
+
+    def run_flusher(self):
+        """Flush at least every flush_interval, so a quiet feed doesn't leave lines in the buffer"""
+        while not self.stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+            except OSError:
+                return  # the reader went away (e.g. `| head`)
+
+    def close(self):
+        self.stopped.set()
+        try:
+            self.flush()
+        except OSError:
+            pass
+
+    def summary(self):
+        """Counts, rates over the time messages were arriving, and lag percentiles"""
+        counts = self.counts
+        active = (self.last - self.first) if self.first is not None else 0.0
+
+        def rate(count):
+            return round(count / active, 1) if active > 0 else None
+
+        def ms(q):
+            value = self.lag.quantile(q)
+            return None if value is None else round(value * 1000, 3)
+
+        return dict(counts, seconds=round(self.clock() - self.started, 1),
+                    messages_per_s=rate(counts['messages']), throws_per_s=rate(counts['throws']),
+                    lag_ms={'p50': ms(0.5), 'p99': ms(0.99)})
+
+
 @sio.event
 def connect():
     print("=" * 70)
@@ -33,46 +168,102 @@ def connect_error(data):
 @sio.on('message')
 def on_message(data):
     try:
-        event_data = json.loads(data) if isinstance(data, str) else data
-        event_type = event_data.get('event', 'UNKNOWN')
-
         # Listen for individual dart throws from X01/Shanghai/Gotcha modes
-        if event_type in ['dart1-thrown', 'dart2-thrown', 'dart3-thrown']:
-            # Parse dart throw from the game object
-            game = event_data.get('game', {})
-            segment = game.get('fieldNumber', 0)
-            multiplier = game.get('fieldMultiplier', 1)
-            value = game.get('dartValue', 0)
-            dart_number = game.get('dartNumber', '?')
-            player = event_data.get('player', 'Unknown')
-
-            mult_name = {1: 'Single', 2: 'Double', 3: 'Triple'}.get(multiplier, '')
-
-            print("\n🎯 " + "═" * 60)
-            print(f"   DART #{dart_number} - {player}")
-            print(f"   HIT: {segment} ({mult_name}) = {value} points")
-            print("   " + "═" * 60)
-
-            # Example zombie game logic
-            zombie_targets = [20, 19, 18, 17, 16, 15, 14, 13, 12, 11]
-            if segment in zombie_targets:
-                print(f"\n   💀 ZOMBIE HIT! Number {segment}")
-                if multiplier == 3:
-                    print(f"   ⚡ TRIPLE! BONUS DAMAGE!")
-                elif multiplier == 2:
-                    print(f"   ⚡ DOUBLE! EXTRA DAMAGE!")
-            else:
-                print(f"\n   ❌ Miss! Zombie not at {segment}")
+        dart = decode_message(data)
+        if dart is None:
+            return
 
+        segment = dart.segment
+        multiplier = dart.multiplier
+
+        print("\n🎯 " + "═" * 60)
+        print(f"   DART #{dart.dart_number} - {dart.player}")
+        print(f"   HIT: {segment} ({dart.multiplier_name}) = {dart.value} points")
+        print("   " + "═" * 60)
+
+        # Example zombie game logic
+        if segment in ZOMBIE_TARGETS:
+            print(f"\n   💀 ZOMBIE HIT! Number {segment}")
+            if multiplier == 3:
+                print(f"   ⚡ TRIPLE! BONUS DAMAGE!")
+            elif multiplier == 2:
+                print(f"   ⚡ DOUBLE! EXTRA DAMAGE!")
+        else:
+            print(f"\n   ❌ Miss! Zombie not at {segment}")
+
+    except MalformedMessage as e:
+        print(f"Ignoring malformed dart message: {e}")
     except Exception as e:
         print(f"Error: {e}")
 
+def print_summary(summary):
+    lag = summary['lag_ms']
+    print(f"{summary['written']} throws written ({summary['filtered']} filtered, {summary['malformed']} malformed) "
+          f"from {summary['messages']} messages in {summary['seconds']}s", file=sys.stderr)
+    print(f"rate: {summary['messages_per_s']} messages/s, {summary['throws_per_s']} throws/s   "
+          f"lag: p50 {lag['p50']} ms, p99 {lag['p99']} ms", file=sys.stderr)
+
+def run_headless(args):
+    """--jsonl mode: an asyncio client (the demo's threaded client starts a thread per message)"""
+    out = open(sys.stdout.fileno() if args.output == '-' else args.output, 'w', encoding='utf-8',
+               buffering=args.buffer, closefd=args.output != '-')  # block-buffered even on a terminal
+    tap = ThrowTap(out, events=args.event, players=args.player, flush_interval=args.flush_interval)
+    threading.Thread(target=tap.run_flusher, name='jsonl-flush', daemon=True).start()
+
+    client = socketio.AsyncClient(ssl_verify=False, handle_sigint=False)
+    client.on('connect', lambda: print(f"Connected to darts-caller at {args.url}", file=sys.stderr))
+    client.on('disconnect', lambda: print("Disconnected from darts-caller", file=sys.stderr))
+    client.on('message', tap.on_message)
+
+    async def run():
+        await client.connect(args.url)
+        try:
+            await client.wait()
+        finally:
+            await client.disconnect()
+
+    try:
+        asyncio.run(run())
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    except Exception as e:
+        print(f"Error: {e} - make sure darts-caller is running!", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        tap.close()
+        out.close()
+        print_summary(tap.summary())
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description='DeadEyeDarts darts-caller client')
+    parser.add_argument('--url', default=DARTS_CALLER_URL, help=f'darts-caller URL (default: {DARTS_CALLER_URL})')
+    parser.add_argument('--jsonl', action='store_true', help='Headless: one JSON line per throw instead of the demo')
+    parser.add_argument('-o', '--output', default='-', help='--jsonl output file (default: - for stdout)')
+    parser.add_argument('--event', action='append', choices=THROW_EVENTS,
+                        help='Only write this throw event (repeatable)')
+    parser.add_argument('--player', action='append', help='Only write throws by this player (repeatable)')
+    parser.add_argument('--buffer', type=int, default=DEFAULT_BUFFER,
+                        help=f'--jsonl output buffer in bytes (default: {DEFAULT_BUFFER})')
+    parser.add_argument('--flush-interval', type=float, default=DEFAULT_FLUSH_INTERVAL,
+                        help=f'Longest a line waits in the buffer, seconds (default: {DEFAULT_FLUSH_INTERVAL})')
+    return parser
+
+def _raise_system_exit(signum, frame):
+    raise SystemExit(0)
+
 def main():
+    args = build_arg_parser().parse_args()
+    if args.jsonl:
+        # SIGTERM still flushes the buffer and prints the summary
+        signal.signal(signal.SIGTERM, _raise_system_exit)
+        run_headless(args)
+        return
+
     print("\n🎯 DeadEyeDarts Client Starting...")
-    print("Connecting to darts-caller at https://localhost:8079\n")
+    print(f"Connecting to darts-caller at {args.url}\n")
 
     try:
-        sio.connect("https://localhost:8079")
+        sio.connect(args.url)
         sio.wait()
     except KeyboardInterrupt:
         print("\n\n👋 Shutting down...")
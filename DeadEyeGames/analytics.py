@@ -0,0 +1,365 @@
+"""
+DeadEyeGames Analytics - Per-player throw statistics over the whole journal
+
+Every throw is kept in columnar NumPy arrays (time, player id, segment,
+multiplier, value). Per-player aggregates are updated in place as each live
+throw arrives:
+
+    darts, points       -> three-dart average
+    heatmap             -> darts per (segment, multiplier), 26 x 4 per player
+    trebles, doubles    -> hit rates; doubles (including the bull) are the checkout stats
+    streaks             -> longest and current run of darts that scored
+
+At startup the throw journal (months of throws, millions of records) is
+memory-mapped straight into a structured array and recompute() rebuilds every
+aggregate with vectorized bincounts and run-length passes, without a Python
+loop per throw. server.py imports this module and loads the journal in the
+background once it is serving, so neither NumPy nor the journal delays a
+cold start.
+
+darts-caller throw events don't say how many points a player had left, so
+"checkout" here means accuracy on doubles and the bull's-eye: the darts that
+can finish a leg.
+
+Results are served as JSON at /api/stats and /api/stats/player/<name>. Both
+are cached per throw count and carry an ETag, so game pages can poll them
+cheaply.
+
+NumPy is optional. Without it, or with DEADEYE_ANALYTICS=off, from_env()
+returns None and the stats API answers 503.
+"""
+import logging
+import os
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:  # optional - analytics off
+    np = None
+
+from journal import HEADER_SIZE, JournalFile, JournalReader
+
+logger = logging.getLogger(__name__)
+
+SEGMENTS = 26     # 0 (miss) .. 20, 25 (bull); 21-24 unused
+MULTIPLIERS = 4   # 0 (miss), single, double, triple
+BULL = 25
+
+INITIAL_CAPACITY = 4096
+
+
+def journal_dtype():
+    """Structured dtype matching journal.RECORD (64 bytes, little endian)"""
+    return np.dtype([('time', '<f8'), ('event', 'u1'), ('segment', 'u1'), ('multiplier', 'u1'),
+                     ('value', 'u1'), ('dart_number', 'u1'), ('pad', 'V3'), ('board', 'S16'),
+                     ('player', 'S32')])
+
+
+_LANE_MIX = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+
+
+def _unique_names(names):
+    """
+    np.unique(names, return_inverse=True), faster for journal player columns
+
+    Sorting a million 32-byte strings dominates a journal load, so names are
+    grouped by a 64-bit hash of their bytes first. The grouping is checked
+    against the real names and falls back to np.unique on a collision.
+    """
+    if names.dtype != np.dtype('S32'):
+        return np.unique(names, return_inverse=True)
+    lanes = np.ascontiguousarray(names).view('<u8').reshape(-1, 4)
+    hashed = np.zeros(len(names), np.uint64)
+    for lane, mix in enumerate(_LANE_MIX):
+        hashed ^= lanes[:, lane] * np.uint64(mix)
+    _, first, inverse = np.unique(hashed, return_index=True, return_inverse=True)
+    unique = names[first]
+    if not (unique[inverse] == names).all():
+        return np.unique(names, return_inverse=True)
+    return unique, inverse
+
+
+class ThrowAnalytics:
+    """Columnar throw history plus per-player aggregates, safe to read while throws arrive"""
+
+    COLUMNS = (('time', '<f8'), ('player', '<u4'), ('segment', 'u1'), ('multiplier', 'u1'), ('value', 'u1'))
+
+    def __init__(self, capacity=INITIAL_CAPACITY):
+        self.lock = threading.Lock()
+        self.count = 0
+        self.columns = {name: np.zeros(capacity, dtype) for name, dtype in self.COLUMNS}
+        self.names = []    # player id -> name
+        self.ids = {}      # name -> player id
+        self.started = time.time()
+        self._cache = {}   # key -> (count, report)
+        self._reset_aggregates(0)
+
+    @classmethod
+    def from_env(cls):
+        """Build analytics unless DEADEYE_ANALYTICS is off or NumPy isn't installed (then None)"""
+        if os.environ.get('DEADEYE_ANALYTICS', 'on').lower() in ('off', '0', 'false'):
+            return None
+        if np is None:
+            logger.warning("NumPy is not installed - throw analytics (/api/stats) disabled")
+            return None
+        return cls()
+
+    # -------------------------------------------------------------------------
+    # Storage
+    # -------------------------------------------------------------------------
+
+    def _reset_aggregates(self, players):
+        self.darts = np.zeros(players, np.int64)
+        self.points = np.zeros(players, np.int64)
+        self.heat = np.zeros((players, SEGMENTS, MULTIPLIERS), np.int64)
+        self.best_streak = np.zeros(players, np.int64)
+        self.streak = np.zeros(players, np.int64)
+        self.first = np.zeros(players, np.float64)
+        self.last = np.zeros(players, np.float64)
+
+    def _grow_players(self, players):
+        """Make room in the per-player aggregates for ids below `players`"""
+        extra = players - len(self.darts)
+        if extra <= 0:
+            return
+        for name in ('darts', 'points', 'best_streak', 'streak', 'first', 'last'):
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate([array, np.zeros(extra, array.dtype)]))
+        self.heat = np.concatenate([self.heat, np.zeros((extra, SEGMENTS, MULTIPLIERS), np.int64)])
+
+    def _player_id(self, name):
+        player = self.ids.get(name)
+        if player is None:
+            player = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return player
+
+    def _reserve(self, extra):
+        needed = self.count + extra
+        capacity = len(self.columns['time'])
+        if needed <= capacity:
+            return
+        capacity = max(needed, capacity * 2)
+        for name, array in self.columns.items():
+            grown = np.zeros(capacity, array.dtype)
+            grown[:self.count] = array[:self.count]
+            self.columns[name] = grown
+
+    def view(self, name):
+        """The filled part of a column"""
+        return self.columns[name][:self.count]
+
+    # -------------------------------------------------------------------------
+    # Incremental updates (one live throw)
+    # -------------------------------------------------------------------------
+
+    def add(self, dart, timestamp=None):
+        """Record one DartThrow and update its player's aggregates"""
+        timestamp = time.time() if timestamp is None else timestamp
+        segment = dart.segment if 0 <= dart.segment < SEGMENTS else 0
+        multiplier = dart.multiplier if 0 <= dart.multiplier < MULTIPLIERS else 0
+        with self.lock:
+            player = self._player_id(dart.player)
+            self._grow_players(player + 1)
+            self._reserve(1)
+            index = self.count
+            columns = self.columns
+            columns['time'][index] = timestamp
+            columns['player'][index] = player
+            columns['segment'][index] = segment
+            columns['multiplier'][index] = multiplier
+            columns['value'][index] = dart.value
+            self.count = index + 1
+
+            if not self.darts[player]:
+                self.first[player] = timestamp
+            self.last[player] = timestamp
+            self.darts[player] += 1
+            self.points[player] += dart.value
+            self.heat[player, segment, multiplier] += 1
+            if segment and multiplier:
+                streak = self.streak[player] + 1
+                self.streak[player] = streak
+                if streak > self.best_streak[player]:
+                    self.best_streak[player] = streak
+            else:
+                self.streak[player] = 0
+
+    # -------------------------------------------------------------------------
+    # Bulk loading and vectorized recompute
+    # -------------------------------------------------------------------------
+
+    def extend(self, times, players, segments, multipliers, values, recompute=True):
+        """
+        Append whole columns (player names as an array of str/bytes); returns the count
+
+        The aggregates are rebuilt afterwards unless recompute is False, for a
+        caller appending several batches that calls recompute() once at the end.
+        """
+        players = np.asarray(players)
+        names, inverse = _unique_names(players)
+        with self.lock:
+            mapping = np.array([self._player_id(n.decode('utf-8', 'replace') if isinstance(n, bytes) else str(n))
+                                for n in names], dtype=np.uint32)
+            count = len(players)
+            self._reserve(count)
+            start, stop = self.count, self.count + count
+            segments = np.asarray(segments)
+            multipliers = np.asarray(multipliers)
+            valid = (segments < SEGMENTS) & (multipliers < MULTIPLIERS)
+            self.columns['time'][start:stop] = times
+            self.columns['player'][start:stop] = mapping[inverse.ravel()]
+            self.columns['segment'][start:stop] = np.where(valid, segments, 0)
+            self.columns['multiplier'][start:stop] = np.where(valid, multipliers, 0)
+            self.columns['value'][start:stop] = values
+            self.count = stop
+            if recompute:
+                self._recompute()
+        return count
+
+    def load_journal(self, directory, files=None):
+        """
+        Load every throw in a journal directory (one vectorized copy per file); returns the count
+
+        The columns of every file are appended first and the aggregates rebuilt
+        once, not once per file.
+
+        files limits the load to these file names, e.g. the files that were
+        there before this run's JournalWriter started its own.
+        """
+        started = time.perf_counter()
+        dtype = journal_dtype()
+        loaded = 0
+        if files is None:
+            files = [name for _, name in JournalReader(directory).files]
+        for name in files:
+            try:
+                journal_file = JournalFile(os.path.join(directory, name))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Analytics skipping journal file {name}: {e}")
+                continue
+            try:
+                if not len(journal_file):
+                    continue
+                records = np.frombuffer(journal_file.mm, dtype, count=len(journal_file), offset=HEADER_SIZE)
+                columns = (records['time'].copy(), records['player'].copy(), records['segment'].copy(),
+                           records['multiplier'].copy(), records['value'].copy())
+                del records  # release the mmap export before closing
+                loaded += self.extend(*columns, recompute=False)
+            finally:
+                journal_file.close()
+        if loaded:
+            self.recompute()
+            logger.info(f"Analytics loaded {loaded} journal throws for {len(self.names)} players "
+                        f"in {time.perf_counter() - started:.2f}s")
+        return loaded
+
+    def recompute(self):
+        """Rebuild every aggregate from the columns"""
+        with self.lock:
+            self._recompute()
+
+    def _recompute(self):
+        players = len(self.names)
+        player = self.view('player').astype(np.int64)
+        segment = self.view('segment').astype(np.int64)
+        multiplier = self.view('multiplier').astype(np.int64)
+        times = self.view('time')
+        self._reset_aggregates(players)
+        if not self.count:
+            return
+
+        self.darts = np.bincount(player, minlength=players)
+        self.points = np.bincount(player, weights=self.view('value'), minlength=players).astype(np.int64)
+        cells = (player * SEGMENTS + segment) * MULTIPLIERS + multiplier
+        self.heat = np.bincount(cells, minlength=players * SEGMENTS * MULTIPLIERS).reshape(
+            players, SEGMENTS, MULTIPLIERS)
+        self.first = np.full(players, np.inf)
+        np.minimum.at(self.first, player, times)
+        self.first[np.isinf(self.first)] = 0
+        np.maximum.at(self.last, player, times)
+
+        # Streaks: runs of scoring darts within each player's throws, in order
+        # (16-bit keys let NumPy's stable sort use a radix sort)
+        narrow = self.view('player').astype(np.uint16) if players <= 0xFFFF else player
+        order = np.argsort(narrow, kind='stable')
+        by_player = player[order]
+        hit = ((segment > 0) & (multiplier > 0))[order]
+        boundary = np.empty(len(order), bool)
+        boundary[0] = True
+        boundary[1:] = (by_player[1:] != by_player[:-1]) | (hit[1:] != hit[:-1])
+        starts = np.flatnonzero(boundary)
+        lengths = np.diff(np.append(starts, len(order)))
+        hit_runs = hit[starts]
+        np.maximum.at(self.best_streak, by_player[starts][hit_runs], lengths[hit_runs])
+        # Current streak: each player's last run, if it scored
+        last_index = np.flatnonzero(np.append(by_player[1:] != by_player[:-1], True))
+        last_run = np.searchsorted(starts, last_index, side='right') - 1
+        self.streak[by_player[last_index]] = np.where(hit[last_index], lengths[last_run], 0)
+
+    # -------------------------------------------------------------------------
+    # Reports
+    # -------------------------------------------------------------------------
+
+    def _player_report(self, player, detail=False):
+        darts = int(self.darts[player])
+        heat = self.heat[player]
+        hits = int(heat[1:, 1:].sum())
+        trebles = int(heat[:, 3].sum())
+        doubles = int(heat[:, 2].sum())
+        rate = (lambda n: round(n / darts, 4)) if darts else (lambda n: 0.0)
+        double_hits = heat[1:, 2]
+        report = {
+            'player': self.names[player],
+            'darts': darts,
+            'points': int(self.points[player]),
+            'average': round(3 * int(self.points[player]) / darts, 2) if darts else 0.0,
+            'hitRate': rate(hits),
+            'trebles': trebles,
+            'trebleRate': rate(trebles),
+            'doubles': doubles,
+            'doubleRate': rate(doubles),
+            'bulls': int(heat[BULL, 1]),
+            'bullseyes': int(heat[BULL, 2]),
+            'favouriteDouble': int(double_hits.argmax()) + 1 if double_hits.any() else None,
+            'longestStreak': int(self.best_streak[player]),
+            'currentStreak': int(self.streak[player]),
+            'first': float(self.first[player]),
+            'last': float(self.last[player]),
+        }
+        if detail:
+            # heatmap[segment] = [singles, doubles, trebles]; misses are counted apart
+            report['misses'] = darts - hits
+            report['heatmap'] = {str(segment): heat[segment, 1:].tolist()
+                                 for segment in range(1, SEGMENTS) if heat[segment, 1:].any()}
+        return report
+
+    def _cached(self, key, build):
+        cached = self._cache.get(key)
+        if cached is not None and cached[0] == self.count:
+            return cached[1]
+        report = build()
+        self._cache[key] = (self.count, report)
+        return report
+
+    def summary(self):
+        """Every player's headline stats, most darts first"""
+        with self.lock:
+            return self._cached(None, lambda: {
+                'throws': self.count,
+                'players': sorted((self._player_report(p) for p in range(len(self.names))),
+                                  key=lambda report: -report['darts']),
+            })
+
+    def player(self, name):
+        """One player's stats with the full heatmap (None for an unknown player)"""
+        with self.lock:
+            player = self.ids.get(name)
+            if player is None:
+                return None
+            return self._cached(name, lambda: dict(self._player_report(player, detail=True), throws=self.count))
+
+    def version(self):
+        """ETag value for the reports: changes with every throw and every server run"""
+        return f"{int(self.started * 1000)}-{self.count}"
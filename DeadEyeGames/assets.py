@@ -0,0 +1,194 @@
+"""
+DeadEyeGames Assets - Precompressed in-memory cache for game and static files
+
+At startup every file under games/ and static/ is read once, hashed, and
+compressed with gzip (and brotli, if the optional `brotli` package is
+installed). server.py leaves the compression to a background task once it is
+serving (precompress=False, then precompress()), so it doesn't hold up a cold
+start; a file requested before then is compressed on its first request.
+Requests are then answered from memory:
+
+    - ETag is a content hash, so unchanged files get a 304 with no body
+    - the client's Accept-Encoding picks the smallest precompressed variant
+    - game pages reference their CSS/JS with ?v=<hash> URLs, and a request
+      carrying the current hash is served as immutable for a year, so
+      tablets reloading a game only revalidate the HTML
+
+In dev mode (watch=True) the tree is re-scanned at most once a second and
+changed files (and the pages that reference them) are rebuilt, so editing a
+game and reloading the browser works as before.
+
+Settings (environment variables):
+    DEADEYE_ASSETS_WATCH - "on"/"off" to force change detection (default: on for server.py)
+"""
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+import threading
+import time
+
+try:
+    import brotli
+except ImportError:  # optional - gzip only
+    brotli = None
+
+ASSET_DIRS = ('games', 'static')
+
+# Files smaller than this aren't worth compressing
+MIN_COMPRESS_SIZE = 512
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+# href="/static/..." / src="/games/..." in HTML pages
+ASSET_REFERENCE = re.compile(r'((?:src|href)=")(/(?:static|games)/[^"?#]+)(")')
+
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+
+class Asset:
+    """One file's bytes, precompressed variants and validators"""
+
+    __slots__ = ('path', 'mimetype', 'data', 'encoded', 'hash', 'etag', 'stamp')
+
+    def __init__(self, path, data, stamp):
+        self.path = path
+        self.mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        self.stamp = stamp
+        self.set_data(data)
+
+    def set_data(self, data):
+        self.data = data
+        self.hash = hashlib.sha256(data).hexdigest()[:16]
+        self.etag = f'"{self.hash}"'
+        self.encoded = None  # encoding -> bytes, only kept when smaller than the original (see compress)
+
+    def compress(self):
+        """Build the compressed variants of the current data; returns them"""
+        data = self.data
+        encoded = {}
+        if len(data) >= MIN_COMPRESS_SIZE and self.mimetype.startswith(COMPRESSIBLE_TYPES):
+            variants = [('gzip', gzip.compress(data, compresslevel=9, mtime=0))]
+            if brotli is not None:
+                variants.insert(0, ('br', brotli.compress(data, quality=11)))
+            encoded = {encoding: body for encoding, body in variants if len(body) < len(data)}
+        if self.data is data:  # not replaced by a re-scan meanwhile
+            self.encoded = encoded
+        return encoded
+
+    def body_for(self, accept_encoding):
+        """(body, content-encoding or None) for a request's Accept-Encoding header"""
+        data, encoded = self.data, self.encoded
+        if encoded is None:
+            encoded = self.compress()
+        accept_encoding = accept_encoding or ''
+        for encoding in ('br', 'gzip'):
+            if encoding in encoded and encoding in accept_encoding:
+                return encoded[encoding], encoding
+        return data, None
+
+
+class AssetCache:
+    """In-memory copies of every file under the asset directories, keyed by relative path"""
+
+    def __init__(self, root, dirs=ASSET_DIRS, watch=False, check_interval=1.0, precompress=True):
+        self.root = root
+        self.dirs = dirs
+        self.watch = watch
+        self.check_interval = check_interval
+        self.eager = precompress  # compress as files are loaded, not on first request
+        self.assets = {}  # 'games/zombie-slayer/zombie.js' -> Asset
+        self.lock = threading.Lock()
+        self.checked = 0.0
+        self.scan()
+
+    @classmethod
+    def from_env(cls, root, default_watch=False, precompress=True):
+        """Build the cache, with change detection from DEADEYE_ASSETS_WATCH (or default_watch)"""
+        setting = os.environ.get('DEADEYE_ASSETS_WATCH', '').lower()
+        watch = default_watch if not setting else setting not in ('off', '0', 'false')
+        return cls(root, watch=watch, precompress=precompress)
+
+    # -------------------------------------------------------------------------
+    # Loading
+    # -------------------------------------------------------------------------
+
+    def _walk(self):
+        """{relative path: (mtime_ns, size)} for every file under the asset directories"""
+        found = {}
+        for directory in self.dirs:
+            for dirpath, _, filenames in os.walk(os.path.join(self.root, directory)):
+                for name in filenames:
+                    full = os.path.join(dirpath, name)
+                    stat = os.stat(full)
+                    found[os.path.relpath(full, self.root).replace(os.sep, '/')] = (stat.st_mtime_ns, stat.st_size)
+        return found
+
+    def _read(self, path):
+        with open(os.path.join(self.root, path), 'rb') as f:
+            return f.read()
+
+    def scan(self):
+        """Load every file that is new or changed since the last scan; returns True if anything changed"""
+        found = self._walk()
+        with self.lock:
+            changed = set(self.assets) - set(found)
+            for path in changed:
+                del self.assets[path]
+            for path, stamp in found.items():
+                asset = self.assets.get(path)
+                if asset is None or asset.stamp != stamp:
+                    self.assets[path] = Asset(path, self._read(path), stamp)
+                    changed.add(path)
+            if changed:
+                self._rewrite_pages()
+                if self.eager:
+                    self.precompress()
+            self.checked = time.monotonic()
+        return bool(changed)
+
+    def _rewrite_pages(self):
+        """Point every HTML page at the current ?v=<hash> URL of the files it references"""
+        for path, asset in self.assets.items():
+            if asset.mimetype == 'text/html':
+                source = self._read(path).decode('utf-8')
+                data = self.rewrite(source).encode('utf-8')
+                if data != asset.data:
+                    asset.set_data(data)
+
+    def precompress(self):
+        """Compress every file not compressed yet (server.py runs this once it is serving); returns the count"""
+        pending = [asset for asset in list(self.assets.values()) if asset.encoded is None]
+        for asset in pending:
+            asset.compress()
+        return len(pending)
+
+    def rewrite(self, html):
+        """Add ?v=<hash> to /static/ and /games/ references that point at cached files"""
+        return ASSET_REFERENCE.sub(lambda m: m.group(1) + self.url(m.group(2)) + m.group(3), html)
+
+    def refresh(self):
+        """In watch mode, re-scan if the last check is older than check_interval"""
+        if self.watch and time.monotonic() - self.checked >= self.check_interval:
+            self.scan()
+
+    # -------------------------------------------------------------------------
+    # Lookup
+    # -------------------------------------------------------------------------
+
+    def get(self, path):
+        self.refresh()
+        return self.assets.get(path)
+
+    def url(self, url_path):
+        """Versioned URL for an asset URL path, e.g. /static/js/darts-client.js?v=3f2a..."""
+        asset = self.assets.get(url_path.lstrip('/'))
+        return f"{url_path}?v={asset.hash}" if asset is not None else url_path
+
+    def total_bytes(self):
+        """(original, stored) byte counts across the cache"""
+        original = sum(len(asset.data) for asset in self.assets.values())
+        stored = original + sum(len(body) for asset in self.assets.values() for body in (asset.encoded or {}).values())
+        return original, stored
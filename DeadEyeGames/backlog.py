@@ -0,0 +1,245 @@
+"""
+DeadEyeGames Backlog - Sequence numbers and resume for browser clients
+
+Every throw emitted to a board's browsers gets the next sequence number for
+that board ('seq' in the dart_thrown payload). The last `capacity` throws per
+board are kept in memory, so a browser that drops off (Wi-Fi blip, laptop
+sleep) can reconnect with the last sequence it saw and receive exactly the
+throws it missed, in order.
+
+Sequence numbers restart when the server restarts, unless it restores a
+checkpoint of the last run (see checkpoint.py). The backlog's `epoch`
+identifies the numbering, and a browser whose epoch doesn't match is told it
+has a gap instead of being sent throws from a different numbering.
+
+The same history serves late joins. A browser that opens a board mid-round
+gets one snapshot from memory: the board's newest throws and the current
+round (whose turn it is, their darts so far and the turn score).
+
+Settings (environment variables):
+    DEADEYE_RESUME_BACKLOG  - throws kept per board for resume (default 200, 0 disables)
+    DEADEYE_SNAPSHOT_THROWS - newest throws in a late-join snapshot (default 30, 0 disables snapshots)
+"""
+import collections
+import itertools
+import os
+import threading
+import time
+
+DEFAULT_CAPACITY = 200
+DEFAULT_SNAPSHOT_THROWS = 30
+DARTS_PER_TURN = 3
+
+
+class RoundContext:
+    """
+    The turn in progress on a board, worked out from its throws
+
+    darts-caller's turn events are skipped without being decoded, so a new
+    turn starts with dart 1, another player, or a fourth dart.
+    """
+
+    __slots__ = ('turn', 'player', 'darts', 'score')
+
+    def __init__(self):
+        self.turn = 0
+        self.player = None
+        self.darts = []
+        self.score = 0
+
+    def add(self, dart_throw):
+        player = dart_throw.get('player')
+        if dart_throw.get('dartNumber') == 1 or player != self.player or len(self.darts) >= DARTS_PER_TURN:
+            self.turn += 1
+            self.player = player
+            self.darts = []
+            self.score = 0
+        self.darts.append(dart_throw)
+        self.score += dart_throw.get('value') or 0
+
+    def to_dict(self):
+        return {'turn': self.turn, 'player': self.player, 'darts': list(self.darts), 'score': self.score}
+
+    @classmethod
+    def from_dict(cls, data):
+        round_context = cls()
+        round_context.turn = data['turn']
+        round_context.player = data['player']
+        round_context.darts = list(data['darts'])
+        round_context.score = data['score']
+        return round_context
+
+
+class ThrowBacklog:
+    """Per-board sequence counters plus a bounded history of recent throws"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, snapshot_throws=DEFAULT_SNAPSHOT_THROWS):
+        self.capacity = capacity
+        self.snapshot_throws = snapshot_throws
+        self.epoch = str(int(time.time() * 1000))
+        self.lock = threading.Lock()
+        self.sequences = {}  # board -> last sequence number issued
+        self.history = {}    # board -> deque of dart_throw dicts (each with 'seq')
+        self.rounds = {}     # board -> RoundContext
+
+    @classmethod
+    def from_env(cls):
+        """Build a backlog sized by DEADEYE_RESUME_BACKLOG / DEADEYE_SNAPSHOT_THROWS"""
+        return cls(capacity=int(os.environ.get('DEADEYE_RESUME_BACKLOG', DEFAULT_CAPACITY)),
+                   snapshot_throws=int(os.environ.get('DEADEYE_SNAPSHOT_THROWS', DEFAULT_SNAPSHOT_THROWS)))
+
+    def publish(self, board_id, dart_throw, send):
+        """
+        Stamp a throw with its board's next sequence number, remember it and send it
+
+        send() runs under the backlog lock, so throws leave in sequence order and
+        a browser resuming at the same moment (see resume) gets each throw
+        exactly once.
+        """
+        with self.lock:
+            seq = self.sequences.get(board_id, 0) + 1
+            self.sequences[board_id] = seq
+            dart_throw['seq'] = seq
+            self._remember(board_id, dart_throw)
+            send(dart_throw)
+        return seq
+
+    def record(self, board_id, dart_throw, send=None):
+        """
+        Remember and send a throw numbered by another process (a cluster worker relaying ingest)
+
+        Throws at or below the board's last sequence number were seen already
+        and are dropped, so a throw that arrives twice is sent once.
+
+        :returns: True if the throw was new
+        """
+        with self.lock:
+            seq = dart_throw['seq']
+            if seq <= self.sequences.get(board_id, 0):
+                return False
+            self.sequences[board_id] = seq
+            self._remember(board_id, dart_throw)
+            if send is not None:
+                send(dart_throw)
+        return True
+
+    def adopt(self, epoch):
+        """
+        Follow another process's numbering (see bus.py)
+
+        :returns: True if the epoch changed and this backlog's history was reset
+        """
+        with self.lock:
+            if epoch == self.epoch:
+                return False
+            self.epoch = epoch
+            self.sequences.clear()
+            self.history.clear()
+            self.rounds.clear()
+        return True
+
+    def recent(self):
+        """Copy of every board's history: {board: [dart_throw, ...]}"""
+        with self.lock:
+            return {board_id: list(history) for board_id, history in self.history.items()}
+
+    def checkpoint(self):
+        """The epoch plus every board's counter, history and round, as JSON-ready data"""
+        with self.lock:
+            boards = {}
+            for board_id, seq in self.sequences.items():
+                round_context = self.rounds.get(board_id)
+                boards[board_id] = {'seq': seq, 'throws': list(self.history.get(board_id, ())),
+                                    'round': round_context.to_dict() if round_context else None}
+            return {'epoch': self.epoch, 'boards': boards}
+
+    def restore(self, state):
+        """
+        Carry on numbering from a checkpoint() of an earlier run
+
+        Browsers that saw that run's epoch resume as if the server never went
+        away. History beyond this backlog's capacity is dropped, oldest first.
+
+        :returns: the number of throws restored
+        """
+        with self.lock:
+            self.epoch = state['epoch']
+            self.sequences.clear()
+            self.history.clear()
+            self.rounds.clear()
+            restored = 0
+            for board_id, board in state['boards'].items():
+                self.sequences[board_id] = board['seq']
+                if board.get('round'):
+                    self.rounds[board_id] = RoundContext.from_dict(board['round'])
+                if self.capacity > 0 and board['throws']:
+                    history = self.history[board_id] = collections.deque(board['throws'], maxlen=self.capacity)
+                    restored += len(history)
+        return restored
+
+    def _remember(self, board_id, dart_throw):
+        round_context = self.rounds.get(board_id)
+        if round_context is None:
+            round_context = self.rounds[board_id] = RoundContext()
+        round_context.add(dart_throw)
+        if self.capacity > 0:
+            history = self.history.get(board_id)
+            if history is None:
+                history = self.history[board_id] = collections.deque(maxlen=self.capacity)
+            history.append(dart_throw)
+
+    def last_seq(self, board_id):
+        return self.sequences.get(board_id, 0)
+
+    def snapshot(self, board_id, join, matches=None, send=None):
+        """
+        Subscribe a browser to a board and return what it needs to catch up on
+
+        send(snapshot) and then join() run under the backlog lock, so every
+        throw is either in the snapshot or sent live after it, never both,
+        never neither and never ahead of it. matches(dart_throw) limits the
+        throws to a subscription filter.
+
+        :returns: {'board', 'epoch', 'seq', 'throws' (oldest first), 'round'}
+        """
+        with self.lock:
+            throws = reversed(self.history.get(board_id, ()))
+            if matches is not None:
+                throws = filter(matches, throws)
+            throws = list(itertools.islice(throws, self.snapshot_throws))
+            throws.reverse()
+            round_context = self.rounds.get(board_id)
+            snapshot = {'board': board_id, 'epoch': self.epoch, 'seq': self.sequences.get(board_id, 0),
+                        'throws': throws, 'round': round_context.to_dict() if round_context else None}
+            if send is not None:
+                send(snapshot)
+            join()
+        return snapshot
+
+    def resume(self, board_id, seq, epoch, join, send):
+        """
+        Subscribe a browser to a board, first re-sending the throws it missed after `seq`
+
+        join() subscribes it to live throws and send(dart_throw) re-sends one
+        missed throw. Both run under the backlog lock, so nothing is published
+        in between.
+
+        :returns: (count re-sent, gap) - gap is True when some missed throws are no
+                  longer in the backlog or the browser saw another server run
+        """
+        with self.lock:
+            missed, gap = self._since(board_id, seq, epoch)
+            for dart_throw in missed:
+                send(dart_throw)
+            join()
+        return len(missed), gap
+
+    def _since(self, board_id, seq, epoch):
+        if epoch != self.epoch:
+            return [], True
+        last = self.sequences.get(board_id, 0)
+        if seq >= last:
+            return [], seq > last
+        missed = [dart_throw for dart_throw in self.history.get(board_id, ()) if dart_throw['seq'] > seq]
+        gap = not missed or missed[0]['seq'] != seq + 1
+        return missed, gap
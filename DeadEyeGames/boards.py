@@ -0,0 +1,274 @@
+"""
+DeadEyeGames Boards - Upstream darts-caller connections for one or more boards
+
+Every board in the venue runs its own darts-caller. The BoardManager holds one
+upstream Socket.IO connection per board, all multiplexed on a single asyncio
+event loop running in one background thread, so adding a board adds a
+coroutine rather than a set of reader/writer threads.
+
+Each board's coroutine is a supervisor: it reconnects forever, waiting a
+jittered, exponentially growing delay between attempts, so a darts-caller that
+is restarted (or a board that is switched on late) is picked up again without
+restarting the server.
+"""
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+
+import socketio
+
+from journal import BOARD_ID_BYTES
+
+logger = logging.getLogger(__name__)
+
+# Board used when nothing is configured - matches the original single-board setup
+DEFAULT_BOARD_ID = 'default'
+DEFAULT_DARTS_CALLER_URL = 'https://127.0.0.1:8079'
+
+# Reconnect backoff (per board): full jitter between 0 and min(MAX, BASE * 2^attempt) seconds
+RETRY_BASE_DELAY = 0.5
+RETRY_MAX_DELAY = 30.0
+# A connection that stayed up this long resets the backoff
+RETRY_RESET_AFTER = 60.0
+
+
+def parse_boards(spec):
+    """
+    Parse a board specification into an ordered {board_id: url} dict
+
+    Format: "lane1=https://10.0.0.11:8079,lane2=https://10.0.0.12:8079"
+    A bare URL without "id=" is registered under the default board id. Ids
+    must fit the journal's board field (BOARD_ID_BYTES of UTF-8).
+    """
+    boards = {}
+    if not spec:
+        return {DEFAULT_BOARD_ID: DEFAULT_DARTS_CALLER_URL}
+
+    for entry in spec.split(','):
+        entry = entry.strip()
+        if not entry:
+            continue
+        if '=' in entry:
+            board_id, url = entry.split('=', 1)
+            board_id = board_id.strip()
+            url = url.strip()
+        else:
+            board_id, url = DEFAULT_BOARD_ID, entry
+        if not board_id or not url:
+            raise ValueError(f"Invalid board entry: {entry!r}")
+        if len(board_id.encode('utf-8')) > BOARD_ID_BYTES:
+            raise ValueError(f"Board id {board_id!r} is longer than {BOARD_ID_BYTES} bytes of UTF-8")
+        if board_id in boards:
+            raise ValueError(f"Duplicate board id: {board_id!r}")
+        boards[board_id] = url
+
+    if not boards:
+        return {DEFAULT_BOARD_ID: DEFAULT_DARTS_CALLER_URL}
+    return boards
+
+
+def boards_from_env():
+    """Read the board list from the DEADEYE_BOARDS environment variable"""
+    return parse_boards(os.environ.get('DEADEYE_BOARDS', ''))
+
+
+def board_room(board_id):
+    """Socket.IO room name that browser clients for a board join"""
+    return f"board:{board_id}"
+
+
+class Backoff:
+    """Exponential backoff with full jitter (delays spread out so boards don't reconnect in lockstep)"""
+
+    def __init__(self, base=RETRY_BASE_DELAY, maximum=RETRY_MAX_DELAY, rng=None):
+        self.base = base
+        self.maximum = maximum
+        self.rng = rng or random.Random()
+        self.attempt = 0
+
+    def next_delay(self):
+        ceiling = min(self.maximum, self.base * (2 ** self.attempt))
+        self.attempt += 1
+        return self.rng.uniform(0, ceiling)
+
+    def reset(self):
+        self.attempt = 0
+
+
+class Board:
+    """A single darts-caller connection and its status"""
+
+    __slots__ = ('board_id', 'url', 'client', 'connected', 'attempts')
+
+    def __init__(self, board_id, url):
+        self.board_id = board_id
+        self.url = url
+        self.client = None
+        self.connected = False
+        self.attempts = 0
+
+
+class BoardManager:
+    """
+    Owns the upstream darts-caller connections for every configured board
+
+    Callbacks run on the shared ingest loop thread:
+        on_message(board_id, data)      - raw 'message' event from darts-caller
+        on_status(board_id, connected)  - connection state changed
+    """
+
+    def __init__(self, boards, on_message, on_status=None):
+        self.boards = {board_id: Board(board_id, url) for board_id, url in boards.items()}
+        self.on_message = on_message
+        self.on_status = on_status
+        self.loop = None
+        self.thread = None
+        self.tasks = []
+
+    @property
+    def default_board(self):
+        """First configured board - browsers that don't pick one land here"""
+        return next(iter(self.boards))
+
+    def has_board(self, board_id):
+        return board_id in self.boards
+
+    def is_connected(self, board_id):
+        board = self.boards.get(board_id)
+        return board is not None and board.connected
+
+    def add_board(self, board_id, url=None):
+        """Register a board with no darts-caller behind it (e.g. one fed by journal replay)"""
+        if board_id not in self.boards:
+            self.boards[board_id] = Board(board_id, url)
+        return self.boards[board_id]
+
+    def set_connected(self, board_id, connected):
+        """Mark a board that isn't backed by a connection as up or down"""
+        board = self.add_board(board_id)
+        if board.connected != connected:
+            board.connected = connected
+            self._notify_status(board_id, connected)
+
+    def status(self):
+        """Connection status of every board, keyed by board id"""
+        return {board_id: board.connected for board_id, board in self.boards.items()}
+
+    # -------------------------------------------------------------------------
+    # Lifecycle
+    # -------------------------------------------------------------------------
+
+    def start(self):
+        """Start the ingest loop thread and connect every board"""
+        if self.thread is not None:
+            return
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self._run_loop, name='darts-ingest', daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=5):
+        """Disconnect every board and stop the ingest loop"""
+        if self.loop is None:
+            return
+        future = asyncio.run_coroutine_threadsafe(self._disconnect_all(), self.loop)
+        try:
+            future.result(timeout)
+        except Exception as e:
+            logger.warning(f"Error while disconnecting boards: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout)
+        self.thread = None
+        self.loop = None
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.tasks = [self.loop.create_task(self._run_board(board))
+                      for board in self.boards.values() if board.url is not None]
+        self.loop.run_forever()
+        self.loop.close()
+
+    async def _disconnect_all(self):
+        for task in self.tasks:
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks = []
+        for board in self.boards.values():
+            if board.client is not None and board.client.connected:
+                await board.client.disconnect()
+
+    # -------------------------------------------------------------------------
+    # Per-board connection
+    # -------------------------------------------------------------------------
+
+    def _create_client(self, board):
+        """Create the Socket.IO client for a board and wire up its handlers"""
+        # Disable SSL verification for darts-caller's self-signed cert. Reconnection
+        # is handled by _run_board, not by the client.
+        client = socketio.AsyncClient(ssl_verify=False, engineio_logger=False,
+                                      reconnection=False, handle_sigint=False)
+        board_id = board.board_id
+
+        async def connect():
+            board.connected = True
+            logger.info(f"✓ [{board_id}] Connected to darts-caller at {board.url}")
+            await client.emit('message', {'event': 'subscribe', 'client': 'DeadEyeGames'})
+            self._notify_status(board_id, True)
+
+        async def disconnect():
+            board.connected = False
+            logger.info(f"✗ [{board_id}] Disconnected from darts-caller")
+            self._notify_status(board_id, False)
+
+        async def connect_error(data):
+            logger.error(f"[{board_id}] Connection error: {data}")
+
+        async def message(data):
+            self.on_message(board_id, data)
+
+        client.on('connect', connect)
+        client.on('disconnect', disconnect)
+        client.on('connect_error', connect_error)
+        client.on('message', message)
+        return client
+
+    def _notify_status(self, board_id, connected):
+        if self.on_status is not None:
+            try:
+                self.on_status(board_id, connected)
+            except Exception as e:
+                logger.error(f"[{board_id}] Status callback failed: {e}")
+
+    async def _run_board(self, board, backoff=None, sleep=asyncio.sleep, clock=time.monotonic):
+        """Supervise one board: connect, wait for the connection to drop, back off, repeat forever"""
+        backoff = backoff or Backoff()
+        board_id = board.board_id
+
+        while True:
+            board.attempts += 1
+            board.client = self._create_client(board)
+            connected_at = None
+            try:
+                logger.info(f"[{board_id}] Connecting to darts-caller at {board.url}... (attempt {board.attempts})")
+                await board.client.connect(
+                    board.url,
+                    transports=['websocket', 'polling'],
+                    wait_timeout=10
+                )
+                connected_at = clock()
+                await board.client.wait()  # Returns when the connection drops
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"[{board_id}] Connection attempt {board.attempts} failed: {e}")
+            finally:
+                if board.client.connected:
+                    await board.client.disconnect()
+
+            if connected_at is not None and clock() - connected_at >= RETRY_RESET_AFTER:
+                backoff.reset()
+            delay = backoff.next_delay()
+            logger.info(f"[{board_id}] Reconnecting to {board.url} in {delay:.1f}s")
+            await sleep(delay)
@@ -0,0 +1,294 @@
+"""
+DeadEyeGames Bus - Local publish/subscribe between the ingest process and web workers
+
+A single server process can only use one core, and with hundreds of browsers
+the fan-out (encoding and writing every throw to every socket) is what fills
+it. cluster.py splits the server in two roles:
+
+    ingest      - owns the darts-caller connections, decodes and numbers each
+                  throw, journals it and publishes it on the bus
+    worker (N)  - subscribes to the bus and serves browsers exactly like a
+                  standalone server (rooms, resume, game state, stats, ...)
+
+The bus is a stream socket (a Unix socket, or TCP on localhost) carrying
+length-prefixed JSON messages:
+
+    {"type": "hello",  "epoch": ..., "boards": {board: connected}, "recent": {board: [throw, ...]}}
+    {"type": "throw",  "board": ..., "throw": {..., "seq": n}, "sent": unix time}
+    {"type": "status", "board": ..., "connected": bool}
+
+Every subscriber gets a hello first, so a worker that starts (or restarts)
+late knows every board, the ingest process's sequence epoch and the recent
+throws browsers may resume from. Each subscriber has its own bounded send
+buffer and writer thread: a stalled worker is disconnected (it reconnects and
+gets a fresh hello) instead of slowing down ingest or the other workers.
+
+Settings (environment variables):
+    DEADEYE_ROLE          - "ingest" or "worker" under cluster.py (default "standalone")
+    DEADEYE_BUS           - bus address: unix:/path/to/socket or tcp:127.0.0.1:7001
+    DEADEYE_WORKER_PORTS  - ingest only: comma-separated worker ports to send browsers to
+"""
+import collections
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+
+from boards import Backoff
+
+logger = logging.getLogger(__name__)
+
+ROLES = ('standalone', 'ingest', 'worker')
+
+HEADER = struct.Struct('>I')
+MAX_MESSAGE = 16 * 1024 * 1024
+DEFAULT_MAX_PENDING = 10000  # messages buffered per subscriber before it is cut off
+
+
+def role_from_env():
+    """This process's cluster role from DEADEYE_ROLE"""
+    role = os.environ.get('DEADEYE_ROLE', 'standalone').lower()
+    if role not in ROLES:
+        raise ValueError(f"Invalid DEADEYE_ROLE: {role!r} (use {', '.join(ROLES)})")
+    return role
+
+
+def worker_ports_from_env():
+    """Worker ports the ingest process routes browsers to (DEADEYE_WORKER_PORTS)"""
+    return [int(port) for port in os.environ.get('DEADEYE_WORKER_PORTS', '').split(',') if port.strip()]
+
+
+def parse_address(address):
+    """'unix:/path' or 'tcp:host:port' -> (socket family, socket address)"""
+    if address.startswith('unix:'):
+        return socket.AF_UNIX, address[5:]
+    if address.startswith('tcp:'):
+        host, _, port = address[4:].rpartition(':')
+        if port.isdigit():
+            return socket.AF_INET, (host or '127.0.0.1', int(port))
+    raise ValueError(f"Invalid bus address: {address!r} (use unix:/path or tcp:host:port)")
+
+
+def assign_boards(board_ids, workers):
+    """
+    Sticky routing table: board id -> worker index
+
+    Boards are dealt round-robin in configuration order, so every display of
+    a board lands on the same worker (one authoritative game state per board)
+    and boards spread evenly over the workers.
+    """
+    return {board_id: index % workers for index, board_id in enumerate(board_ids)}
+
+
+def encode(message):
+    """One length-prefixed bus frame"""
+    data = json.dumps(message, separators=(',', ':')).encode('utf-8')
+    return HEADER.pack(len(data)) + data
+
+
+def read_messages(stream):
+    """Yield decoded messages from a binary file object until the connection closes"""
+    while True:
+        header = stream.read(HEADER.size)
+        if len(header) < HEADER.size:
+            return
+        (size,) = HEADER.unpack(header)
+        if size > MAX_MESSAGE:
+            raise ValueError(f"bus message of {size} bytes is too large")
+        data = stream.read(size)
+        if len(data) < size:
+            return
+        yield json.loads(data)
+
+
+class _Subscriber:
+    """One connected worker: a bounded queue of frames drained by its own writer thread"""
+
+    def __init__(self, sock, max_pending, on_close):
+        self.sock = sock
+        self.max_pending = max_pending
+        self.on_close = on_close
+        self.pending = collections.deque()
+        self.ready = threading.Condition()
+        self.closed = False
+
+    def start(self):
+        threading.Thread(target=self._write_loop, name='bus-writer', daemon=True).start()
+
+    def send(self, data):
+        """Queue a frame; False if the subscriber is closed or too far behind"""
+        with self.ready:
+            if self.closed or len(self.pending) >= self.max_pending:
+                return False
+            self.pending.append(data)
+            self.ready.notify()
+        return True
+
+    def close(self):
+        with self.ready:
+            if self.closed:
+                return
+            self.closed = True
+            self.ready.notify()
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+    def _write_loop(self):
+        while True:
+            with self.ready:
+                while not self.pending and not self.closed:
+                    self.ready.wait()
+                if self.closed:
+                    break
+                # Everything queued since the last write goes out in one syscall
+                chunk = b''.join(self.pending)
+                self.pending.clear()
+            try:
+                self.sock.sendall(chunk)
+            except OSError:
+                break
+        self.close()
+        self.on_close(self)
+
+
+class BusPublisher:
+    """
+    Ingest side: accepts worker connections and sends every message to all of them
+
+    hello() builds the first message for a new subscriber. It runs under the
+    publisher lock, so no message published meanwhile is missed or sent
+    before it.
+    """
+
+    def __init__(self, address, hello, max_pending=DEFAULT_MAX_PENDING):
+        self.address = address
+        self.hello = hello
+        self.max_pending = max_pending
+        self.lock = threading.Lock()
+        self.subscribers = []
+        self.listener = None
+        self.stats = collections.Counter()
+
+    def start(self):
+        family, sockaddr = parse_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(sockaddr):
+            os.unlink(sockaddr)  # left behind by a previous run
+        listener = socket.socket(family, socket.SOCK_STREAM)
+        if family != socket.AF_UNIX:
+            listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        listener.bind(sockaddr)
+        listener.listen(64)
+        self.listener = listener
+        threading.Thread(target=self._accept_loop, name='bus-accept', daemon=True).start()
+        logger.info(f"Bus listening on {self.address}")
+        return self
+
+    def _accept_loop(self):
+        while True:
+            try:
+                sock, _ = self.listener.accept()
+            except OSError:
+                return  # close()
+            if sock.family != socket.AF_UNIX:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            subscriber = _Subscriber(sock, self.max_pending, self._remove)
+            with self.lock:
+                subscriber.send(encode(self.hello()))
+                self.subscribers.append(subscriber)
+            subscriber.start()
+            self.stats['connects'] += 1
+            logger.info(f"Bus subscriber connected ({len(self.subscribers)} total)")
+
+    def _remove(self, subscriber):
+        with self.lock:
+            if subscriber in self.subscribers:
+                self.subscribers.remove(subscriber)
+                logger.info(f"Bus subscriber disconnected ({len(self.subscribers)} left)")
+
+    def publish(self, message):
+        """Send a message to every subscriber (never blocks on a slow one)"""
+        data = encode(message)
+        with self.lock:
+            self.stats['published'] += 1
+            for subscriber in self.subscribers:
+                if not subscriber.send(data):
+                    self.stats['overflows'] += 1
+                    logger.warning("Bus subscriber fell too far behind - disconnecting it")
+                    subscriber.close()
+
+    def close(self):
+        if self.listener is not None:
+            self.listener.close()
+            self.listener = None
+        with self.lock:
+            subscribers, self.subscribers = self.subscribers, []
+        for subscriber in subscribers:
+            subscriber.close()
+        family, sockaddr = parse_address(self.address)
+        if family == socket.AF_UNIX and os.path.exists(sockaddr):
+            os.unlink(sockaddr)
+
+
+class BusSubscriber:
+    """
+    Worker side: stays connected to the ingest process's bus and hands each message to on_message
+
+    Reconnects forever with the same jittered backoff as the board
+    connections. on_disconnect() runs whenever an established connection drops.
+    """
+
+    def __init__(self, address, on_message, on_disconnect=None, sleep=time.sleep, backoff=None):
+        self.address = address
+        self.on_message = on_message
+        self.on_disconnect = on_disconnect
+        self.sleep = sleep
+        self.backoff = backoff or Backoff(maximum=5.0)
+        self.sock = None
+        self.stopped = False
+        self.connected = False
+
+    def run(self):
+        """Connect/read/reconnect until stop() (run it as a background task)"""
+        family, sockaddr = parse_address(self.address)
+        while not self.stopped:
+            try:
+                self.sock = socket.socket(family, socket.SOCK_STREAM)
+                self.sock.connect(sockaddr)
+                self.connected = True
+                logger.info(f"Connected to bus at {self.address}")
+                with self.sock.makefile('rb') as stream:
+                    for message in read_messages(stream):
+                        if message.get('type') == 'hello':
+                            self.backoff.reset()
+                        self._dispatch(message)
+            except (OSError, ValueError) as e:
+                if not self.stopped:
+                    logger.warning(f"Bus connection to {self.address} failed: {e}")
+            finally:
+                self.sock.close()
+                if self.connected:
+                    self.connected = False
+                    if self.on_disconnect is not None and not self.stopped:
+                        self.on_disconnect()
+            if not self.stopped:
+                self.sleep(self.backoff.next_delay())
+
+    def _dispatch(self, message):
+        try:
+            self.on_message(message)
+        except Exception as e:
+            logger.error(f"Bus message {message.get('type')!r} failed: {e}")
+
+    def stop(self):
+        self.stopped = True
+        if self.sock is not None:
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
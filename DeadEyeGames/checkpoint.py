@@ -0,0 +1,106 @@
+"""
+DeadEyeGames Checkpoint - Session state saved on shutdown, restored on the next boot
+
+Without a checkpoint, a restart (a deploy, a config change) starts every board
+over: a new epoch, sequence numbers from 1 and an empty backlog. Every
+browser that reconnects is told it has a gap, and server-side games go back to
+their start screen. With one, shutdown() writes the in-memory session state to
+a JSON file and the next run_server() reads it back before it serves anything:
+
+    backlog   the epoch, each board's sequence counter, recent throws and round
+    games     each game room's state and version (see game_state.py)
+    browsers  how many browsers were watching each board
+
+Because the epoch and counters carry over, a browser that reconnects with its
+last_seq (darts-client.js does this on every reconnect) gets only the throws
+it missed, and a game display gets its game back where it left off.
+
+A checkpoint is only used once. It is deleted as soon as it is read, so a run
+that crashes later can't bring back counters it has since moved past. A
+checkpoint older than DEADEYE_CHECKPOINT_MAX_AGE is ignored: a restart is
+seconds, and last night's game isn't tonight's.
+
+Settings (environment variables):
+    DEADEYE_CHECKPOINT         - directory for checkpoint files (default: checkpoints/ next to
+                                 server.py, "off" disables); one file per server port
+    DEADEYE_CHECKPOINT_MAX_AGE - seconds a checkpoint stays usable (default 600)
+"""
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+DEFAULT_MAX_AGE = 600.0
+
+
+class CheckpointStore:
+    """One process's checkpoint file: written atomically, read at most once"""
+
+    def __init__(self, path, max_age=DEFAULT_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+
+    @classmethod
+    def from_env(cls, default_directory, name):
+        """A store for checkpoint file `name` in DEADEYE_CHECKPOINT (None if "off")"""
+        directory = os.environ.get('DEADEYE_CHECKPOINT', default_directory)
+        if directory.lower() in ('off', '0', 'false'):
+            return None
+        max_age = float(os.environ.get('DEADEYE_CHECKPOINT_MAX_AGE', DEFAULT_MAX_AGE))
+        return cls(os.path.join(directory, name), max_age)
+
+    def save(self, state):
+        """
+        Write the state (a JSON-ready dict) for the next run; returns the bytes written
+
+        The file is written next to the old one and renamed over it, so a run
+        killed mid-write leaves the previous checkpoint or none, never half of one.
+        """
+        body = json.dumps({'version': FORMAT_VERSION, 'saved': time.time(), 'state': state},
+                          separators=(',', ':')).encode('utf-8')
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        partial = self.path + '.tmp'
+        with open(partial, 'wb') as f:
+            f.write(body)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(partial, self.path)
+        return len(body)
+
+    def take(self):
+        """
+        Read and delete the checkpoint
+
+        :returns: (state, age in seconds), or (None, None) when there is no usable checkpoint
+        """
+        try:
+            with open(self.path, 'rb') as f:
+                body = f.read()
+        except FileNotFoundError:
+            return None, None
+        except OSError as e:
+            logger.warning(f"Can't read checkpoint {self.path}: {e}")
+            return None, None
+        try:
+            os.remove(self.path)
+        except OSError as e:
+            logger.warning(f"Can't remove checkpoint {self.path} ({e}) - not restoring it")
+            return None, None
+
+        try:
+            record = json.loads(body)
+            version, saved, state = record['version'], float(record['saved']), record['state']
+        except (ValueError, TypeError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {self.path}: {e}")
+            return None, None
+        if version != FORMAT_VERSION:
+            logger.warning(f"Ignoring checkpoint {self.path}: format {version}, expected {FORMAT_VERSION}")
+            return None, None
+        age = time.time() - saved
+        if age > self.max_age:
+            logger.info(f"Ignoring checkpoint from {age:.0f}s ago (DEADEYE_CHECKPOINT_MAX_AGE={self.max_age:g})")
+            return None, None
+        return state, age
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+DeadEyeGames Cluster - one ingest process plus N web worker processes
+
+A standalone server does everything on one core. The cluster spreads browsers
+over N worker processes instead:
+
+    port       ingest process: darts-caller connections, journal, and a
+               redirect that sends each page to the worker for its board
+    port+1..N  web workers: browser sockets, games, stats, leaderboards
+
+The ingest process publishes every numbered throw on a local bus (see bus.py)
+and each worker fans it out to its own browsers. Each board is served by one
+worker (sticky by board), so every display of a board shares one worker and
+one server-side game state. Workers that exit are restarted; Ctrl+C or
+SIGTERM stops the whole cluster.
+
+Usage:
+    python3 cluster.py --workers 4 [--host 0.0.0.0] [--port 5001] [--server production.py]
+
+Behind a reverse proxy, point it at the worker ports directly and route on the
+?board= query argument (see README "Multi-Process Cluster").
+"""
+import argparse
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# A worker that keeps crashing is restarted at most this often
+RESTART_DELAY = 2.0
+
+
+def default_bus_address(port):
+    """A Unix socket where available, else TCP on localhost"""
+    if hasattr(socket, 'AF_UNIX'):
+        return f"unix:{os.path.join(tempfile.gettempdir(), f'deadeye-bus-{port}.sock')}"
+    return f"tcp:127.0.0.1:{port + 1000}"
+
+
+class Cluster:
+    """Starts and supervises the ingest process and the web workers"""
+
+    def __init__(self, workers, host, port, server='production.py', bus=None, env=None):
+        self.host = host
+        self.port = port
+        self.server = server
+        self.worker_ports = [port + 1 + index for index in range(workers)]
+        self.bus = bus or default_bus_address(port)
+        self.env = dict(os.environ if env is None else env, DEADEYE_BUS=self.bus)
+        self.processes = {}  # port -> Popen
+        self.started = {}    # port -> time of the last (re)start
+
+    def _spawn(self, port):
+        if port == self.port:
+            env = dict(self.env, DEADEYE_ROLE='ingest',
+                       DEADEYE_WORKER_PORTS=','.join(str(p) for p in self.worker_ports))
+        else:
+            # Only the ingest process writes the journal; workers read it for stats
+            env = dict(self.env, DEADEYE_ROLE='worker')
+        self.processes[port] = subprocess.Popen(
+            [sys.executable, os.path.join(HERE, self.server), '--host', self.host, '--port', str(port)],
+            cwd=HERE, env=env)
+        self.started[port] = time.monotonic()
+
+    def start(self):
+        self._spawn(self.port)
+        for port in self.worker_ports:
+            self._spawn(port)
+        return self
+
+    def supervise(self, poll=0.5):
+        """Restart any process that exits, until stop()"""
+        while self.processes:
+            for port, proc in list(self.processes.items()):
+                if proc.poll() is None:
+                    continue
+                role = 'ingest' if port == self.port else 'worker'
+                wait = max(0.0, RESTART_DELAY - (time.monotonic() - self.started[port]))
+                print(f"cluster: {role} on port {port} exited with {proc.returncode}, restarting in {wait:.1f}s",
+                      file=sys.stderr)
+                time.sleep(wait)
+                if port in self.processes:
+                    self._spawn(port)
+            time.sleep(poll)
+
+    def stop(self, timeout=10):
+        processes, self.processes = list(self.processes.values()), {}
+        for proc in processes:
+            if proc.poll() is None:
+                proc.terminate()
+        for proc in processes:
+            try:
+                proc.wait(timeout)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+
+def _raise_system_exit(signum, frame):
+    raise SystemExit(0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DeadEyeGames cluster: one ingest process plus N web workers')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Web worker processes (default: one per CPU)')
+    parser.add_argument('--host', default=os.environ.get('DEADEYE_HOST', '0.0.0.0'),
+                        help='Interface to listen on (default: 0.0.0.0)')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('DEADEYE_PORT', 5001)),
+                        help='Ingest/redirect port; workers use the ports after it (default: 5001)')
+    parser.add_argument('--server', default='production.py', choices=('production.py', 'server.py'),
+                        help='Server script every process runs (default: production.py)')
+    parser.add_argument('--bus', default=os.environ.get('DEADEYE_BUS'),
+                        help='Bus address, unix:/path or tcp:host:port (default: a Unix socket in the temp dir)')
+    args = parser.parse_args()
+    if args.workers < 1:
+        parser.error('--workers must be at least 1')
+
+    cluster = Cluster(args.workers, args.host, args.port, server=args.server, bus=args.bus)
+    signal.signal(signal.SIGTERM, _raise_system_exit)
+    print(f"cluster: ingest on port {args.port}, {args.workers} worker(s) on ports "
+          f"{cluster.worker_ports[0]}-{cluster.worker_ports[-1]}, bus {cluster.bus}")
+    cluster.start()
+    try:
+        cluster.supervise()
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        cluster.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+DeadEyeGames Dart Events - Shared decoder for darts-caller messages
+
+Used by both the game server (server.py) and the DeadEyeDarts CLI client so the
+parsing rules live in one place.
+
+    throw = decode_message(data)      # DartThrow, or None for non-throw events
+    payload = throw.to_dict('lane1')  # dict sent to browsers as 'dart_thrown'
+
+darts-caller sends many events that are not dart throws (turn changes, board
+status, calls...). Those are skipped before the JSON is decoded whenever the raw
+message is a string, and throw events are validated against a small schema so a
+malformed message is rejected with MalformedMessage instead of reaching games.
+"""
+import json
+from typing import NamedTuple
+
+THROW_EVENTS = ('dart1-thrown', 'dart2-thrown', 'dart3-thrown')
+
+# Every throw event name contains this, so raw strings without it can't be throws
+_THROW_MARKER = 'thrown'
+_THROW_MARKER_BYTES = b'thrown'
+
+# Valid field ranges (autodarts uses 25 for the bull, 0 for a miss)
+SEGMENTS = frozenset(range(21)) | {25}
+MULTIPLIERS = frozenset((0, 1, 2, 3))
+MAX_VALUE = 60
+# Which dart of the turn; '?' when darts-caller doesn't say
+DART_NUMBERS = frozenset((1, 2, 3))
+UNKNOWN_DART = '?'
+
+MULTIPLIER_NAMES = {1: 'Single', 2: 'Double', 3: 'Triple'}
+
+
+class MalformedMessage(ValueError):
+    """A darts-caller throw message that doesn't match the expected schema"""
+
+
+class DartThrow(NamedTuple):
+    """One normalized dart throw (tuple-backed: no per-instance __dict__)"""
+    event: str
+    segment: int       # Dartboard number (1-20, 25 for bull, 0 for miss)
+    multiplier: int    # 1=single, 2=double, 3=triple
+    value: int         # Point value
+    dart_number: object  # Which dart in the round (1-3, '?' if darts-caller didn't say)
+    player: str
+
+    @property
+    def multiplier_name(self):
+        return MULTIPLIER_NAMES.get(self.multiplier, '')
+
+    def to_dict(self, board=None):
+        """Browser payload for the 'dart_thrown' Socket.IO event"""
+        payload = {
+            'event': self.event,
+            'segment': self.segment,
+            'multiplier': self.multiplier,
+            'value': self.value,
+            'dartNumber': self.dart_number,
+            'player': self.player,
+        }
+        if board is not None:
+            payload['board'] = board
+        return payload
+
+    @classmethod
+    def from_dict(cls, payload):
+        """Rebuild a throw from its to_dict() payload (e.g. one relayed over the cluster bus)"""
+        return cls(payload['event'], payload['segment'], payload['multiplier'], payload['value'],
+                   payload.get('dartNumber', '?'), payload.get('player', 'Unknown'))
+
+
+def _reject(game, key):
+    raise MalformedMessage(f"invalid {key}: {game.get(key)!r}")
+
+
+_new_throw = tuple.__new__
+_EMPTY = {}
+
+
+def _decode_throw(event_type, event_data):
+    game = event_data.get('game', _EMPTY)
+    if game.__class__ is not dict:
+        raise MalformedMessage(f"'game' must be an object, got {type(game).__name__}")
+
+    # Exact int checks also reject bools, floats and strings
+    segment = game.get('fieldNumber', 0)
+    if segment.__class__ is not int or segment not in SEGMENTS:
+        _reject(game, 'fieldNumber')
+    multiplier = game.get('fieldMultiplier', 1)
+    if multiplier.__class__ is not int or multiplier not in MULTIPLIERS:
+        _reject(game, 'fieldMultiplier')
+    value = game.get('dartValue', 0)
+    if value.__class__ is not int or not 0 <= value <= MAX_VALUE:
+        _reject(game, 'dartValue')
+    dart_number = game.get('dartNumber', UNKNOWN_DART)
+    if dart_number != UNKNOWN_DART and (dart_number.__class__ is not int or dart_number not in DART_NUMBERS):
+        _reject(game, 'dartNumber')
+
+    player = event_data.get('player', 'Unknown')
+    if player.__class__ is not str:
+        player = str(player)
+
+    return _new_throw(DartThrow, (event_type, segment, multiplier, value, dart_number, player))
+
+
+# Event type -> decoder. Anything not listed is ignored.
+DECODERS = {event_type: _decode_throw for event_type in THROW_EVENTS}
+
+
+def decode_message(data):
+    """
+    Decode one darts-caller 'message' payload
+
+    :param data: JSON string/bytes or an already-parsed dict
+    :returns: DartThrow for dart throw events, None for every other event
+    :raises MalformedMessage: for throw events that fail validation or invalid JSON
+    """
+    if isinstance(data, str):
+        # Fast path: skip non-throw events without decoding them
+        if _THROW_MARKER not in data:
+            return None
+        data = _loads(data)
+    elif isinstance(data, (bytes, bytearray)):
+        if _THROW_MARKER_BYTES not in data:
+            return None
+        data = _loads(data)
+
+    if not isinstance(data, dict):
+        return None
+
+    event_type = data.get('event')
+    decoder = DECODERS.get(event_type) if isinstance(event_type, str) else None
+    if decoder is None:
+        return None
+    return decoder(event_type, data)
+
+
+def _loads(raw):
+    try:
+        return json.loads(raw)
+    except ValueError as e:
+        raise MalformedMessage(f"invalid JSON: {e}") from None
@@ -0,0 +1,86 @@
+"""
+DeadEyeGames Event Log - Cheap structured logging for the dart ingest hot path
+
+Raw darts-caller messages are kept, unformatted, in a fixed-size in-memory ring
+buffer. Nothing is stringified until someone dumps the buffer (see the
+/debug/events route), and the per-throw log line is sampled and lazily
+formatted, so a busy night pays almost nothing for debug detail.
+
+Settings (environment variables):
+    DEADEYE_EVENT_BUFFER  - how many raw messages to keep (default 500, 0 disables)
+    DEADEYE_LOG_SAMPLE    - log 1 in N dart throws at INFO (default 10, 0 disables)
+"""
+import collections
+import itertools
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUFFER_SIZE = 500
+DEFAULT_SAMPLE_EVERY = 10
+
+
+class EventLog:
+    """Ring buffer of recent raw messages plus sampled throw logging"""
+
+    def __init__(self, capacity=DEFAULT_BUFFER_SIZE, sample_every=DEFAULT_SAMPLE_EVERY, log=logger):
+        self.capacity = capacity
+        self.sample_every = sample_every
+        self.log = log
+        # deque.append is atomic, so the ingest thread never takes a lock here
+        self.buffer = collections.deque(maxlen=capacity) if capacity > 0 else None
+        self.throw_counter = itertools.count(1)
+        self.error_count = 0
+        self.malformed_count = 0
+
+    @classmethod
+    def from_env(cls):
+        """Build an event log from DEADEYE_EVENT_BUFFER / DEADEYE_LOG_SAMPLE"""
+        return cls(
+            capacity=int(os.environ.get('DEADEYE_EVENT_BUFFER', DEFAULT_BUFFER_SIZE)),
+            sample_every=int(os.environ.get('DEADEYE_LOG_SAMPLE', DEFAULT_SAMPLE_EVERY)),
+        )
+
+    def record(self, board_id, data):
+        """Keep a raw upstream message - stored as-is, formatted only on dump"""
+        if self.buffer is not None:
+            self.buffer.append((time.time(), board_id, data))
+
+    def throw(self, board_id, dart_throw):
+        """Log a forwarded dart throw, subject to sampling"""
+        n = next(self.throw_counter)
+        if self.sample_every and n % self.sample_every == 0:
+            self.log.info("[%s] Dart throw #%d from %s: %s x%s = %s points",
+                          board_id, n, dart_throw['player'], dart_throw['segment'],
+                          dart_throw['multiplier'], dart_throw['value'])
+        elif self.log.isEnabledFor(logging.DEBUG):
+            self.log.debug("[%s] Dart throw #%d: %r", board_id, n, dart_throw)
+
+    def error(self, board_id, data, exc):
+        """Log a message that failed to process, with the raw payload that caused it"""
+        self.error_count += 1
+        self.log.error("[%s] Error processing dart message: %s (raw: %.500r)",
+                       board_id, exc, data, exc_info=True)
+
+    def malformed(self, board_id, data, exc):
+        """Log a throw message rejected by validation - expected noise, so no traceback"""
+        self.malformed_count += 1
+        self.log.warning("[%s] Rejected malformed dart message: %s (raw: %.200r)", board_id, exc, data)
+
+    def dump(self, limit=None, board_id=None):
+        """
+        Return buffered messages, oldest first, as JSON-friendly dicts
+
+        :param limit: Only return the newest `limit` messages
+        :param board_id: Only return messages from this board
+        """
+        if self.buffer is None:
+            return []
+        entries = list(self.buffer)
+        if board_id is not None:
+            entries = [entry for entry in entries if entry[1] == board_id]
+        if limit is not None:
+            entries = entries[-limit:] if limit > 0 else []
+        return [{'time': ts, 'board': board, 'data': data} for ts, board, data in entries]
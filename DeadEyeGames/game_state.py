@@ -0,0 +1,651 @@
+"""
+DeadEyeGames Game State - Authoritative server-side game state with delta sync
+
+Without this, every display runs the game in its own browser and replays each
+throw itself, so a scoreboard TV, a player tablet and a spectator laptop can
+drift apart, and a screen that joins late starts from zero. With it, the
+server owns one state per (board, game) room. It applies each throw once and
+sends the displays only what changed:
+
+    join_game {game}            -> game_snapshot {game, board, version, state}
+    every throw on the board    -> game_delta    {game, board, version, set}
+    game_command {game, action} -> game_delta    (e.g. action 'start')
+
+`set` holds only the top-level state keys that changed. Versions increase by
+one per delta, so a display that sees a gap asks for a fresh snapshot.
+
+The engine is opt-in per page: rooms exist only once a display joins a game,
+and throws on boards with no game rooms cost one dict lookup. Rooms and their
+versions survive a restart through the server's checkpoint (see checkpoint.py).
+
+Adding a game: subclass GameRules and register it with register_game().
+Zombie Slayer, Heist Crew and Station Siege are registered below.
+"""
+import copy
+import math
+import random
+import threading
+import time
+
+# Registered rules, keyed by the game's URL slug
+GAMES = {}
+
+_MISSING = object()
+
+
+def register_game(rules):
+    """Make a GameRules instance available to join_game by its name"""
+    GAMES[rules.name] = rules
+    return rules
+
+
+def game_room(board_id, game):
+    """Socket.IO room for the displays showing one game on one board"""
+    return f"game:{game}:{board_id}"
+
+
+def _own(state, *keys):
+    """Deep-copy nested values before changing them in place, so the room's old state (and the delta) stay right"""
+    for key in keys:
+        state[key] = copy.deepcopy(state[key])
+
+
+class GameRules:
+    """
+    Rules for one game. State is a flat dict of JSON values - a delta replaces
+    whole top-level keys, so keep large or frequently changing parts separate.
+    """
+
+    name = None
+
+    def initial_state(self, rng):
+        """State before anyone has pressed start"""
+        raise NotImplementedError
+
+    def apply_throw(self, state, dart, rng):
+        """Update state (a shallow copy, safe to assign keys on) for one DartThrow"""
+        raise NotImplementedError
+
+    def command(self, state, action, data, rng):
+        """Handle a display command such as 'start'; unknown actions raise ValueError"""
+        if action == 'start':
+            round_number = state.get('round', 0) + 1
+            state.clear()
+            state.update(self.initial_state(rng))
+            state['active'] = True
+            state['round'] = round_number
+            return
+        raise ValueError(f"Unknown {self.name} command: {action!r}")
+
+
+class ZombieSlayerRules(GameRules):
+    """Zombie Slayer (games/zombie-slayer/zombie.js): hit the zombie's number, 3 misses and you're out"""
+
+    name = 'zombie-slayer'
+    MAX_MISSES = 3
+
+    def initial_state(self, rng):
+        return {'active': False, 'score': 0, 'kills': 0, 'misses': 0, 'maxMisses': self.MAX_MISSES,
+                'target': rng.randint(1, 20), 'throws': 0, 'round': 0, 'event': None}
+
+    def apply_throw(self, state, dart, rng):
+        if not state['active']:
+            return
+        # 'throw' makes every event distinct, so two misses in a row both animate
+        state['throws'] += 1
+        if dart.segment == state['target']:
+            points = 100 * dart.multiplier
+            state['score'] += points
+            state['kills'] += 1
+            state['target'] = rng.randint(1, 20)
+            state['event'] = {'type': 'hit', 'throw': state['throws'], 'points': points,
+                              'multiplier': dart.multiplier}
+        else:
+            state['misses'] += 1
+            state['event'] = {'type': 'miss', 'throw': state['throws'], 'segment': dart.segment}
+            if state['misses'] >= self.MAX_MISSES:
+                state['active'] = False
+
+    def command(self, state, action, data, rng):
+        super().command(state, action, data, rng)
+        state['event'] = {'type': 'start', 'round': state['round']}
+
+
+register_game(ZombieSlayerRules())
+
+
+class HeistCrewRules(GameRules):
+    """
+    Heist Crew (games/heist-crew/heist.js): a crew of three takes turns on one
+    of five missions while wrong hits raise the alert level
+
+    The countdown runs on the displays, from `startedAt` (server epoch
+    seconds) plus `timeLimit` and the seconds the hacker has won
+    (`timeBonus`). The server ends the mission on a 'timeout' command.
+    Crew reputation and unlocked missions stay with the page's saved progress.
+    """
+
+    name = 'heist-crew'
+    ROLES = ('hacker', 'infiltrator', 'demolitions')
+    MISSIONS = {
+        'vault': {'type': 'sequence', 'goal': 3, 'timeLimit': 180, 'penalty': 10},
+        'databreach': {'type': 'target_count', 'goal': 12, 'timeLimit': 240, 'penalty': 15},
+        'diamond': {'type': 'point_threshold', 'goal': 50000, 'timeLimit': 300, 'penalty': 5},
+        'casino': {'type': 'pattern_match', 'goal': 30, 'timeLimit': 300, 'penalty': 8},
+        'bigscore': {'type': 'multi_phase', 'goal': 1, 'timeLimit': 360},
+    }
+    # The Big Score: (type, goal, alert penalty) per phase
+    PHASES = (('sequence', [7, 14, 20], 10), ('odd_count', 8, 12), ('high_value', 30000, 8))
+    ODD = range(1, 20, 2)
+    HIGH = range(15, 21)
+    HACKER_TIME_BONUS = 10
+
+    def initial_state(self, rng):
+        return {'active': False, 'mission': None, 'crew': [], 'activePlayer': 0, 'alert': 0,
+                'progress': 0, 'goal': 0, 'sequence': [], 'phase': 0, 'phaseProgress': 0,
+                'timeLimit': 0, 'timeBonus': 0, 'startedAt': None, 'throws': 0, 'round': 0,
+                'outcome': None, 'event': None}
+
+    def apply_throw(self, state, dart, rng):
+        if not state['active']:
+            return
+        _own(state, 'crew')
+        state['throws'] += 1
+        player = state['crew'][state['activePlayer']]
+        event = {'type': 'miss', 'throw': state['throws'], 'player': state['activePlayer'],
+                 'segment': dart.segment, 'multiplier': dart.multiplier, 'points': 0, 'ability': None}
+        mission = self.MISSIONS[state['mission']]
+        if mission['type'] == 'multi_phase':
+            self._phase_throw(state, dart, player, event)
+        else:
+            getattr(self, '_' + mission['type'])(state, dart, player, event)
+        if event['type'] == 'miss':
+            state['alert'] = min(100, state['alert'] + event.pop('penalty'))
+        player['score'] += event['points']
+        state['event'] = event
+        state['activePlayer'] = (state['activePlayer'] + 1) % len(state['crew'])
+
+        if state['progress'] >= state['goal']:
+            state['active'] = False
+            state['outcome'] = {'success': True, 'reason': 'Objective complete!'}
+        elif state['alert'] >= 100:
+            state['active'] = False
+            state['outcome'] = {'success': False, 'reason': 'Alert level reached 100%!'}
+
+    def _hit(self, event, points, ability=None):
+        event.update(type='hit', points=points, ability=ability)
+
+    def _miss(self, event, penalty):
+        event['penalty'] = penalty
+
+    def _sequence(self, state, dart, player, event):
+        """The Vault Job: hit the three combination numbers in order"""
+        if dart.segment != state['sequence'][state['progress']]:
+            return self._miss(event, self.MISSIONS['vault']['penalty'])
+        state['progress'] += 1
+        ability = None
+        if player['role'] == 'hacker' and dart.multiplier == 2:
+            state['timeBonus'] += self.HACKER_TIME_BONUS
+            ability = 'time'
+        if player['role'] == 'infiltrator' and dart.multiplier == 3:
+            state['progress'] = len(state['sequence'])
+            ability = 'instant'
+        self._hit(event, 100 * dart.multiplier, ability)
+
+    def _target_count(self, state, dart, player, event):
+        """Data Breach: odd numbers hack a server, even ones hit the firewall"""
+        if dart.segment not in self.ODD:
+            return self._miss(event, self.MISSIONS['databreach']['penalty'])
+        if player['role'] == 'infiltrator' and dart.multiplier == 3:
+            state['progress'] = state['goal']
+            return self._hit(event, 0, 'instant')
+        servers = 2 if player['role'] == 'hacker' and dart.multiplier == 2 else 1
+        state['progress'] = min(state['goal'], state['progress'] + servers)
+        self._hit(event, 50 * dart.multiplier * servers, 'double' if servers == 2 else None)
+
+    def _point_threshold(self, state, dart, player, event):
+        """Diamond District: cases 15-20 are worth value x $100, bullseyes are a bonus"""
+        if dart.segment == 25:
+            explosive = player['role'] == 'demolitions'
+            points = 2000 if explosive else 500
+            ability = 'explosive' if explosive else None
+        elif dart.segment in self.HIGH:
+            points = dart.value * 100 + (500 if dart.multiplier == 3 else 0)
+            ability = None
+        else:
+            return self._miss(event, self.MISSIONS['diamond']['penalty'])
+        state['progress'] += points
+        self._hit(event, points, ability)
+
+    def _pattern_match(self, state, dart, player, event):
+        """Casino Royale: single 7 = 1, double 7 = 2, any triple = 3 successes"""
+        if dart.segment == 7 and dart.multiplier in (1, 2):
+            successes = dart.multiplier
+        elif dart.multiplier == 3:
+            successes = 3
+        else:
+            return self._miss(event, self.MISSIONS['casino']['penalty'])
+        state['progress'] += successes
+        ability = None
+        if player['role'] == 'infiltrator' and dart.multiplier == 3:
+            state['progress'] = state['goal']
+            ability = 'instant'
+        self._hit(event, 100 * successes, ability)
+
+    def _phase_throw(self, state, dart, player, event):
+        """The Big Score: a sequence, then odd numbers, then $ from cases 15-20"""
+        kind, goal, penalty = self.PHASES[state['phase']]
+        if kind == 'sequence':
+            hit = dart.segment == goal[state['phaseProgress']]
+            step, points, done = 1, 100 * dart.multiplier, len(goal)
+        elif kind == 'odd_count':
+            hit = dart.segment in self.ODD
+            step, points, done = 1, 50 * dart.multiplier, goal
+        else:
+            hit = dart.segment in self.HIGH
+            step = points = dart.value * 100
+            done = goal
+        if not hit:
+            return self._miss(event, penalty)
+        state['phaseProgress'] += step
+        self._hit(event, points)
+        if state['phaseProgress'] >= done:
+            if state['phase'] + 1 < len(self.PHASES):
+                state['phase'] += 1
+                state['phaseProgress'] = 0
+                event['phaseComplete'] = state['phase']
+            else:
+                state['progress'] = state['goal']
+
+    def command(self, state, action, data, rng):
+        """
+        'start' {mission, crew: [three names]} starts a mission; 'timeout' ends
+        it when a display's countdown runs out (later timeouts change nothing)
+        """
+        if action == 'timeout':
+            if state['active']:
+                state['active'] = False
+                state['outcome'] = {'success': False, 'reason': 'Time ran out!'}
+            return
+        mission = data.get('mission', 'vault')
+        if action == 'start' and mission not in self.MISSIONS:
+            raise ValueError(f"Unknown heist-crew mission: {mission!r}")
+        super().command(state, action, data, rng)
+        names = list(data.get('crew') or [role.title() for role in self.ROLES])[:len(self.ROLES)]
+        if len(names) != len(self.ROLES):
+            raise ValueError(f"A heist-crew needs {len(self.ROLES)} players")
+        state['mission'] = mission
+        state['crew'] = [{'name': str(name), 'role': role, 'score': 0} for name, role in zip(names, self.ROLES)]
+        state['goal'] = self.MISSIONS[mission]['goal']
+        state['timeLimit'] = self.MISSIONS[mission]['timeLimit']
+        state['startedAt'] = time.time()
+        if mission == 'vault':
+            state['sequence'] = rng.sample(range(1, 21), 3)
+        state['event'] = {'type': 'start', 'round': state['round']}
+
+
+register_game(HeistCrewRules())
+
+
+class StationSiegeRules(GameRules):
+    """
+    Station Siege (games/station-siege/station-siege.js): three darts per wave
+    against hostiles closing in on the station, with an armory of power-ups
+
+    The page calls its rounds "rounds"; here they are `wave`, since `round`
+    counts restarts for every game. Hostile `x` is a 0-1 fraction of the
+    canvas width; `y` positions are in the page's fixed 500px canvas height.
+    A 'start' with the same seed replays the same game, though not the same
+    game as a local one with that seed (the page uses a different generator).
+    """
+
+    name = 'station-siege'
+    INITIAL_SHIELDS = 5
+    MAX_SHIELDS = 10
+    INITIAL_ENERGY = 3
+    MAX_ARMORY = 6
+    STEPS_TO_STATION = 6
+    MAX_HOSTILES = 8
+    ALERT_CYCLE = 12
+    SPEEDS = {'SCOUT': 1, 'FIGHTER': 2, 'FRIGATE': 1, 'DREADNOUGHT': 0.5, 'HACKER': 2}
+    MAX_HP = {'SCOUT': 6, 'FIGHTER': 3, 'FRIGATE': 9, 'HACKER': 1}
+    POWERUPS = ('PLASMA', 'EMP', 'FORCEFIELD', 'SHIELD')
+
+    def initial_state(self, rng):
+        return {'active': False, 'seed': None, 'wave': 1, 'alert': 'WARNING', 'score': 0,
+                'shields': self.INITIAL_SHIELDS, 'energy': self.INITIAL_ENERGY, 'hostiles': [],
+                'armory': [], 'forceFields': [], 'numberPool': [], 'plasma': False, 'emp': False,
+                'empRounds': 0, 'nextId': 0, 'throws': 0, 'round': 0, 'event': None}
+
+    def alert_level(self, wave):
+        cycle = wave % self.ALERT_CYCLE
+        if 3 <= cycle <= 5:
+            return 'RED_ALERT'
+        if 6 <= cycle <= 8:
+            return 'DE_ESCALATING'
+        if 9 <= cycle <= 11:
+            return 'ALL_CLEAR'
+        return 'WARNING'
+
+    def hostile_y(self, position):
+        """Canvas y of a hostile `position` steps from its spawn point"""
+        return 50 + 370 * position / self.STEPS_TO_STATION
+
+    def command(self, state, action, data, rng):
+        """'start' {seed} starts a game; without a seed the server picks one"""
+        super().command(state, action, data, rng)
+        seed = data.get('seed')
+        state['seed'] = int(seed) if seed not in (None, '') else rng.randrange(1000000)
+        rng.seed(state['seed'])
+        state['numberPool'] = rng.sample(range(1, 21), 20)
+        self._start_wave(state, rng)
+        self._add_powerup(state, rng)
+        self._add_powerup(state, rng)
+        state['event'] = {'type': 'start', 'round': state['round']}
+
+    def apply_throw(self, state, dart, rng):
+        if not state['active'] or state['energy'] <= 0:
+            return
+        _own(state, 'hostiles', 'armory', 'forceFields', 'numberPool')
+        state['energy'] -= 1
+        state['throws'] += 1
+        event = {'type': 'miss', 'throw': state['throws'], 'segment': dart.segment, 'multiplier': dart.multiplier}
+
+        if dart.segment in (25, 0):
+            event['type'] = 'plasma' if state['plasma'] else 'bullseye'
+            self._bullseye(state, dart.multiplier, rng)
+        elif any(item['number'] == dart.segment for item in state['armory']):
+            event['type'] = 'item'
+            event['item'] = self._activate(state, dart.segment, dart.multiplier, rng)
+        else:
+            for hostile in state['hostiles']:
+                if hostile['type'] == 'DREADNOUGHT':
+                    wanted = hostile['sequence'][hostile['sequenceIndex']]
+                else:
+                    wanted = hostile['targetNumber']
+                if wanted == dart.segment:
+                    event['type'] = 'hit'
+                    event['hostile'] = hostile['id']
+                    self._attack(state, hostile, dart.multiplier, rng)
+                    break
+        state['event'] = event
+
+        if state['energy'] <= 0 and state['active']:
+            state['wave'] += 1
+            self._start_wave(state, rng)
+
+    def _start_wave(self, state, rng):
+        state['energy'] = self.INITIAL_ENERGY
+        if state['emp']:
+            state['empRounds'] -= 1
+            if state['empRounds'] <= 0:
+                state['emp'] = False
+        self._advance(state, rng)
+        self._spawn(state, rng)
+        state['alert'] = self.alert_level(state['wave'])
+
+    def _advance(self, state, rng):
+        for hostile in list(state['hostiles']):
+            if hostile['stunned']:
+                hostile['stunned'] = False
+                continue
+            blocked = False
+            for field in list(state['forceFields']):
+                if abs(self.hostile_y(hostile['position']) - field['y']) < 30 and field['strength'] > 0:
+                    field['strength'] -= 1
+                    hostile['hp'] -= 1
+                    blocked = True
+                    if hostile['hp'] <= 0:
+                        self._destroy(state, hostile, rng)
+                    if field['strength'] <= 0:
+                        state['forceFields'].remove(field)
+            if not blocked and hostile['hp'] > 0:
+                hostile['position'] += hostile['speed']
+                hostile['x'] = rng.random()
+                if hostile['position'] >= self.STEPS_TO_STATION:
+                    self._reach_station(state, hostile, rng)
+        state['hostiles'] = [hostile for hostile in state['hostiles']
+                             if hostile['hp'] > 0 and hostile['position'] < self.STEPS_TO_STATION]
+
+    def _spawn(self, state, rng):
+        alert = self.alert_level(state['wave'])
+        if alert == 'ALL_CLEAR':
+            return
+        count = 1 + state['wave'] // 7 + (1 if alert == 'RED_ALERT' else 0)
+        for _ in range(min(count, self.MAX_HOSTILES - len(state['hostiles']))):
+            hostile = self._create_hostile(state, alert, rng)
+            if hostile:
+                state['hostiles'].append(hostile)
+
+    def _create_hostile(self, state, alert, rng):
+        if not state['numberPool']:
+            return None
+        wave = state['wave']
+        kind = 'SCOUT'
+        if wave >= 5 and alert == 'RED_ALERT' and rng.random() < 0.1:
+            if not any(hostile['type'] == 'DREADNOUGHT' for hostile in state['hostiles']):
+                kind = 'DREADNOUGHT'
+        elif wave >= 3 and rng.random() < 0.15:
+            kind = 'HACKER'
+        elif wave >= 4 and rng.random() < 0.25 + wave / 60:
+            kind = 'FRIGATE'
+        elif wave >= 6 and rng.random() < 0.75 - wave / 40:
+            kind = 'FIGHTER'
+
+        target = state['numberPool'].pop(0)
+        hp = 1
+        if kind != 'DREADNOUGHT':
+            base = math.ceil(rng.random() * (1 + wave / 5))
+            if kind == 'FIGHTER':
+                hp = max(1, min(base - 1, self.MAX_HP[kind]))
+            elif kind == 'FRIGATE':
+                hp = min(base + 2 + wave // 12, self.MAX_HP[kind])
+            else:
+                hp = min(base, self.MAX_HP[kind])
+
+        state['nextId'] += 1
+        hostile = {'id': state['nextId'], 'type': kind, 'targetNumber': target, 'hp': hp, 'maxHP': hp,
+                   'position': 0, 'speed': self.SPEEDS[kind], 'stunned': state['emp'], 'x': rng.random()}
+        if kind == 'DREADNOUGHT':
+            hostile['sequence'] = [target] + state['numberPool'][:1]
+            del state['numberPool'][:1]
+            hostile['sequenceIndex'] = 0
+        return hostile
+
+    def _reach_station(self, state, hostile, rng):
+        if hostile['type'] == 'HACKER' and state['armory']:
+            del state['armory'][int(rng.random() * len(state['armory']))]
+        else:
+            state['shields'] -= 1
+        state['numberPool'].append(hostile['targetNumber'])
+        for number in hostile.get('sequence', ()):
+            if number not in state['numberPool']:
+                state['numberPool'].append(number)
+        state['hostiles'] = [other for other in state['hostiles'] if other['id'] != hostile['id']]
+        if state['shields'] <= 0:
+            state['active'] = False
+
+    def _destroy(self, state, hostile, rng):
+        state['score'] += hostile['maxHP']
+        state['numberPool'].append(hostile['targetNumber'])
+        if hostile['type'] == 'DREADNOUGHT':
+            state['score'] += 6
+            for _ in range(3):
+                self._add_powerup(state, rng)
+        for _ in range(hostile.get('overkill', 0)):
+            self._add_powerup(state, rng)
+        if rng.random() < 0.4:
+            self._add_powerup(state, rng)
+
+    def _bullseye(self, state, multiplier, rng):
+        """A bull fires plasma at every hostile if charged, or hits one hostile at random"""
+        damage = 2 if multiplier == 2 else 1
+        if state['plasma']:
+            targets = [hostile for hostile in state['hostiles'] if hostile['type'] != 'DREADNOUGHT']
+            damage *= 3
+            state['plasma'] = False
+        elif state['hostiles']:
+            targets = [state['hostiles'][int(rng.random() * len(state['hostiles']))]]
+        else:
+            targets = []
+        for hostile in targets:
+            hostile['hp'] -= damage
+            state['score'] += min(damage, hostile['maxHP'])
+            if hostile['hp'] <= 0:
+                self._destroy(state, hostile, rng)
+        state['hostiles'] = [hostile for hostile in state['hostiles'] if hostile['hp'] > 0]
+
+    def _attack(self, state, hostile, multiplier, rng):
+        damage = multiplier
+        if state['plasma']:
+            damage *= 3
+            state['plasma'] = False
+        if state['emp'] or hostile['stunned']:
+            damage *= 2
+        if hostile['type'] == 'DREADNOUGHT':
+            hostile['sequenceIndex'] += 1
+            if hostile['sequenceIndex'] < len(hostile['sequence']):
+                return
+        else:
+            hostile['hp'] -= damage
+            state['score'] += min(damage, hostile['maxHP'])
+            if hostile['hp'] < 0:
+                hostile['overkill'] = -hostile['hp']
+            if hostile['hp'] > 0:
+                return
+        self._destroy(state, hostile, rng)
+        state['hostiles'] = [other for other in state['hostiles'] if other['id'] != hostile['id']]
+
+    def _activate(self, state, number, multiplier, rng):
+        index = next(i for i, item in enumerate(state['armory']) if item['number'] == number)
+        kind = state['armory'].pop(index)['type']
+        if kind == 'PLASMA':
+            state['plasma'] = True
+        elif kind == 'EMP':
+            state['emp'] = True
+            state['empRounds'] = 2 if multiplier >= 2 else 1
+            for hostile in state['hostiles']:
+                hostile['stunned'] = True
+        elif kind == 'FORCEFIELD':
+            strength = 3 + int(rng.random() * 3)
+            state['forceFields'].append({'y': 150 + rng.random() * 200, 'strength': strength})
+        else:
+            restore = (1 + int(rng.random() * 2)) * multiplier
+            state['shields'] = min(self.MAX_SHIELDS, state['shields'] + restore)
+        return kind
+
+    def _add_powerup(self, state, rng):
+        """Stock the armory on a number nothing else uses; a full armory gives a shield instead"""
+        if len(state['armory']) >= self.MAX_ARMORY:
+            state['shields'] = min(self.MAX_SHIELDS, state['shields'] + 1)
+            return
+        used = {hostile['targetNumber'] for hostile in state['hostiles']}
+        used.update(item['number'] for item in state['armory'])
+        available = [number for number in range(1, 21) if number not in used]
+        if not available:
+            return
+        number = available[int(rng.random() * len(available))]
+        kind = self.POWERUPS[int(rng.random() * len(self.POWERUPS))]
+        state['armory'].append({'type': kind, 'number': number})
+
+
+register_game(StationSiegeRules())
+
+
+class GameRoom:
+    """The authoritative state of one game on one board"""
+
+    def __init__(self, board_id, rules, rng=None):
+        self.board_id = board_id
+        self.rules = rules
+        self.rng = rng or random.Random()
+        self.state = rules.initial_state(self.rng)
+        self.version = 0
+        # Held while a change is applied *and* sent, so displays see versions in order
+        self.lock = threading.RLock()
+
+    def snapshot(self):
+        return {'game': self.rules.name, 'board': self.board_id, 'version': self.version, 'state': self.state}
+
+    def _change(self, mutate, send):
+        with self.lock:
+            new_state = dict(self.state)
+            mutate(new_state)
+            changed = {key: value for key, value in new_state.items() if self.state.get(key, _MISSING) != value}
+            removed = [key for key in self.state if key not in new_state]
+            if not changed and not removed:
+                return None
+            self.state = new_state
+            self.version += 1
+            delta = {'game': self.rules.name, 'board': self.board_id, 'version': self.version, 'set': changed}
+            if removed:
+                delta['unset'] = removed
+            send(delta)
+            return delta
+
+    def apply_throw(self, dart, send):
+        """Apply a throw; send(delta) is called (under the room lock) if the state changed"""
+        return self._change(lambda state: self.rules.apply_throw(state, dart, self.rng), send)
+
+    def command(self, action, data, send):
+        return self._change(lambda state: self.rules.command(state, action, data or {}, self.rng), send)
+
+
+class GameEngine:
+    """All game rooms, created on demand when a display joins a game"""
+
+    def __init__(self, games=None, rng=None):
+        self.games = GAMES if games is None else games
+        self.rng = rng or random.Random()
+        self.rooms = {}    # (board_id, game) -> GameRoom
+        self.by_board = {}  # board_id -> [GameRoom]
+        self.lock = threading.Lock()
+
+    def room(self, board_id, game):
+        """The room for a game on a board, created on first join (KeyError for unknown games)"""
+        room = self.rooms.get((board_id, game))
+        if room is not None:
+            return room
+        rules = self.games[game]
+        with self.lock:
+            room = self.rooms.get((board_id, game))
+            if room is None:
+                room = GameRoom(board_id, rules, random.Random(self.rng.random()))
+                self.rooms[(board_id, game)] = room
+                self.by_board[board_id] = self.by_board.get(board_id, []) + [room]
+        return room
+
+    def apply_throw(self, board_id, dart, send):
+        """Apply a throw to every game running on its board; send(room_name, delta) per change"""
+        for room in self.by_board.get(board_id, ()):
+            name = game_room(board_id, room.rules.name)
+            room.apply_throw(dart, lambda delta: send(name, delta))
+
+    def checkpoint(self):
+        """Every room's state and version, as JSON-ready data"""
+        rooms = []
+        for room in list(self.rooms.values()):
+            with room.lock:
+                rooms.append({'board': room.board_id, 'game': room.rules.name, 'version': room.version,
+                              'state': room.state})
+        return rooms
+
+    def restore(self, rooms):
+        """
+        Recreate rooms from a checkpoint(); games that are no longer registered are skipped
+
+        Versions carry on from the checkpoint: displays that reconnect get a
+        snapshot of the game as it was, and deltas keep counting up from there.
+
+        :returns: the number of rooms restored
+        """
+        restored = 0
+        for saved in rooms:
+            if saved['game'] not in self.games:
+                continue
+            room = self.room(saved['board'], saved['game'])
+            with room.lock:
+                room.state = saved['state']
+                room.version = saved['version']
+            restored += 1
+        return restored
@@ -12,6 +12,11 @@
  * - Hacker: Doubles give 2x time bonus, can bypass security
  * - Infiltrator: Triples count as instant success, stealth bonuses
  * - Demolitions: Bullseye triggers explosive bonus, high risk/reward
+ *
+ * Shared mode (?sync=1):
+ * - The server runs the mission (HeistCrewRules in game_state.py) and every
+ *   display on the board renders its state through renderState() instead of
+ *   scoring darts locally. Crew setup and mission select stay on each page.
  */
 
 const HeistGame = (function() {
@@ -39,6 +44,7 @@ const HeistGame = (function() {
     // Timers
     let gameTimer = null;
     let startTime = 0;
+    let sharedDeadline = null; // Shared mode: epoch ms the server's mission runs out
 
     // Progression
     let crewRep = 0;
@@ -204,24 +210,41 @@ const HeistGame = (function() {
     };
 
     /**
-     * Initialize game from localStorage
+     * Apply saved progress data
+     */
+    function applyProgress(data) {
+        crewRep = data.crewRep || 0;
+        unlockedMissions = data.unlockedMissions || ['vault'];
+        completedMissions = data.completedMissions || [];
+    }
+
+    /**
+     * Load progress from the server (shared by every screen), falling back to localStorage
+     * @returns {Promise} Resolves once progress is applied
      */
     function loadProgress() {
-        const saved = localStorage.getItem('heist_crew_progress');
-        if (saved) {
-            try {
-                const data = JSON.parse(saved);
-                crewRep = data.crewRep || 0;
-                unlockedMissions = data.unlockedMissions || ['vault'];
-                completedMissions = data.completedMissions || [];
-            } catch (e) {
-                console.error('Failed to load progress:', e);
-            }
-        }
+        return fetch('/api/progress/heist-crew/default')
+            .then((response) => {
+                if (!response.ok) {
+                    throw new Error(`HTTP ${response.status}`);
+                }
+                return response.json();
+            })
+            .then(applyProgress)
+            .catch(() => {
+                const saved = localStorage.getItem('heist_crew_progress');
+                if (saved) {
+                    try {
+                        applyProgress(JSON.parse(saved));
+                    } catch (e) {
+                        console.error('Failed to load progress:', e);
+                    }
+                }
+            });
     }
 
     /**
-     * Save game progress to localStorage
+     * Save game progress to the server and to localStorage
      */
     function saveProgress() {
         const data = {
@@ -230,6 +253,11 @@ const HeistGame = (function() {
             completedMissions: completedMissions
         };
         localStorage.setItem('heist_crew_progress', JSON.stringify(data));
+        fetch('/api/progress/heist-crew/default', {
+            method: 'PUT',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify(data)
+        }).catch((e) => console.error('Failed to save progress to server:', e));
     }
 
     /**
@@ -266,11 +294,8 @@ const HeistGame = (function() {
             }
         ];
 
-        // Load progress
-        loadProgress();
-
-        // Show mission select screen
-        showMissionSelect();
+        // Load progress, then show mission select screen
+        loadProgress().then(showMissionSelect);
     }
 
     /**
@@ -409,6 +434,16 @@ const HeistGame = (function() {
         gameTimer = setInterval(() => {
             if (!gameActive || gamePaused) return;
 
+            if (sharedDeadline !== null) {
+                // Shared mode: every display counts down to the same deadline, the server ends the mission
+                timeRemaining = Math.max(0, Math.round((sharedDeadline - Date.now()) / 1000));
+                updateTimer();
+                if (timeRemaining <= 0) {
+                    DartsClient.gameCommand('timeout');
+                }
+                return;
+            }
+
             timeRemaining--;
             updateTimer();
 
@@ -1014,6 +1049,83 @@ const HeistGame = (function() {
         return `${mins}:${secs.toString().padStart(2, '0')}`;
     }
 
+    /**
+     * Mission and crew names for a shared-mode 'start' command
+     * @returns {Object} {mission, crew} as HeistCrewRules expects them
+     */
+    function getMissionSetup() {
+        return { mission: currentMissionId, crew: players.map(p => p.name) };
+    }
+
+    /**
+     * Show the server's mission state (shared mode, see DartsClient.joinGame)
+     * @param {Object} state - Full state, as in HeistCrewRules.initial_state()
+     * @param {Object|null} delta - The delta just applied, or null for a snapshot
+     */
+    function renderState(state, delta) {
+        if (!state.mission) {
+            return; // No mission started on this board yet
+        }
+
+        currentMissionId = state.mission;
+        currentMission = MISSIONS[state.mission];
+        players = state.crew.map(p => ({
+            name: p.name,
+            role: p.role,
+            roleIcon: ROLES[p.role].icon,
+            roleName: ROLES[p.role].name,
+            score: p.score,
+            abilityUsed: false
+        }));
+        activePlayerIndex = state.activePlayer;
+        alertLevel = state.alert;
+        missionProgress = state.progress;
+        missionGoal = state.goal;
+        sequenceTarget = state.sequence;
+        sequenceProgress = state.progress;
+        if (currentMission.type === 'multi_phase') {
+            currentMission.currentPhase = state.phase;
+            currentMission.phases.forEach((phase, i) => {
+                phase.progress = i === state.phase ? state.phaseProgress : 0;
+            });
+        }
+        sharedDeadline = (state.startedAt + state.timeLimit + state.timeBonus) * 1000;
+        timeRemaining = Math.max(0, Math.round((sharedDeadline - Date.now()) / 1000));
+
+        const wasActive = gameActive;
+        gameActive = state.active;
+        gamePaused = false;
+        if (gameActive && (!wasActive || !delta)) {
+            hideAllScreens();
+            document.getElementById('active-heist-screen').style.display = 'block';
+            startGameTimer();
+        }
+        if (document.getElementById('active-heist-screen').style.display === 'block') {
+            updateHUD();
+            updateActivePlayer();
+        }
+
+        // Announce only what just happened - a snapshot just shows the current state
+        const event = delta && delta.set.event;
+        if (event && event.type === 'start') {
+            showOverlayMessage('HEIST STARTED!', 'success', 2000);
+            addToFeed('🚨 HEIST INITIATED! Good luck, crew!', 'system');
+        } else if (event && (event.type === 'hit' || event.type === 'miss')) {
+            const player = players[event.player];
+            if (event.type === 'hit') {
+                addToFeed(`✓ ${player.roleIcon} ${player.name} hit ${event.segment}! +${event.points}`, 'success');
+                showOverlayMessage(event.ability ? `${player.roleName} BONUS!` : 'HIT!', 'success', 1000);
+            } else {
+                addToFeed(`✗ ${player.roleIcon} ${player.name} hit ${event.segment}. Alert ${Math.floor(alertLevel)}%!`, 'miss');
+                showOverlayMessage('ALERT!', 'error', 1000);
+            }
+        }
+
+        if (delta && delta.set.outcome) {
+            endMission(state.outcome.success, state.outcome.reason);
+        }
+    }
+
     /**
      * Check if game is active
      */
@@ -1031,6 +1143,8 @@ const HeistGame = (function() {
         replayMission: replayMission,
         pauseGame: pauseGame,
         resumeGame: resumeGame,
+        getMissionSetup: getMissionSetup,
+        renderState: renderState,
         isGameActive: isGameActive
     };
 })();
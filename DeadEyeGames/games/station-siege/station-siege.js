@@ -7,6 +7,8 @@
  * - Seeded RNG for reproducible games (compare scores with friends)
  * - Cooperative multiplayer (multiple players defend same station)
  * - Game event logging for replays and leaderboards
+ * - Shared mode (?sync=1): the server runs the game (StationSiegeRules in
+ *   game_state.py) and every display on the board renders it via renderState()
  */
 
 const StationSiege = (function() {
@@ -112,6 +114,10 @@ const StationSiege = (function() {
     // Shared state for coop (synced from host)
     let sharedState = null;
 
+    // Shared mode (?sync=1): the server's game, shown through renderState()
+    let sharedMode = false;
+    let startedHere = false; // This display pressed start, so it posts the score
+
     // =========================================================================
     // SOUND EFFECTS (Space/Zapping sounds)
     // =========================================================================
@@ -1485,8 +1491,11 @@ const StationSiege = (function() {
         const summary = getGameSummary();
         console.log('Game Summary:', summary);
 
-        // Save to local storage for leaderboard
-        saveToLeaderboard(summary);
+        // Save to local storage for leaderboard (once per shared game, not once per display)
+        if (!sharedMode || startedHere) {
+            saveToLeaderboard(summary);
+        }
+        startedHere = false;
 
         setTimeout(() => {
             elements.gameScreen.classList.remove('active');
@@ -1524,6 +1533,19 @@ const StationSiege = (function() {
     // =========================================================================
 
     function saveToLeaderboard(summary) {
+        // Server leaderboard, shared by every screen (scores.py)
+        fetch('/api/scores/station-siege', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                player: summary.player,
+                score: summary.finalScore,
+                mode: String(summary.seed),
+                data: { rounds: summary.roundsPlayed, timestamp: summary.timestamp }
+            })
+        }).catch((e) => console.log('Could not save to server leaderboard:', e));
+
+        // Local copy, used when the server leaderboard is unavailable
         try {
             const key = `station_siege_scores_${summary.seed}`;
             let scores = JSON.parse(localStorage.getItem(key) || '[]');
@@ -1555,7 +1577,7 @@ const StationSiege = (function() {
         }
     }
 
-    function getLeaderboard(seed = null) {
+    function getLocalLeaderboard(seed = null) {
         try {
             if (seed) {
                 const key = `station_siege_scores_${seed}`;
@@ -1567,6 +1589,29 @@ const StationSiege = (function() {
         }
     }
 
+    /**
+     * Top scores from the server (per seed, or all-time), falling back to this device's copy
+     * @returns {Promise<Array>} Entries with player, score, rounds, seed, timestamp
+     */
+    function getLeaderboard(seed = null) {
+        const query = seed ? `?mode=${encodeURIComponent(seed)}&limit=10` : '?limit=50';
+        return fetch(`/api/scores/station-siege${query}`)
+            .then((response) => {
+                if (!response.ok) {
+                    throw new Error(`HTTP ${response.status}`);
+                }
+                return response.json();
+            })
+            .then((result) => result.scores.map((entry) => ({
+                player: entry.player,
+                score: entry.score,
+                rounds: entry.data ? entry.data.rounds : undefined,
+                seed: entry.mode ? Number(entry.mode) : undefined,
+                timestamp: entry.data ? entry.data.timestamp : undefined
+            })))
+            .catch(() => getLocalLeaderboard(seed));
+    }
+
     function copySeed() {
         const seedText = formatSeed(currentSeed);
         navigator.clipboard.writeText(seedText).then(() => {
@@ -1676,6 +1721,88 @@ const StationSiege = (function() {
         }
     }
 
+    // =========================================================================
+    // SHARED MODE
+    // =========================================================================
+
+    function startSharedGame() {
+        const seedField = document.getElementById('seed-input');
+        const val = seedField ? seedField.value.trim() : '';
+        startedHere = true;
+        DartsClient.gameCommand('start', val ? { seed: /^\d+$/.test(val) ? parseInt(val) : stringToSeed(val) } : {});
+    }
+
+    /**
+     * Show the server's game state (shared mode, see DartsClient.joinGame)
+     * @param {Object} state - Full state, as in StationSiegeRules.initial_state()
+     * @param {Object|null} delta - The delta just applied, or null for a snapshot
+     */
+    function renderState(state, delta) {
+        if (!elements.titleScreen) initElements();
+        sharedMode = true;
+        if (state.round === 0) {
+            return; // Nobody has started a game on this board yet
+        }
+
+        const wasActive = gameActive;
+        gameActive = state.active;
+        currentSeed = state.seed;
+        round = state.wave;
+        score = state.score;
+        shields = state.shields;
+        energyCells = state.energy;
+        plasmaActive = state.plasma;
+        empActive = state.emp;
+        empRoundsLeft = state.empRounds;
+        forceFields = state.forceFields;
+        armory = state.armory.map(item => Object.assign({}, POWERUP_TYPES[item.type], item));
+
+        if (gameActive && (!wasActive || !delta)) {
+            elements.titleScreen.classList.remove('active');
+            elements.gameoverScreen.classList.remove('active');
+            elements.gameScreen.classList.add('active');
+            const seedDisplay = document.getElementById('current-seed');
+            if (seedDisplay) {
+                seedDisplay.textContent = formatSeed(currentSeed);
+            }
+            resizeCanvas();
+            if (animationId) cancelAnimationFrame(animationId);
+            renderLoop();
+        }
+        hostiles = state.hostiles.map(h => Object.assign({}, HOSTILE_TYPES[h.type], h, {
+            x: 100 + h.x * (canvas.width - 200),
+            y: 50 + (canvas.height - 130) * h.position / CONFIG.STEPS_TO_STATION
+        }));
+
+        updateUI();
+        updateEnergyDisplay();
+        updateArmoryDisplay();
+        updateActiveEffects();
+        if (!delta || 'wave' in delta.set || 'round' in delta.set) {
+            updateAlertStatus(); // Sounds the alarm, so only when a wave starts
+        }
+
+        // Play only what just happened - a snapshot just shows the current state
+        const event = delta && delta.set.event;
+        if (event && event.type === 'hit') {
+            playSound('laser');
+        } else if (event && event.type === 'plasma') {
+            playSound('plasma');
+            showAnnouncement('PLASMA BURST!');
+        } else if (event && event.type === 'bullseye') {
+            playSound('laser');
+        } else if (event && event.type === 'item') {
+            playSound('powerup');
+            showAnnouncement(`${POWERUP_TYPES[event.item].name.toUpperCase()}!`);
+        } else if (event && event.type === 'miss') {
+            playSound('miss');
+        }
+
+        if (wasActive && !gameActive && delta) {
+            gameOver();
+        }
+    }
+
     // =========================================================================
     // PUBLIC API
     // =========================================================================
@@ -1696,6 +1823,9 @@ const StationSiege = (function() {
         getLeaderboard,
         copySeed,
         getGameSummary,
+        // Shared mode
+        startSharedGame,
+        renderState,
         // Multiplayer
         initMultiplayer,
         createRoom,
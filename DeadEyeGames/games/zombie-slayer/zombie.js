@@ -13,6 +13,10 @@
  * - Single hit: 100 points
  * - Double hit: 200 points
  * - Triple hit: 300 points
+ *
+ * Shared mode (?sync=1):
+ * - The server runs the game (game_state.py) and every display on the board
+ *   renders its state through renderState() instead of scoring darts locally
  */
 
 const ZombieGame = (function() {
@@ -234,6 +238,52 @@ const ZombieGame = (function() {
         gameOverScreen.style.display = 'flex';
     }
 
+    /**
+     * Render the server's authoritative state (shared mode)
+     * @param {Object} state - Full game state from the server
+     * @param {Object|null} delta - What just changed, or null for a full snapshot
+     */
+    function renderState(state, delta) {
+        if (!scoreElement) {
+            initElements();
+        }
+
+        gameActive = state.active;
+        score = state.score;
+        kills = state.kills;
+        misses = state.misses;
+        zombieTarget = state.target;
+
+        const started = state.round > 0;
+        instructionsPanel.style.display = started ? 'none' : '';
+        gameArea.style.display = started ? 'block' : 'none';
+        updateStats();
+        targetElement.textContent = state.target;
+
+        // Animate only what just happened - a snapshot just shows the current state
+        const event = delta && delta.set.event;
+        if (event && event.type === 'hit') {
+            const multiplierText = event.multiplier > 1 ? `${event.multiplier}X ` : '';
+            showMessage(`${multiplierText}HIT! +${event.points}`, 'hit');
+            zombieElement.classList.add('respawn');
+            setTimeout(() => zombieElement.classList.remove('respawn'), 500);
+        } else if (event && event.type === 'miss') {
+            showMessage('MISS!', 'miss');
+            document.body.classList.add('screen-shake');
+            setTimeout(() => document.body.classList.remove('screen-shake'), 500);
+        } else if (event && event.type === 'start') {
+            showMessage('START!', 'hit');
+        }
+
+        if (started && !state.active) {
+            document.getElementById('final-kills').textContent = kills;
+            document.getElementById('final-score').textContent = score;
+            gameOverScreen.style.display = 'flex';
+        } else {
+            gameOverScreen.style.display = 'none';
+        }
+    }
+
     /**
      * Check if game is currently active
      * @returns {boolean} True if game is active
@@ -246,6 +296,7 @@ const ZombieGame = (function() {
     return {
         startGame: startGame,
         handleDartThrow: handleDartThrow,
+        renderState: renderState,
         isGameActive: isGameActive
     };
 })();
@@ -0,0 +1,359 @@
+"""
+DeadEyeGames Journal - Append-only binary log of every dart throw
+
+Each normalized throw is written as one fixed-size 64-byte record, so record N
+of a file always starts at HEADER_SIZE + N * RECORD_SIZE and a file can be
+memory-mapped and binary-searched by time without being parsed. Writes go
+straight to the OS (a crashed server loses nothing already written) and a
+background thread fsyncs dirty files periodically (a power cut loses at most
+`fsync_interval` seconds).
+
+Layout of a journal directory:
+    throws-20261018-193000-0001.dej   record files, rotated at max_bytes
+    index.jsonl                       one line per session start and per file
+
+Record layout (little endian, 64 bytes):
+    d    time          wall clock seconds
+    B    dart event    1-3 (dart1-thrown ... dart3-thrown)
+    B    segment
+    B    multiplier
+    B    value
+    B    dart number   0 when darts-caller didn't say
+    3x   padding
+    16s  board id      UTF-8, NUL padded (boards.parse_boards rejects longer ids)
+    32s  player        UTF-8, NUL padded (longer names are truncated)
+"""
+import bisect
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+import time
+
+from dart_events import THROW_EVENTS, DartThrow
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'DEDJ'
+VERSION = 1
+HEADER = struct.Struct('<4sHHd48x')
+RECORD = struct.Struct('<dBBBBB3x16s32s')
+HEADER_SIZE = HEADER.size
+RECORD_SIZE = RECORD.size
+BOARD_ID_BYTES = 16
+
+INDEX_FILE = 'index.jsonl'
+FILE_PREFIX = 'throws-'
+FILE_SUFFIX = '.dej'
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_FSYNC_INTERVAL = 1.0
+
+_EVENT_CODES = {event: code for code, event in enumerate(THROW_EVENTS, start=1)}
+
+
+def _fixed(text, size):
+    """Encode text into a fixed-width field without splitting a UTF-8 character"""
+    raw = text.encode('utf-8')
+    if len(raw) > size:
+        raw = raw[:size].decode('utf-8', 'ignore').encode('utf-8')
+    return raw
+
+
+def _text(raw):
+    return raw.rstrip(b'\0').decode('utf-8', 'replace')
+
+
+def _board_field(board_id):
+    """Encode a board id, refusing one that would be cut short and read back as another board"""
+    raw = board_id.encode('utf-8')
+    if len(raw) > BOARD_ID_BYTES:
+        raise ValueError(f"Board id {board_id!r} is longer than {BOARD_ID_BYTES} bytes of UTF-8")
+    return raw
+
+
+def pack_record(timestamp, board_id, dart):
+    dart_number = dart.dart_number if type(dart.dart_number) is int and 0 < dart.dart_number < 256 else 0
+    return RECORD.pack(timestamp, _EVENT_CODES[dart.event], dart.segment, dart.multiplier, dart.value,
+                       dart_number, _board_field(board_id), _fixed(dart.player, 32))
+
+
+def unpack_record(buffer, offset=0):
+    """Return (timestamp, board_id, DartThrow) for the record at offset"""
+    timestamp, event, segment, multiplier, value, dart_number, board, player = RECORD.unpack_from(buffer, offset)
+    dart = DartThrow(THROW_EVENTS[event - 1], segment, multiplier, value, dart_number or '?', _text(player))
+    return timestamp, _text(board), dart
+
+
+# =============================================================================
+# WRITER
+# =============================================================================
+
+class JournalWriter:
+    """Appends throws to the current journal file, rotating and fsyncing as it goes"""
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES, fsync_interval=DEFAULT_FSYNC_INTERVAL):
+        self.directory = directory
+        self.max_bytes = max(max_bytes, HEADER_SIZE + RECORD_SIZE)
+        self.fsync_interval = fsync_interval
+        self.lock = threading.Lock()
+        self.file = None
+        self.file_name = None
+        self.records = 0
+        self.dirty = False
+        self.closed = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+
+        self._open_new_file()
+        self.session = self.start_session()
+
+        self.fsync_thread = threading.Thread(target=self._fsync_loop, name='journal-fsync', daemon=True)
+        self.fsync_thread.start()
+
+    @classmethod
+    def from_env(cls, default_directory):
+        """
+        Open the journal configured by DEADEYE_JOURNAL (a directory, or "off")
+
+        Returns None when journaling is turned off.
+        """
+        directory = os.environ.get('DEADEYE_JOURNAL', default_directory)
+        if not directory or directory.lower() == 'off':
+            return None
+        return cls(
+            directory,
+            max_bytes=int(os.environ.get('DEADEYE_JOURNAL_MAX_BYTES', DEFAULT_MAX_BYTES)),
+            fsync_interval=float(os.environ.get('DEADEYE_JOURNAL_FSYNC', DEFAULT_FSYNC_INTERVAL)),
+        )
+
+    def _write_index(self, entry):
+        with open(os.path.join(self.directory, INDEX_FILE), 'a', encoding='utf-8') as index:
+            index.write(json.dumps(entry) + '\n')
+            index.flush()
+            os.fsync(index.fileno())
+
+    def _open_new_file(self):
+        """Start a new record file (called with the lock held, or during __init__)"""
+        if self.file is not None:
+            self._sync()
+            self.file.close()
+
+        now = time.time()
+        stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(now))
+        sequence = 1
+        while True:
+            name = f"{FILE_PREFIX}{stamp}-{sequence:04d}{FILE_SUFFIX}"
+            if not os.path.exists(os.path.join(self.directory, name)):
+                break
+            sequence += 1
+
+        # Unbuffered: every record reaches the OS immediately
+        self.file = open(os.path.join(self.directory, name), 'xb', buffering=0)
+        self.file.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE, now))
+        self.file_name = name
+        self.records = 0
+        self.dirty = True
+        self._write_index({'kind': 'file', 'file': name, 'start': now})
+
+    def start_session(self, label=None):
+        """Mark the start of a session (server start, league night...) in the index"""
+        now = time.time()
+        session = label or time.strftime('%Y%m%d-%H%M%S', time.localtime(now))
+        with self.lock:
+            self._write_index({'kind': 'session', 'session': session, 'start': now,
+                               'file': self.file_name, 'record': self.records})
+        logger.info(f"Journal session {session} started in {self.file_name}")
+        return session
+
+    def append(self, board_id, dart, timestamp=None):
+        """Write one throw"""
+        record = pack_record(time.time() if timestamp is None else timestamp, board_id, dart)
+        with self.lock:
+            if self.file is None:
+                return
+            if HEADER_SIZE + (self.records + 1) * RECORD_SIZE > self.max_bytes:
+                self._open_new_file()
+            self.file.write(record)
+            self.records += 1
+            self.dirty = True
+
+    def _sync(self):
+        if self.dirty and self.file is not None:
+            os.fsync(self.file.fileno())
+            self.dirty = False
+
+    def _fsync_loop(self):
+        while not self.closed.wait(self.fsync_interval):
+            with self.lock:
+                try:
+                    self._sync()
+                except OSError as e:
+                    logger.error(f"Journal fsync failed: {e}")
+
+    def close(self):
+        self.closed.set()
+        with self.lock:
+            if self.file is not None:
+                self._sync()
+                self.file.close()
+                self.file = None
+
+
+# =============================================================================
+# READER
+# =============================================================================
+
+class JournalFile:
+    """Read-only, memory-mapped view of one record file"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER_SIZE:
+                raise ValueError(f"{path}: too short to be a journal file")
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, self.created = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION or record_size != RECORD_SIZE:
+            self.mm.close()
+            raise ValueError(f"{path}: not a version {VERSION} journal file")
+        # A torn final record (crash mid-write) is ignored
+        self.count = (size - HEADER_SIZE) // RECORD_SIZE
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return unpack_record(self.mm, HEADER_SIZE + index * RECORD_SIZE)
+
+    def timestamp(self, index):
+        return struct.unpack_from('<d', self.mm, HEADER_SIZE + index * RECORD_SIZE)[0]
+
+    def find_time(self, timestamp):
+        """Index of the first record at or after timestamp (binary search over the mmap)"""
+        return bisect.bisect_left(_TimestampView(self), timestamp)
+
+    def iter_from(self, start=0, stop=None):
+        stop = self.count if stop is None else min(stop, self.count)
+        for index in range(start, stop):
+            yield unpack_record(self.mm, HEADER_SIZE + index * RECORD_SIZE)
+
+    def close(self):
+        self.mm.close()
+
+
+class _TimestampView:
+    """Sequence of record timestamps, read on demand, for bisect"""
+
+    def __init__(self, journal_file):
+        self.journal_file = journal_file
+
+    def __len__(self):
+        return len(self.journal_file)
+
+    def __getitem__(self, index):
+        return self.journal_file.timestamp(index)
+
+
+class JournalReader:
+    """Reads a journal directory using its index to jump straight to a session or time"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.files = []      # [(start, name)] in write order
+        self.sessions = []   # [{'session', 'start', 'file', 'record'}] in start order
+        index_path = os.path.join(directory, INDEX_FILE)
+        if os.path.exists(index_path):
+            with open(index_path, encoding='utf-8') as index:
+                for line in index:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line
+                    if entry.get('kind') == 'file':
+                        self.files.append((entry['start'], entry['file']))
+                    elif entry.get('kind') == 'session':
+                        self.sessions.append(entry)
+        else:
+            # No index (copied files?): fall back to file names, which sort by time
+            for name in sorted(os.listdir(directory)):
+                if name.startswith(FILE_PREFIX) and name.endswith(FILE_SUFFIX):
+                    self.files.append((0.0, name))
+
+    def _open(self, name):
+        return JournalFile(os.path.join(self.directory, name))
+
+    def session(self, label):
+        for entry in self.sessions:
+            if entry['session'] == label:
+                return entry
+        raise KeyError(f"no session {label!r} in {self.directory}")
+
+    def records(self, session=None, since=None, until=None):
+        """
+        Yield (timestamp, board_id, DartThrow) in write order
+
+        :param session: Only this session's throws (up to the next session start)
+        :param since: Skip throws before this wall clock time
+        :param until: Stop at this wall clock time
+        """
+        start_file, start_record = None, 0
+        if session is not None:
+            entry = self.session(session)
+            start_file, start_record = entry['file'], entry['record']
+            later = [s for s in self.sessions if s['start'] > entry['start']]
+            if later:
+                next_start = later[0]
+                until = next_start['start'] if until is None else min(until, next_start['start'])
+
+        names = [name for _, name in self.files]
+        if start_file is not None and start_file in names:
+            names = names[names.index(start_file):]
+        elif since is not None:
+            # Skip whole files that start after `since`'s file using the index
+            starts = [start for start, _ in self.files]
+            first = max(0, bisect.bisect_right(starts, since) - 1)
+            names = names[first:]
+
+        for position, name in enumerate(names):
+            try:
+                journal_file = self._open(name)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping journal file {name}: {e}")
+                continue
+            try:
+                first = start_record if position == 0 and start_file == name else 0
+                if since is not None:
+                    first = max(first, journal_file.find_time(since))
+                stop = journal_file.find_time(until) if until is not None else None
+                yield from journal_file.iter_from(first, stop)
+                if stop is not None and stop < len(journal_file):
+                    return
+            finally:
+                journal_file.close()
+
+
+def replay(records, emit, speed=1.0, sleep=time.sleep, clock=time.monotonic):
+    """
+    Feed journal records to emit(board_id, dart) with the original pacing
+
+    :param speed: Playback multiplier - 1.0 is real time, 100 is 100x, 0 is as fast as possible
+    :returns: Number of throws replayed
+    """
+    count = 0
+    first_time = None
+    started = clock()
+    for timestamp, board_id, dart in records:
+        if speed > 0:
+            if first_time is None:
+                first_time = timestamp
+            delay = (timestamp - first_time) / speed - (clock() - started)
+            if delay > 0:
+                sleep(delay)
+        emit(board_id, dart)
+        count += 1
+    return count
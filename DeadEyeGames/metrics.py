@@ -0,0 +1,242 @@
+"""
+DeadEyeGames Metrics - Latency histograms and counters for the dart hot path
+
+The server timestamps each throw with time.perf_counter() as it passes through
+the pipeline:
+
+    receive  - on_darts_message gets the raw darts-caller message
+    decode   - decode_message returned a DartThrow
+    emit     - the throw was handed to the board's room (or its outbound queues)
+    queue    - the outbound flusher passed it to a browser's socket (see outbound.py)
+    ack      - a browser acknowledged the throw (optional, see DEADEYE_METRICS_ACK)
+    bus      - cluster workers only: the ingest process published it -> this worker got it
+
+Stage durations go into fixed-bucket histograms and are exported, together
+with counters and gauges, in the Prometheus text format at /metrics. A JSON
+summary at /metrics/summary drives the on-screen overlay (?metrics=1).
+
+Histograms are plain lists of bucket counts updated without a lock. Ingest
+runs on a single thread, so only the ack histogram (updated from browser
+handlers) can race, and at worst it loses an increment.
+
+Settings (environment variables):
+    DEADEYE_METRICS      - "off" turns instrumentation off (default on)
+    DEADEYE_METRICS_ACK  - ask 1 in N throws to be acknowledged by browsers (default 0 = never)
+
+With metrics off, the ingest path does one attribute check per message and
+takes no timestamps.
+"""
+import bisect
+import collections
+import os
+import time
+
+# Upper bounds in seconds, Prometheus style (+Inf is implicit)
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+STAGES = ('decode', 'emit', 'total', 'queue', 'ack', 'bus')
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram"""
+
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def quantile(self, q):
+        """Estimate a quantile by linear interpolation inside its bucket (None if empty)"""
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        lower = 0.0
+        for upper, count in zip(self.buckets, self.counts):
+            if seen + count >= rank:
+                return lower + (upper - lower) * ((rank - seen) / count if count else 0)
+            seen += count
+            lower = upper
+        return self.buckets[-1]
+
+    def prometheus(self, name, labels):
+        """Text exposition lines for this histogram"""
+        lines = []
+        cumulative = 0
+        for upper, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{upper:g}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f'{name}_sum{{{labels}}} {self.total:.6f}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metrics:
+    """Per-stage histograms, per-board counters and scrape-time gauges"""
+
+    def __init__(self, enabled=True, ack_every=0, clock=time.perf_counter):
+        self.enabled = enabled
+        self.ack_every = ack_every if enabled else 0
+        self.clock = clock
+        self.started = time.time()
+        self.stages = {stage: Histogram() for stage in STAGES}
+        self.messages = collections.Counter()    # board -> raw messages received
+        self.throws = collections.Counter()      # board -> throws emitted
+        self.drops = collections.Counter()       # reason -> messages dropped
+        self.reconnects = collections.Counter()  # board -> reconnects after the first connect
+        self.ever_connected = set()
+        self.gauges = {}                         # name -> (help, read, type) - read() returns {labels: value}
+        self.families = {}                       # name -> (help, read) - read() returns {labels: Histogram}
+        self.ack_counter = 0
+
+    @classmethod
+    def from_env(cls):
+        """Build metrics from DEADEYE_METRICS / DEADEYE_METRICS_ACK"""
+        return cls(
+            enabled=os.environ.get('DEADEYE_METRICS', 'on').lower() not in ('off', '0', 'false'),
+            ack_every=int(os.environ.get('DEADEYE_METRICS_ACK', 0)),
+        )
+
+    # -------------------------------------------------------------------------
+    # Hot path (callers check .enabled first)
+    # -------------------------------------------------------------------------
+
+    def message(self, board_id):
+        self.messages[board_id] += 1
+
+    def throw(self, board_id, received, decoded, emitted):
+        """Record one forwarded throw's stage timestamps (perf_counter seconds)"""
+        self.throws[board_id] += 1
+        stages = self.stages
+        stages['decode'].observe(decoded - received)
+        stages['emit'].observe(emitted - decoded)
+        stages['total'].observe(emitted - received)
+
+    def relayed(self, board_id, bus, received, emitted):
+        """Record a throw a cluster worker got from the bus (bus: seconds in transit)"""
+        self.throws[board_id] += 1
+        if bus >= 0:
+            self.stages['bus'].observe(bus)
+        self.stages['emit'].observe(emitted - received)
+
+    def drop(self, reason):
+        self.drops[reason] += 1
+
+    def ack_stamp(self):
+        """Timestamp to send with a throw if this one should be acknowledged, else None"""
+        if not self.ack_every:
+            return None
+        self.ack_counter += 1
+        if self.ack_counter % self.ack_every:
+            return None
+        return self.clock()
+
+    def ack(self, stamp):
+        """A browser echoed back an ack_stamp: record emit -> browser handled -> ack received"""
+        try:
+            elapsed = self.clock() - float(stamp)
+        except (TypeError, ValueError):
+            return
+        if 0 <= elapsed < 60:
+            self.stages['ack'].observe(elapsed)
+
+    def board_status(self, board_id, connected):
+        if not connected:
+            return
+        if board_id in self.ever_connected:
+            self.reconnects[board_id] += 1
+        else:
+            self.ever_connected.add(board_id)
+
+    # -------------------------------------------------------------------------
+    # Export
+    # -------------------------------------------------------------------------
+
+    def gauge(self, name, help_text, read):
+        """Register a gauge read at scrape time; read() returns {label tuple or None: value}"""
+        self.gauges[name] = (help_text, read, 'gauge')
+
+    def counter(self, name, help_text, read):
+        """Register a counter kept elsewhere (e.g. the outbound queues), read at scrape time like a gauge"""
+        self.gauges[name] = (help_text, read, 'counter')
+
+    def histograms(self, name, help_text, read):
+        """Register histograms kept elsewhere (e.g. pipeline stages); read() returns {label tuple: Histogram}"""
+        self.families[name] = (help_text, read)
+
+    def prometheus(self):
+        """All metrics in the Prometheus text exposition format"""
+        lines = [
+            '# HELP deadeye_stage_seconds Time spent in each stage of the dart pipeline',
+            '# TYPE deadeye_stage_seconds histogram',
+        ]
+        for stage, histogram in self.stages.items():
+            lines.extend(histogram.prometheus('deadeye_stage_seconds', f'stage="{stage}"'))
+        for name, (help_text, read) in self.families.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} histogram')
+            for labels, histogram in read().items():
+                lines.extend(histogram.prometheus(name, ','.join(f'{k}="{_label(v)}"' for k, v in labels)))
+
+        counters = (
+            ('deadeye_messages_total', 'Raw darts-caller messages received', 'board', self.messages),
+            ('deadeye_throws_total', 'Dart throws forwarded to browsers', 'board', self.throws),
+            ('deadeye_dropped_total', 'Messages dropped instead of forwarded', 'reason', self.drops),
+            ('deadeye_reconnects_total', 'darts-caller reconnects after the first connect', 'board',
+             self.reconnects),
+        )
+        for name, help_text, label, counter in counters:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} counter')
+            for key, value in sorted(counter.items()):
+                lines.append(f'{name}{{{label}="{_label(key)}"}} {value}')
+
+        for name, (help_text, read, kind) in self.gauges.items():
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in read().items():
+                if labels:
+                    rendered = ','.join(f'{k}="{_label(v)}"' for k, v in labels)
+                    lines.append(f'{name}{{{rendered}}} {value}')
+                else:
+                    lines.append(f'{name} {value}')
+
+        lines.append('# HELP deadeye_metrics_enabled Whether hot-path instrumentation is on')
+        lines.append('# TYPE deadeye_metrics_enabled gauge')
+        lines.append(f'deadeye_metrics_enabled {int(self.enabled)}')
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """Compact JSON-able snapshot for the on-screen overlay"""
+        def ms(histogram, q):
+            value = histogram.quantile(q)
+            return None if value is None else round(value * 1000, 3)
+
+        gauges = {}
+        for name, (_, read, _) in self.gauges.items():
+            gauges[name] = sum(read().values())
+        return {
+            'enabled': self.enabled,
+            'uptime': round(time.time() - self.started, 1),
+            'messages': sum(self.messages.values()),
+            'throws': sum(self.throws.values()),
+            'dropped': sum(self.drops.values()),
+            'reconnects': sum(self.reconnects.values()),
+            'gauges': gauges,
+            'stages': {stage: {'count': h.count, 'p50': ms(h, 0.5), 'p95': ms(h, 0.95), 'p99': ms(h, 0.99)}
+                       for stage, h in self.stages.items()},
+        }
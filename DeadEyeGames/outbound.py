@@ -0,0 +1,285 @@
+"""
+DeadEyeGames Outbound - Bounded per-browser send queues with a slow-consumer policy
+
+A plain room emit hands every throw to every browser socket immediately, and
+Engine.IO queues it there without limit. A tablet on bad Wi-Fi then collects
+an ever-growing backlog, and a replay burst turns into one frame per throw per
+socket. Here the ingest thread only appends each throw to a small queue per
+browser and wakes a flusher task. The flusher:
+
+    - encodes each throw once and hands that frame to every browser that is keeping up
+    - leaves browsers whose Engine.IO queue is above `high_water` alone until they drain
+    - applies the policy to browsers whose own queue reaches `max_pending`
+
+Each throw is queued with the codec of the room it was published to (see
+wire.py), so JSON and packed browsers share the same queues and flusher.
+
+Policies (DEADEYE_OUTBOUND_POLICY):
+    coalesce     - several pending throws go out as one 'dart_batch' frame;
+                   on overflow the oldest pending throw is dropped (default)
+    drop_oldest  - one 'dart_thrown' frame per throw; on overflow the oldest is dropped
+    disconnect   - one frame per throw; on overflow the browser is disconnected
+                   (it reconnects and resumes the missed throws from the backlog)
+    direct       - no queues: emit straight to the room as before
+
+Other settings (environment variables):
+    DEADEYE_OUTBOUND_QUEUE       - max pending throws per browser (default 64)
+    DEADEYE_OUTBOUND_HIGH_WATER  - Engine.IO packets queued before a browser counts as slow (default 16)
+"""
+import collections
+import logging
+import os
+import threading
+import time
+
+from engineio import packet as eio_packet
+from engineio import socket as eio_socket
+from socketio import packet as sio_packet
+
+from wire import JSON
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ('coalesce', 'drop_oldest', 'disconnect', 'direct')
+DEFAULT_POLICY = 'coalesce'
+DEFAULT_MAX_PENDING = 64
+DEFAULT_HIGH_WATER = 16
+
+NAMESPACE = '/'
+
+
+def check_internals(sio_server):
+    """
+    Raise RuntimeError unless the python-socketio/engineio internals the flusher uses are there
+
+    The public API has no way to see how far behind one browser's socket is,
+    or to send one pre-encoded packet to it, so the flusher reaches into
+    python-socketio 5.10 and python-engineio 4.8 (pinned in requirements.txt):
+
+        socketio.Server._send_eio_packet(eio_sid, packet)   send one encoded packet
+        socketio.Server.packet_class                        the Socket.IO packet encoder
+        socketio.Server.manager.get_participants(ns, room)  (sid, eio_sid) pairs in a room
+        engineio.Server.sockets[eio_sid].queue              packets not yet sent to a browser
+
+    An upgrade that renames any of them would otherwise drop throws without
+    an error; start() calls this so the server refuses to start instead.
+    """
+    eio = getattr(sio_server, 'eio', None)
+    checks = (
+        ('socketio.Server._send_eio_packet', callable(getattr(sio_server, '_send_eio_packet', None))),
+        ('socketio.Server.packet_class', hasattr(sio_server, 'packet_class')),
+        ('socketio.Server.manager.get_participants',
+         callable(getattr(getattr(sio_server, 'manager', None), 'get_participants', None))),
+        ('engineio.Server.sockets', isinstance(getattr(eio, 'sockets', None), dict)),
+        # A socket that is never registered: only its attributes are looked at
+        ('engineio.Socket.queue', eio is not None and hasattr(eio_socket.Socket(eio, None), 'queue')),
+    )
+    missing = [name for name, present in checks if not present]
+    if missing:
+        raise RuntimeError(f"Outbound queues need {', '.join(missing)}, which this python-socketio/engineio "
+                           f"doesn't have (written against python-socketio 5.10 / engineio 4.8). "
+                           f"Pin those versions or set DEADEYE_OUTBOUND_POLICY=direct.")
+
+
+class Frame:
+    """One throw's payload, encoded for the wire at most once however many browsers get it"""
+
+    __slots__ = ('payload', 'codec', 'packets', 'queued')
+
+    def __init__(self, payload, codec=JSON, queued=None):
+        self.payload = payload
+        self.codec = codec
+        self.packets = None
+        self.queued = queued
+
+
+class ClientQueue:
+    __slots__ = ('sid', 'eio_sid', 'pending', 'doomed')
+
+    def __init__(self, sid, eio_sid):
+        self.sid = sid
+        self.eio_sid = eio_sid
+        self.pending = collections.deque()
+        self.doomed = False
+
+
+class OutboundQueues:
+    """Per-browser throw queues, flushed by a single background task"""
+
+    def __init__(self, policy=DEFAULT_POLICY, max_pending=DEFAULT_MAX_PENDING, high_water=DEFAULT_HIGH_WATER,
+                 observe=None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown outbound policy {policy!r} (choose from {', '.join(POLICIES)})")
+        self.policy = policy
+        self.max_pending = max(1, max_pending)
+        self.high_water = high_water
+        # observe(seconds) gets each throw's queue -> socket delay (metrics 'queue' stage)
+        self.observe = observe
+        self.server = None   # socketio.Server, set by start()
+        self.sleep = None
+        self.queues = {}     # sid -> ClientQueue
+        self.dirty = set()   # sids with something to send
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.running = False
+        self.stats = collections.Counter()  # frames, batches, throws, dropped, deferred, disconnected
+
+    @classmethod
+    def from_env(cls, observe=None):
+        """Build queues from DEADEYE_OUTBOUND_POLICY / _QUEUE / _HIGH_WATER"""
+        return cls(
+            observe=observe,
+            policy=os.environ.get('DEADEYE_OUTBOUND_POLICY', DEFAULT_POLICY).lower(),
+            max_pending=int(os.environ.get('DEADEYE_OUTBOUND_QUEUE', DEFAULT_MAX_PENDING)),
+            high_water=int(os.environ.get('DEADEYE_OUTBOUND_HIGH_WATER', DEFAULT_HIGH_WATER)),
+        )
+
+    @property
+    def enabled(self):
+        """True once started with a queueing policy - until then publish() isn't used"""
+        return self.running and self.policy != 'direct'
+
+    def start(self, socketio_app, start_task=None):
+        """
+        Start flushing through a Flask-SocketIO instance
+
+        start_task(fn) runs fn in the background (defaults to
+        socketio_app.start_background_task); tests pass a no-op and call flush().
+        """
+        self.server = socketio_app.server
+        self.sleep = socketio_app.sleep
+        if self.policy != 'direct':
+            check_internals(self.server)
+            self.running = True
+            (start_task or socketio_app.start_background_task)(self._run)
+            logger.info(f"Outbound queues: policy={self.policy} max_pending={self.max_pending} "
+                        f"high_water={self.high_water}")
+
+    def stop(self):
+        self.running = False
+        self.wake.set()
+
+    # -------------------------------------------------------------------------
+    # Ingest side - never blocks on a browser
+    # -------------------------------------------------------------------------
+
+    def publish(self, room, payload, codec=JSON):
+        """Queue a throw for every browser in a Socket.IO room, to be sent in that room's encoding"""
+        frame = Frame(payload, codec, time.perf_counter() if self.observe is not None else None)
+        overflow = self.policy
+        with self.lock:
+            for sid, eio_sid in self.server.manager.get_participants(NAMESPACE, room):
+                queue = self.queues.get(sid)
+                if queue is None:
+                    queue = self.queues[sid] = ClientQueue(sid, eio_sid)
+                elif queue.doomed:
+                    continue
+                if len(queue.pending) >= self.max_pending:
+                    if overflow == 'disconnect':
+                        queue.doomed = True
+                        queue.pending.clear()
+                        self.dirty.add(sid)
+                        continue
+                    queue.pending.popleft()
+                    self.stats['dropped'] += 1
+                queue.pending.append(frame)
+                self.dirty.add(sid)
+        self.wake.set()
+
+    def forget(self, sid):
+        """Drop a disconnected browser's queue"""
+        with self.lock:
+            self.queues.pop(sid, None)
+            self.dirty.discard(sid)
+
+    def pending(self):
+        """Total throws waiting across all browsers"""
+        return sum(len(queue.pending) for queue in list(self.queues.values()))
+
+    # -------------------------------------------------------------------------
+    # Flusher side
+    # -------------------------------------------------------------------------
+
+    def _run(self):
+        stalled = False
+        while self.running:
+            # Poll quickly only while some browser is being held back
+            self.wake.wait(0.02 if stalled else 1.0)
+            self.wake.clear()
+            try:
+                stalled = self.flush()
+            except Exception as e:
+                logger.error(f"Outbound flush failed: {e}")
+            self.sleep(0)
+
+    # _backlog, _packets and _send use python-socketio/engineio internals (see check_internals)
+
+    def _backlog(self, eio_sid):
+        """Packets Engine.IO is still holding for a browser (0 if unknown, e.g. test clients)"""
+        socket = self.server.eio.sockets.get(eio_sid)
+        return socket.queue.qsize() if socket is not None else 0
+
+    def _packets(self, event, payload):
+        pkt = self.server.packet_class(sio_packet.EVENT, namespace=NAMESPACE, data=[event, payload])
+        encoded = pkt.encode()
+        if not isinstance(encoded, list):
+            encoded = [encoded]
+        return [eio_packet.Packet(eio_packet.MESSAGE, part) for part in encoded]
+
+    def _send(self, eio_sid, packets):
+        for part in packets:
+            self.server._send_eio_packet(eio_sid, part)
+
+    def flush(self):
+        """Send what every keeping-up browser has pending; returns True if some were held back"""
+        with self.lock:
+            dirty, self.dirty = self.dirty, set()
+        held = set()
+
+        for sid in dirty:
+            queue = self.queues.get(sid)
+            if queue is None:
+                continue
+            if queue.doomed:
+                self.forget(sid)
+                self.stats['disconnected'] += 1
+                logger.warning(f"Disconnecting slow web client {sid} (more than {self.max_pending} throws behind)")
+                try:
+                    self.server.disconnect(sid, namespace=NAMESPACE)
+                except Exception as e:
+                    logger.error(f"Failed to disconnect slow web client {sid}: {e}")
+                continue
+            if self.high_water and self._backlog(queue.eio_sid) > self.high_water:
+                held.add(sid)
+                self.stats['deferred'] += 1
+                continue
+
+            with self.lock:
+                frames = list(queue.pending)
+                queue.pending.clear()
+            if not frames:
+                continue
+            self.stats['throws'] += len(frames)
+            if self.observe is not None:
+                now = time.perf_counter()
+                for frame in frames:
+                    self.observe(now - frame.queued)
+            codec = frames[0].codec
+            if len(frames) > 1 and self.policy == 'coalesce' and all(f.codec is codec for f in frames):
+                step = codec.max_batch or len(frames)
+                for start in range(0, len(frames), step):
+                    batch = codec.encode_batch([f.payload for f in frames[start:start + step]])
+                    self._send(queue.eio_sid, self._packets(codec.batch_event, batch))
+                    self.stats['batches'] += 1
+                    self.stats['frames'] += 1
+                continue
+            for frame in frames:
+                if frame.packets is None:
+                    frame.packets = self._packets(frame.codec.event, frame.codec.encode(frame.payload))
+                self._send(queue.eio_sid, frame.packets)
+                self.stats['frames'] += 1
+
+        if held:
+            with self.lock:
+                self.dirty |= held
+        return bool(held)
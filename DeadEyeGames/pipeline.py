@@ -0,0 +1,267 @@
+"""
+DeadEyeGames Pipeline - Pluggable processing stages for every decoded throw
+
+Server logic used to be added inline in on_darts_message, on the ingest
+thread, so one slow addition (a database write, an announcer call) delayed
+every later throw. Each decoded throw now runs through registered stages in
+order:
+
+    validate -> enrich -> persist -> broadcast -> ...
+
+Every stage is pinned to a pool:
+
+    inline   - runs on the ingest thread, in order. It may return False to
+               drop the throw (validate) or change the event (enrich). Use
+               it only for work measured in microseconds.
+    thread   - queued to the stage's own worker threads. Stages can be
+               `async def` functions, which run on the worker thread's event loop.
+    process  - queued, then run in a process pool. The function and the
+               event must be picklable (a module-level function).
+
+Queued stages never block the ingest thread. Each one has a bounded queue,
+and when it is full the throw is dropped for that stage only and counted.
+Later stages in the chain, broadcast included, go on without waiting, so a
+slow side effect never stalls the broadcast path. With one worker, a stage
+sees throws in order.
+
+Every stage counts processed, dropped, filtered and failed throws, and keeps
+latency histograms of its run time and its queue wait. They are exported on
+/metrics as deadeye_pipeline_seconds and deadeye_pipeline_total.
+
+Settings (environment variables):
+    DEADEYE_WEBHOOK - POST every throw as JSON to this URL from a thread-pool stage
+"""
+import asyncio
+import concurrent.futures
+import json
+import logging
+import queue
+import threading
+import time
+import urllib.request
+
+from metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+INLINE, THREAD, PROCESS = 'inline', 'thread', 'process'
+POOLS = (INLINE, THREAD, PROCESS)
+DEFAULT_QUEUE_SIZE = 1000
+
+_STOP = None
+
+
+class ThrowEvent:
+    """What every stage receives: the decoded throw plus what earlier stages added"""
+
+    __slots__ = ('board_id', 'dart', 'payload', 'received', 'decoded')
+
+    def __init__(self, board_id, dart, received=None, decoded=None):
+        self.board_id = board_id
+        self.dart = dart
+        self.payload = None      # the browser payload, set by the broadcast stage (with 'seq')
+        self.received = received  # perf_counter timestamps for the hot-path metrics
+        self.decoded = decoded
+
+
+class Stage:
+    """One registered processor, its pool and its counters"""
+
+    def __init__(self, name, fn, pool=INLINE, workers=1, queue_size=DEFAULT_QUEUE_SIZE):
+        if pool not in POOLS:
+            raise ValueError(f"Invalid pool for stage {name!r}: {pool!r} (use {', '.join(POOLS)})")
+        self.is_async = asyncio.iscoroutinefunction(fn)
+        if self.is_async and pool != THREAD:
+            raise ValueError(f"Stage {name!r} is async: it needs pool='thread'")
+        self.name = name
+        self.fn = fn
+        self.pool = pool
+        self.workers = workers
+        self.queue = queue.Queue(maxsize=queue_size) if pool != INLINE else None
+        self.executor = None
+        self.threads = []
+        self.run_time = Histogram()
+        self.wait_time = Histogram()
+        self.counts = {'processed': 0, 'dropped': 0, 'filtered': 0, 'errors': 0}
+
+    def submit(self, event, queued):
+        try:
+            self.queue.put_nowait((event, queued))
+        except queue.Full:
+            self.counts['dropped'] += 1
+
+
+class Pipeline:
+    """Ordered stages run for every decoded throw (see the module docstring)"""
+
+    def __init__(self, timed=True, clock=time.perf_counter):
+        self.timed = timed
+        self.clock = clock
+        self.stages = []
+        self.running = False
+
+    def add(self, name, fn, pool=INLINE, workers=1, queue_size=DEFAULT_QUEUE_SIZE, before=None):
+        """
+        Register a stage at the end, or just before the stage named `before`
+
+        fn(event) gets a ThrowEvent. Stages added while the pipeline is
+        running start their workers straight away.
+        """
+        if any(stage.name == name for stage in self.stages):
+            raise ValueError(f"Duplicate pipeline stage: {name!r}")
+        stage = Stage(name, fn, pool, workers, queue_size)
+        if before is None:
+            self.stages.append(stage)
+        else:
+            index = next((i for i, existing in enumerate(self.stages) if existing.name == before), None)
+            if index is None:
+                raise ValueError(f"No pipeline stage named {before!r}")
+            self.stages.insert(index, stage)
+        if self.running:
+            self._start_stage(stage)
+        return stage
+
+    def stage(self, name):
+        return next(stage for stage in self.stages if stage.name == name)
+
+    # -------------------------------------------------------------------------
+    # Ingest side
+    # -------------------------------------------------------------------------
+
+    def process(self, event):
+        """
+        Run one throw through every stage
+
+        Inline stages run here. Their exceptions propagate to the caller,
+        after being counted. Queued stages only get the event put on their queue.
+
+        :returns: False if an inline stage dropped the throw
+        """
+        timed = self.timed
+        clock = self.clock
+        for stage in self.stages:
+            if stage.queue is not None:
+                stage.submit(event, clock() if timed else None)
+                continue
+            if timed:
+                start = clock()
+            try:
+                result = stage.fn(event)
+            except Exception:
+                stage.counts['errors'] += 1
+                raise
+            if timed:
+                stage.run_time.observe(clock() - start)
+            if result is False:
+                stage.counts['filtered'] += 1
+                return False
+            stage.counts['processed'] += 1
+        return True
+
+    # -------------------------------------------------------------------------
+    # Workers for queued stages
+    # -------------------------------------------------------------------------
+
+    def start(self):
+        """Start the worker threads (and process pools) of every queued stage"""
+        if self.running:
+            return
+        self.running = True
+        for stage in self.stages:
+            self._start_stage(stage)
+
+    def _start_stage(self, stage):
+        if stage.queue is None or stage.threads:
+            return
+        if stage.pool == PROCESS:
+            stage.executor = concurrent.futures.ProcessPoolExecutor(max_workers=stage.workers)
+        for index in range(stage.workers):
+            thread = threading.Thread(target=self._work, args=(stage,), name=f'pipeline-{stage.name}-{index}',
+                                      daemon=True)
+            thread.start()
+            stage.threads.append(thread)
+        logger.info(f"Pipeline stage {stage.name}: {stage.workers} {stage.pool} worker(s)")
+
+    def _work(self, stage):
+        loop = asyncio.new_event_loop() if stage.is_async else None
+        clock = self.clock
+        while True:
+            item = stage.queue.get()
+            try:
+                if item is _STOP:
+                    break
+                event, queued = item
+                start = clock()
+                if queued is not None:
+                    stage.wait_time.observe(start - queued)
+                try:
+                    if loop is not None:
+                        loop.run_until_complete(stage.fn(event))
+                    elif stage.executor is not None:
+                        stage.executor.submit(stage.fn, event).result()
+                    else:
+                        stage.fn(event)
+                except Exception as e:
+                    stage.counts['errors'] += 1
+                    logger.error(f"Pipeline stage {stage.name} failed on a {event.board_id} throw: {e}")
+                    continue
+                if queued is not None:
+                    stage.run_time.observe(clock() - start)
+                stage.counts['processed'] += 1
+            finally:
+                stage.queue.task_done()
+        if loop is not None:
+            loop.close()
+
+    def drain(self):
+        """Block until every queued throw has been handled (tests, shutdown)"""
+        for stage in self.stages:
+            if stage.queue is not None and stage.threads:
+                stage.queue.join()
+
+    def stop(self, timeout=5):
+        """Finish what is queued, then stop the workers"""
+        for stage in self.stages:
+            for _ in stage.threads:
+                stage.queue.put(_STOP)
+        deadline = time.monotonic() + timeout
+        for stage in self.stages:
+            for thread in stage.threads:
+                thread.join(max(0.0, deadline - time.monotonic()))
+            stage.threads = []
+            if stage.executor is not None:
+                stage.executor.shutdown(wait=False)
+                stage.executor = None
+        self.running = False
+
+    # -------------------------------------------------------------------------
+    # Metrics
+    # -------------------------------------------------------------------------
+
+    def histograms(self):
+        """{labels: Histogram} for Metrics.histograms (run time of every stage, queue wait of queued ones)"""
+        families = {}
+        for stage in self.stages:
+            families[(('stage', stage.name), ('phase', 'run'))] = stage.run_time
+            if stage.queue is not None:
+                families[(('stage', stage.name), ('phase', 'queue'))] = stage.wait_time
+        return families
+
+    def counters(self):
+        """{labels: count} for Metrics.counter"""
+        return {(('stage', stage.name), ('outcome', outcome)): count
+                for stage in self.stages for outcome, count in stage.counts.items()}
+
+    def pending(self):
+        """{labels: queued throws} for Metrics.gauge"""
+        return {(('stage', stage.name),): stage.queue.qsize() for stage in self.stages if stage.queue is not None}
+
+
+def webhook(url, timeout=2.0):
+    """Stage function that POSTs each throw's browser payload as JSON to url (use pool='thread')"""
+    def post(event):
+        body = json.dumps(event.payload or event.dart.to_dict(event.board_id)).encode('utf-8')
+        request = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            response.read()
+    return post
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+DeadEyeGames Production Server - eventlet event loop instead of one thread per connection
+
+Browser Socket.IO connections and the darts-caller ingest loop all run as green
+threads on a single eventlet hub, served by eventlet's WSGI server rather than
+Werkzeug's development server. Stop it with Ctrl+C or SIGTERM for a graceful
+shutdown.
+
+Usage:
+    python3 production.py [--host 0.0.0.0] [--port 5001] [--pool-size 1000]
+"""
+import eventlet
+
+# Must happen before anything imports socket/threading (Flask, python-socketio, server.py)
+eventlet.monkey_patch()
+
+import os  # noqa: E402
+
+import server  # noqa: E402
+
+
+def main():
+    parser = server.build_arg_parser('DeadEyeGames production server (eventlet)')
+    parser.add_argument('--pool-size', type=int, default=int(os.environ.get('DEADEYE_POOL_SIZE', 1000)),
+                        help='Maximum concurrent green threads, i.e. open HTTP/WebSocket connections (default: 1000)')
+    args = parser.parse_args()
+
+    server.run_server(args.host, args.port, server.replay_options_from_args(args),
+                      max_size=args.pool_size, log_output=False)
+
+
+if __name__ == '__main__':
+    main()
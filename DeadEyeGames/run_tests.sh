@@ -1,5 +1,7 @@
 #!/bin/bash
-# Run Playwright browser tests for DeadEyeGames
+# Run the tests (Playwright browser tests need the server), then the performance suite
+# against tools/perf_baseline.json and the startup checks; any failure fails the run.
+# --no-perf skips the performance steps (e.g. while iterating on a test)
 
 echo "🎯 DeadEyeGames - Browser Test Runner"
 echo "====================================="
@@ -26,13 +28,42 @@ echo "✓ Server is running on port 5001"
 echo ""
 
 # Parse command line arguments
-ARGS="$@"
+PERF=1
+ARGS=()
+for arg in "$@"; do
+    if [ "$arg" = "--no-perf" ]; then
+        PERF=0
+    else
+        ARGS+=("$arg")
+    fi
+done
 
 # If no arguments provided, run all tests
-if [ -z "$ARGS" ]; then
+if [ ${#ARGS[@]} -eq 0 ]; then
     echo "Running all tests..."
     pytest tests/ -v
 else
-    echo "Running tests with arguments: $ARGS"
-    pytest tests/ $ARGS
+    echo "Running tests with arguments: ${ARGS[*]}"
+    pytest tests/ "${ARGS[@]}"
 fi
+STATUS=$?
+
+if [ "$PERF" = "1" ]; then
+    echo ""
+    # In process - compared with the checked-in baseline and its per-metric tolerances
+    echo "Running performance regression suite..."
+    if ! python3 tools/perf_suite.py; then
+        echo "❌ ERROR: Performance regression (see above)"
+        echo "If the change is intended, re-baseline with: python3 tools/perf_suite.py --update (and commit it)"
+        STATUS=1
+    fi
+    echo ""
+    # Cold start budget and hot restart (starts its own servers on free ports)
+    echo "Checking cold start and hot restart..."
+    if ! python3 tools/bench_startup.py --runs 3; then
+        echo "❌ ERROR: Startup over budget or hot restart lost state (see above)"
+        STATUS=1
+    fi
+fi
+
+exit $STATUS
@@ -0,0 +1,334 @@
+"""
+DeadEyeGames Scores - Server-side leaderboards and game progress on SQLite
+
+Games used to keep high scores and progress in the browser's localStorage,
+where every sort and trim ran on a JSON blob and nothing left the device.
+Here they live in one SQLite database in WAL mode, shared by every screen in
+the venue:
+
+    POST /api/scores/<game>          {player, score, mode?, data?}   -> 202
+    GET  /api/scores/<game>          ?mode=&period=&player=&limit=   -> top scores
+    GET  /api/progress/<game>/<key>                                  -> saved progress
+    PUT  /api/progress/<game>/<key>  {...}                           -> 202
+
+Writes never touch the database on the request path. They are queued, and a
+single writer thread commits them in batches: one transaction per batch, at
+most every `batch_interval` seconds. A score posted a moment ago can therefore
+be missing from a top-N read for up to that long. Progress writes to the same
+key in one batch collapse to the last one.
+
+Reads borrow a connection from a small pool (at most MAX_READERS, opened on
+first use and kept), so a GET doesn't pay for a connect and its PRAGMAs even
+though every request runs on a thread or green thread of its own. Each query
+shape goes through an index, and with WAL reads never wait on the writer:
+
+    game + mode (+ player)       top scores all time, for one mode (e.g. a seed)
+    game                         top scores all time, across modes
+    game + mode + day/week/month top scores this period (UTC buckets stored per row)
+    game + day/week/month        top scores this period, across modes
+
+Settings (environment variables):
+    DEADEYE_SCORES         - database file, or "off" (default scores.db next to server.py)
+    DEADEYE_SCORES_BATCH   - seconds between write batches (default 0.05)
+"""
+import contextlib
+import json
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_INTERVAL = 0.05
+MAX_BATCH = 1000
+MAX_READERS = 4
+MIN_SCORE, MAX_SCORE = -2 ** 63, 2 ** 63 - 1  # SQLite INTEGER
+MAX_LIMIT = 100
+MAX_NAME = 64
+MAX_DATA_BYTES = 64 * 1024
+
+PERIODS = ('all', 'day', 'week', 'month')
+SLUG = re.compile(r'^[a-z0-9][a-z0-9_-]{0,39}$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id      INTEGER PRIMARY KEY,
+    game    TEXT    NOT NULL,
+    mode    TEXT    NOT NULL DEFAULT '',
+    player  TEXT    NOT NULL,
+    score   INTEGER NOT NULL,
+    created REAL    NOT NULL,
+    day     INTEGER NOT NULL,
+    week    INTEGER NOT NULL,
+    month   INTEGER NOT NULL,
+    data    TEXT
+);
+CREATE INDEX IF NOT EXISTS scores_mode_top   ON scores (game, mode, score DESC, created);
+CREATE INDEX IF NOT EXISTS scores_game_top   ON scores (game, score DESC, created);
+CREATE INDEX IF NOT EXISTS scores_day_top    ON scores (game, mode, day, score DESC, created);
+CREATE INDEX IF NOT EXISTS scores_week_top   ON scores (game, mode, week, score DESC, created);
+CREATE INDEX IF NOT EXISTS scores_month_top  ON scores (game, mode, month, score DESC, created);
+CREATE INDEX IF NOT EXISTS scores_player_top ON scores (game, player, score DESC, created);
+CREATE INDEX IF NOT EXISTS scores_game_day_top   ON scores (game, day, score DESC, created);
+CREATE INDEX IF NOT EXISTS scores_game_week_top  ON scores (game, week, score DESC, created);
+CREATE INDEX IF NOT EXISTS scores_game_month_top ON scores (game, month, score DESC, created);
+
+CREATE TABLE IF NOT EXISTS progress (
+    game    TEXT NOT NULL,
+    key     TEXT NOT NULL,
+    data    TEXT NOT NULL,
+    updated REAL NOT NULL,
+    PRIMARY KEY (game, key)
+) WITHOUT ROWID;
+"""
+
+_INSERT_SCORE = ("INSERT INTO scores (game, mode, player, score, created, day, week, month, data) "
+                 "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+_UPSERT_PROGRESS = ("INSERT INTO progress (game, key, data, updated) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT (game, key) DO UPDATE SET data = excluded.data, updated = excluded.updated")
+
+
+class InvalidScore(ValueError):
+    """A score or progress submission that doesn't pass validation"""
+
+
+def buckets(timestamp):
+    """(day, week, month) period numbers for a UTC timestamp"""
+    day = int(timestamp // 86400)
+    # 1970-01-01 was a Thursday: shift so weeks start on Monday
+    week = (day + 3) // 7
+    moment = time.gmtime(timestamp)
+    month = (moment.tm_year - 1970) * 12 + moment.tm_mon - 1
+    return day, week, month
+
+
+def check_slug(kind, value):
+    if not isinstance(value, str) or not SLUG.match(value):
+        raise InvalidScore(f"invalid {kind}: {value!r}")
+    return value
+
+
+def _text(kind, value, default=None):
+    if value is None and default is not None:
+        return default
+    if not isinstance(value, str) or len(value) > MAX_NAME:
+        raise InvalidScore(f"{kind} must be a string of at most {MAX_NAME} characters")
+    return value
+
+
+def _json(kind, value):
+    if value is None:
+        return None
+    encoded = json.dumps(value, separators=(',', ':'))
+    if len(encoded) > MAX_DATA_BYTES:
+        raise InvalidScore(f"{kind} is larger than {MAX_DATA_BYTES} bytes")
+    return encoded
+
+
+class ScoreStore:
+    """SQLite-backed scores and progress with a batching writer thread"""
+
+    def __init__(self, path, batch_interval=DEFAULT_BATCH_INTERVAL, clock=time.time):
+        self.path = path
+        self.batch_interval = batch_interval
+        self.clock = clock
+        self.pending = queue.Queue()
+        self.write_lock = threading.Lock()  # the writer thread and flush() share one connection
+        self.readers = queue.LifoQueue()  # idle read connections
+        self.reader_count = 0
+        self.reader_lock = threading.Lock()
+        self.stats = {'batches': 0, 'scores': 0, 'progress': 0}
+        self.closed = threading.Event()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.writer = self._connect()
+        self.writer.executescript(SCHEMA)
+        self.writer.commit()
+
+        self.thread = threading.Thread(target=self._write_loop, name='scores-writer', daemon=True)
+        self.thread.start()
+
+    @classmethod
+    def from_env(cls, default_path):
+        """
+        Open the store configured by DEADEYE_SCORES (a file path, or "off")
+
+        Returns None when the store is turned off.
+        """
+        path = os.environ.get('DEADEYE_SCORES', default_path)
+        if not path or path.lower() == 'off':
+            return None
+        return cls(path, batch_interval=float(os.environ.get('DEADEYE_SCORES_BATCH', DEFAULT_BATCH_INTERVAL)))
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        # WAL + NORMAL: commits survive a server crash; a power cut can lose the last few batches
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute('PRAGMA busy_timeout=5000')
+        connection.execute('PRAGMA cache_size=-16384')  # 16 MB: index pages stay cached across batches
+        return connection
+
+    @contextlib.contextmanager
+    def _reader(self):
+        """Borrow a pooled read connection; waits for one when MAX_READERS are busy"""
+        try:
+            connection = self.readers.get_nowait()
+        except queue.Empty:
+            with self.reader_lock:
+                opened = self.reader_count < MAX_READERS
+                if opened:
+                    self.reader_count += 1
+            if opened:
+                connection = self._connect()
+                connection.row_factory = sqlite3.Row
+            else:
+                connection = self.readers.get()
+        try:
+            yield connection
+        finally:
+            self.readers.put(connection)
+
+    # -------------------------------------------------------------------------
+    # Writes (queued, committed in batches by the writer thread)
+    # -------------------------------------------------------------------------
+
+    def submit_score(self, game, player, score, mode='', data=None):
+        """Validate and queue a score; raises InvalidScore"""
+        check_slug('game', game)
+        player = _text('player', player).strip() or 'Anonymous'
+        mode = _text('mode', mode, default='')
+        if score.__class__ is not int:
+            raise InvalidScore("score must be an integer")
+        if not MIN_SCORE <= score <= MAX_SCORE:
+            raise InvalidScore("score is out of range for a 64-bit integer")
+        created = self.clock()
+        self.pending.put(('score', (game, mode, player, score, created) + buckets(created)
+                          + (_json('data', data),)))
+
+    def save_progress(self, game, key, data):
+        """Validate and queue a progress blob; raises InvalidScore"""
+        check_slug('game', game)
+        check_slug('key', key)
+        if not isinstance(data, dict):
+            raise InvalidScore("progress must be a JSON object")
+        self.pending.put(('progress', (game, key, _json('progress', data), self.clock())))
+
+    def _write_loop(self):
+        while not self.closed.is_set():
+            first = self.pending.get()
+            if first is None:  # close()
+                break
+            # Let a burst of writes collect, then commit them together
+            if self.batch_interval:
+                self.closed.wait(self.batch_interval)
+            try:
+                self._write_batch(first)
+            except Exception:
+                # One bad batch must not stop the writer: every later write would be accepted and lost
+                logger.exception("Score store write batch failed; dropped it")
+
+    def _drain(self, first):
+        items = [first] if first is not None else []
+        while len(items) < MAX_BATCH:
+            try:
+                item = self.pending.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                items.append(item)
+        return items
+
+    def _write_batch(self, first=None):
+        with self.write_lock:
+            return self._commit(self._drain(first))
+
+    def _commit(self, items):
+        if not items:
+            return 0
+        scores = [row for kind, row in items if kind == 'score']
+        progress = {}
+        for kind, row in items:
+            if kind == 'progress':
+                progress[row[:2]] = row  # last write per key wins
+        try:
+            with self.writer:
+                if scores:
+                    self.writer.executemany(_INSERT_SCORE, scores)
+                if progress:
+                    self.writer.executemany(_UPSERT_PROGRESS, list(progress.values()))
+        except sqlite3.Error as e:
+            logger.error(f"Score store write of {len(items)} items failed: {e}")
+            return 0
+        self.stats['batches'] += 1
+        self.stats['scores'] += len(scores)
+        self.stats['progress'] += len(progress)
+        return len(items)
+
+    def flush(self):
+        """Commit everything queued so far on the calling thread (tests, shutdown)"""
+        while not self.pending.empty():
+            self._write_batch()
+
+    def close(self):
+        self.closed.set()
+        self.pending.put(None)  # wake the writer thread
+        self.thread.join(timeout=2)
+        self.flush()
+        self.writer.close()
+        while not self.readers.empty():
+            self.readers.get_nowait().close()
+
+    # -------------------------------------------------------------------------
+    # Reads
+    # -------------------------------------------------------------------------
+
+    def top(self, game, mode=None, period='all', player=None, limit=10):
+        """
+        Best scores for a game, highest first (ties: earliest first)
+
+        :param mode: Only this mode (None = every mode)
+        :param period: 'all', or 'day'/'week'/'month' for the current UTC period
+        :param player: Only this player's scores
+        """
+        check_slug('game', game)
+        if period not in PERIODS:
+            raise InvalidScore(f"period must be one of {', '.join(PERIODS)}")
+        limit = max(1, min(int(limit), MAX_LIMIT))
+
+        clauses, params = ['game = ?'], [game]
+        if mode is not None:
+            clauses.append('mode = ?')
+            params.append(mode)
+        if period != 'all':
+            clauses.append(f'{period} = ?')
+            params.append(buckets(self.clock())[PERIODS.index(period) - 1])
+        if player is not None:
+            clauses.append('player = ?')
+            params.append(player)
+        params.append(limit)
+        with self._reader() as reader:
+            rows = reader.execute(
+                f"SELECT player, score, mode, created, data FROM scores WHERE {' AND '.join(clauses)} "
+                f"ORDER BY score DESC, created LIMIT ?", params).fetchall()
+        return [{'player': row['player'], 'score': row['score'], 'mode': row['mode'], 'created': row['created'],
+                 'data': json.loads(row['data']) if row['data'] else None} for row in rows]
+
+    def progress(self, game, key):
+        """Saved progress blob, or None"""
+        check_slug('game', game)
+        check_slug('key', key)
+        with self._reader() as reader:
+            row = reader.execute('SELECT data FROM progress WHERE game = ? AND key = ?', (game, key)).fetchone()
+        return json.loads(row['data']) if row else None
+
+    def count(self, game=None):
+        with self._reader() as reader:
+            if game is None:
+                return reader.execute('SELECT COUNT(*) FROM scores').fetchone()[0]
+            return reader.execute('SELECT COUNT(*) FROM scores WHERE game = ?', (game,)).fetchone()[0]
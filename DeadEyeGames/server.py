@@ -3,153 +3,414 @@
 DeadEyeGames Server - Flask web server that bridges autodarts.io to web games
 Connects to autodarts.io WebSocket and forwards dart events to browser clients
 """
-from flask import Flask, render_template, send_from_directory
-from flask_socketio import SocketIO, emit
-import socketio
-import json
-import threading
+from flask import Flask, render_template, request, jsonify, Response, abort, redirect
+from flask_socketio import SocketIO, emit, join_room, leave_room
+import argparse
+import http.client
 import logging
 import os
-import websocket
+import signal
+import sys
+import threading
+import time
+
+from assets import IMMUTABLE, REVALIDATE, AssetCache
+from backlog import ThrowBacklog
+from boards import BoardManager, boards_from_env
+from bus import BusPublisher, BusSubscriber, assign_boards, role_from_env, worker_ports_from_env
+from checkpoint import CheckpointStore
+from dart_events import DartThrow, MalformedMessage, decode_message
+from eventlog import EventLog
+from game_state import GameEngine, game_room
+from journal import JournalReader, JournalWriter, replay
+from metrics import Metrics
+from outbound import OutboundQueues
+from pipeline import THREAD, Pipeline, ThrowEvent, webhook
+from scores import InvalidScore, ScoreStore
+from subscriptions import ALL, InvalidSubscription, SubscriptionIndex, parse_subscription, subscription_room
+from wire import JSON, PACKED, board_rooms, negotiate, wire_room
 
 # Flask app configuration
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'deadeye-games-secret'
 
-# Socket.IO for browser clients
-web_socketio = SocketIO(app, cors_allowed_origins="*")
 
-# Socket.IO client for darts-caller connection
-# Use engineio_version=4 to match darts-caller's Socket.IO v4 protocol
-darts_client = socketio.Client(ssl_verify=False, engineio_logger=False)  # Disable SSL verification for self-signed cert
 
-# Connection status
-darts_connected = False
+def detect_async_mode():
+    """
+    Pick the Socket.IO async mode for this process
+
+    production.py monkey patches the standard library with eventlet before it
+    imports this module, so browsers and the darts-caller clients share one
+    cooperative event loop. Everything else (python3 server.py, tests) runs the
+    threaded Werkzeug dev server.
+    """
+    if 'eventlet' in sys.modules:
+        from eventlet import patcher
+        if patcher.is_monkey_patched('socket'):
+            return 'eventlet'
+    return 'threading'
+
+
+ASYNC_MODE = detect_async_mode()
+
+# Socket.IO for browser clients
+web_socketio = SocketIO(app, cors_allowed_origins="*", async_mode=ASYNC_MODE)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Browser clients: Socket.IO session id -> board id they are watching
+web_clients = {}
+
+# Browsers following a server-side game: session id -> game name
+web_games = {}
+
+# Browsers that negotiated a compact throw encoding: session id -> codec (JSON clients aren't listed)
+web_wires = {}
+
+# Browsers that subscribed to less than everything: session id -> Subscription (see subscriptions.py)
+web_subscriptions = {}
+
+# Filtered rooms in use per board, checked once per throw
+subscriptions = SubscriptionIndex()
+
+# Ring buffer of recent raw darts-caller messages + sampled throw logging
+event_log = EventLog.from_env()
+
+# Per-board throw sequence numbers and recent history for browsers that reconnect
+backlog = ThrowBacklog.from_env()
+
+# Authoritative per-board game state for pages that join a game (see game_state.py)
+game_engine = GameEngine()
+
+# Per-stage latency histograms, counters and gauges for /metrics
+metrics = Metrics.from_env()
+
+# Game and static files in memory (re-scanned on change in dev mode) - compressed in the
+# background by run_server(), or on first request
+assets = AssetCache.from_env(app.root_path, default_watch=ASYNC_MODE == 'threading', precompress=False)
+
+# Bounded per-browser send queues for throws, flushed off the ingest thread (started by run_server)
+outbound = OutboundQueues.from_env(observe=metrics.stages['queue'].observe if metrics.enabled else None)
+
+# Per-player stats over the journal plus live throws for /api/stats - loaded in the background
+# by run_server() (None until then, if off, or if NumPy is missing)
+analytics = None
+
+# Live throws that arrive while analytics loads, as (DartThrow, time) - None when not loading
+analytics_pending = None
+analytics_lock = threading.Lock()
+
+# Append-only binary journal of every throw - opened by run_server()
+JOURNAL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'journal')
+journal = None
+
+# Leaderboards and game progress in SQLite (see scores.py) - opened by run_server()
+SCORES_DB = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scores.db')
+scores = None
+
+# Cluster role (see cluster.py and bus.py): a standalone server, the ingest process or a web worker
+ROLE = role_from_env()
+bus_publisher = None   # ingest: sends every throw to the workers - started by run_server()
+bus_subscriber = None  # worker: receives them - started by run_server()
+
+# Session state saved by shutdown() and restored by run_server() (see checkpoint.py)
+CHECKPOINT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'checkpoints')
+checkpoints = None
+
+# Startup progress for /ready, filled in by run_server() and announce_serving(): where throws
+# come from, when the web server started answering and what it restored
+startup = {'began': time.monotonic(), 'source': None, 'serving': None, 'restored': None}
+
 
 # =============================================================================
-# DARTS-CALLER WEBSOCKET CLIENT
+# DARTS-CALLER WEBSOCKET CLIENTS
 # =============================================================================
 
-@darts_client.event
-def connect():
-    """Called when successfully connected to darts-caller"""
-    global darts_connected
-    darts_connected = True
-    logger.info("✓ Connected to darts-caller at https://localhost:8079")
+def on_board_status(board_id, connected):
+    """Called when a board's darts-caller connection comes up or goes down"""
+    if metrics.enabled:
+        metrics.board_status(board_id, connected)
+    # Notify the web clients watching this board
+    web_socketio.emit('darts_status', {'connected': connected, 'board': board_id},
+                      to=status_rooms(board_id))
+    if bus_publisher is not None:
+        bus_publisher.publish({'type': 'status', 'board': board_id, 'connected': connected})
+
+
+def status_rooms(board_id):
+    """Rooms that get a board's darts_status changes: every wire room plus the filtered rooms that asked"""
+    rooms = board_rooms(board_id)
+    if web_subscriptions:
+        rooms += subscriptions.status_rooms(board_id)
+    return rooms
+
+
+def emit_throw(room, numbered, codec=JSON):
+    if outbound.enabled:
+        outbound.publish(room, numbered, codec)  # never blocks on a slow browser
+    else:
+        web_socketio.emit(codec.event, codec.encode(numbered), to=room)
+
+
+def throw_sender(board_id):
+    """send(dart_throw) for the backlog: hands a numbered throw to the board's browsers"""
+    room = wire_room(board_id, JSON)
 
-    # Try sending a message to darts-caller to register/subscribe
-    logger.info("Attempting to subscribe to dart events...")
-    darts_client.emit('message', {'event': 'subscribe', 'client': 'DeadEyeGames'})
+    def send(numbered):
+        stamp = metrics.ack_stamp() if metrics.ack_every else None
+        if stamp is not None:
+            # echoed back by darts-client.js as 'dart_ack' (kept out of the backlog copy)
+            numbered = dict(numbered, ack=stamp)
+        emit_throw(room, numbered)
+        if web_wires:
+            emit_throw(wire_room(board_id, PACKED), numbered, PACKED)
+        if web_subscriptions:
+            # One check per distinct filter on the board, then one encode per matching room
+            for filtered_room, codec in subscriptions.matching(board_id, numbered):
+                emit_throw(filtered_room, numbered, codec)
 
-    # Notify all web clients about connection status
-    web_socketio.emit('darts_status', {'connected': True})
+    return send
 
 
-@darts_client.event
-def disconnect():
-    """Called when disconnected from darts-caller"""
-    global darts_connected
-    darts_connected = False
-    logger.info("✗ Disconnected from darts-caller")
-    # Notify all web clients about disconnection
-    web_socketio.emit('darts_status', {'connected': False})
+def broadcast_throw(board_id, dart):
+    """Send a dart throw, with its sequence number, to the web clients watching its board"""
+    dart_throw = dart.to_dict(board_id)
+    if bus_publisher is not None:
+        # Ingest process: number it here, the workers do the fan-out
+        backlog.publish(board_id, dart_throw, _keep)
+        bus_publisher.publish({'type': 'throw', 'board': board_id, 'throw': dart_throw, 'sent': time.time()})
+        return dart_throw
 
+    backlog.publish(board_id, dart_throw, throw_sender(board_id))
 
-@darts_client.event
-def connect_error(data):
-    """Called when connection to darts-caller fails"""
-    logger.error(f"Connection error: {data}")
-    logger.error("Make sure darts-caller is running at https://localhost:8079")
+    # Server-side games on this board send state deltas instead of each display recomputing
+    if game_engine.by_board:
+        game_engine.apply_throw(board_id, dart, send_game_delta)
+    return dart_throw
 
 
-@darts_client.on('message')
-def on_darts_message(data):
+def _keep(dart_throw):
+    """Backlog send() for the ingest process: history only, nothing to emit"""
+
+
+def send_game_delta(room, delta):
+    web_socketio.emit('game_delta', delta, to=room)
+
+
+def on_darts_message(board_id, data):
     """
-    Handle messages from darts-caller
-    Listens for dart throw events and forwards to web clients
+    Handle messages from a board's darts-caller
+    Listens for dart throw events and forwards them to that board's web clients
     """
+    timed = metrics.enabled
+    received = decoded = None
+    if timed:
+        received = time.perf_counter()
+        metrics.message(board_id)
     try:
-        # Log ALL messages received
-        logger.info(f"RAW MESSAGE RECEIVED: {data}")
-
-        # Parse message data
-        event_data = json.loads(data) if isinstance(data, str) else data
-        event_type = event_data.get('event', 'UNKNOWN')
-
-        logger.info(f"EVENT TYPE: {event_type}")
-
-        # Filter for dart throw events
-        if event_type in ['dart1-thrown', 'dart2-thrown', 'dart3-thrown']:
-            # Log the full message for debugging
-            logger.info(f"Full dart message: {json.dumps(event_data, indent=2)}")
-
-            # Extract dart information from game object
-            game = event_data.get('game', {})
-            segment = game.get('fieldNumber', 0)      # Dartboard number (1-20, or 0 for bullseye)
-            multiplier = game.get('fieldMultiplier', 1)  # 1=single, 2=double, 3=triple
-            value = game.get('dartValue', 0)          # Point value
-            dart_number = game.get('dartNumber', '?')  # Which dart in the round
-            player = event_data.get('player', 'Unknown')
-
-            # Create dart throw object for web clients
-            dart_throw = {
-                'event': event_type,
-                'segment': segment,
-                'multiplier': multiplier,
-                'value': value,
-                'dartNumber': dart_number,
-                'player': player
-            }
-
-            logger.info(f"Dart throw from {player}: {segment} x{multiplier} = {value} points")
-
-            # Broadcast to all connected web clients
-            web_socketio.emit('dart_thrown', dart_throw)
-
+        # Keep the raw message in the ring buffer (formatted only if dumped)
+        event_log.record(board_id, data)
+
+        # Non-throw events are skipped without being fully decoded
+        dart = decode_message(data)
+        if dart is None:
+            return
+        if timed:
+            decoded = time.perf_counter()
+
+        pipeline.process(ThrowEvent(board_id, dart, received, decoded))
+
+    except MalformedMessage as e:
+        event_log.malformed(board_id, data, e)
+        if timed:
+            metrics.drop('malformed')
     except Exception as e:
-        logger.error(f"Error processing dart message: {e}")
-        import traceback
-        logger.error(traceback.format_exc())
+        event_log.error(board_id, data, e)
+        if timed:
+            metrics.drop('error')
 
 
-def connect_to_darts_caller():
-    """
-    Connect to darts-caller WebSocket in a separate thread
-    This runs independently from the Flask web server
+def broadcast_stage(event):
+    """Browsers first: number the throw and hand it to the board's room"""
+    event.payload = broadcast_throw(event.board_id, event.dart)
+    if event.received is not None:
+        metrics.throw(event.board_id, event.received, event.decoded, time.perf_counter())
+
+
+def persist_stage(event):
+    """Journal and stats - an unbuffered 64-byte write() and an array write, cheap enough to stay inline"""
+    if journal is not None:
+        journal.append(event.board_id, event.dart)
+    record_analytics(event.dart)
+
+
+def log_stage(event):
+    event_log.throw(event.board_id, event.payload)
+
+
+def record_analytics(dart):
+    """Add a live throw to the stats - held back while the journal is still loading (see load_analytics)"""
+    if analytics is None and analytics_pending is not None:
+        with analytics_lock:
+            if analytics is None:
+                analytics_pending.append((dart, time.time()))
+                return
+    if analytics is not None:
+        analytics.add(dart)
+
+
+# Every decoded throw runs through these stages in order (see pipeline.py). Slow
+# additions go on a pool, e.g. pipeline.add('announce', fn, pool=THREAD)
+pipeline = Pipeline(timed=metrics.enabled)
+pipeline.add('broadcast', broadcast_stage)
+pipeline.add('persist', persist_stage)
+pipeline.add('log', log_stage)
+if os.environ.get('DEADEYE_WEBHOOK'):
+    pipeline.add('webhook', webhook(os.environ['DEADEYE_WEBHOOK']), pool=THREAD, workers=2)
+
+# One upstream connection per board, all sharing a single ingest loop thread
+board_manager = BoardManager(boards_from_env(), on_message=on_darts_message, on_status=on_board_status)
+
+
+def web_client_counts():
+    """Gauge: connected browsers per board"""
+    counts = {(('board', board_id),): 0 for board_id in board_manager.boards}
+    for board_id in list(web_clients.values()):
+        key = (('board', board_id),)
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+metrics.gauge('deadeye_web_clients', 'Connected browser clients', web_client_counts)
+metrics.gauge('deadeye_outbound_pending', 'Throws queued for browsers but not yet sent',
+              lambda: {None: outbound.pending()})
+metrics.counter('deadeye_outbound_total', 'Outbound queue activity (policy: ' + outbound.policy + ')',
+                lambda: {(('action', action),): count for action, count in sorted(outbound.stats.items())})
+metrics.histograms('deadeye_pipeline_seconds', 'Run time and queue wait of each throw pipeline stage',
+                   pipeline.histograms)
+metrics.counter('deadeye_pipeline_total', 'Throws handled by each pipeline stage, by outcome', pipeline.counters)
+metrics.gauge('deadeye_pipeline_pending', 'Throws queued for each pooled pipeline stage', pipeline.pending)
+metrics.gauge('deadeye_board_connected', 'Whether each board\'s darts-caller is connected',
+              lambda: {(('board', board_id),): int(connected)
+                       for board_id, connected in board_manager.status().items()})
+
+
+# =============================================================================
+# CLUSTER (ingest process <-> web workers, see cluster.py and bus.py)
+# =============================================================================
+
+def bus_hello():
+    """Ingest: first message for a worker that (re)connects - boards, epoch and recent throws"""
+    return {'type': 'hello', 'epoch': backlog.epoch, 'boards': board_manager.status(), 'recent': backlog.recent()}
+
+
+def deliver_throw(board_id, dart_throw, sent=None):
+    """Worker: fan a throw numbered by the ingest process out to this worker's browsers"""
+    timed = metrics.enabled
+    if timed:
+        received = time.perf_counter()
+    if not backlog.record(board_id, dart_throw, throw_sender(board_id)):
+        return  # already delivered (sent again in a hello)
+    dart = DartThrow.from_dict(dart_throw)
+    if game_engine.by_board:
+        game_engine.apply_throw(board_id, dart, send_game_delta)
+    if timed:
+        metrics.relayed(board_id, time.time() - sent if sent else -1, received, time.perf_counter())
+    record_analytics(dart)
+
+
+def on_bus_message(message):
+    """Worker: handle one message from the ingest process"""
+    kind = message.get('type')
+    if kind == 'throw':
+        deliver_throw(message['board'], message['throw'], message.get('sent'))
+    elif kind == 'status':
+        board_manager.set_connected(message['board'], message['connected'])
+    elif kind == 'hello':
+        # A new ingest run renumbers every board: keep its recent throws for
+        # resume without re-sending them. After a bus blip on the same run,
+        # send the throws this worker missed.
+        renumbered = backlog.adopt(message['epoch'])
+        for board_id, connected in message['boards'].items():
+            board_manager.set_connected(board_id, connected)
+        for board_id, throws in message['recent'].items():
+            for dart_throw in throws:
+                if renumbered:
+                    backlog.record(board_id, dart_throw)
+                else:
+                    deliver_throw(board_id, dart_throw)
+        logger.info(f"Following ingest run {message['epoch']} ({len(message['boards'])} boards)")
+
+
+def on_bus_disconnect():
+    """Worker: without the ingest process no throws arrive - show every board as offline"""
+    for board_id in list(board_manager.boards):
+        board_manager.set_connected(board_id, False)
+
+
+# Ingest only: board id -> worker port, for sticky routing of browsers
+worker_routes = {}
+
+# Paths the ingest process answers itself instead of redirecting to a worker
+INGEST_PATHS = ('/metrics', '/debug/', '/ready')
+
+
+@app.before_request
+def route_to_worker():
     """
-    import time
-    max_retries = 5
-    retry_delay = 2
+    Ingest: send each browser to the worker that serves its board
 
-    for attempt in range(max_retries):
-        try:
-            logger.info(f"Connecting to darts-caller at https://127.0.0.1:8079... (attempt {attempt + 1}/{max_retries})")
-            darts_client.connect(
-                "https://127.0.0.1:8079",
-                transports=['websocket', 'polling'],
-                wait_timeout=10
-            )
-            darts_client.wait()  # Keep connection alive
-            break
-        except Exception as e:
-            logger.error(f"Connection attempt {attempt + 1} failed: {e}")
-            if attempt < max_retries - 1:
-                logger.info(f"Retrying in {retry_delay} seconds...")
-                time.sleep(retry_delay)
-            else:
-                logger.error("Failed to connect to darts-caller after multiple attempts!")
-                logger.error("Make sure darts-caller is running at https://127.0.0.1:8079")
+    Every display of a board ends up on one worker, so server-side game state
+    stays authoritative per board. Browsers that don't name a board go to the
+    default board's worker.
+    """
+    if not worker_routes or request.path.startswith(INGEST_PATHS):
+        return None
+    board_id = request.args.get('board')
+    if board_id not in worker_routes:
+        board_id = board_manager.default_board
+    host = request.host.rsplit(':', 1)[0] if not request.host.endswith(']') else request.host
+    return redirect(f"{request.scheme}://{host}:{worker_routes[board_id]}{request.full_path.rstrip('?')}", 307)
 
 
 # =============================================================================
 # WEB ROUTES
 # =============================================================================
 
+def asset_response(path):
+    """
+    Serve a file from the in-memory asset cache
+
+    Conditional requests get a 304. Requests for the current ?v=<hash> URL are
+    cacheable forever; everything else must revalidate with the ETag.
+    """
+    asset = assets.get(path)
+    if asset is None:
+        abort(404)
+
+    cache_control = IMMUTABLE if request.args.get('v') == asset.hash else REVALIDATE
+    if asset.hash in request.if_none_match:
+        response = Response(status=304)
+    else:
+        body, encoding = asset.body_for(request.headers.get('Accept-Encoding'))
+        response = Response(body, mimetype=asset.mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.headers['ETag'] = asset.etag
+    response.headers['Cache-Control'] = cache_control
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+@app.context_processor
+def asset_urls():
+    """Templates link assets with {{ asset_url('/static/...') }} to get the versioned URL"""
+    return {'asset_url': assets.url}
+
+
 @app.route('/')
 def homepage():
     """Serve the main homepage with game selection"""
@@ -159,144 +420,664 @@ def homepage():
 @app.route('/games/zombie-slayer')
 def zombie_game():
     """Serve the Zombie Slayer game page"""
-    return send_from_directory('games/zombie-slayer', 'zombie.html')
+    return asset_response('games/zombie-slayer/zombie.html')
 
 
 @app.route('/static/css/<path:filename>')
 def serve_css(filename):
     """Serve CSS files from static/css directory"""
-    return send_from_directory('static/css', filename)
+    return asset_response(f'static/css/{filename}')
 
 
 @app.route('/static/js/<path:filename>')
 def serve_js(filename):
     """Serve JavaScript files from static/js directory"""
-    return send_from_directory('static/js', filename)
+    return asset_response(f'static/js/{filename}')
 
 
 @app.route('/games/zombie-slayer/<path:filename>')
 def serve_zombie_assets(filename):
     """Serve game-specific assets from zombie-slayer directory"""
-    return send_from_directory('games/zombie-slayer', filename)
+    return asset_response(f'games/zombie-slayer/{filename}')
 
 
 @app.route('/games/heist-crew')
 def heist_game():
     """Serve the Heist Crew game page"""
-    return send_from_directory('games/heist-crew', 'heist.html')
+    return asset_response('games/heist-crew/heist.html')
 
 
 @app.route('/games/heist-crew/<path:filename>')
 def serve_heist_assets(filename):
     """Serve game-specific assets from heist-crew directory"""
-    return send_from_directory('games/heist-crew', filename)
+    return asset_response(f'games/heist-crew/{filename}')
 
 
 @app.route('/games/dad-bod-olympics')
 def dad_bod_game():
     """Serve the Dad Bod Olympics game page"""
-    return send_from_directory('games/dad-bod-olympics', 'dad-bod.html')
+    return asset_response('games/dad-bod-olympics/dad-bod.html')
 
 
 @app.route('/games/dad-bod-olympics/<path:filename>')
 def serve_dad_bod_assets(filename):
     """Serve game-specific assets from dad-bod-olympics directory"""
-    return send_from_directory('games/dad-bod-olympics', filename)
+    return asset_response(f'games/dad-bod-olympics/{filename}')
 
 
 @app.route('/games/dungeon-crawl')
 def dungeon_game():
     """Serve the Dungeon of Darts game page"""
-    return send_from_directory('games/dungeon-crawl', 'dungeon.html')
+    return asset_response('games/dungeon-crawl/dungeon.html')
 
 
 @app.route('/games/dungeon-crawl/<path:filename>')
 def serve_dungeon_assets(filename):
     """Serve game-specific assets from dungeon-crawl directory"""
-    return send_from_directory('games/dungeon-crawl', filename)
+    return asset_response(f'games/dungeon-crawl/{filename}')
 
 
 @app.route('/games/station-siege')
 def station_siege_game():
     """Serve the Station Siege game page"""
-    return send_from_directory('games/station-siege', 'station-siege.html')
+    return asset_response('games/station-siege/station-siege.html')
 
 
 @app.route('/games/station-siege/<path:filename>')
 def serve_station_siege_assets(filename):
     """Serve game-specific assets from station-siege directory"""
-    return send_from_directory('games/station-siege', filename)
+    return asset_response(f'games/station-siege/{filename}')
+
+
+@app.route('/debug/events')
+def debug_events():
+    """Dump the recent raw darts-caller messages kept in the event ring buffer"""
+    limit = request.args.get('limit', type=int)
+    board_id = request.args.get('board')
+    return jsonify({
+        'capacity': event_log.capacity,
+        'errors': event_log.error_count,
+        'malformed': event_log.malformed_count,
+        'events': event_log.dump(limit=limit, board_id=board_id)
+    })
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape endpoint"""
+    return Response(metrics.prometheus(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/metrics/summary')
+def metrics_summary():
+    """Compact JSON view of /metrics for the in-game overlay"""
+    return jsonify(metrics.summary())
+
+
+def upstream_status():
+    """Where throws come from (set by run_server) and whether they can flow now"""
+    boards = board_manager.status()
+    source = startup['source']
+    if source == 'bus':
+        ready = bus_subscriber is not None and bus_subscriber.connected
+    else:
+        ready = source is not None and bool(boards) and all(boards.values())
+    return {'ready': ready, 'source': source, 'boards': boards}
+
+
+@app.route('/ready')
+def readiness():
+    """
+    Readiness for load balancers and deploy scripts: 200 once browsers can be served, else 503
+
+    The upstream is reported next to the web side, not folded into it: a board
+    whose darts-caller is down doesn't stop the games from loading.
+    """
+    serving = startup['serving'] is not None
+    analytics_state = 'loading' if analytics_pending is not None else ('on' if analytics is not None else 'off')
+    body = {
+        'ready': serving,
+        'web': {'ready': serving, 'clients': len(web_clients), 'analytics': analytics_state},
+        'upstream': upstream_status(),
+        'restored': startup['restored'],
+        'uptime_s': round(time.monotonic() - startup['began'], 3),
+    }
+    return jsonify(body), 200 if serving else 503
+
+
+def stats_response(build):
+    """JSON from the analytics engine, with an ETag so polling pages mostly get 304s"""
+    if analytics is None:
+        if analytics_pending is not None:
+            return jsonify({'error': 'analytics still loading the journal'}), 503
+        return jsonify({'error': 'analytics off (DEADEYE_ANALYTICS, or NumPy not installed)'}), 503
+    version = analytics.version()
+    if version in request.if_none_match:
+        response = Response(status=304)
+    else:
+        report = build()
+        if report is None:
+            abort(404)
+        response = jsonify(report)
+    response.headers['ETag'] = f'"{version}"'
+    response.headers['Cache-Control'] = REVALIDATE
+    return response
+
+
+@app.route('/api/stats')
+def stats_summary():
+    """Headline stats for every player: average, hit rates, streaks"""
+    return stats_response(lambda: analytics.summary())
+
+
+@app.route('/api/stats/player/<path:name>')
+def stats_player(name):
+    """One player's stats including the segment heatmap"""
+    return stats_response(lambda: analytics.player(name))
+
+
+def score_store():
+    """The open score store, or a 503 for the games to fall back to localStorage"""
+    if scores is None:
+        abort(Response('{"error": "score store off (DEADEYE_SCORES)"}', status=503, mimetype='application/json'))
+    return scores
+
+
+@app.route('/api/scores/<game>', methods=['GET'])
+def get_scores(game):
+    """Top scores: ?mode= (e.g. a seed), ?period=all|day|week|month, ?player=, ?limit= (default 10)"""
+    try:
+        top = score_store().top(game, mode=request.args.get('mode'), period=request.args.get('period', 'all'),
+                                player=request.args.get('player'), limit=request.args.get('limit', 10, type=int))
+    except InvalidScore as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'game': game, 'scores': top})
+
+
+@app.route('/api/scores/<game>', methods=['POST'])
+def post_score(game):
+    """Record a score: {player, score, mode?, data?} - written in the next batch"""
+    body = request.get_json(silent=True) or {}
+    try:
+        score_store().submit_score(game, body.get('player', 'Anonymous'), body.get('score'),
+                                   mode=str(body.get('mode') or ''), data=body.get('data'))
+    except InvalidScore as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'queued': True}), 202
+
+
+@app.route('/api/progress/<game>/<key>', methods=['GET'])
+def get_progress(game, key):
+    """Saved progress for a game (e.g. heist-crew/default)"""
+    try:
+        data = score_store().progress(game, key)
+    except InvalidScore as e:
+        return jsonify({'error': str(e)}), 400
+    if data is None:
+        return jsonify({'error': 'no saved progress'}), 404
+    return jsonify(data)
+
+
+@app.route('/api/progress/<game>/<key>', methods=['PUT'])
+def put_progress(game, key):
+    """Save progress (a JSON object) - written in the next batch"""
+    try:
+        score_store().save_progress(game, key, request.get_json(silent=True))
+    except InvalidScore as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'queued': True}), 202
 
 
 # =============================================================================
 # WEB SOCKET EVENTS (Browser to Server)
 # =============================================================================
 
+def requested_subscription(value):
+    """A browser's subscribe filter and the board it names - a bad filter is logged and means everything"""
+    try:
+        return parse_subscription(value)
+    except InvalidSubscription as e:
+        logger.warning(f"Ignoring subscribe filter from a web client: {e}")
+        return ALL, None
+
+
+def select_board(board_id, last_seq=None, epoch=None, subscription=None):
+    """
+    Move the current web client into a board's room (unknown ids fall back to the default board)
+
+    A client that passes the last sequence number it saw (and the server epoch
+    it saw it in) first gets the throws it missed from the backlog. Any other
+    client joining a board gets a snapshot of its recent throws and current
+    round instead. A subscription (see subscriptions.py) puts it in the room
+    for its filter; None keeps the one it has.
+
+    Sends the client its darts_status, then any board_snapshot. Both go out
+    under the backlog lock before the client joins the room, so no live
+    throw overtakes the snapshot.
+
+    :returns: the board id joined
+    """
+    if not board_id or not board_manager.has_board(board_id):
+        board_id = board_manager.default_board
+    status = {'connected': board_manager.is_connected(board_id), 'board': board_id,
+              'seq': backlog.last_seq(board_id), 'epoch': backlog.epoch}
+
+    codec = web_wires.get(request.sid, JSON)
+    status['wire'] = codec.name
+    current = web_subscriptions.get(request.sid, ALL)
+    if subscription is None:
+        subscription = current
+    if not subscription.everything:
+        status['subscribe'] = subscription.to_dict()
+
+    previous = web_clients.get(request.sid)
+    if previous == board_id and subscription.key == current.key:
+        emit('darts_status', status)
+        return board_id
+    if previous is not None:
+        previous_room = subscription_room(wire_room(previous, codec), current)
+        leave_room(previous_room)
+        if not current.everything:
+            subscriptions.discard(previous, previous_room)
+    if previous is not None and previous != board_id:
+        outbound.forget(request.sid)  # throws still queued from the old board
+        # A server-side game is per board: the page joins it again on the new board
+        game = web_games.pop(request.sid, None)
+        if game is not None:
+            leave_room(game_room(previous, game))
+
+    room = subscription_room(wire_room(board_id, codec), subscription)
+
+    def join():
+        join_room(room)
+        if not subscription.everything:
+            # Under the backlog lock: the next throw published already checks this room
+            subscriptions.add(board_id, room, subscription, codec)
+
+    if last_seq is not None:
+        def resend(dart_throw):
+            if subscription.matches(dart_throw):
+                emit(codec.event, codec.encode(dart_throw))
+
+        resumed, gap = backlog.resume(board_id, last_seq, epoch, join=join, send=resend)
+        status.update(resumed=resumed, gap=gap, seq=backlog.last_seq(board_id))
+        if resumed or gap:
+            logger.info(f"Web client resumed board {board_id} from #{last_seq}: {resumed} missed throws resent"
+                        f"{' (gap)' if gap else ''}")
+        emit('darts_status', status)
+    elif backlog.snapshot_throws > 0:
+        def send_snapshot(snapshot):
+            status['seq'] = snapshot['seq']  # the client counts on from the newest throw in the snapshot
+            emit('darts_status', status)
+            emit('board_snapshot', snapshot)
+
+        backlog.snapshot(board_id, join, None if subscription.everything else subscription.matches,
+                         send=send_snapshot)
+    else:
+        emit('darts_status', status)
+        join()
+    web_clients[request.sid] = board_id
+    if subscription.everything:
+        web_subscriptions.pop(request.sid, None)
+    else:
+        web_subscriptions[request.sid] = subscription
+    return board_id
+
+
 @web_socketio.on('connect')
 def handle_web_connect():
-    """Handle new browser client connection"""
-    logger.info("Web client connected")
-    # Send current darts-caller connection status
-    emit('darts_status', {'connected': darts_connected})
+    """Handle new browser client connection (reconnecting clients send last_seq/epoch to resume)"""
+    codec = negotiate(request.args.get('wire'))
+    if codec is not JSON:
+        web_wires[request.sid] = codec
+    subscription, board_id = requested_subscription(request.args.get('subscribe'))
+    # Sends the darts-caller connection status for this board, then its recent throws
+    board_id = select_board(request.args.get('board') or board_id, request.args.get('last_seq', type=int),
+                            request.args.get('epoch'), subscription)
+    logger.info(f"Web client connected to board {board_id}")
+
+
+@web_socketio.on('join_board')
+def handle_join_board(data):
+    """Switch the browser client to another board, or change what it subscribes to"""
+    data = data or {}
+    subscription = board_id = None
+    if 'subscribe' in data:
+        subscription, board_id = requested_subscription(data['subscribe'])
+    select_board(data.get('board') or board_id, subscription=subscription)
 
 
 @web_socketio.on('disconnect')
 def handle_web_disconnect():
     """Handle browser client disconnection"""
+    board_id = web_clients.pop(request.sid, None)
+    subscription = web_subscriptions.pop(request.sid, None)
+    if subscription is not None and board_id is not None:
+        subscriptions.discard(board_id, subscription_room(wire_room(board_id, web_wires.get(request.sid, JSON)),
+                                                          subscription))
+    web_games.pop(request.sid, None)
+    web_wires.pop(request.sid, None)
+    outbound.forget(request.sid)
     logger.info("Web client disconnected")
 
 
+@web_socketio.on('join_game')
+def handle_join_game(data):
+    """Follow the server-side state of a game on this client's board: full snapshot now, deltas after"""
+    game = (data or {}).get('game')
+    board_id = web_clients.get(request.sid, board_manager.default_board)
+    try:
+        room = game_engine.room(board_id, game)
+    except KeyError:
+        emit('game_error', {'game': game, 'error': 'unknown game'})
+        return
+
+    previous = web_games.get(request.sid)
+    if previous is not None and previous != game:
+        leave_room(game_room(board_id, previous))
+    web_games[request.sid] = game
+    # Join and snapshot under the room lock so no delta falls between them
+    with room.lock:
+        join_room(game_room(board_id, game))
+        emit('game_snapshot', room.snapshot())
+
+
+@web_socketio.on('game_command')
+def handle_game_command(data):
+    """Control the client's current server-side game (e.g. {'action': 'start'})"""
+    data = data or {}
+    game = web_games.get(request.sid)
+    if game is None:
+        emit('game_error', {'game': data.get('game'), 'error': 'join_game first'})
+        return
+    board_id = web_clients.get(request.sid, board_manager.default_board)
+    room_name = game_room(board_id, game)
+    try:
+        game_engine.room(board_id, game).command(data.get('action'), data.get('data'),
+                                                 lambda delta: send_game_delta(room_name, delta))
+    except ValueError as e:
+        emit('game_error', {'game': game, 'error': str(e)})
+
+
+@web_socketio.on('dart_ack')
+def handle_dart_ack(data):
+    """A browser handled a throw that asked for an ack (see DEADEYE_METRICS_ACK)"""
+    if metrics.enabled and isinstance(data, dict):
+        metrics.ack(data.get('ack'))
+
+
 @web_socketio.on('ping')
 def handle_ping():
     """Respond to ping from web clients (keep-alive)"""
-    emit('pong', {'connected': darts_connected})
+    board_id = web_clients.get(request.sid, board_manager.default_board)
+    emit('pong', {'connected': board_manager.is_connected(board_id), 'board': board_id})
 
 
 # =============================================================================
 # SERVER STARTUP
 # =============================================================================
 
-def print_banner():
-    """Display startup banner"""
-    banner = """
-╔══════════════════════════════════════════════════════════════════════╗
-║                                                                      ║
-║   ██████╗ ███████╗ █████╗ ██████╗     ███████╗██╗   ██╗███████╗      ║
-║   ██╔══██╗██╔════╝██╔══██╗██╔══██╗    ██╔════╝╚██╗ ██╔╝██╔════╝      ║
-║   ██║  ██║█████╗  ███████║██║  ██║    █████╗   ╚████╔╝ █████╗        ║
-║   ██║  ██║██╔══╝  ██╔══██║██║  ██║    ██╔══╝    ╚██╔╝  ██╔══╝        ║
-║   ██████╔╝███████╗██║  ██║██████╔╝    ███████╗   ██║   ███████╗      ║
-║   ╚═════╝ ╚══════╝╚═╝  ╚═╝╚═════╝     ╚══════╝   ╚═╝   ╚══════╝      ║
-║                                                                      ║
-║    ██████╗  █████╗ ███╗   ███╗███████╗███████╗                       ║
-║   ██╔════╝ ██╔══██╗████╗ ████║██╔════╝██╔════╝                       ║
-║   ██║  ███╗███████║██╔████╔██║█████╗  ███████╗                       ║
-║   ██║   ██║██╔══██║██║╚██╔╝██║██╔══╝  ╚════██║                       ║
-║   ╚██████╔╝██║  ██║██║ ╚═╝ ██║███████╗███████║                       ║
-║    ╚═════╝ ╚═╝  ╚═╝╚═╝     ╚═╝╚══════╝╚══════╝                       ║
-║                                                                      ║
-║              RETRO CYBERPUNK DART GAMING PLATFORM                    ║
-║                                                                      ║
-╚══════════════════════════════════════════════════════════════════════╝
-
-    Server: http://localhost:5001
-    Darts-Caller: https://localhost:8079
-
-    Starting services...
-"""
-    print(banner)
+def print_banner(port=5001):
+    """Short startup banner: where to point the browsers and which boards they'll see"""
+    boards = ', '.join(f"{board_id} ({board.url})" for board_id, board in board_manager.boards.items())
+    print(f"\nDEADEYE GAMES - retro cyberpunk dart gaming platform\n"
+          f"    Server: http://localhost:{port} ({ASYNC_MODE} mode)\n"
+          f"    Boards: {boards}\n", flush=True)
 
 
-if __name__ == '__main__':
-    print_banner()
+def load_analytics(directory, files=None):
+    """
+    Background task: import NumPy, load the journal from earlier runs, then take live throws
 
-    # Start darts-caller connection in separate thread
-    darts_thread = threading.Thread(target=connect_to_darts_caller, daemon=True)
-    darts_thread.start()
+    Throws that arrive meanwhile wait in analytics_pending and are added after
+    the journal, so the stats count every throw once, in order.
+    """
+    global analytics, analytics_pending
+    loaded = None
+    try:
+        from analytics import ThrowAnalytics
+        loaded = ThrowAnalytics.from_env()
+        if loaded is not None and directory.lower() != 'off' and os.path.isdir(directory):
+            loaded.load_journal(directory, files)
+    except Exception:
+        logger.exception("Throw analytics failed to load - /api/stats disabled")
+        loaded = None
+    with analytics_lock:
+        if loaded is not None:
+            for dart, timestamp in analytics_pending or ():
+                loaded.add(dart, timestamp)
+        analytics = loaded
+        analytics_pending = None
+
+
+def save_checkpoint():
+    """Write the session state for the next run to restore (see checkpoint.py)"""
+    if checkpoints is None:
+        return
+    browsers = {}
+    for board_id in list(web_clients.values()):
+        browsers[board_id] = browsers.get(board_id, 0) + 1
+    state = {'backlog': backlog.checkpoint(), 'games': game_engine.checkpoint(), 'browsers': browsers}
+    try:
+        size = checkpoints.save(state)
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning(f"Checkpoint not saved: {e}")
+        return
+    logger.info(f"Checkpoint saved to {checkpoints.path}: {len(state['backlog']['boards'])} boards, "
+                f"{len(state['games'])} games, {sum(browsers.values())} browsers ({size} bytes)")
+
+
+def restore_checkpoint():
+    """Carry on from the last run's checkpoint, if there is a fresh one; returns what was restored"""
+    state, age = checkpoints.take() if checkpoints is not None else (None, None)
+    if state is None:
+        return None
+    try:
+        throws = backlog.restore(state['backlog'])
+        games = game_engine.restore(state['games'])
+    except (KeyError, TypeError, ValueError) as e:
+        logger.warning(f"Checkpoint not restored: {e!r}")
+        # Start over rather than from half a checkpoint: a new numbering, no game rooms
+        backlog.adopt(str(int(time.time() * 1000)))
+        game_engine.rooms.clear()
+        game_engine.by_board.clear()
+        return None
+    restored = {'epoch': backlog.epoch, 'age_s': round(age, 1), 'boards': len(state['backlog']['boards']),
+                'throws': throws, 'games': games, 'browsers': sum(state.get('browsers', {}).values())}
+    logger.info(f"Restored checkpoint from {age:.1f}s ago: run {restored['epoch']}, {restored['boards']} boards, "
+                f"{throws} recent throws, {games} games; {restored['browsers']} browsers to reconnect")
+    return restored
+
+
+def start_replay(directory, speed=1.0, session=None, since=None, delay=0.0):
+    """
+    Stream a throw journal back through broadcast_throw instead of live boards
+
+    Boards found in the journal are registered on the fly and reported as
+    connected, so games behave as if the darts were being thrown now.
+    """
+    reader = JournalReader(directory)
+
+    def emit(board_id, dart):
+        if not board_manager.is_connected(board_id):
+            board_manager.set_connected(board_id, True)
+        broadcast_throw(board_id, dart)
+
+    def run():
+        # Give displays a moment to connect before the first throw
+        web_socketio.sleep(delay)
+        for board_id in list(board_manager.boards):
+            board_manager.set_connected(board_id, True)
+        logger.info(f"Replaying journal {directory} at {'max' if not speed else f'{speed:g}x'} speed")
+        count = replay(reader.records(session=session, since=since), emit, speed=speed, sleep=web_socketio.sleep)
+        logger.info(f"Replay finished: {count} throws")
+
+    web_socketio.start_background_task(run)
+
+
+def parse_speed(text):
+    """--speed value: a multiplier, or 'max' for as fast as possible"""
+    return 0.0 if text == 'max' else float(text)
+
+
+def build_arg_parser(description):
+    """Command line options shared by server.py and production.py"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--host', default=os.environ.get('DEADEYE_HOST', '0.0.0.0'),
+                        help='Interface to listen on (default: 0.0.0.0)')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('DEADEYE_PORT', 5001)),
+                        help='Port to listen on (default: 5001)')
+    parser.add_argument('--replay', metavar='JOURNAL_DIR',
+                        help='Replay a throw journal to the games instead of connecting to boards')
+    parser.add_argument('--speed', type=parse_speed, default=1.0,
+                        help="Replay speed multiplier, or 'max' (default: 1 = real time)")
+    parser.add_argument('--session', help='Replay only this journal session (see tools/journal_tool.py sessions)')
+    parser.add_argument('--replay-delay', type=float, default=5.0,
+                        help='Seconds to wait for displays before replay starts (default: 5)')
+    return parser
+
+
+def _raise_system_exit(signum, frame):
+    """Turn SIGTERM into a normal exit so the shutdown path runs"""
+    raise SystemExit(0)
+
+
+def shutdown():
+    """Graceful shutdown: tell browsers their boards are going away, close upstream connections, checkpoint"""
+    logger.info("Shutting down...")
+    for board_id in board_manager.boards:
+        web_socketio.emit('darts_status', {'connected': False, 'board': board_id}, to=status_rooms(board_id))
+    board_manager.stop()
+    pipeline.stop()  # queued side effects finish before the journal closes
+    if bus_publisher is not None:
+        bus_publisher.close()
+    if bus_subscriber is not None:
+        bus_subscriber.stop()
+    save_checkpoint()  # no more throws can arrive: every one so far is in it
+    outbound.stop()
+    if journal is not None:
+        journal.close()
+    if scores is not None:
+        scores.close()
+    logger.info("Server stopped")
+
+
+def announce_serving(host, port, tasks=()):
+    """
+    Background: mark /ready as serving once the web server answers and `tasks` have finished
+
+    run_server() hands over to the web server, which binds its socket later,
+    so this asks the server's own /ready over HTTP until something answers
+    (503 until now). `tasks` are the background startup tasks that must finish
+    first (objects with join(), as start_background_task returns).
+    """
+    for task in tasks:
+        task.join()
+    probe = {'': '127.0.0.1', '0.0.0.0': '127.0.0.1', '::': '::1'}.get(host, host)
+    while True:
+        connection = http.client.HTTPConnection(probe, port, timeout=1)
+        try:
+            connection.request('GET', '/ready')
+            connection.getresponse().read()
+            break
+        except OSError:
+            web_socketio.sleep(0.005)
+        finally:
+            connection.close()
+    startup['serving'] = time.monotonic()
+    logger.info(f"Serving after {startup['serving'] - startup['began']:.2f}s")
+
+
+def run_server(host='0.0.0.0', port=5001, replay_options=None, **server_options):
+    """
+    Connect to every board and serve browsers until SIGINT/SIGTERM
+
+    replay_options (keyword arguments for start_replay) feed the games from a
+    throw journal instead of live boards. server_options are passed through to
+    the web server, e.g. max_size (green thread pool size) in eventlet mode.
+
+    Only what browsers need comes before the web server starts: the last run's
+    checkpoint and the upstream connections. Analytics (NumPy and the journal)
+    and asset compression follow in the background. /ready answers 200 once the
+    web server answers and compression is done (see announce_serving), and
+    reports analytics and the upstream on their own.
+    """
+    global journal, scores, analytics_pending, bus_publisher, bus_subscriber, checkpoints
+
+    print_banner(port)
+    signal.signal(signal.SIGTERM, _raise_system_exit)
+
+    if not replay_options:
+        # One file per port: cluster workers share the environment
+        checkpoints = CheckpointStore.from_env(CHECKPOINT_DIR, f'server-{port}.json')
+        startup['restored'] = restore_checkpoint()
+
+    directory = os.environ.get('DEADEYE_JOURNAL', JOURNAL_DIR)
+    if ROLE == 'ingest':
+        # Browsers are redirected to the workers: this process only reads the boards
+        ports = worker_ports_from_env()
+        if ports:
+            worker_routes.update({board_id: ports[index]
+                                  for board_id, index in assign_boards(board_manager.boards, len(ports)).items()})
+        bus_publisher = BusPublisher(os.environ['DEADEYE_BUS'], bus_hello).start()
+    else:
+        scores = ScoreStore.from_env(SCORES_DB)
+        outbound.start(web_socketio)
+
+    if ROLE == 'worker':
+        # Throws come from the ingest process, which also writes the journal. The
+        # bus starts once analytics has loaded it, so no throw is counted twice.
+        startup['source'] = 'bus'
+        analytics_pending = []
+        bus_subscriber = BusSubscriber(os.environ['DEADEYE_BUS'], on_bus_message, on_bus_disconnect,
+                                       sleep=web_socketio.sleep)
+
+        def follow_ingest():
+            load_analytics(directory)
+            bus_subscriber.run()
+
+        web_socketio.start_background_task(follow_ingest)
+    elif replay_options:
+        startup['source'] = 'replay'
+        start_replay(**replay_options)
+    else:
+        startup['source'] = 'boards'
+        # The files from earlier runs: this run's throws reach analytics live
+        earlier = [name for _, name in JournalReader(directory).files] if os.path.isdir(directory) else []
+        journal = JournalWriter.from_env(JOURNAL_DIR)
+        if ROLE != 'ingest':
+            analytics_pending = []
+            web_socketio.start_background_task(load_analytics, journal.directory if journal else 'off', earlier)
+        # Connect to every board's darts-caller on the shared ingest loop
+        pipeline.start()
+        board_manager.start()
+
+    precompressing = web_socketio.start_background_task(assets.precompress)
+    web_socketio.start_background_task(announce_serving, host, port, [precompressing])
 
     # Start Flask web server
-    logger.info("Starting web server on http://localhost:5001")
-    logger.info("Open your browser to http://localhost:5001 to play!")
+    logger.info(f"Starting web server on http://localhost:{port} ({ASYNC_MODE} mode)")
+    logger.info(f"Open your browser to http://localhost:{port} to play!")
+
+    if ASYNC_MODE == 'threading':
+        server_options['allow_unsafe_werkzeug'] = True
+
+    try:
+        # Run Flask app with Socket.IO
+        web_socketio.run(app, host=host, port=port, debug=False, **server_options)
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        shutdown()
 
-    # Run Flask app with Socket.IO
-    web_socketio.run(app, host='0.0.0.0', port=5001, debug=False, allow_unsafe_werkzeug=True)
+
+def replay_options_from_args(args):
+    """start_replay() keyword arguments from parsed command line options (None if not replaying)"""
+    if not args.replay:
+        return None
+    return {'directory': args.replay, 'speed': args.speed, 'session': args.session, 'delay': args.replay_delay}
+
+
+if __name__ == '__main__':
+    args = build_arg_parser('DeadEyeGames development server (threaded)').parse_args()
+    run_server(args.host, args.port, replay_options_from_args(args))
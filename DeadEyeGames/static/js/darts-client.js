@@ -2,7 +2,8 @@
  * DeadEyeGames - Darts Client WebSocket Handler
  *
  * This module handles the WebSocket connection between the browser and the Flask server.
- * The Flask server forwards dart throw events from darts-caller to all connected clients.
+ * The Flask server forwards dart throw events from each board's darts-caller to the
+ * clients watching that board.
  *
  * Usage:
  * 1. Include this script in your HTML page
@@ -15,6 +16,54 @@
  *     onDartThrown: (dart) => console.log('Dart thrown:', dart),
  *     onDisconnected: () => console.log('Disconnected')
  *   });
+ *
+ * Boards:
+ *   In a multi-board venue pick the board with `?board=lane3` in the page URL
+ *   or `DartsClient.init({ board: 'lane3', ... })`. Without one, the server
+ *   assigns its default board.
+ *
+ * Resume:
+ *   Every throw carries a per-board sequence number (`dart.seq`). When the
+ *   connection drops and Socket.IO reconnects, the client sends the last
+ *   sequence it saw and the server re-sends only the throws it missed, so a
+ *   Wi-Fi blip doesn't lose darts. If the server no longer has them all (or
+ *   was restarted), `onResumeGap` is called so the game can resync.
+ *
+ * Late joins:
+ *   A page that opens a board (or switches to one) mid-round gets one
+ *   `onSnapshot(snapshot)` call right after connecting, served from the
+ *   server's memory: `snapshot.throws` (the board's newest throws, oldest
+ *   first, matching the page's subscription) and `snapshot.round` (turn,
+ *   player, that player's darts so far and the turn score, or null). Those
+ *   throws are not passed to onDartThrown again; live throws continue after them.
+ *
+ * Server-side games:
+ *   `DartsClient.joinGame('zombie-slayer', (state, delta) => render(state))`
+ *   follows the server's authoritative state for that game on this board: a
+ *   full snapshot on join (and after reconnects), then small deltas per throw.
+ *   Every display on the board shows the same state. Control the game with
+ *   `DartsClient.gameCommand('start')`.
+ *
+ * Subscriptions:
+ *   A page that needs less than every throw can say so, and the server only
+ *   sends what matches (see subscriptions.py):
+ *     DartsClient.init({
+ *       subscribe: { players: ['Alice'], events: ['dart3-thrown', 'darts_status'], board: 'lane2' },
+ *       onDartThrown: (dart) => ...
+ *     });
+ *   Leave out `players` for every player and `events` for every throw plus
+ *   status changes. Calling init() again with another subscription changes it.
+ *
+ * Compact wire:
+ *   Add `?wire=packed` to a game URL (or pass `wire: 'packed'` to init) to
+ *   receive throws as small binary 'dart_packed' frames instead of JSON. They
+ *   are decoded back into the same dart objects, so games don't change. The
+ *   server confirms the encoding in `darts_status.wire` (see wire.py).
+ *
+ * Metrics overlay:
+ *   Add `?metrics=1` to a game URL (or pass `metrics: true` to init) to show a
+ *   small overlay with the server's throw counts, stage latencies and client
+ *   counts, refreshed from /metrics/summary every 2 seconds.
  */
 
 const DartsClient = (function() {
@@ -22,7 +71,146 @@ const DartsClient = (function() {
     let socket = null;
     let isConnected = false;
     let dartsCallerConnected = false;
+    let boardId = null;
+    let lastSeq = null;   // Last throw sequence number seen on boardId
+    let epoch = null;     // Server run the sequence numbers belong to
     let handlers = {};
+    let overlayTimer = null;
+    let game = null;          // Server-side game this page follows (joinGame)
+    let gameHandler = null;
+    let gameState = null;
+    let gameVersion = 0;
+    let wire = null;          // Throw encoding asked for at connect ('packed'), null for JSON
+    let subscription = null;  // JSON text of the { players, events } filter, null for everything
+
+    /**
+     * Board requested by the page: init option first, then ?board= URL parameter
+     * @param {Object} options - Options passed to init()
+     * @returns {string|null} Board id, or null for the server default
+     */
+    function requestedBoard(options) {
+        if (options.board) {
+            return options.board;
+        }
+        if (options.subscribe && options.subscribe.board) {
+            return options.subscribe.board;
+        }
+        return new URLSearchParams(window.location.search).get('board');
+    }
+
+    /**
+     * Throw encoding requested by the page: init option first, then ?wire= URL parameter
+     * @param {Object} options - Options passed to init()
+     * @returns {string|null} Encoding name, or null for JSON
+     */
+    function requestedWire(options) {
+        if (options.wire) {
+            return options.wire;
+        }
+        return new URLSearchParams(window.location.search).get('wire');
+    }
+
+    /**
+     * The server-side filter requested by the page, as sent to the server
+     * @param {Object} options - Options passed to init()
+     * @returns {string|null} JSON text of { players, events }, or null for everything
+     */
+    function requestedSubscription(options) {
+        const subscribe = options.subscribe;
+        if (!subscribe || (!subscribe.players && !subscribe.events)) {
+            return null;
+        }
+        return JSON.stringify({ players: subscribe.players || null, events: subscribe.events || null });
+    }
+
+    /**
+     * Connection query for a board: the board plus the negotiated throw encoding and filter
+     * @param {string|null} board - Board id
+     * @returns {Object} Socket.IO query parameters
+     */
+    function connectQuery(board) {
+        const query = {};
+        if (board) {
+            query.board = board;
+        }
+        if (wire) {
+            query.wire = wire;
+        }
+        if (subscription) {
+            query.subscribe = subscription;
+        }
+        return query;
+    }
+
+    const THROW_EVENTS = ['dart1-thrown', 'dart2-thrown', 'dart3-thrown'];
+    const utf8 = new TextDecoder();
+
+    /**
+     * Decode a binary 'dart_packed' frame (layout in wire.py) into dart_thrown objects
+     * @param {ArrayBuffer|Uint8Array} frame - Frame bytes as delivered by Socket.IO
+     * @returns {Array<Object>} Darts, in order
+     */
+    function decodePacked(frame) {
+        const bytes = frame instanceof ArrayBuffer ? new Uint8Array(frame) : frame;
+        const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+        if (view.getUint8(0) !== 1) {
+            throw new Error('Unsupported packed frame version ' + view.getUint8(0));
+        }
+        const strings = [];
+        let offset = 2;
+        for (let i = view.getUint8(1); i > 0; i--) {
+            const length = view.getUint8(offset);
+            strings.push(utf8.decode(bytes.subarray(offset + 1, offset + 1 + length)));
+            offset += 1 + length;
+        }
+        const count = view.getUint16(offset, true);
+        offset += 2;
+
+        const darts = new Array(count);
+        for (let i = 0; i < count; i++) {
+            const seq = view.getUint32(offset, true);
+            const dart = {
+                event: THROW_EVENTS[view.getUint8(offset + 4) - 1] || 'unknown',
+                segment: view.getUint8(offset + 5),
+                multiplier: view.getUint8(offset + 6),
+                value: view.getUint8(offset + 7),
+                dartNumber: view.getUint8(offset + 8) || '?',
+                player: strings[view.getUint8(offset + 10)],
+                board: strings[view.getUint8(offset + 9)]
+            };
+            if (seq) {
+                dart.seq = seq;
+            }
+            const flags = view.getUint8(offset + 11);
+            offset += 12;
+            if (flags & 1) {
+                dart.ack = view.getFloat64(offset, true);
+                offset += 8;
+            }
+            darts[i] = dart;
+        }
+        return darts;
+    }
+
+    /**
+     * Pass a dart to the page, then ack it if the server asked (latency metrics)
+     * @param {Object} dart - dart_thrown payload
+     */
+    function handleDart(dart) {
+        if (dart.seq !== undefined) {
+            if (lastSeq !== null && dart.seq <= lastSeq) {
+                return;  // Already delivered
+            }
+            lastSeq = dart.seq;
+        }
+        console.log('DartsClient: Dart thrown:', dart);
+        if (handlers.onDartThrown) {
+            handlers.onDartThrown(dart);
+        }
+        if (dart.ack !== undefined && socket) {
+            socket.emit('dart_ack', { ack: dart.ack });
+        }
+    }
 
     /**
      * Initialize the darts client connection
@@ -31,9 +219,21 @@ const DartsClient = (function() {
      * @param {Function} options.onDisconnected - Called when disconnected from server
      * @param {Function} options.onDartsStatus - Called when darts-caller status changes
      * @param {Function} options.onDartThrown - Called when dart is thrown
+     * @param {Function} options.onResumeGap - Called after a reconnect that couldn't recover every missed throw
+     * @param {Function} options.onSnapshot - Called with the board's recent throws and round when joining a board
+     * @param {string} options.board - Board id to watch (defaults to ?board= or the server default)
+     * @param {boolean} options.metrics - Show the metrics overlay (defaults to ?metrics=1)
+     * @param {string} options.wire - 'packed' for compact binary throws (defaults to ?wire=, else JSON)
+     * @param {Object} options.subscribe - Only receive some throws: { players, events, board } (default: all)
      */
     function init(options = {}) {
         handlers = options;
+        const board = requestedBoard(options);
+        const filter = requestedSubscription(options);
+
+        if (options.metrics || new URLSearchParams(window.location.search).get('metrics') === '1') {
+            showMetricsOverlay();
+        }
 
         // If socket already exists, remove old listeners and update handlers
         if (socket) {
@@ -41,18 +241,78 @@ const DartsClient = (function() {
             socket.off('dart_thrown');  // Remove old dart_thrown listeners
 
             // Re-add dart_thrown listener with new handler
-            socket.on('dart_thrown', (dart) => {
-                console.log('DartsClient: Dart thrown:', dart);
-                if (handlers.onDartThrown) {
-                    handlers.onDartThrown(dart);
+            socket.on('dart_thrown', handleDart);
+            socket.off('dart_batch');
+            socket.on('dart_batch', (darts) => darts.forEach(handleDart));
+            socket.off('dart_packed');
+            socket.on('dart_packed', (frame) => decodePacked(frame).forEach(handleDart));
+
+            // Switch boards, or the filter, if this page asked for a different one
+            const switchBoard = board && board !== boardId;
+            if (switchBoard || filter !== subscription) {
+                subscription = filter;
+                socket.io.opts.query = connectQuery(switchBoard ? board : boardId);  // Keep it across reconnects
+                const request = { board: switchBoard ? board : boardId };
+                if (switchBoard) {
+                    lastSeq = null;
                 }
-            });
+                request.subscribe = filter === null ? null : JSON.parse(filter);
+                socket.emit('join_board', request);
+            }
             return;
         }
 
         // Initialize Socket.IO connection to Flask server
         console.log('DartsClient: Initializing connection...');
-        socket = io();
+        wire = requestedWire(options);
+        subscription = filter;
+        socket = io({ query: connectQuery(board) });
+
+        // Reconnecting: tell the server where we left off so it can re-send missed throws
+        socket.io.on('reconnect_attempt', () => {
+            const query = Object.assign({}, socket.io.opts.query);
+            if (boardId) {
+                query.board = boardId;
+            }
+            if (lastSeq !== null && epoch !== null) {
+                query.last_seq = lastSeq;
+                query.epoch = epoch;
+            }
+            socket.io.opts.query = query;
+        });
+
+        // Server-side game state: snapshot on join, then versioned deltas
+        socket.on('game_snapshot', (snapshot) => {
+            if (snapshot.game !== game) {
+                return;
+            }
+            gameState = snapshot.state;
+            gameVersion = snapshot.version;
+            if (gameHandler) {
+                gameHandler(gameState, null);
+            }
+        });
+
+        socket.on('game_delta', (delta) => {
+            if (delta.game !== game || gameState === null) {
+                return;
+            }
+            if (delta.version !== gameVersion + 1) {
+                // Missed a delta: start over from a fresh snapshot
+                socket.emit('join_game', { game: game });
+                return;
+            }
+            Object.assign(gameState, delta.set);
+            (delta.unset || []).forEach((key) => delete gameState[key]);
+            gameVersion = delta.version;
+            if (gameHandler) {
+                gameHandler(gameState, delta);
+            }
+        });
+
+        socket.on('game_error', (error) => {
+            console.error('DartsClient: Game error:', error);
+        });
 
         // Connection established
         socket.on('connect', () => {
@@ -71,6 +331,7 @@ const DartsClient = (function() {
             console.log('DartsClient: Disconnected from server');
             isConnected = false;
             dartsCallerConnected = false;
+            gameState = null;  // Resync with a snapshot after reconnecting
 
             if (handlers.onDisconnected) {
                 handlers.onDisconnected();
@@ -81,8 +342,29 @@ const DartsClient = (function() {
 
         // Darts-caller connection status update
         socket.on('darts_status', (data) => {
-            console.log('DartsClient: Darts-caller status:', data.connected);
+            console.log('DartsClient: Darts-caller status:', data.connected, 'board:', data.board);
+            if (data.wire && wire && data.wire !== wire) {
+                console.warn('DartsClient: Server does not support wire=' + wire + ', using ' + data.wire);
+                wire = null;
+            }
             dartsCallerConnected = data.connected;
+            if (data.board && data.board !== boardId) {
+                boardId = data.board;
+                lastSeq = null;
+                gameState = null;
+            }
+            if (game && gameState === null) {
+                // First status after (re)connecting or switching boards
+                socket.emit('join_game', { game: game });
+            }
+            if (data.epoch !== undefined && (data.epoch !== epoch || lastSeq === null)) {
+                // New server run or new board: start counting from the current throw
+                epoch = data.epoch;
+                lastSeq = data.seq;
+            }
+            if (data.gap && handlers.onResumeGap) {
+                handlers.onResumeGap(data);
+            }
 
             if (handlers.onDartsStatus) {
                 handlers.onDartsStatus(data.connected);
@@ -91,15 +373,26 @@ const DartsClient = (function() {
             updateConnectionStatus(isConnected, dartsCallerConnected);
         });
 
-        // Dart thrown event from darts-caller
-        socket.on('dart_thrown', (dart) => {
-            console.log('DartsClient: Dart thrown:', dart);
-
-            if (handlers.onDartThrown) {
-                handlers.onDartThrown(dart);
+        // Recent throws and the round in progress, sent once after joining a board
+        socket.on('board_snapshot', (snapshot) => {
+            if (snapshot.board !== boardId) {
+                return;
+            }
+            console.log('DartsClient: Board snapshot:', snapshot.throws.length, 'recent throws');
+            if (handlers.onSnapshot) {
+                handlers.onSnapshot(snapshot);
             }
         });
 
+        // Dart thrown event from darts-caller
+        socket.on('dart_thrown', handleDart);
+
+        // Several throws coalesced into one frame (a burst, or this client fell behind)
+        socket.on('dart_batch', (darts) => darts.forEach(handleDart));
+
+        // Compact binary throws (one or more per frame), if this client asked for wire=packed
+        socket.on('dart_packed', (frame) => decodePacked(frame).forEach(handleDart));
+
         // Pong response (for keep-alive)
         socket.on('pong', (data) => {
             dartsCallerConnected = data.connected;
@@ -146,6 +439,68 @@ const DartsClient = (function() {
         }
     }
 
+    /**
+     * Follow a game's server-side state on this board
+     * @param {string} name - Game name, e.g. 'zombie-slayer'
+     * @param {Function} handler - Called as handler(state, delta); delta is null for a full snapshot
+     */
+    function joinGame(name, handler) {
+        game = name;
+        gameHandler = handler;
+        gameState = null;
+        if (socket && isConnected) {
+            socket.emit('join_game', { game: name });
+        }
+    }
+
+    /**
+     * Send a command to the server-side game this page follows
+     * @param {string} action - e.g. 'start'
+     * @param {Object} data - Optional command data
+     */
+    function gameCommand(action, data) {
+        if (socket) {
+            socket.emit('game_command', { game: game, action: action, data: data || {} });
+        }
+    }
+
+    /**
+     * Show the compact metrics overlay and keep it refreshed
+     */
+    function showMetricsOverlay() {
+        if (overlayTimer) {
+            return;
+        }
+        const overlay = document.createElement('div');
+        overlay.className = 'metrics-overlay';
+        overlay.textContent = 'metrics...';
+        document.body.appendChild(overlay);
+
+        const ms = (value) => (value === null ? '-' : value.toFixed(1));
+        const refresh = () => {
+            fetch('/metrics/summary')
+                .then((response) => response.json())
+                .then((m) => {
+                    if (!m.enabled) {
+                        overlay.textContent = 'metrics off (DEADEYE_METRICS)';
+                        return;
+                    }
+                    const total = m.stages.total;
+                    const ack = m.stages.ack;
+                    overlay.textContent =
+                        `throws ${m.throws}  drops ${m.dropped}  reconn ${m.reconnects}  ` +
+                        `clients ${m.gauges.deadeye_web_clients}\n` +
+                        `ingest p50 ${ms(total.p50)} p95 ${ms(total.p95)} p99 ${ms(total.p99)} ms` +
+                        (ack.count ? `\nack p50 ${ms(ack.p50)} p95 ${ms(ack.p95)} ms` : '');
+                })
+                .catch(() => {
+                    overlay.textContent = 'metrics unavailable';
+                });
+        };
+        refresh();
+        overlayTimer = setInterval(refresh, 2000);
+    }
+
     /**
      * Get current connection status
      * @returns {Object} Connection status
@@ -153,7 +508,8 @@ const DartsClient = (function() {
     function getStatus() {
         return {
             serverConnected: isConnected,
-            dartsCallerConnected: dartsCallerConnected
+            dartsCallerConnected: dartsCallerConnected,
+            board: boardId
         };
     }
 
@@ -170,26 +526,36 @@ const DartsClient = (function() {
     // Public API
     return {
         init: init,
+        joinGame: joinGame,
+        gameCommand: gameCommand,
+        decodePacked: decodePacked,
         getStatus: getStatus,
         disconnect: disconnect
     };
 })();
 
+// Node (tools/bench_wire.py) loads this file for the decoder only
+if (typeof module !== 'undefined' && module.exports) {
+    module.exports = DartsClient;
+}
+
 // Auto-initialize if connection status element exists
-document.addEventListener('DOMContentLoaded', () => {
-    const statusElement = document.getElementById('connection-status');
-    if (statusElement) {
-        console.log('DartsClient: Auto-initializing...');
-        DartsClient.init({
-            onConnected: () => {
-                console.log('Connected to DeadEyeGames server');
-            },
-            onDisconnected: () => {
-                console.log('Disconnected from DeadEyeGames server');
-            },
-            onDartsStatus: (connected) => {
-                console.log('Darts-caller status:', connected ? 'Connected' : 'Disconnected');
-            }
-        });
-    }
-});
+if (typeof document !== 'undefined') {
+    document.addEventListener('DOMContentLoaded', () => {
+        const statusElement = document.getElementById('connection-status');
+        if (statusElement) {
+            console.log('DartsClient: Auto-initializing...');
+            DartsClient.init({
+                onConnected: () => {
+                    console.log('Connected to DeadEyeGames server');
+                },
+                onDisconnected: () => {
+                    console.log('Disconnected from DeadEyeGames server');
+                },
+                onDartsStatus: (connected) => {
+                    console.log('Darts-caller status:', connected ? 'Connected' : 'Disconnected');
+                }
+            });
+        }
+    });
+}
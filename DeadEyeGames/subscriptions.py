@@ -0,0 +1,208 @@
+"""
+DeadEyeGames Subscriptions - Per-browser filters for throws and board status
+
+By default every browser on a board gets every 'dart_thrown' and every
+'darts_status' change. A page can ask for less with
+DartsClient.init({subscribe: {...}}). darts-client.js sends the filter as
+?subscribe=<json> when it connects, and in join_board when it changes:
+
+    {"players": ["Alice"], "events": ["dart3-thrown", "darts_status"], "board": "lane2"}
+
+    players  only throws by these players (leave out for everyone)
+    events   throw events (dart1-thrown, dart2-thrown, dart3-thrown) and/or
+             darts_status (connection changes); leave out for all of them
+    board    the board to watch, like ?board=
+
+Browsers with the same filter share a room next to the board's unfiltered
+room. The filter is compiled into a predicate once, when its first browser
+subscribes, and player filters are indexed by name. For each throw the
+server only checks the filters that name its player or don't filter on
+players, once each, however many browsers share them. It then encodes and
+emits only to the rooms that match, so a throw nobody wants is never
+serialized.
+
+The darts_status reply to connect and join_board (board, seq, epoch, wire)
+is always sent. It is the handshake, not a status change.
+"""
+import json
+import threading
+
+from dart_events import THROW_EVENTS
+
+STATUS_EVENT = 'darts_status'
+EVENTS = THROW_EVENTS + (STATUS_EVENT,)
+MAX_PLAYERS = 64
+
+
+class InvalidSubscription(ValueError):
+    """A subscribe filter the server can't use"""
+
+
+def _always(dart_throw):
+    return True
+
+
+def _compile(players, events):
+    """A predicate over a dart_thrown payload that makes only the checks this filter needs"""
+    if players is None and events is None:
+        return _always
+    if players is None:
+        return lambda dart_throw: dart_throw['event'] in events
+    if events is None:
+        return lambda dart_throw: dart_throw['player'] in players
+    return lambda dart_throw: dart_throw['player'] in players and dart_throw['event'] in events
+
+
+class Subscription:
+    """One compiled filter; its key names the room its browsers share ('' for everything)"""
+
+    __slots__ = ('players', 'events', 'status', 'key', 'matches')
+
+    def __init__(self, players=None, events=None):
+        self.players = frozenset(players) if players else None
+        self.events = frozenset(events) if events else None
+        self.status = self.events is None or STATUS_EVENT in self.events
+        throw_events = None
+        if self.events is not None and not self.events.issuperset(THROW_EVENTS):
+            throw_events = self.events.intersection(THROW_EVENTS)
+        self.matches = _compile(self.players, throw_events)
+        if self.players is None and throw_events is None and self.status:
+            self.key = ''
+        else:
+            self.key = json.dumps([sorted(self.players) if self.players else None,
+                                   sorted(self.events) if self.events else None], separators=(',', ':'))
+
+    @property
+    def everything(self):
+        return not self.key
+
+    def to_dict(self):
+        """The filter as echoed back to the browser in darts_status.subscribe"""
+        return {'players': sorted(self.players) if self.players else None,
+                'events': sorted(self.events) if self.events else None}
+
+
+ALL = Subscription()
+
+
+def parse_subscription(value):
+    """
+    A browser's subscribe filter (JSON text from the query string, or a dict from join_board)
+
+    :returns: (Subscription, board id or None)
+    :raises InvalidSubscription: not an object, unknown event names, bad player lists
+    """
+    if value is None or value == '':
+        return ALL, None
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError as e:
+            raise InvalidSubscription(f"subscribe is not JSON: {e}") from None
+    if not isinstance(value, dict):
+        raise InvalidSubscription("subscribe must be an object")
+
+    players = value.get('players')
+    if players is not None:
+        if not isinstance(players, list) or not all(isinstance(player, str) for player in players):
+            raise InvalidSubscription("players must be a list of names")
+        if len(players) > MAX_PLAYERS:
+            raise InvalidSubscription(f"At most {MAX_PLAYERS} players per subscription")
+    events = value.get('events')
+    if events is not None:
+        if not isinstance(events, list) or not all(isinstance(event, str) for event in events):
+            raise InvalidSubscription("events must be a list of event names")
+        unknown = set(events).difference(EVENTS)
+        if unknown:
+            raise InvalidSubscription(f"Unknown events {sorted(unknown)} (use {', '.join(EVENTS)})")
+    board = value.get('board')
+    if board is not None and not isinstance(board, str):
+        raise InvalidSubscription("board must be a board id")
+
+    subscription = Subscription(players, events)
+    return (ALL if subscription.everything else subscription), board
+
+
+def subscription_room(room, subscription):
+    """Room for a board's browsers with this filter (unfiltered ones stay in the board/wire room)"""
+    return room if subscription.everything else f"{room}|{subscription.key}"
+
+
+class BoardView:
+    """A board's filtered rooms, indexed by player, as read per throw (replaced, never changed)"""
+
+    __slots__ = ('entries', 'by_player', 'any_player', 'status_rooms')
+
+    def __init__(self, entries):
+        self.entries = entries  # ((room, subscription, codec), ...)
+        self.by_player = {}     # player -> entries whose filter names that player
+        any_player = []
+        for entry in entries:
+            players = entry[1].players
+            if players is None:
+                any_player.append(entry)
+            else:
+                for player in players:
+                    self.by_player.setdefault(player, []).append(entry)
+        self.any_player = tuple(any_player)
+        self.status_rooms = [room for room, subscription, _ in entries if subscription.status]
+
+
+class SubscriptionIndex:
+    """
+    The filtered rooms that have browsers in them, per board
+
+    Player filters are indexed by name, so a throw only checks the rooms that
+    name its player (plus rooms that filter on events alone): the per-throw
+    cost doesn't grow with the number of players subscribed to on the board.
+    The ingest thread reads a board's view without a lock: it is rebuilt and
+    replaced, never changed, when browsers come and go.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counts = {}  # (board id, room) -> browsers in it
+        self.views = {}   # board id -> BoardView
+
+    def add(self, board_id, room, subscription, codec):
+        with self.lock:
+            key = (board_id, room)
+            self.counts[key] = self.counts.get(key, 0) + 1
+            if self.counts[key] == 1:
+                view = self.views.get(board_id)
+                self.views[board_id] = BoardView((view.entries if view else ()) + ((room, subscription, codec),))
+
+    def discard(self, board_id, room):
+        with self.lock:
+            key = (board_id, room)
+            count = self.counts.get(key, 0) - 1
+            if count > 0:
+                self.counts[key] = count
+                return
+            self.counts.pop(key, None)
+            view = self.views.get(board_id)
+            remaining = tuple(entry for entry in (view.entries if view else ()) if entry[0] != room)
+            if remaining:
+                self.views[board_id] = BoardView(remaining)
+            else:
+                self.views.pop(board_id, None)
+
+    def matching(self, board_id, dart_throw):
+        """(room, codec) for every filtered room on the board that wants this throw"""
+        view = self.views.get(board_id)
+        if view is None:
+            return []
+        rooms = [(room, codec) for room, subscription, codec in view.by_player.get(dart_throw['player'], ())
+                 if subscription.matches(dart_throw)]
+        for room, subscription, codec in view.any_player:
+            if subscription.matches(dart_throw):
+                rooms.append((room, codec))
+        return rooms
+
+    def status_rooms(self, board_id):
+        """Filtered rooms on the board that want darts_status changes"""
+        view = self.views.get(board_id)
+        return view.status_rooms if view is not None else []
+
+    def room_count(self):
+        return len(self.counts)
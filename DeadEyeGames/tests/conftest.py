@@ -0,0 +1,34 @@
+"""
+Helpers and fixtures shared by the in-process server tests
+"""
+import json
+
+import pytest
+
+import server
+from backlog import ThrowBacklog
+
+
+def dart_message(segment=20, multiplier=1, player='Alice', dart_number=1):
+    """A darts-caller style dart message, as server.on_darts_message receives it"""
+    return json.dumps({'event': f'dart{dart_number}-thrown', 'player': player,
+                       'game': {'fieldNumber': segment, 'fieldMultiplier': multiplier,
+                                'dartValue': segment * multiplier, 'dartNumber': dart_number}})
+
+
+def throw(dart_number, player='Alice', value=20):
+    """The parts of a decoded throw the backlog's round context reads"""
+    return {'event': f'dart{dart_number}-thrown', 'player': player, 'value': value, 'dartNumber': dart_number}
+
+
+def received(client, name):
+    """Arguments of every `name` event a Socket.IO test client has received since the last call"""
+    return [msg['args'][0] for msg in client.get_received() if msg['name'] == name]
+
+
+@pytest.fixture
+def fresh_backlog(monkeypatch):
+    """Swap the server's throw backlog for an empty one"""
+    fresh = ThrowBacklog(capacity=10, snapshot_throws=4)
+    monkeypatch.setattr(server, 'backlog', fresh)
+    return fresh
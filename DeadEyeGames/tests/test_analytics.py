@@ -0,0 +1,138 @@
+"""
+Test cases for the columnar throw analytics and the /api/stats endpoints
+"""
+import json
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+import server  # noqa: E402
+from analytics import ThrowAnalytics  # noqa: E402
+from dart_events import DartThrow  # noqa: E402
+from journal import JournalReader, JournalWriter  # noqa: E402
+
+
+def dart(segment, multiplier=1, player='Alice'):
+    value = segment * multiplier if multiplier else 0
+    return DartThrow('dart1-thrown', segment, multiplier, value, 1, player)
+
+
+def random_darts(count, seed=7):
+    rng = random.Random(seed)
+    darts = []
+    for _ in range(count):
+        segment = rng.choice([0, 25] + list(range(1, 21)))
+        multiplier = 0 if segment == 0 else rng.choice((1, 2) if segment == 25 else (1, 1, 2, 3))
+        darts.append(dart(segment, multiplier, rng.choice(('Alice', 'Bob', 'Carol'))))
+    return darts
+
+
+@pytest.fixture
+def stats(monkeypatch):
+    analytics = ThrowAnalytics(capacity=4)
+    monkeypatch.setattr(server, 'analytics', analytics)
+    return analytics
+
+
+def test_incremental_stats():
+    analytics = ThrowAnalytics()
+    for thrown in (dart(20, 3), dart(20, 1), dart(0, 0), dart(16, 2), dart(25, 2), dart(5, 1)):
+        analytics.add(thrown)
+    alice = analytics.player('Alice')
+    assert alice['darts'] == 6
+    assert alice['points'] == 60 + 20 + 32 + 50 + 5
+    assert alice['average'] == round(3 * 167 / 6, 2)
+    assert alice['trebles'] == 1 and alice['doubles'] == 2 and alice['bullseyes'] == 1
+    assert alice['misses'] == 1
+    assert alice['longestStreak'] == 3 and alice['currentStreak'] == 3
+    assert alice['favouriteDouble'] == 16
+    assert alice['heatmap']['20'] == [1, 0, 1]
+    assert analytics.player('Nobody') is None
+
+
+def test_recompute_matches_incremental():
+    """The vectorized rebuild gives exactly the aggregates the per-throw updates built"""
+    analytics = ThrowAnalytics(capacity=8)
+    for index, thrown in enumerate(random_darts(3000)):
+        analytics.add(thrown, timestamp=1000.0 + index)
+    incremental = json.dumps(analytics.summary(), sort_keys=True)
+    heat = analytics.heat.copy()
+
+    analytics.recompute()
+    analytics._cache.clear()
+    assert json.dumps(analytics.summary(), sort_keys=True) == incremental
+    assert (analytics.heat == heat).all()
+
+
+def test_load_journal(tmp_path):
+    darts = random_darts(500, seed=3)
+    writer = JournalWriter(str(tmp_path), max_bytes=8 * 1024)  # several files
+    for index, thrown in enumerate(darts):
+        writer.append('lane1', thrown, timestamp=2000.0 + index)
+    writer.close()
+    assert len(JournalReader(str(tmp_path)).files) > 1
+
+    loaded = ThrowAnalytics()
+    recomputes = []
+    rebuild = loaded._recompute
+    loaded._recompute = lambda: recomputes.append(1) or rebuild()
+    assert loaded.load_journal(str(tmp_path)) == 500
+    assert len(recomputes) == 1  # once for all the files
+    expected = ThrowAnalytics()
+    for index, thrown in enumerate(darts):
+        expected.add(thrown, timestamp=2000.0 + index)
+    assert loaded.summary() == expected.summary()
+
+    # Live throws keep updating the loaded aggregates
+    loaded.add(dart(20, 3, 'Alice'))
+    assert loaded.player('Alice')['darts'] == expected.player('Alice')['darts'] + 1
+
+
+def test_stats_api_and_etag(stats):
+    client = server.app.test_client()
+    server.on_darts_message('default', json.dumps({
+        'event': 'dart1-thrown', 'player': 'Alice',
+        'game': {'fieldNumber': 20, 'fieldMultiplier': 3, 'dartValue': 60}}))
+
+    response = client.get('/api/stats')
+    assert response.status_code == 200
+    (alice,) = response.get_json()['players']
+    assert alice['player'] == 'Alice' and alice['average'] == 180.0
+
+    etag = response.headers['ETag']
+    assert client.get('/api/stats', headers={'If-None-Match': etag}).status_code == 304
+
+    stats.add(dart(1))
+    assert client.get('/api/stats', headers={'If-None-Match': etag}).status_code == 200
+
+    detail = client.get('/api/stats/player/Alice').get_json()
+    assert detail['heatmap']['20'] == [0, 0, 1]
+    assert client.get('/api/stats/player/Nobody').status_code == 404
+
+
+def test_live_throws_wait_for_the_journal(tmp_path, monkeypatch):
+    """run_server loads analytics in the background: throws meanwhile are added after the journal"""
+    writer = JournalWriter(str(tmp_path))
+    writer.append('lane1', dart(20, 3), timestamp=1000.0)
+    writer.append('lane1', dart(1), timestamp=1001.0)
+    writer.close()
+    monkeypatch.setattr(server, 'analytics', None)
+    monkeypatch.setattr(server, 'analytics_pending', [])
+
+    server.record_analytics(dart(5, player='Bob'))
+    response = server.app.test_client().get('/api/stats')
+    assert response.status_code == 503 and 'loading' in response.get_json()['error']
+
+    server.load_analytics(str(tmp_path))
+    assert server.analytics_pending is None
+    summary = server.analytics.summary()
+    assert summary['throws'] == 3 and [p['player'] for p in summary['players']] == ['Alice', 'Bob']
+    server.record_analytics(dart(5, player='Bob'))
+    assert server.analytics.summary()['throws'] == 4
+
+
+def test_stats_api_off(monkeypatch):
+    monkeypatch.setattr(server, 'analytics', None)
+    assert server.app.test_client().get('/api/stats').status_code == 503
@@ -0,0 +1,94 @@
+"""
+Test cases for the precompressed in-memory asset cache
+"""
+import gzip
+import os
+
+import server
+from assets import IMMUTABLE, REVALIDATE, AssetCache
+
+
+def make_tree(root):
+    os.makedirs(os.path.join(root, 'games', 'demo'))
+    os.makedirs(os.path.join(root, 'static', 'js'))
+    with open(os.path.join(root, 'static', 'js', 'app.js'), 'w') as f:
+        f.write('console.log("dart");\n' * 100)
+    with open(os.path.join(root, 'games', 'demo', 'demo.html'), 'w') as f:
+        f.write('<script src="/static/js/app.js"></script><a href="/">home</a>')
+
+
+def test_files_are_precompressed_and_hashed(tmp_path):
+    make_tree(str(tmp_path))
+    cache = AssetCache(str(tmp_path))
+    asset = cache.get('static/js/app.js')
+
+    assert asset.mimetype in ('application/javascript', 'text/javascript')
+    assert gzip.decompress(asset.encoded['gzip']) == asset.data
+    assert asset.body_for('gzip, deflate') == (asset.encoded['gzip'], 'gzip')
+    assert asset.body_for('') == (asset.data, None)
+    assert cache.get('static/js/missing.js') is None
+
+
+def test_compression_can_wait_for_first_request(tmp_path):
+    """server.py builds the cache uncompressed and compresses in the background once serving"""
+    make_tree(str(tmp_path))
+    cache = AssetCache(str(tmp_path), precompress=False)
+    asset = cache.get('static/js/app.js')
+    assert asset.encoded is None
+
+    body, encoding = asset.body_for('gzip')
+    assert encoding == 'gzip' and gzip.decompress(body) == asset.data
+    assert cache.precompress() == 1  # the page; app.js was compressed by its request
+    assert cache.precompress() == 0
+
+
+def test_pages_reference_versioned_urls(tmp_path):
+    make_tree(str(tmp_path))
+    cache = AssetCache(str(tmp_path))
+    page = cache.get('games/demo/demo.html').data.decode()
+    assert f'src="/static/js/app.js?v={cache.get("static/js/app.js").hash}"' in page
+    assert 'href="/"' in page
+
+
+def test_watch_mode_picks_up_changes(tmp_path):
+    """In dev mode an edited file gets a new hash and the page that uses it is rewritten"""
+    make_tree(str(tmp_path))
+    cache = AssetCache(str(tmp_path), watch=True, check_interval=0)
+    old_hash = cache.get('static/js/app.js').hash
+
+    path = os.path.join(str(tmp_path), 'static', 'js', 'app.js')
+    with open(path, 'w') as f:
+        f.write('console.log("changed");')
+    os.utime(path, ns=(1, 1))
+
+    new_hash = cache.get('static/js/app.js').hash
+    assert new_hash != old_hash
+    assert f'?v={new_hash}' in cache.get('games/demo/demo.html').data.decode()
+
+
+def test_served_with_etag_and_304():
+    client = server.app.test_client()
+    response = client.get('/static/js/darts-client.js', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 200
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['Cache-Control'] == REVALIDATE
+    etag = response.headers['ETag']
+
+    again = client.get('/static/js/darts-client.js', headers={'If-None-Match': etag})
+    assert again.status_code == 304
+    assert again.data == b''
+
+
+def test_versioned_url_is_immutable():
+    """Game pages link hashed URLs, which browsers may cache forever"""
+    client = server.app.test_client()
+    page = client.get('/games/zombie-slayer').get_data(as_text=True)
+    url = '/static/js/darts-client.js?v=' + server.assets.get('static/js/darts-client.js').hash
+    assert url in page
+    assert client.get(url).headers['Cache-Control'] == IMMUTABLE
+    assert client.get('/static/js/darts-client.js?v=stale').headers['Cache-Control'] == REVALIDATE
+
+
+def test_unknown_asset_is_404():
+    assert server.app.test_client().get('/games/zombie-slayer/../../server.py').status_code == 404
+    assert server.app.test_client().get('/static/js/nope.js').status_code == 404
@@ -0,0 +1,91 @@
+"""
+Test cases for multi-board ingestion
+Runs in-process with the Flask-SocketIO test client - no darts-caller or browser needed
+"""
+import pytest
+
+import server
+from boards import DEFAULT_BOARD_ID, DEFAULT_DARTS_CALLER_URL, BoardManager, parse_boards
+from conftest import dart_message
+
+
+@pytest.fixture
+def two_boards(monkeypatch):
+    """Swap the server's board manager for one with two (unstarted) boards"""
+    manager = BoardManager(
+        parse_boards('lane1=https://10.0.0.11:8079,lane2=https://10.0.0.12:8079'),
+        on_message=server.on_darts_message,
+        on_status=server.on_board_status,
+    )
+    monkeypatch.setattr(server, 'board_manager', manager)
+    return manager
+
+
+def test_parse_boards_default():
+    """No configuration keeps the original single darts-caller"""
+    assert parse_boards('') == {DEFAULT_BOARD_ID: DEFAULT_DARTS_CALLER_URL}
+
+
+def test_parse_boards_multiple():
+    """Board ids and URLs are parsed in order"""
+    boards = parse_boards('lane1=https://a:8079, lane2=https://b:8079')
+    assert list(boards.items()) == [('lane1', 'https://a:8079'), ('lane2', 'https://b:8079')]
+
+
+def test_parse_boards_rejects_duplicates():
+    """The same board id can't be configured twice"""
+    with pytest.raises(ValueError):
+        parse_boards('lane1=https://a:8079,lane1=https://b:8079')
+
+
+def test_parse_boards_rejects_ids_the_journal_cant_hold():
+    """Ids up to 16 bytes of UTF-8 fit the journal's board field; longer ones would come back truncated"""
+    assert list(parse_boards('lane-sixteen-b16=https://a:8079')) == ['lane-sixteen-b16']
+    with pytest.raises(ValueError):
+        parse_boards('main-hall-lane-1=https://a:8079,main-hall-lane-10=https://b:8079')
+    with pytest.raises(ValueError):
+        parse_boards('bühne-lane-12345=https://a:8079')  # 16 characters, 17 bytes
+
+
+def test_throw_only_reaches_its_board(two_boards):
+    """A throw on one board is sent only to that board's room"""
+    lane1 = server.web_socketio.test_client(server.app, query_string='board=lane1')
+    lane2 = server.web_socketio.test_client(server.app, query_string='board=lane2')
+    lane1.get_received()
+    lane2.get_received()
+
+    server.on_darts_message('lane1', dart_message(20, 3))
+
+    received = lane1.get_received()
+    assert [msg['name'] for msg in received] == ['dart_thrown']
+    dart = received[0]['args'][0]
+    assert dart['board'] == 'lane1'
+    assert dart['value'] == 60
+    assert lane2.get_received() == []
+
+    lane1.disconnect()
+    lane2.disconnect()
+
+
+def test_unknown_board_falls_back_to_default(two_boards):
+    """Clients asking for an unknown board are put on the default board"""
+    client = server.web_socketio.test_client(server.app, query_string='board=nope')
+    status = client.get_received()[0]
+    assert status['name'] == 'darts_status'
+    assert status['args'][0]['board'] == 'lane1'
+    client.disconnect()
+
+
+def test_join_board_switches_rooms(two_boards):
+    """join_board moves a client from one board's room to another"""
+    client = server.web_socketio.test_client(server.app, query_string='board=lane1')
+    client.emit('join_board', {'board': 'lane2'})
+    client.get_received()
+
+    server.on_darts_message('lane1', dart_message(20, 3))
+    assert client.get_received() == []
+
+    server.on_darts_message('lane2', dart_message(20, 3, player='Bob'))
+    received = client.get_received()
+    assert received[0]['args'][0]['player'] == 'Bob'
+    client.disconnect()
@@ -0,0 +1,149 @@
+"""
+Test cases for the cluster bus and the ingest/worker roles of the server
+"""
+import io
+import socket
+import threading
+import time
+
+import pytest
+
+import server
+from bus import BusPublisher, BusSubscriber, _Subscriber, assign_boards, encode, parse_address, read_messages
+
+
+def throw(seq, segment=20, player='Alice', board='default'):
+    return {'event': 'dart1-thrown', 'segment': segment, 'multiplier': 1, 'value': segment,
+            'dartNumber': 1, 'player': player, 'board': board, 'seq': seq}
+
+
+def darts(client):
+    return [msg['args'][0] for msg in client.get_received() if msg['name'] == 'dart_thrown']
+
+
+def test_frames_round_trip():
+    messages = [{'type': 'status', 'board': 'lane1', 'connected': True}, {'type': 'throw', 'throw': throw(1)}]
+    stream = io.BytesIO(b''.join(encode(message) for message in messages) + encode({'cut': 'off'})[:-3])
+    assert list(read_messages(stream)) == messages  # a truncated last frame ends the stream
+
+
+def test_addresses_and_routing():
+    assert parse_address('tcp:127.0.0.1:7001') == (socket.AF_INET, ('127.0.0.1', 7001))
+    assert parse_address('unix:/tmp/bus.sock')[1] == '/tmp/bus.sock'
+    with pytest.raises(ValueError):
+        parse_address('127.0.0.1:7001')
+    assert assign_boards(['lane1', 'lane2', 'lane3', 'lane4', 'lane5'], 2) == \
+        {'lane1': 0, 'lane2': 1, 'lane3': 0, 'lane4': 1, 'lane5': 0}
+
+
+def test_publisher_to_subscriber(tmp_path):
+    """A subscriber gets the hello first, then every message in order, and reconnects"""
+    address = f"unix:{tmp_path / 'bus.sock'}"
+    publisher = BusPublisher(address, hello=lambda: {'type': 'hello', 'n': len(received)}).start()
+    received, disconnects = [], []
+    subscriber = BusSubscriber(address, received.append, lambda: disconnects.append(True), sleep=time.sleep)
+    threading.Thread(target=subscriber.run, daemon=True).start()
+
+    def wait_for(condition):
+        deadline = time.time() + 5
+        while not condition() and time.time() < deadline:
+            time.sleep(0.01)
+        assert condition()
+
+    wait_for(lambda: received)
+    for n in range(100):
+        publisher.publish({'type': 'throw', 'n': n})
+    wait_for(lambda: len(received) == 101)
+    assert received[0] == {'type': 'hello', 'n': 0}
+    assert [message['n'] for message in received[1:]] == list(range(100))
+
+    # The ingest process restarts: the subscriber notices and comes back for a new hello
+    publisher.close()
+    wait_for(lambda: disconnects)
+    publisher = BusPublisher(address, hello=lambda: {'type': 'hello', 'n': len(received)}).start()
+    wait_for(lambda: len(received) == 102)
+    assert received[-1] == {'type': 'hello', 'n': 101}
+    subscriber.stop()
+    publisher.close()
+
+
+def test_stalled_subscriber_is_cut_off():
+    """A subscriber that stops reading overflows its own buffer instead of blocking the publisher"""
+    ours, theirs = socket.socketpair()
+    closed = []
+    subscriber = _Subscriber(ours, max_pending=4, on_close=closed.append)
+    subscriber.start()
+    frame = encode({'type': 'throw', 'padding': 'x' * 65536})
+    accepted = [subscriber.send(frame) for _ in range(200)]  # nobody reads `theirs`
+    assert accepted[0] and not all(accepted)
+    subscriber.close()
+    theirs.close()
+
+
+def test_backlog_record_and_adopt(fresh_backlog):
+    sent = []
+    assert fresh_backlog.record('lane1', throw(1), sent.append)
+    assert fresh_backlog.record('lane1', throw(2), sent.append)
+    assert not fresh_backlog.record('lane1', throw(2), sent.append)  # a duplicate is sent once
+    assert [t['seq'] for t in sent] == [1, 2]
+    assert fresh_backlog.recent() == {'lane1': [throw(1), throw(2)]}
+
+    assert not fresh_backlog.adopt(fresh_backlog.epoch)
+    assert fresh_backlog.adopt('ingest-run')
+    assert fresh_backlog.epoch == 'ingest-run' and fresh_backlog.last_seq('lane1') == 0
+
+
+def test_ingest_publishes_numbered_throws(monkeypatch, fresh_backlog):
+    """The ingest process numbers throws and puts them on the bus instead of emitting to browsers"""
+    published = []
+
+    class Publisher:
+        def publish(self, message):
+            published.append(message)
+
+    monkeypatch.setattr(server, 'bus_publisher', Publisher())
+    browser = server.web_socketio.test_client(server.app)
+    browser.get_received()
+
+    server.on_darts_message('default', '{"event": "dart1-thrown", "player": "Alice", '
+                                       '"game": {"fieldNumber": 20, "fieldMultiplier": 3, "dartValue": 60}}')
+    (message,) = published
+    assert message['type'] == 'throw' and message['board'] == 'default'
+    assert message['throw']['seq'] == 1 and message['throw']['value'] == 60
+    assert darts(browser) == []
+    assert server.bus_hello()['recent'] == {'default': [message['throw']]}
+    browser.disconnect()
+
+
+def test_worker_delivers_and_resumes(fresh_backlog):
+    """A worker sends bus throws to its browsers with the ingest process's numbering"""
+    server.on_bus_message({'type': 'hello', 'epoch': 'run-1', 'boards': {'default': True},
+                           'recent': {'default': [throw(1), throw(2)]}})
+    assert fresh_backlog.epoch == 'run-1' and fresh_backlog.last_seq('default') == 2
+
+    browser = server.web_socketio.test_client(server.app)
+    status = browser.get_received()[0]['args'][0]
+    assert status['connected'] is True and status['epoch'] == 'run-1'
+
+    server.on_bus_message({'type': 'throw', 'board': 'default', 'throw': throw(3, 19), 'sent': time.time()})
+    server.on_bus_message({'type': 'throw', 'board': 'default', 'throw': throw(3, 19), 'sent': time.time()})
+    assert [(t['seq'], t['segment']) for t in darts(browser)] == [(3, 19)]
+    browser.disconnect()
+
+    # A browser that comes back (to any worker) resumes from the shared numbering
+    resumed = server.web_socketio.test_client(server.app, query_string='last_seq=1&epoch=run-1')
+    assert [t['seq'] for t in darts(resumed)] == [2, 3]
+    resumed.disconnect()
+
+    server.on_bus_disconnect()
+    assert server.board_manager.is_connected('default') is False
+
+
+def test_ingest_redirects_browsers_to_their_worker(monkeypatch):
+    monkeypatch.setattr(server, 'worker_routes', {'default': 5002})
+    client = server.app.test_client()
+    response = client.get('/games/zombie-slayer?board=default')
+    assert response.status_code == 307
+    assert response.headers['Location'] == 'http://localhost:5002/games/zombie-slayer?board=default'
+    assert client.get('/').headers['Location'] == 'http://localhost:5002/'
+    assert client.get('/metrics').status_code == 200
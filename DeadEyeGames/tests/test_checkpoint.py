@@ -0,0 +1,159 @@
+"""
+Test cases for hot restart: session state checkpointed on shutdown and restored on boot, and /ready
+"""
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+from werkzeug.serving import make_server
+
+import server
+from backlog import ThrowBacklog
+from checkpoint import CheckpointStore
+from conftest import dart_message, throw
+from dart_events import DartThrow
+from game_state import GameEngine
+
+
+@pytest.fixture
+def fresh_state(monkeypatch, tmp_path):
+    """A new backlog, game engine and checkpoint file, as a fresh server run has"""
+    def new_run():
+        monkeypatch.setattr(server, 'backlog', ThrowBacklog(capacity=10))
+        monkeypatch.setattr(server, 'game_engine', GameEngine())
+        monkeypatch.setattr(server, 'checkpoints', CheckpointStore(str(tmp_path / 'server-5001.json')))
+    new_run()
+    return new_run
+
+
+def test_store_is_read_once(tmp_path, monkeypatch):
+    store = CheckpointStore(str(tmp_path / 'checkpoints' / 'server-5001.json'))
+    assert store.take() == (None, None)
+    assert store.save({'backlog': {'epoch': '1', 'boards': {}}}) > 0
+    assert not os.path.exists(store.path + '.tmp')
+
+    state, age = store.take()
+    assert state == {'backlog': {'epoch': '1', 'boards': {}}} and 0 <= age < 5
+    assert store.take() == (None, None)  # deleted once read
+
+    store.save({})
+    stale = CheckpointStore(store.path, max_age=0)
+    time.sleep(0.01)
+    assert stale.take() == (None, None) and not os.path.exists(store.path)
+
+    with open(store.path, 'w') as f:
+        f.write('{"version": 1, "saved": ')  # torn or hand-edited
+    assert store.take() == (None, None)
+
+    monkeypatch.setenv('DEADEYE_CHECKPOINT', 'off')
+    assert CheckpointStore.from_env(str(tmp_path), 'server-5001.json') is None
+
+
+def test_backlog_carries_on_numbering():
+    backlog = ThrowBacklog(capacity=3)
+    for n in range(1, 6):
+        backlog.publish('lane1', throw(n % 3 + 1, value=n), lambda t: None)
+    state = json.loads(json.dumps(backlog.checkpoint()))
+
+    restored = ThrowBacklog(capacity=2)
+    assert restored.restore(state) == 2  # trimmed to this backlog's capacity
+    assert restored.epoch == backlog.epoch and restored.last_seq('lane1') == 5
+    assert restored.rounds['lane1'].to_dict() == backlog.rounds['lane1'].to_dict()
+
+    sent = []
+    assert restored.resume('lane1', 3, backlog.epoch, lambda: None, sent.append) == (2, False)
+    assert [t['seq'] for t in sent] == [4, 5]
+    assert restored.publish('lane1', throw(1), lambda t: None) == 6
+
+
+def test_game_rooms_keep_state_and_version():
+    engine = GameEngine()
+    room = engine.room('lane1', 'zombie-slayer')
+    room.command('start', None, lambda delta: None)
+    room.apply_throw(DartThrow('dart1-thrown', 20, 1, 20, 1, 'Alice'), lambda delta: None)
+    rooms = json.loads(json.dumps(engine.checkpoint()))
+
+    restored = GameEngine()
+    assert restored.restore(rooms + [{'board': 'lane1', 'game': 'retired-game', 'version': 3, 'state': {}}]) == 1
+    again = restored.room('lane1', 'zombie-slayer')
+    assert (again.version, again.state) == (room.version, room.state)
+    assert restored.by_board['lane1'] == [again]
+
+
+def test_browser_resumes_across_a_restart(fresh_state):
+    for dart_number, player in ((1, 'Alice'), (2, 'Alice'), (3, 'Alice')):
+        server.on_darts_message('default', dart_message(dart_number=dart_number, player=player))
+    client = server.web_socketio.test_client(server.app)
+    status = client.get_received()[0]['args'][0]
+    client.disconnect()
+    epoch = server.backlog.epoch
+    server.game_engine.room('default', 'zombie-slayer').command('start', None, lambda delta: None)
+    server.save_checkpoint()
+
+    fresh_state()  # the next run
+    restored = server.restore_checkpoint()
+    assert restored['epoch'] == epoch and restored['throws'] == 3 and restored['games'] == 1
+    assert server.restore_checkpoint() is None  # used once
+    server.on_darts_message('default', dart_message(dart_number=1, player='Bob'))
+
+    back = server.web_socketio.test_client(server.app, query_string=f"last_seq={status['seq']}&epoch={epoch}")
+    received = back.get_received()
+    status, = [msg['args'][0] for msg in received if msg['name'] == 'darts_status']
+    assert status['gap'] is False and status['epoch'] == epoch
+    assert [msg['args'][0]['seq'] for msg in received if msg['name'] == 'dart_thrown'] == [4]
+
+    back.emit('join_game', {'game': 'zombie-slayer'})
+    snapshot, = [msg['args'][0] for msg in back.get_received() if msg['name'] == 'game_snapshot']
+    assert snapshot['version'] == 2 and snapshot['state']['throws'] == 1  # started, then Bob's dart
+    back.disconnect()
+
+
+def test_ready_reports_web_and_upstream_apart(monkeypatch):
+    client = server.app.test_client()
+    response = client.get('/ready')
+    assert response.status_code == 503 and response.get_json()['ready'] is False
+
+    monkeypatch.setitem(server.startup, 'serving', time.monotonic())
+    monkeypatch.setitem(server.startup, 'source', 'boards')
+    server.board_manager.set_connected('default', False)
+    body = client.get('/ready').get_json()
+    assert body['ready'] and body['web']['ready']
+    assert body['upstream'] == {'ready': False, 'source': 'boards', 'boards': {'default': False}}
+
+    server.board_manager.set_connected('default', True)
+    try:
+        assert client.get('/ready').get_json()['upstream']['ready'] is True
+    finally:
+        server.board_manager.set_connected('default', False)
+
+
+def test_ready_once_bound_and_started(monkeypatch):
+    """/ready stays 503 until the web server answers and the startup tasks are done"""
+    monkeypatch.setitem(server.startup, 'serving', None)
+    web = make_server('127.0.0.1', 0, server.app, threaded=True)
+    threading.Thread(target=web.serve_forever, daemon=True).start()
+    compressed = threading.Event()
+    precompress = threading.Thread(target=compressed.wait)
+    precompress.start()
+    announcer = threading.Thread(target=server.announce_serving, args=('0.0.0.0', web.port, [precompress]))
+    announcer.start()
+
+    def status():
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{web.port}/ready', timeout=2) as response:
+                return response.status
+        except urllib.error.HTTPError as e:
+            return e.code
+
+    try:
+        assert status() == 503
+        compressed.set()
+        announcer.join(5)
+        assert not announcer.is_alive() and status() == 200
+    finally:
+        compressed.set()
+        web.shutdown()
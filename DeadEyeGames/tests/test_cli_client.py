@@ -0,0 +1,77 @@
+"""
+Test cases for the DeadEyeDarts CLI client's headless JSON-lines mode
+"""
+import io
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '..', 'DeadEyeDarts'))
+from deadeyedarts_client import ThrowTap  # noqa: E402
+
+
+def message(dart_number=1, player='Alice', segment=20, multiplier=3, **game):
+    game = dict({'fieldNumber': segment, 'fieldMultiplier': multiplier, 'dartValue': segment * multiplier,
+                 'dartNumber': dart_number}, **game)
+    return json.dumps({'event': f'dart{dart_number}-thrown', 'player': player, 'game': game})
+
+
+@pytest.fixture
+def out():
+    return io.StringIO()
+
+
+def lines(out):
+    return [json.loads(line) for line in out.getvalue().splitlines()]
+
+
+def test_one_json_line_per_throw(out):
+    tap = ThrowTap(out, wall_clock=lambda: 1700000000.25)
+    tap.on_message(message(1))
+    tap.on_message(json.dumps({'event': 'darts-pulled', 'player': 'Alice'}))
+    tap.on_message(message(2, player='Bo "Quotes" B', segment=25, multiplier=2))
+    tap.close()
+
+    first, second = lines(out)
+    assert first == {'event': 'dart1-thrown', 'segment': 20, 'multiplier': 3, 'value': 60, 'dartNumber': 1,
+                     'player': 'Alice', 't': 1700000000.25}
+    assert second['player'] == 'Bo "Quotes" B' and second['value'] == 50
+    summary = tap.summary()
+    assert (summary['messages'], summary['throws'], summary['written']) == (3, 2, 2)
+    assert summary['lag_ms']['p99'] is not None
+
+
+def test_formatted_line_matches_json_dumps(out):
+    """The hand-formatted line is exactly the compact JSON of to_dict() plus 't'"""
+    tap = ThrowTap(out)
+    for raw in (message(1), message(3, player='Zoë \\ 1'), message(2, dartNumber='?'), message(1, segment=0)):
+        tap.on_message(raw)
+    tap.close()
+    for line in out.getvalue().splitlines():
+        assert line == json.dumps(json.loads(line), separators=(',', ':'), ensure_ascii=True)
+
+
+def test_filters(out):
+    tap = ThrowTap(out, events=['dart3-thrown'], players=['Alice'])
+    for dart_number in (1, 2, 3):
+        for player in ('Alice', 'Bob'):
+            tap.on_message(message(dart_number, player=player))
+    tap.on_message('{"event": "dart1-thrown", "game": {"fieldNumber": "x"}}')
+    tap.close()
+
+    assert [(line['dartNumber'], line['player']) for line in lines(out)] == [(3, 'Alice')]
+    summary = tap.summary()
+    assert (summary['written'], summary['filtered'], summary['malformed']) == (1, 5, 1)
+
+
+def test_block_buffered_until_flush(tmp_path):
+    path = tmp_path / 'throws.jsonl'
+    with open(path, 'w', encoding='utf-8', buffering=64 * 1024) as f:
+        tap = ThrowTap(f)
+        for _ in range(10):
+            tap.on_message(message())
+        assert path.read_text() == ''  # nothing written per line
+        tap.flush()
+        assert len(path.read_text().splitlines()) == 10
@@ -0,0 +1,79 @@
+"""
+Test cases for the shared darts-caller message decoder
+"""
+import json
+
+import pytest
+
+from dart_events import DartThrow, MalformedMessage, decode_message
+
+
+def throw_message(**game):
+    fields = {'fieldNumber': 20, 'fieldMultiplier': 3, 'dartValue': 60, 'dartNumber': 2}
+    fields.update(game)
+    return json.dumps({'event': 'dart2-thrown', 'player': 'Alice', 'game': fields})
+
+
+def test_decodes_throw():
+    """A throw message becomes a DartThrow with the browser payload shape"""
+    dart = decode_message(throw_message())
+    assert dart == DartThrow('dart2-thrown', 20, 3, 60, 2, 'Alice')
+    assert dart.multiplier_name == 'Triple'
+    assert dart.to_dict('lane1') == {
+        'event': 'dart2-thrown', 'segment': 20, 'multiplier': 3, 'value': 60,
+        'dartNumber': 2, 'player': 'Alice', 'board': 'lane1',
+    }
+
+
+def test_accepts_parsed_dicts_and_bytes():
+    """Messages may arrive as dicts or bytes as well as strings"""
+    raw = throw_message()
+    assert decode_message(json.loads(raw)) == decode_message(raw.encode())
+
+
+def test_missing_fields_use_defaults():
+    """Missing game fields fall back to the historical defaults"""
+    dart = decode_message({'event': 'dart1-thrown'})
+    assert dart == DartThrow('dart1-thrown', 0, 1, 0, '?', 'Unknown')
+
+
+def test_accepts_the_bull_and_an_unnumbered_dart():
+    dart = decode_message(throw_message(fieldNumber=25, fieldMultiplier=2, dartValue=50, dartNumber='?'))
+    assert (dart.segment, dart.value, dart.dart_number) == (25, 50, '?')
+
+
+@pytest.mark.parametrize('message', [
+    '{"event": "turn-started", "player": "Alice"}',
+    '{"event": "call", "text": "one hundred and eighty"}',
+    '{"event": "darts-thrown-summary"}',
+    '["dart1-thrown"]',
+])
+def test_non_throw_events_are_ignored(message):
+    assert decode_message(message) is None
+
+
+@pytest.mark.parametrize('game', [
+    {'fieldNumber': 99},
+    {'fieldNumber': 21},
+    {'fieldNumber': 24},
+    {'fieldNumber': '20'},
+    {'fieldMultiplier': 4},
+    {'fieldMultiplier': True},
+    {'dartValue': -5},
+    {'dartValue': 60.0},
+    {'dartNumber': 0},
+    {'dartNumber': 4},
+    {'dartNumber': '1'},
+    {'dartNumber': True},
+    {'dartNumber': [1]},
+])
+def test_rejects_malformed_throws(game):
+    with pytest.raises(MalformedMessage):
+        decode_message(throw_message(**game))
+
+
+def test_rejects_bad_json_and_game_type():
+    with pytest.raises(MalformedMessage):
+        decode_message('{"event": "dart1-thrown", ')
+    with pytest.raises(MalformedMessage):
+        decode_message({'event': 'dart1-thrown', 'game': [20, 3]})
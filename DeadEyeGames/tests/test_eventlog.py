@@ -0,0 +1,58 @@
+"""
+Test cases for the structured ingest event log
+"""
+import logging
+
+import server
+from eventlog import EventLog
+
+
+def dart(value=20):
+    return {'event': 'dart1-thrown', 'segment': value, 'multiplier': 1, 'value': value,
+            'dartNumber': 1, 'player': 'Alice', 'board': 'default'}
+
+
+def test_ring_buffer_keeps_newest():
+    """Only the last `capacity` raw messages are kept, oldest first"""
+    log = EventLog(capacity=3, sample_every=0)
+    for i in range(5):
+        log.record('default', {'event': 'msg', 'n': i})
+
+    dumped = log.dump()
+    assert [entry['data']['n'] for entry in dumped] == [2, 3, 4]
+    assert [entry['data']['n'] for entry in log.dump(limit=1)] == [4]
+
+
+def test_dump_filters_by_board():
+    """Dumps can be narrowed to a single board"""
+    log = EventLog(capacity=10, sample_every=0)
+    log.record('lane1', 'a')
+    log.record('lane2', 'b')
+    assert [entry['data'] for entry in log.dump(board_id='lane2')] == ['b']
+
+
+def test_disabled_buffer():
+    """A zero-size buffer records nothing"""
+    log = EventLog(capacity=0, sample_every=0)
+    log.record('default', 'raw')
+    assert log.dump() == []
+
+
+def test_throw_logging_is_sampled(caplog):
+    """Only 1 in N throws produces an INFO line"""
+    log = EventLog(capacity=0, sample_every=4, log=logging.getLogger('test.eventlog'))
+    with caplog.at_level(logging.INFO, logger='test.eventlog'):
+        for _ in range(8):
+            log.throw('default', dart())
+    assert len(caplog.records) == 2
+
+
+def test_debug_events_route(monkeypatch):
+    """The /debug/events route dumps what on_darts_message recorded"""
+    monkeypatch.setattr(server, 'event_log', EventLog(capacity=10, sample_every=0))
+    server.on_darts_message('default', '{"event": "turn-started"}')
+
+    response = server.app.test_client().get('/debug/events?limit=5')
+    assert response.status_code == 200
+    events = response.get_json()['events']
+    assert events[-1]['data'] == '{"event": "turn-started"}'
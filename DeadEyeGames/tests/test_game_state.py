@@ -0,0 +1,161 @@
+"""
+Test cases for the authoritative server-side game state engine
+"""
+import random
+
+import pytest
+
+import server
+from conftest import dart_message, received
+from dart_events import DartThrow
+from game_state import GameEngine, GameRoom, HeistCrewRules, StationSiegeRules, ZombieSlayerRules
+
+
+def dart(segment, multiplier=1):
+    return DartThrow('dart1-thrown', segment, multiplier, segment * multiplier, 1, 'Alice')
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    fresh = GameEngine(rng=random.Random(5))
+    monkeypatch.setattr(server, 'game_engine', fresh)
+    return fresh
+
+
+def test_zombie_rules():
+    room = GameRoom('default', ZombieSlayerRules(), random.Random(1))
+    deltas = []
+    room.apply_throw(dart(20), deltas.append)
+    assert deltas == []  # not started: throws change nothing
+
+    room.command('start', None, deltas.append)
+    target = room.state['target']
+    room.apply_throw(dart(target, 3), deltas.append)
+    assert room.state['score'] == 300 and room.state['kills'] == 1
+
+    hit = deltas[-1]
+    assert hit['version'] == 2
+    assert set(hit['set']) >= {'score', 'kills', 'event', 'throws'}
+    assert 'misses' not in hit['set']  # only what changed
+
+
+def test_three_misses_end_the_game():
+    room = GameRoom('default', ZombieSlayerRules(), random.Random(1))
+    room.command('start', None, lambda d: None)
+    miss = 1 if room.state['target'] != 1 else 2
+    for _ in range(3):
+        room.apply_throw(dart(miss), lambda d: None)
+    assert room.state['active'] is False
+    with pytest.raises(ValueError):
+        room.command('explode', None, lambda d: None)
+
+
+def test_heist_crew_rules():
+    room = GameRoom('default', HeistCrewRules(), random.Random(1))
+    deltas = []
+    room.command('start', {'mission': 'vault', 'crew': ['Ann', 'Bo', 'Cy']}, deltas.append)
+    first, second, third = room.state['sequence']
+    wrong = next(n for n in range(1, 21) if n != first)
+
+    room.apply_throw(dart(first, 2), deltas.append)  # the hacker's double wins time
+    assert room.state['progress'] == 1 and room.state['timeBonus'] == 10
+    assert room.state['crew'][0]['score'] == 200 and room.state['activePlayer'] == 1
+    room.apply_throw(dart(wrong), deltas.append)
+    assert room.state['alert'] == 10 and 'crew' not in deltas[-1]['set']
+    room.apply_throw(dart(second), deltas.append)
+    room.apply_throw(dart(third, 3), deltas.append)  # back to the hacker: no infiltrator shortcut
+    assert room.state['outcome'] == {'success': True, 'reason': 'Objective complete!'}
+    assert room.state['active'] is False
+
+    with pytest.raises(ValueError):
+        room.command('start', {'mission': 'moon'}, deltas.append)
+    with pytest.raises(ValueError):
+        room.command('start', {'mission': 'vault', 'crew': ['Solo']}, deltas.append)
+
+
+def test_heist_alert_and_timeout_end_the_mission():
+    room = GameRoom('default', HeistCrewRules(), random.Random(1))
+    room.command('start', {'mission': 'databreach'}, lambda d: None)
+    for _ in range(7):
+        room.apply_throw(dart(20), lambda d: None)  # firewall: +15% each
+    assert room.state['alert'] == 100 and room.state['outcome']['success'] is False
+
+    room.command('start', {'mission': 'bigscore'}, lambda d: None)
+    for segment in (7, 14, 20):
+        room.apply_throw(dart(segment), lambda d: None)
+    assert room.state['phase'] == 1 and room.state['phaseProgress'] == 0
+    deltas = []
+    room.command('timeout', None, deltas.append)
+    room.command('timeout', None, deltas.append)  # every display's countdown sends one
+    assert len(deltas) == 1 and deltas[0]['set']['outcome']['reason'] == 'Time ran out!'
+
+
+def test_station_siege_rules():
+    rules = StationSiegeRules()
+    room = GameRoom('default', rules, random.Random(1))
+    deltas = []
+    room.command('start', {'seed': 42}, deltas.append)
+    replay = GameRoom('default', rules, random.Random(2))
+    replay.command('start', {'seed': 42}, lambda d: None)
+    assert replay.state == room.state  # same seed, same game
+    assert len(room.state['hostiles']) == 1 and len(room.state['armory']) == 2
+
+    scout = room.state['hostiles'][0]
+    room.apply_throw(dart(scout['targetNumber'], scout['maxHP']), deltas.append)
+    assert room.state['hostiles'] == [] and room.state['score'] == 2 * scout['maxHP']  # damage + kill
+    assert deltas[-1]['set']['event']['type'] == 'hit'
+    assert scout['hp'] == scout['maxHP']  # the previous state was left alone
+
+    unused = set(range(1, 21)) - {item['number'] for item in room.state['armory']}
+    for _ in range(2):
+        room.apply_throw(dart(min(unused)), deltas.append)
+    assert room.state['wave'] == 2 and room.state['energy'] == 3  # three darts per wave
+    assert 'wave' in deltas[-1]['set'] and 'seed' not in deltas[-1]['set']
+
+
+def test_station_siege_ends_when_the_shields_fall():
+    room = GameRoom('default', StationSiegeRules(), random.Random(1))
+    room.command('start', {'seed': 7}, lambda d: None)
+    while room.state['active']:
+        used = {item['number'] for item in room.state['armory']}
+        used.update(hostile['targetNumber'] for hostile in room.state['hostiles'])
+        room.apply_throw(dart(min(set(range(1, 21)) - used)), lambda d: None)
+    assert room.state['shields'] <= 0 and room.state['wave'] > room.rules.STEPS_TO_STATION
+
+
+def test_displays_share_one_state(engine):
+    """Two screens on a board get the same snapshot and the same deltas; a late joiner gets the current state"""
+    tv = server.web_socketio.test_client(server.app)
+    tablet = server.web_socketio.test_client(server.app)
+    for client in (tv, tablet):
+        client.emit('join_game', {'game': 'zombie-slayer'})
+        assert received(client, 'game_snapshot')[0]['version'] == 0
+
+    tablet.emit('game_command', {'action': 'start'})
+    target = engine.room('default', 'zombie-slayer').state['target']
+    server.on_darts_message('default', dart_message(target, 2))
+
+    tv_deltas, tablet_deltas = received(tv, 'game_delta'), received(tablet, 'game_delta')
+    assert tv_deltas == tablet_deltas
+    assert [d['version'] for d in tv_deltas] == [1, 2]
+    assert tv_deltas[-1]['set']['score'] == 200
+
+    laptop = server.web_socketio.test_client(server.app)
+    laptop.emit('join_game', {'game': 'zombie-slayer'})
+    snapshot = received(laptop, 'game_snapshot')[0]
+    assert snapshot['version'] == 2 and snapshot['state']['score'] == 200
+
+    for client in (tv, tablet, laptop):
+        client.disconnect()
+
+
+def test_boards_without_games_are_untouched(engine):
+    server.on_darts_message('default', dart_message(20))
+    assert engine.rooms == {}
+
+
+def test_unknown_game(engine):
+    client = server.web_socketio.test_client(server.app)
+    client.emit('join_game', {'game': 'pong'})
+    assert received(client, 'game_error')[0]['error'] == 'unknown game'
+    client.disconnect()
@@ -0,0 +1,120 @@
+"""
+Test cases for the binary throw journal and replay
+"""
+import os
+
+import pytest
+
+import server
+from dart_events import DartThrow
+from journal import HEADER_SIZE, RECORD_SIZE, JournalFile, JournalReader, JournalWriter, replay
+
+
+def dart(segment=20, player='Alice', event='dart1-thrown'):
+    return DartThrow(event, segment, 1, segment, 1, player)
+
+
+def test_round_trip(tmp_path):
+    """Throws come back exactly as written, with their board ids"""
+    writer = JournalWriter(str(tmp_path))
+    writer.append('lane1', dart(20), timestamp=100.0)
+    writer.append('lane2', dart(5, 'Bob', 'dart2-thrown'), timestamp=101.0)
+    writer.close()
+
+    records = list(JournalReader(str(tmp_path)).records())
+    assert records == [(100.0, 'lane1', dart(20)), (101.0, 'lane2', dart(5, 'Bob', 'dart2-thrown'))]
+
+
+def test_long_names_are_truncated(tmp_path):
+    """Player names longer than the fixed field are cut on a character boundary"""
+    writer = JournalWriter(str(tmp_path))
+    writer.append('default', dart(player='Ä' * 40), timestamp=1.0)
+    writer.close()
+
+    (_, _, stored), = JournalReader(str(tmp_path)).records()
+    assert stored.player == 'Ä' * 16
+
+
+def test_long_board_ids_are_refused(tmp_path):
+    """A truncated board id would replay as another board, so it is an error rather than cut short"""
+    writer = JournalWriter(str(tmp_path))
+    with pytest.raises(ValueError):
+        writer.append('main-hall-lane-10', dart(), timestamp=1.0)
+    writer.close()
+    assert list(JournalReader(str(tmp_path)).records()) == []
+
+
+def test_rotation_and_since(tmp_path):
+    """Files rotate at max_bytes and `since` seeks across them"""
+    writer = JournalWriter(str(tmp_path), max_bytes=HEADER_SIZE + 4 * RECORD_SIZE)
+    for i in range(10):
+        writer.append('default', dart(i + 1), timestamp=1000.0 + i)
+    writer.close()
+
+    reader = JournalReader(str(tmp_path))
+    assert len(reader.files) == 3
+    assert [d.segment for _, _, d in reader.records(since=1006.0)] == [7, 8, 9, 10]
+
+
+def test_sessions(tmp_path):
+    """A session replays only the throws written after its start"""
+    writer = JournalWriter(str(tmp_path))
+    writer.append('default', dart(1), timestamp=1.0)
+    writer.start_session('league-night')
+    writer.append('default', dart(2), timestamp=2.0)
+    writer.append('default', dart(3), timestamp=3.0)
+    writer.close()
+
+    reader = JournalReader(str(tmp_path))
+    assert [d.segment for _, _, d in reader.records(session='league-night')] == [2, 3]
+
+
+def test_torn_record_is_ignored(tmp_path):
+    """A partially written last record (crash mid-write) is skipped"""
+    writer = JournalWriter(str(tmp_path))
+    writer.append('default', dart(1), timestamp=1.0)
+    path = os.path.join(str(tmp_path), writer.file_name)
+    writer.close()
+    with open(path, 'ab') as f:
+        f.write(b'\x01' * (RECORD_SIZE // 2))
+
+    journal_file = JournalFile(path)
+    assert len(journal_file) == 1
+    journal_file.close()
+
+
+def test_replay_pacing():
+    """Replay sleeps according to the original gaps divided by speed"""
+    now = [0.0]
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        now[0] += seconds
+
+    records = [(10.0, 'default', dart(1)), (12.0, 'default', dart(2)), (20.0, 'default', dart(3))]
+    emitted = []
+    count = replay(records, lambda board_id, d: emitted.append(d.segment), speed=2.0,
+                   sleep=sleep, clock=lambda: now[0])
+
+    assert count == 3
+    assert emitted == [1, 2, 3]
+    assert sleeps == [1.0, 4.0]
+
+
+def test_replay_max_speed_never_sleeps():
+    records = [(float(i), 'default', dart(1)) for i in range(5)]
+    assert replay(records, lambda *_: None, speed=0, sleep=lambda s: 1 / 0) == 5
+
+
+def test_server_journals_live_throws(tmp_path, monkeypatch):
+    """on_darts_message appends every forwarded throw to the journal"""
+    writer = JournalWriter(str(tmp_path))
+    monkeypatch.setattr(server, 'journal', writer)
+    server.on_darts_message('default', '{"event": "dart3-thrown", "player": "Cy", '
+                                       '"game": {"fieldNumber": 25, "fieldMultiplier": 2, "dartValue": 50}}')
+    writer.close()
+
+    (_, board_id, stored), = JournalReader(str(tmp_path)).records()
+    assert board_id == 'default'
+    assert (stored.event, stored.segment, stored.value, stored.player) == ('dart3-thrown', 25, 50, 'Cy')
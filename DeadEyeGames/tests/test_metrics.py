@@ -0,0 +1,96 @@
+"""
+Test cases for hot-path latency metrics and the /metrics endpoint
+"""
+import json
+
+import pytest
+
+import server
+from metrics import Histogram, Metrics
+
+
+def throw_message(segment=20, multiplier=3):
+    return json.dumps({'event': 'dart1-thrown', 'player': 'Alice',
+                       'game': {'fieldNumber': segment, 'fieldMultiplier': multiplier,
+                                'dartValue': segment * multiplier, 'dartNumber': 1}})
+
+
+@pytest.fixture
+def fresh_metrics(monkeypatch):
+    """Give the server a clean Metrics instance (gauges re-registered)"""
+    fresh = Metrics(enabled=True)
+    for name, gauge in server.metrics.gauges.items():
+        fresh.gauges[name] = gauge
+    monkeypatch.setattr(server, 'metrics', fresh)
+    return fresh
+
+
+def test_histogram_quantiles():
+    histogram = Histogram(buckets=(0.001, 0.01, 0.1))
+    for _ in range(90):
+        histogram.observe(0.0005)
+    for _ in range(10):
+        histogram.observe(0.05)
+
+    assert histogram.count == 100
+    assert histogram.quantile(0.5) <= 0.001
+    assert 0.01 < histogram.quantile(0.99) <= 0.1
+    assert Histogram().quantile(0.5) is None
+
+
+def test_throws_are_timed_per_stage(fresh_metrics):
+    """Every forwarded throw lands in the decode/emit/total histograms"""
+    server.on_darts_message('default', throw_message())
+    server.on_darts_message('default', '{"event": "darts-pulled"}')
+    server.on_darts_message('default', '{"event": "dart2-thrown", "game": {"fieldNumber": 99}}')
+
+    assert fresh_metrics.messages['default'] == 3
+    assert fresh_metrics.throws['default'] == 1
+    assert fresh_metrics.drops['malformed'] == 1
+    for stage in ('decode', 'emit', 'total'):
+        assert fresh_metrics.stages[stage].count == 1
+
+
+def test_disabled_metrics_record_nothing(monkeypatch):
+    disabled = Metrics(enabled=False, clock=lambda: 1 / 0)
+    monkeypatch.setattr(server, 'metrics', disabled)
+    server.on_darts_message('default', throw_message())
+
+    assert not disabled.messages and not disabled.throws
+    assert disabled.stages['total'].count == 0
+
+
+def test_reconnects_counted_after_first_connect(fresh_metrics):
+    for connected in (True, False, True, False, True):
+        server.on_board_status('default', connected)
+    assert fresh_metrics.reconnects['default'] == 2
+
+
+def test_prometheus_endpoint(fresh_metrics):
+    """/metrics serves histograms, counters and the web client gauge"""
+    browser = server.web_socketio.test_client(server.app)
+    server.on_darts_message('default', throw_message())
+
+    response = server.app.test_client().get('/metrics')
+    text = response.get_data(as_text=True)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    assert 'deadeye_stage_seconds_count{stage="total"} 1' in text
+    assert 'deadeye_throws_total{board="default"} 1' in text
+    assert 'deadeye_web_clients{board="default"} 1' in text
+    browser.disconnect()
+
+
+def test_client_ack_round_trip(fresh_metrics):
+    """Throws carry an ack stamp when asked, and browser acks feed the ack histogram"""
+    fresh_metrics.ack_every = 1
+    browser = server.web_socketio.test_client(server.app)
+    server.on_darts_message('default', throw_message())
+
+    dart = [m for m in browser.get_received() if m['name'] == 'dart_thrown'][0]['args'][0]
+    browser.emit('dart_ack', {'ack': dart['ack']})
+
+    assert fresh_metrics.stages['ack'].count == 1
+    summary = server.app.test_client().get('/metrics/summary').get_json()
+    assert summary['throws'] == 1 and summary['stages']['ack']['count'] == 1
+    browser.disconnect()
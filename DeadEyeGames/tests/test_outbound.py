@@ -0,0 +1,127 @@
+"""
+Test cases for per-browser outbound queues and slow-consumer policies
+"""
+import types
+
+import pytest
+
+import server
+from conftest import dart_message
+from outbound import OutboundQueues, check_internals
+
+
+def frames(client):
+    return [(msg['name'], msg['args'][0]) for msg in client.get_received()
+            if msg['name'] in ('dart_thrown', 'dart_batch')]
+
+
+@pytest.fixture
+def queues(monkeypatch):
+    """Swap in started outbound queues whose flusher the test runs by hand"""
+    def make(policy='coalesce', max_pending=64):
+        outbound = OutboundQueues(policy=policy, max_pending=max_pending)
+        outbound.start(server.web_socketio, start_task=lambda fn: None)
+        monkeypatch.setattr(server, 'outbound', outbound)
+        return outbound
+    return make
+
+
+def test_ingest_only_queues(queues):
+    """Throws wait in the queue until the flusher runs - ingest never sends"""
+    outbound = queues()
+    client = server.web_socketio.test_client(server.app)
+    client.get_received()
+
+    server.on_darts_message('default', dart_message(20))
+    assert frames(client) == []
+    assert outbound.pending() == 1
+
+    outbound.flush()
+    (name, dart), = frames(client)
+    assert name == 'dart_thrown' and dart['segment'] == 20
+    client.disconnect()
+
+
+def test_coalesce_batches_pending_throws(queues):
+    outbound = queues('coalesce')
+    client = server.web_socketio.test_client(server.app)
+    client.get_received()
+    for segment in (1, 2, 3):
+        server.on_darts_message('default', dart_message(segment))
+    outbound.flush()
+
+    (name, batch), = frames(client)
+    assert name == 'dart_batch'
+    assert [dart['segment'] for dart in batch] == [1, 2, 3]
+    assert outbound.stats['batches'] == 1 and outbound.stats['throws'] == 3
+    client.disconnect()
+
+
+def test_drop_oldest_keeps_newest(queues):
+    outbound = queues('drop_oldest', max_pending=2)
+    client = server.web_socketio.test_client(server.app)
+    client.get_received()
+    for segment in (1, 2, 3, 4):
+        server.on_darts_message('default', dart_message(segment))
+    outbound.flush()
+
+    assert [(name, dart['segment']) for name, dart in frames(client)] == [('dart_thrown', 3), ('dart_thrown', 4)]
+    assert outbound.stats['dropped'] == 2
+    client.disconnect()
+
+
+def test_disconnect_policy_drops_slow_client(queues):
+    outbound = queues('disconnect', max_pending=2)
+    client = server.web_socketio.test_client(server.app)
+    for segment in (1, 2, 3):
+        server.on_darts_message('default', dart_message(segment))
+    outbound.flush()
+
+    assert not client.is_connected()
+    assert outbound.stats['disconnected'] == 1
+    assert outbound.queues == {}
+
+
+def test_slow_socket_is_held_back(queues, monkeypatch):
+    """A browser whose socket already has a backlog isn't sent more until it drains"""
+    outbound = queues()
+    client = server.web_socketio.test_client(server.app)
+    client.get_received()
+    backlog = {'size': 100}
+    monkeypatch.setattr(outbound, '_backlog', lambda eio_sid: backlog['size'])
+
+    server.on_darts_message('default', dart_message(20))
+    assert outbound.flush() is True
+    assert frames(client) == []
+
+    backlog['size'] = 0
+    assert outbound.flush() is False
+    assert len(frames(client)) == 1
+    client.disconnect()
+
+
+def test_policy_is_visible_in_metrics(queues):
+    outbound = queues('drop_oldest', max_pending=1)
+    client = server.web_socketio.test_client(server.app)
+    server.on_darts_message('default', dart_message(1))
+    server.on_darts_message('default', dart_message(2))
+
+    text = server.app.test_client().get('/metrics').get_data(as_text=True)
+    assert 'deadeye_outbound_total{action="dropped"} 1' in text
+    assert 'deadeye_outbound_pending 1' in text
+    client.disconnect()
+
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        OutboundQueues(policy='yolo')
+
+
+def test_missing_socketio_internals_fail_at_start():
+    check_internals(server.web_socketio.server)  # the pinned versions have them all
+    upgraded = types.SimpleNamespace(server=types.SimpleNamespace(eio=server.web_socketio.server.eio,
+                                                                 packet_class=object),
+                                     sleep=lambda seconds: None)
+    with pytest.raises(RuntimeError, match='_send_eio_packet.*manager.get_participants'):
+        OutboundQueues(policy='coalesce').start(upgraded, start_task=lambda fn: None)
+    OutboundQueues(policy='direct').start(upgraded)  # direct emits through the public API only
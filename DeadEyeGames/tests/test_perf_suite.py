@@ -0,0 +1,70 @@
+"""
+Test cases for the in-process performance regression suite (tools/perf_suite.py)
+"""
+import json
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+
+import perf_suite  # noqa: E402
+from dart_events import decode_message  # noqa: E402
+
+
+def test_check_flags_each_direction():
+    thresholds = {'decode_msgs_per_s': 100000, 'emit_50_p50_us': 3000, 'client_memory_bytes': 4000}
+    results = {'decode_msgs_per_s': 90000, 'emit_50_p50_us': 3500, 'client_memory_bytes': 2000,
+               'emit_1_p50_us': 99999}  # no threshold: not checked
+    failures = perf_suite.check(results, thresholds)
+    assert len(failures) == 2
+    assert failures[0].startswith('decode_msgs_per_s') and 'below' in failures[0]
+    assert failures[1].startswith('emit_50_p50_us') and 'above' in failures[1]
+    assert perf_suite.check({'decode_msgs_per_s': 100000}, thresholds) == []
+
+
+def test_baseline_leaves_slack_in_the_right_direction():
+    results = {'decode_msgs_per_s': 500000, 'emit_1_p50_us': 80.0, 'emit_1_p99_us': 200.0}
+    record = perf_suite.baseline(results)
+    thresholds = perf_suite.thresholds_from(record)
+    assert thresholds == {'decode_msgs_per_s': 250000, 'emit_1_p50_us': 160.0, 'emit_1_p99_us': 1200}
+    assert perf_suite.check(results, thresholds) == []
+    assert perf_suite.check({'emit_1_p99_us': 1300.0}, thresholds)  # tail latency has a bound too
+
+    # Re-baselining keeps tolerances a reviewer tuned by hand
+    record['metrics']['emit_1_p99_us']['tolerance'] = 10.0
+    again = perf_suite.baseline({'emit_1_p99_us': 100.0}, record)
+    assert perf_suite.thresholds_from(again) == {'emit_1_p99_us': 1000}
+
+
+def test_checked_in_baseline_covers_every_metric():
+    record = perf_suite.load_baseline()
+    assert record is not None, 'tools/perf_baseline.json is missing'
+    assert set(record['metrics']) == set(perf_suite.METRICS)
+    assert all(metric['tolerance'] > 0 for metric in record['metrics'].values())
+    assert perf_suite.load_baseline(os.path.join(os.path.dirname(perf_suite.BASELINE), 'missing.json')) is None
+
+
+def test_upstream_mix_is_mostly_chatter():
+    messages = perf_suite.upstream_messages(1000, throw_ratio=0.3)
+    throws = [dart for dart in map(decode_message, messages) if dart is not None]
+    assert 200 < len(throws) < 400
+    assert {dart.dart_number for dart in throws} == {1, 2, 3}
+
+
+def test_small_run_is_stored(tmp_path):
+    root = logging.getLogger()
+    level = root.level
+    try:
+        results = perf_suite.run_suite(messages=500, throws=30, repeats=1, levels=(1, 3))
+    finally:
+        root.setLevel(level)
+    assert set(results) == {'decode_msgs_per_s', 'ingest_msgs_per_s', 'emit_1_p50_us', 'emit_1_p99_us',
+                            'emit_3_p50_us', 'emit_3_p99_us', 'emit_3_filtered_p50_us', 'emit_3_filtered_p99_us',
+                            'client_memory_bytes'}
+    assert results['emit_3_p50_us'] > 0 and results['client_memory_bytes'] > 0
+
+    perf_suite.store(results, str(tmp_path))
+    perf_suite.store(results, str(tmp_path))
+    assert json.loads((tmp_path / 'latest.json').read_text())['results'] == results
+    assert len((tmp_path / 'history.jsonl').read_text().splitlines()) == 2
@@ -0,0 +1,128 @@
+"""
+Test cases for the throw processor pipeline and its per-stage metrics
+"""
+import asyncio
+import json
+import threading
+import time
+
+import pytest
+
+import server
+from dart_events import DartThrow
+from pipeline import INLINE, PROCESS, THREAD, Pipeline, ThrowEvent
+
+
+def event(segment=20, player='Alice'):
+    return ThrowEvent('lane1', DartThrow('dart1-thrown', segment, 1, segment, 1, player))
+
+
+def append_to_file(thrown):
+    """Process-pool stage: must be a module-level (picklable) function"""
+    with open(thrown.payload, 'a', encoding='utf-8') as f:
+        f.write(f'{thrown.dart.segment}\n')
+
+
+@pytest.fixture
+def pipeline():
+    pipeline = Pipeline()
+    yield pipeline
+    pipeline.stop()
+
+
+def test_inline_stages_run_in_order_and_can_drop(pipeline):
+    seen = []
+    pipeline.add('validate', lambda e: e.dart.segment != 0)
+    pipeline.add('broadcast', lambda e: seen.append(e.dart.player))
+    pipeline.add('enrich', lambda e: setattr(e, 'dart', e.dart._replace(player=e.dart.player.upper())),
+                 before='broadcast')
+
+    assert pipeline.process(event()) is True
+    assert pipeline.process(event(segment=0)) is False
+    assert seen == ['ALICE']
+    assert pipeline.stage('validate').counts['filtered'] == 1
+    assert [stage.name for stage in pipeline.stages] == ['validate', 'enrich', 'broadcast']
+
+
+def test_slow_pooled_stage_never_delays_broadcast(pipeline):
+    busy, release = threading.Event(), threading.Event()
+    broadcast = []
+    pipeline.add('announce', lambda e: busy.set() or release.wait(5), pool=THREAD, queue_size=2)
+    pipeline.add('broadcast', lambda e: broadcast.append(time.perf_counter()))
+    pipeline.start()
+
+    started = time.perf_counter()
+    pipeline.process(event())
+    busy.wait(5)
+    for _ in range(4):
+        pipeline.process(event())
+    assert len(broadcast) == 5 and broadcast[-1] - started < 0.1
+
+    # One throw is being announced and two are queued: the rest were dropped for that stage only
+    announce = pipeline.stage('announce')
+    assert announce.counts['dropped'] == 2
+    release.set()
+    pipeline.drain()
+    assert announce.counts['processed'] == 3
+    assert announce.wait_time.count == 3 and announce.run_time.count == 3
+
+
+def test_async_and_failing_stages(pipeline):
+    handled = []
+
+    async def announce(e):
+        await asyncio.sleep(0)
+        handled.append(e.dart.segment)
+
+    def flaky(e):
+        if e.dart.segment == 13:
+            raise RuntimeError('unlucky')
+
+    pipeline.add('announce', announce, pool=THREAD)
+    pipeline.add('flaky', flaky, pool=THREAD)
+    pipeline.start()
+    for segment in (1, 13, 20):
+        pipeline.process(event(segment))
+    pipeline.drain()
+    assert handled == [1, 13, 20]
+    assert pipeline.stage('flaky').counts == {'processed': 2, 'dropped': 0, 'filtered': 0, 'errors': 1}
+
+
+def test_process_pool_stage(pipeline, tmp_path):
+    path = str(tmp_path / 'out.txt')
+    pipeline.add('tag', lambda e: setattr(e, 'payload', path))
+    pipeline.add('heavy', append_to_file, pool=PROCESS)
+    pipeline.start()
+    for segment in (5, 6, 7):
+        pipeline.process(event(segment))
+    pipeline.drain()
+    with open(path, encoding='utf-8') as f:
+        assert f.read().split() == ['5', '6', '7']
+
+
+def test_registration_errors(pipeline):
+    async def coroutine(e):
+        pass
+
+    pipeline.add('broadcast', print)
+    with pytest.raises(ValueError):
+        pipeline.add('broadcast', print)
+    with pytest.raises(ValueError):
+        pipeline.add('announce', coroutine, pool=INLINE)
+    with pytest.raises(ValueError):
+        pipeline.add('announce', print, pool='gpu')
+    with pytest.raises(ValueError):
+        pipeline.add('announce', print, before='nope')
+
+
+def test_server_throws_go_through_the_pipeline():
+    broadcast = server.pipeline.stage('broadcast')
+    before = broadcast.counts['processed']
+    server.on_darts_message('default', json.dumps({
+        'event': 'dart1-thrown', 'player': 'Alice',
+        'game': {'fieldNumber': 20, 'fieldMultiplier': 1, 'dartValue': 20}}))
+    assert broadcast.counts['processed'] == before + 1
+
+    text = server.app.test_client().get('/metrics').get_data(as_text=True)
+    assert 'deadeye_pipeline_seconds_count{stage="broadcast",phase="run"}' in text
+    assert 'deadeye_pipeline_total{stage="persist",outcome="processed"}' in text
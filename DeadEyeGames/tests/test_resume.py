@@ -0,0 +1,109 @@
+"""
+Test cases for the reconnecting board supervisor and sequence-numbered resume
+"""
+import asyncio
+import random
+import threading
+
+import pytest
+
+import server
+from backlog import ThrowBacklog
+from boards import Backoff, BoardManager
+from conftest import dart_message
+
+
+def darts(client):
+    return [msg['args'][0] for msg in client.get_received() if msg['name'] == 'dart_thrown']
+
+
+def test_backoff_is_jittered_and_capped():
+    backoff = Backoff(base=1, maximum=8, rng=random.Random(3))
+    delays = [backoff.next_delay() for _ in range(10)]
+    ceilings = [1, 2, 4, 8, 8, 8, 8, 8, 8, 8]
+    assert all(0 <= delay <= ceiling for delay, ceiling in zip(delays, ceilings))
+    assert len(set(delays)) == len(delays)
+    backoff.reset()
+    assert backoff.next_delay() <= 1
+
+
+def test_supervisor_retries_forever():
+    """A board that keeps failing is retried well past the old 5-attempt limit, with backoff between tries"""
+    class FailingClient:
+        connected = False
+
+        async def connect(self, *args, **kwargs):
+            raise ConnectionError('refused')
+
+    manager = BoardManager({'default': 'https://127.0.0.1:1'}, on_message=lambda *a: None)
+    manager._create_client = lambda board: FailingClient()
+    board = manager.boards['default']
+    sleeps = []
+
+    async def sleep(delay):
+        sleeps.append(delay)
+        if len(sleeps) == 12:
+            raise asyncio.CancelledError
+
+    def run():
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(manager._run_board(board, Backoff(base=0.5, maximum=30, rng=random.Random(1)), sleep=sleep))
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    assert board.attempts == 12
+    assert max(sleeps) > 2  # grew past the old fixed delay
+
+
+def test_backlog_resume():
+    backlog = ThrowBacklog(capacity=3)
+    sent = []
+    for i in range(5):
+        backlog.publish('default', {'n': i}, lambda t: None)
+
+    joined = []
+    assert backlog.resume('default', 3, backlog.epoch, lambda: joined.append(1), sent.append) == (2, False)
+    assert [t['seq'] for t in sent] == [4, 5] and joined == [1]
+
+    sent.clear()
+    assert backlog.resume('default', 0, backlog.epoch, lambda: None, sent.append) == (3, True)
+    assert backlog.resume('default', 5, backlog.epoch, lambda: None, sent.append) == (0, False)
+    assert backlog.resume('default', 2, 'other-run', lambda: None, sent.append) == (0, True)
+
+
+def test_throws_carry_sequence_numbers(fresh_backlog):
+    client = server.web_socketio.test_client(server.app)
+    status = client.get_received()[0]['args'][0]
+    assert status['seq'] == 0 and status['epoch'] == fresh_backlog.epoch
+
+    server.on_darts_message('default', dart_message(1))
+    server.on_darts_message('default', dart_message(2))
+    assert [d['seq'] for d in darts(client)] == [1, 2]
+    client.disconnect()
+
+
+def test_reconnecting_browser_gets_only_missed_throws(fresh_backlog):
+    """A browser that drops after #1 and reconnects with last_seq=1 gets #2 and #3, then live throws"""
+    server.on_darts_message('default', dart_message(1))
+    server.on_darts_message('default', dart_message(2))
+    server.on_darts_message('default', dart_message(3))
+
+    client = server.web_socketio.test_client(
+        server.app, query_string=f'board=default&last_seq=1&epoch={fresh_backlog.epoch}')
+    received = client.get_received()
+    assert [d['args'][0]['segment'] for d in received if d['name'] == 'dart_thrown'] == [2, 3]
+    status = [m['args'][0] for m in received if m['name'] == 'darts_status'][0]
+    assert (status['resumed'], status['gap'], status['seq']) == (2, False, 3)
+
+    server.on_darts_message('default', dart_message(4))
+    assert [d['seq'] for d in darts(client)] == [4]
+    client.disconnect()
+
+
+def test_resume_after_server_restart_reports_gap(fresh_backlog):
+    server.on_darts_message('default', dart_message(1))
+    client = server.web_socketio.test_client(server.app, query_string='last_seq=7&epoch=old-run')
+    status = [m['args'][0] for m in client.get_received() if m['name'] == 'darts_status'][0]
+    assert status['gap'] is True and status['resumed'] == 0
+    client.disconnect()
@@ -0,0 +1,177 @@
+"""
+Test cases for the SQLite leaderboard/progress store and its REST API
+"""
+import threading
+import time
+
+import pytest
+
+import server
+from scores import MAX_READERS, InvalidScore, ScoreStore, buckets
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ScoreStore(str(tmp_path / 'scores.db'), batch_interval=0)
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def api(monkeypatch, store):
+    monkeypatch.setattr(server, 'scores', store)
+    return server.app.test_client()
+
+
+def test_top_scores_per_mode_and_game(store):
+    for player, score, mode in (('Alice', 50, '1'), ('Bob', 80, '1'), ('Carol', 70, '2'), ('Alice', 90, '2')):
+        store.submit_score('station-siege', player, score, mode=mode)
+    store.flush()
+
+    assert [s['score'] for s in store.top('station-siege')] == [90, 80, 70, 50]
+    assert [s['player'] for s in store.top('station-siege', mode='1')] == ['Bob', 'Alice']
+    assert [s['score'] for s in store.top('station-siege', player='Alice')] == [90, 50]
+    assert [s['score'] for s in store.top('station-siege', limit=2)] == [90, 80]
+    assert store.top('zombie-slayer') == []
+
+
+def test_periods(tmp_path):
+    now = [time.time()]
+    store = ScoreStore(str(tmp_path / 'scores.db'), batch_interval=0, clock=lambda: now[0])
+    store.submit_score('zombie-slayer', 'Old', 999)
+    now[0] += 40 * 86400
+    store.submit_score('zombie-slayer', 'New', 10)
+    store.flush()
+
+    assert [s['player'] for s in store.top('zombie-slayer')] == ['Old', 'New']
+    for period in ('day', 'week', 'month'):
+        assert [s['player'] for s in store.top('zombie-slayer', mode='', period=period)] == ['New']
+        assert [s['player'] for s in store.top('zombie-slayer', period=period)] == ['New']
+    store.close()
+
+
+def test_period_tops_use_an_index(store):
+    """A day/week/month top N reads its bucket's index, with or without a mode, however old the scores are"""
+    now = time.time()
+    for n in range(300):
+        store.clock = lambda: now - 86400 * (n + 1)  # nothing from this period
+        store.submit_score('zombie-slayer', f'P{n}', n, mode=str(n % 3))
+    store.clock = time.time
+    store.flush()
+
+    statements = []
+    with store._reader() as reader:
+        reader.set_trace_callback(statements.append)
+    for mode in (None, '1'):
+        for period in ('day', 'week', 'month'):
+            statements.clear()
+            store.top('zombie-slayer', mode=mode, period=period)
+            with store._reader() as reader:
+                plan = ' '.join(row[3] for row in reader.execute('EXPLAIN QUERY PLAN ' + statements[-1]))
+            assert f'{period}=?' in plan and 'TEMP B-TREE' not in plan, plan
+            assert (mode is not None) == ('mode=?' in plan), plan
+    with store._reader() as reader:
+        reader.set_trace_callback(None)
+
+
+def test_week_buckets_start_on_monday():
+    monday = 1792972800.0  # 2026-10-26 00:00 UTC
+    assert time.gmtime(monday).tm_wday == 0
+    assert buckets(monday - 1)[1] + 1 == buckets(monday)[1] == buckets(monday + 6 * 86400)[1]
+
+
+def test_validation(store):
+    with pytest.raises(InvalidScore):
+        store.submit_score('Not A Slug!', 'Alice', 1)
+    with pytest.raises(InvalidScore):
+        store.submit_score('zombie-slayer', 'Alice', '100')
+    with pytest.raises(InvalidScore):
+        store.submit_score('zombie-slayer', 'A' * 200, 1)
+    with pytest.raises(InvalidScore):
+        store.submit_score('zombie-slayer', 'Alice', 10 ** 20)
+    with pytest.raises(InvalidScore):
+        store.top('zombie-slayer', period='year')
+
+
+def test_writes_are_batched(tmp_path):
+    """The writer thread commits queued writes together, off the caller's thread"""
+    store = ScoreStore(str(tmp_path / 'scores.db'), batch_interval=0.2)
+    for n in range(50):
+        store.submit_score('zombie-slayer', f'P{n}', n)
+    assert store.count() == 0  # nothing written on the request path
+    deadline = time.time() + 5
+    while store.count() < 50 and time.time() < deadline:
+        time.sleep(0.02)
+    assert store.count() == 50
+    assert store.stats['batches'] == 1
+    store.close()
+
+
+def test_writer_survives_a_bad_batch(tmp_path):
+    """A batch SQLite can't take is dropped; the writer thread keeps committing later ones"""
+    store = ScoreStore(str(tmp_path / 'scores.db'), batch_interval=0)
+    with pytest.raises(InvalidScore):
+        store.submit_score('zombie-slayer', 'Huge', 10 ** 20)
+    created = time.time()
+    store.pending.put(('score', ('zombie-slayer', '', 'Huge', 10 ** 20, created) + buckets(created) + (None,)))
+    time.sleep(0.1)
+    store.submit_score('zombie-slayer', 'Alice', 42)
+    deadline = time.time() + 5
+    while not store.top('zombie-slayer') and time.time() < deadline:
+        time.sleep(0.02)
+    assert store.thread.is_alive()
+    assert [(s['player'], s['score']) for s in store.top('zombie-slayer')] == [('Alice', 42)]
+    store.close()
+
+
+def test_reads_share_pooled_connections(store):
+    """Each request runs on its own thread: reads reuse a few connections instead of opening one each"""
+    store.submit_score('zombie-slayer', 'Alice', 42)
+    store.flush()
+    for _ in range(20):
+        request = threading.Thread(target=store.top, args=('zombie-slayer',))
+        request.start()
+        request.join()
+    assert store.reader_count == 1
+
+    results = []
+    requests = [threading.Thread(target=lambda: results.append(store.top('zombie-slayer'))) for _ in range(50)]
+    for request in requests:
+        request.start()
+    for request in requests:
+        request.join()
+    assert len(results) == 50 and all(top[0]['score'] == 42 for top in results)
+    assert store.reader_count <= MAX_READERS
+
+
+def test_progress_last_write_wins(store):
+    store.save_progress('heist-crew', 'default', {'crewRep': 1})
+    store.save_progress('heist-crew', 'default', {'crewRep': 2, 'unlockedMissions': ['vault', 'museum']})
+    store.flush()
+    assert store.progress('heist-crew', 'default') == {'crewRep': 2, 'unlockedMissions': ['vault', 'museum']}
+    assert store.progress('heist-crew', 'other') is None
+
+
+def test_scores_api(api, store):
+    response = api.post('/api/scores/station-siege',
+                        json={'player': 'Alice', 'score': 120, 'mode': 4242, 'data': {'rounds': 7}})
+    assert response.status_code == 202
+    assert api.post('/api/scores/station-siege', json={'player': 'Bob'}).status_code == 400
+    store.flush()
+
+    top = api.get('/api/scores/station-siege?mode=4242').get_json()['scores']
+    assert top[0]['player'] == 'Alice' and top[0]['data'] == {'rounds': 7}
+    assert api.get('/api/scores/station-siege?period=decade').status_code == 400
+
+
+def test_progress_api(api, store):
+    assert api.get('/api/progress/heist-crew/default').status_code == 404
+    assert api.put('/api/progress/heist-crew/default', json={'crewRep': 5}).status_code == 202
+    assert api.put('/api/progress/heist-crew/default', json=[1, 2]).status_code == 400
+    store.flush()
+    assert api.get('/api/progress/heist-crew/default').get_json() == {'crewRep': 5}
+
+
+def test_api_off(monkeypatch):
+    monkeypatch.setattr(server, 'scores', None)
+    assert server.app.test_client().get('/api/scores/station-siege').status_code == 503
@@ -0,0 +1,34 @@
+"""
+Test cases for server startup modes and graceful shutdown
+"""
+import server
+
+
+def test_dev_server_is_threaded():
+    """Without production.py's eventlet monkey patching the server stays in threading mode"""
+    assert server.detect_async_mode() == 'threading'
+    assert server.web_socketio.async_mode == 'threading'
+
+
+def test_arg_parser_defaults():
+    """server.py and production.py share --host/--port"""
+    args = server.build_arg_parser('test').parse_args([])
+    assert args.host == '0.0.0.0'
+    assert args.port == 5001
+
+
+def test_shutdown_tells_browsers_board_is_offline(monkeypatch):
+    """Graceful shutdown marks each board offline for its web clients"""
+    stopped = []
+    monkeypatch.setattr(server.board_manager, 'stop', lambda: stopped.append(True))
+
+    client = server.web_socketio.test_client(server.app)
+    client.get_received()
+
+    server.shutdown()
+
+    received = client.get_received()
+    assert received[0]['name'] == 'darts_status'
+    assert received[0]['args'][0]['connected'] is False
+    assert stopped == [True]
+    client.disconnect()
@@ -0,0 +1,85 @@
+"""
+Test cases for the offline darts-caller simulator used by tools/loadgen.py
+"""
+import asyncio
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools'))
+
+import darts_caller_sim as sim  # noqa: E402
+from dart_events import decode_message  # noqa: E402
+
+
+class RecordingBoard:
+    """Stands in for SimulatedBoard: keeps what would have been sent"""
+
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.append(message)
+
+    async def throw(self, player, dart_number, segment, multiplier):
+        await self.send(sim.throw_message(player, dart_number, segment, multiplier))
+
+
+def run_async(coro):
+    """asyncio.run on its own thread (pytest-playwright may own this thread's loop)"""
+    thread = threading.Thread(target=asyncio.run, args=(coro,))
+    thread.start()
+    thread.join()
+
+
+def test_board_geometry():
+    """Points land in the right bed of a regulation board"""
+    assert sim.score_point(0, 0) == (25, 2)
+    assert sim.score_point(0, 10) == (25, 1)
+    assert sim.score_point(0, 103) == (20, 3)
+    assert sim.score_point(0, 166) == (20, 2)
+    assert sim.score_point(103, 0) == (6, 3)
+    assert sim.score_point(0, 200) == (0, 0)
+    assert sim.score_point(*sim.aim_point(19, 3)) == (19, 3)
+
+
+def test_parse_target():
+    assert sim.parse_target('t20') == (20, 3)
+    assert sim.parse_target('D16') == (16, 2)
+    assert sim.parse_target('7') == (7, 1)
+    assert sim.parse_target('DBULL') == (25, 2)
+    assert sim.parse_target('MISS') == (0, 0)
+    with pytest.raises(ValueError):
+        sim.parse_target('T21')
+
+
+def test_throw_message_decodes_like_darts_caller():
+    """The server's decoder accepts simulated throws unchanged"""
+    dart = decode_message(sim.throw_message('Alice', 2, 19, 3))
+    assert (dart.event, dart.segment, dart.multiplier, dart.value, dart.player) == ('dart2-thrown', 19, 3, 57, 'Alice')
+
+
+def test_skill_orders_averages():
+    """Better players score more on average"""
+    def average(skill):
+        player = sim.Player('P', skill, 'T20', sim.random.Random(7))
+        return sum(s * m for s, m in (player.throw() for _ in range(3000))) / 3000
+
+    assert average('pro') > average('league') > average('pub')
+
+
+def test_scenario_steps():
+    """Scripted throws, events and repeats are sent in order"""
+    board = RecordingBoard()
+    scenario = {'steps': [
+        {'player': 'Alice', 'throws': ['T20', 'D5', 'MISS']},
+        {'event': 'busted', 'player': 'Alice'},
+        {'repeat': 2, 'steps': [{'player': 'Bob', 'throw': 'BULL', 'dartNumber': 1}]},
+    ]}
+    run_async(sim.play_scenario(board, scenario, [], dart_interval=0))
+
+    assert [m['event'] for m in board.sent] == [
+        'dart1-thrown', 'dart2-thrown', 'dart3-thrown', 'darts-pulled', 'busted', 'dart1-thrown', 'dart1-thrown']
+    assert [m['game']['fieldName'] for m in board.sent if 'game' in m] == ['T20', 'D5', 'MISS', 'BULL', 'BULL']
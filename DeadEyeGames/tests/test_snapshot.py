@@ -0,0 +1,102 @@
+"""
+Test cases for late-join snapshots: a board's recent throws and round in progress, from memory
+"""
+import json
+from urllib.parse import quote
+
+import server
+from backlog import RoundContext, ThrowBacklog
+from conftest import dart_message, received, throw
+
+
+def test_round_context_follows_turns():
+    round_context = RoundContext()
+    for dart_number, value in ((1, 60), (2, 20)):
+        round_context.add(throw(dart_number, value=value))
+    assert round_context.to_dict() == {'turn': 1, 'player': 'Alice', 'darts': [throw(1, value=60), throw(2)],
+                                       'score': 80}
+
+    round_context.add(throw(1, 'Bob', 5))
+    assert (round_context.turn, round_context.player, round_context.score) == (2, 'Bob', 5)
+
+    # darts-caller didn't number the darts: a fourth dart by the same player is a new turn
+    for _ in range(3):
+        round_context.add(dict(throw('?', 'Bob'), dartNumber='?'))
+    assert (round_context.turn, len(round_context.darts)) == (3, 1)
+
+
+def test_snapshot_joins_under_the_lock():
+    backlog = ThrowBacklog(capacity=10, snapshot_throws=3)
+    for n in range(1, 6):
+        backlog.publish('lane1', throw(n % 3 + 1, value=n), lambda t: None)
+
+    def join():
+        assert backlog.lock.locked()  # no throw can be published between snapshot and join
+
+    sent = []
+    snapshot = backlog.snapshot('lane1', join, send=lambda taken: sent.append(backlog.lock.locked()))
+    assert sent == [True]
+    assert [t['seq'] for t in snapshot['throws']] == [3, 4, 5] and snapshot['seq'] == 5
+    assert snapshot['round']['darts'][-1]['seq'] == 5
+
+    odd = backlog.snapshot('lane1', lambda: None, matches=lambda t: t['seq'] % 2)
+    assert [t['seq'] for t in odd['throws']] == [1, 3, 5]
+    assert backlog.snapshot('lane2', lambda: None)['throws'] == [] and backlog.snapshot('lane2', join)['round'] is None
+
+
+def test_late_join_gets_recent_throws_and_round(fresh_backlog):
+    for dart_number, player in ((1, 'Alice'), (2, 'Alice'), (3, 'Alice'), (1, 'Bob'), (2, 'Bob')):
+        server.on_darts_message('default', dart_message(dart_number=dart_number, player=player))
+
+    client = server.web_socketio.test_client(server.app)
+    first = client.get_received()
+    assert [msg['name'] for msg in first] == ['darts_status', 'board_snapshot']
+    status, snapshot = first[0]['args'][0], first[1]['args'][0]
+    assert [t['seq'] for t in snapshot['throws']] == [2, 3, 4, 5] and status['seq'] == snapshot['seq'] == 5
+    assert snapshot['round']['player'] == 'Bob' and snapshot['round']['score'] == 40
+    assert [d['dartNumber'] for d in snapshot['round']['darts']] == [1, 2]
+
+    # Live throws carry on after the snapshot
+    server.on_darts_message('default', dart_message(dart_number=3, player='Bob'))
+    assert [d['seq'] for d in received(client, 'dart_thrown')] == [6]
+    client.disconnect()
+
+
+def test_snapshot_reaches_the_client_before_later_throws(fresh_backlog, monkeypatch):
+    """A throw published the moment the join lets go of the backlog lock arrives after the snapshot"""
+    server.on_darts_message('default', dart_message(dart_number=1))
+    snapshot = fresh_backlog.snapshot
+
+    def snapshot_then_throw(*args, **kwargs):
+        taken = snapshot(*args, **kwargs)
+        server.on_darts_message('default', dart_message(dart_number=2))
+        return taken
+
+    monkeypatch.setattr(fresh_backlog, 'snapshot', snapshot_then_throw)
+    client = server.web_socketio.test_client(server.app)
+    first = client.get_received()
+    assert [msg['name'] for msg in first] == ['darts_status', 'board_snapshot', 'dart_thrown']
+    assert first[1]['args'][0]['seq'] == 1 and first[2]['args'][0]['seq'] == 2
+    client.disconnect()
+
+
+def test_snapshot_respects_the_subscription(fresh_backlog):
+    for dart_number, player in ((1, 'Alice'), (1, 'Bob'), (2, 'Alice')):
+        server.on_darts_message('default', dart_message(dart_number=dart_number, player=player))
+    subscribe = quote(json.dumps({'players': ['Alice']}))
+    client = server.web_socketio.test_client(server.app, query_string=f'subscribe={subscribe}')
+    snapshot, = received(client, 'board_snapshot')
+    assert [t['player'] for t in snapshot['throws']] == ['Alice', 'Alice']
+    client.disconnect()
+
+
+def test_no_snapshot_on_resume_or_when_disabled(fresh_backlog, monkeypatch):
+    server.on_darts_message('default', dart_message())
+    client = server.web_socketio.test_client(server.app, query_string=f'last_seq=1&epoch={fresh_backlog.epoch}')
+    assert received(client, 'board_snapshot') == []
+    client.disconnect()
+
+    monkeypatch.setattr(fresh_backlog, 'snapshot_throws', 0)
+    client = server.web_socketio.test_client(server.app)
+    assert received(client, 'board_snapshot') == []
+    client.disconnect()
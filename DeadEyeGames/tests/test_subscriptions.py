@@ -0,0 +1,113 @@
+"""
+Test cases for per-browser subscription filters (players, event types, board)
+"""
+import json
+from urllib.parse import quote
+
+import pytest
+
+import server
+from conftest import dart_message, received
+from subscriptions import ALL, InvalidSubscription, Subscription, SubscriptionIndex, parse_subscription
+from wire import JSON, PACKED
+
+
+def connect(subscribe=None, extra=''):
+    query = f'subscribe={quote(json.dumps(subscribe))}' if subscribe is not None else ''
+    return server.web_socketio.test_client(server.app, query_string='&'.join(filter(None, (query, extra))))
+
+
+def test_parse_and_compile():
+    assert parse_subscription(None) == (ALL, None)
+    assert parse_subscription('{"events": ["dart1-thrown", "dart2-thrown", "dart3-thrown", "darts_status"]}')[0] is ALL
+
+    subscription, board = parse_subscription({'players': ['Bob', 'Alice'], 'events': ['dart3-thrown'],
+                                              'board': 'lane2'})
+    assert board == 'lane2' and not subscription.status
+    assert subscription.key == Subscription(['Alice', 'Bob'], ['dart3-thrown']).key
+    assert subscription.matches({'event': 'dart3-thrown', 'player': 'Alice'})
+    assert not subscription.matches({'event': 'dart1-thrown', 'player': 'Alice'})
+    assert not subscription.matches({'event': 'dart3-thrown', 'player': 'Carol'})
+
+    status_only, _ = parse_subscription({'events': ['darts_status']})
+    assert status_only.status and not status_only.matches({'event': 'dart1-thrown', 'player': 'Alice'})
+
+    for bad in ('not json', '[1]', {'events': ['dart4-thrown']}, {'players': 'Alice'}, {'board': 7}):
+        with pytest.raises(InvalidSubscription):
+            parse_subscription(bad)
+
+
+def test_index_shares_rooms_and_counts_browsers():
+    index = SubscriptionIndex()
+    alice = Subscription(['Alice'])
+    index.add('lane1', 'r1', alice, JSON)
+    index.add('lane1', 'r1', alice, JSON)
+    index.add('lane1', 'r2', Subscription(events=['dart3-thrown']), PACKED)
+    throw = {'event': 'dart1-thrown', 'player': 'Alice'}
+    assert index.matching('lane1', throw) == [('r1', JSON)]
+    assert index.matching('lane2', throw) == []
+
+    index.discard('lane1', 'r1')
+    assert index.matching('lane1', throw) == [('r1', JSON)]  # one browser still in it
+    index.discard('lane1', 'r1')
+    index.discard('lane1', 'r2')
+    assert index.views == {} and index.room_count() == 0
+
+
+def test_filtered_clients_only_get_matching_throws(fresh_backlog):
+    everyone = connect()
+    alice = connect({'players': ['Alice']})
+    third = connect({'events': ['dart3-thrown']}, 'wire=packed')
+    assert received(alice, 'darts_status')[0]['subscribe'] == {'players': ['Alice'], 'events': None}
+    everyone.get_received()
+    third.get_received()
+
+    for dart_number, player in ((1, 'Alice'), (2, 'Bob'), (3, 'Alice'), (3, 'Bob')):
+        server.on_darts_message('default', dart_message(dart_number=dart_number, player=player))
+
+    assert len(received(everyone, 'dart_thrown')) == 4
+    assert [(d['dartNumber'], d['player']) for d in received(alice, 'dart_thrown')] == [(1, 'Alice'), (3, 'Alice')]
+    frames = received(third, 'dart_packed')
+    assert [PACKED.decode(frame)[0]['player'] for frame in frames] == ['Alice', 'Bob']
+
+    for client in (everyone, alice, third):
+        client.disconnect()
+    assert server.web_subscriptions == {} and server.subscriptions.room_count() == 0
+
+
+def test_status_changes_only_when_subscribed():
+    throws_only = connect({'events': ['dart1-thrown']})
+    with_status = connect({'players': ['Alice']})
+    throws_only.get_received()
+    with_status.get_received()
+
+    server.on_board_status('default', True)
+    assert received(throws_only, 'darts_status') == []
+    assert received(with_status, 'darts_status') == [{'connected': True, 'board': 'default'}]
+    throws_only.disconnect()
+    with_status.disconnect()
+
+
+def test_join_board_changes_the_filter(fresh_backlog):
+    client = connect({'players': ['Alice']})
+    client.get_received()
+    client.emit('join_board', {'subscribe': {'players': ['Bob']}})
+    assert received(client, 'darts_status')[0]['subscribe']['players'] == ['Bob']
+
+    server.on_darts_message('default', dart_message(dart_number=1, player='Alice'))
+    server.on_darts_message('default', dart_message(dart_number=2, player='Bob'))
+    assert [d['player'] for d in received(client, 'dart_thrown')] == ['Bob']
+
+    client.emit('join_board', {'subscribe': None})
+    server.on_darts_message('default', dart_message(dart_number=1, player='Alice'))
+    assert [d['player'] for d in received(client, 'dart_thrown')] == ['Alice']
+    assert server.subscriptions.room_count() == 0
+    client.disconnect()
+
+
+def test_resume_only_resends_matching_throws(fresh_backlog):
+    for dart_number, player in ((1, 'Alice'), (2, 'Bob'), (3, 'Alice')):
+        server.on_darts_message('default', dart_message(dart_number=dart_number, player=player))
+    client = connect({'players': ['Alice']}, f'last_seq=0&epoch={fresh_backlog.epoch}')
+    assert [d['seq'] for d in received(client, 'dart_thrown')] == [1, 3]
+    client.disconnect()
@@ -0,0 +1,112 @@
+"""
+Test cases for the per-client throw encodings (JSON default, compact 'packed' frames)
+"""
+import base64
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+import server
+from conftest import dart_message, received
+from outbound import OutboundQueues
+from wire import JSON, PACKED, negotiate
+
+CLIENT_JS = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'static', 'js', 'darts-client.js')
+
+
+def sample_throw(seq=1, player='Alice', **extra):
+    return dict({'event': 'dart1-thrown', 'segment': 20, 'multiplier': 3, 'value': 60, 'dartNumber': 1,
+                 'player': player, 'board': 'lane1', 'seq': seq}, **extra)
+
+
+def test_packed_round_trip():
+    dart_throw = sample_throw(seq=70000, player='Zoë')
+    frame = PACKED.encode(dart_throw)
+    assert PACKED.decode(frame) == [dart_throw]
+    assert len(frame) < len(json.dumps(dart_throw)) / 3
+
+
+def test_packed_batch_interns_names():
+    throws = [sample_throw(seq=n, player='Alice' if n % 2 else 'Bob') for n in range(1, 11)]
+    frame = PACKED.encode_batch(throws)
+    assert PACKED.decode(frame) == throws
+    # 'lane1', 'Alice' and 'Bob' stored once each, plus 12 bytes per throw
+    assert len(frame) == 2 + 6 + 6 + 4 + 2 + 12 * 10
+
+
+def test_packed_ack_stamp_and_unknown_dart_number():
+    dart_throw = sample_throw(ack=1234.5678, dartNumber='?')
+    assert PACKED.decode(PACKED.encode(dart_throw)) == [dart_throw]
+
+
+def test_negotiate_falls_back_to_json():
+    assert negotiate('packed') is PACKED
+    assert negotiate('PACKED') is PACKED
+    assert negotiate('msgpack') is JSON
+    assert negotiate(None) is JSON
+
+
+def test_packed_and_json_clients_on_one_board(fresh_backlog):
+    """Each client gets throws in the encoding it negotiated; JSON stays the default"""
+    plain = server.web_socketio.test_client(server.app)
+    packed = server.web_socketio.test_client(server.app, query_string='wire=packed')
+    assert received(plain, 'darts_status')[0]['wire'] == 'json'
+    assert received(packed, 'darts_status')[0]['wire'] == 'packed'
+
+    server.on_darts_message('default', dart_message(19, 3, dart_number=2))
+
+    json_dart, = received(plain, 'dart_thrown')
+    frame, = received(packed, 'dart_packed')
+    assert PACKED.decode(frame) == [json_dart]
+    assert json_dart['segment'] == 19 and json_dart['dartNumber'] == 2
+    plain.disconnect()
+    packed.disconnect()
+    assert server.web_wires == {}
+
+
+def test_unknown_wire_gets_json(fresh_backlog):
+    client = server.web_socketio.test_client(server.app, query_string='wire=protobuf')
+    assert received(client, 'darts_status')[0]['wire'] == 'json'
+    server.on_darts_message('default', dart_message(20, 3, dart_number=2))
+    assert len(received(client, 'dart_thrown')) == 1
+    client.disconnect()
+
+
+def test_packed_resume(fresh_backlog):
+    for segment in (1, 2, 3):
+        server.on_darts_message('default', dart_message(segment, 3, dart_number=2))
+    client = server.web_socketio.test_client(
+        server.app, query_string=f'wire=packed&last_seq=1&epoch={fresh_backlog.epoch}')
+    frames = received(client, 'dart_packed')
+    assert [PACKED.decode(frame)[0]['segment'] for frame in frames] == [2, 3]
+    client.disconnect()
+
+
+def test_packed_coalesced_batch(monkeypatch, fresh_backlog):
+    outbound = OutboundQueues(policy='coalesce')
+    outbound.start(server.web_socketio, start_task=lambda fn: None)
+    monkeypatch.setattr(server, 'outbound', outbound)
+    client = server.web_socketio.test_client(server.app, query_string='wire=packed')
+    client.get_received()
+
+    for segment in (4, 5, 6):
+        server.on_darts_message('default', dart_message(segment, 3, dart_number=2))
+    outbound.flush()
+
+    frame, = received(client, 'dart_packed')
+    assert [dart['segment'] for dart in PACKED.decode(frame)] == [4, 5, 6]
+    client.disconnect()
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason='node not installed')
+def test_browser_decoder_matches():
+    """darts-client.js decodes packed frames into the same objects as the JSON payload"""
+    throws = [sample_throw(seq=1, player='Zoë'), sample_throw(seq=2, player='Bob', ack=1.5, dartNumber='?')]
+    frame = base64.b64encode(PACKED.encode_batch(throws)).decode()
+    script = (f"const c = require({json.dumps(CLIENT_JS)});"
+              f"console.log(JSON.stringify(c.decodePacked(Buffer.from({json.dumps(frame)}, 'base64'))));")
+    output = subprocess.run(['node', '-e', script], capture_output=True, text=True, check=True).stdout
+    assert json.loads(output) == throws
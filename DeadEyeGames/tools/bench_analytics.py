@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark: throw analytics - journal load, vectorized recompute, live updates
+
+Writes a synthetic journal of N throws (months of league nights) to a temp
+directory, then times:
+
+    load        memory-map every journal file into the columns (includes a recompute)
+    recompute   rebuild every per-player aggregate from the columns
+    naive       the same aggregates with a Python loop per throw, for comparison
+    add         one live throw (the per-throw cost on the ingest thread)
+    summary     building the /api/stats report after a new throw
+
+Usage:
+    python3 tools/bench_analytics.py [--throws 2000000] [--players 40]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np  # noqa: E402
+
+from analytics import ThrowAnalytics, journal_dtype  # noqa: E402
+from dart_events import DartThrow  # noqa: E402
+from journal import FILE_PREFIX, FILE_SUFFIX, HEADER, MAGIC, RECORD_SIZE, VERSION  # noqa: E402
+
+
+def write_journal(directory, count, players, seed=42, per_file=1_000_000):
+    """Synthetic journal files in the real record format, written with NumPy (no index: names sort by time)"""
+    rng = np.random.default_rng(seed)
+    names = np.array([f'Player {n:02d}'.encode() for n in range(players)], dtype='S32')
+    start = time.time() - 180 * 86400
+    for file_number, offset in enumerate(range(0, count, per_file), 1):
+        n = min(per_file, count - offset)
+        records = np.zeros(n, journal_dtype())
+        records['time'] = start + (offset + np.arange(n)) * 2.0
+        segment = rng.integers(0, 22, n)
+        segment[segment == 21] = 25
+        multiplier = np.where(segment == 0, 0, rng.choice([1, 1, 1, 2, 3], n))
+        multiplier[(segment == 25) & (multiplier == 3)] = 1
+        records['segment'] = segment
+        records['multiplier'] = multiplier
+        records['value'] = segment * multiplier
+        records['event'] = 1 + (offset + np.arange(n)) % 3
+        records['dart_number'] = records['event']
+        records['board'] = b'lane1'
+        records['player'] = names[rng.integers(0, players, n)]
+        path = os.path.join(directory, f"{FILE_PREFIX}20260101-000000-{file_number:04d}{FILE_SUFFIX}")
+        with open(path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, RECORD_SIZE, start))
+            f.write(records.tobytes())
+
+
+def naive_aggregates(analytics):
+    """Per-throw Python loop over the same columns (what recompute replaces)"""
+    darts, points, heat = {}, {}, {}
+    columns = [analytics.view(name).tolist() for name in ('player', 'segment', 'multiplier', 'value')]
+    for player, segment, multiplier, value in zip(*columns):
+        darts[player] = darts.get(player, 0) + 1
+        points[player] = points.get(player, 0) + value
+        key = (player, segment, multiplier)
+        heat[key] = heat.get(key, 0) + 1
+    return darts, points, heat
+
+
+def timed(fn, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Throw analytics load/recompute/update speed')
+    parser.add_argument('--throws', type=int, default=2_000_000)
+    parser.add_argument('--players', type=int, default=40)
+    parser.add_argument('--live', type=int, default=20000, help='Live throws for the per-throw timings')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_journal(directory, args.throws, args.players)
+        analytics = ThrowAnalytics()
+        load = timed(lambda: analytics.load_journal(directory), repeat=1)
+
+    recompute = timed(analytics.recompute)
+    naive = timed(lambda: naive_aggregates(analytics), repeat=1)
+
+    live = [DartThrow('dart1-thrown', s % 21, 1 + s % 3, (s % 21) * (1 + s % 3), 1, f'Player {s % args.players:02d}')
+            for s in range(args.live)]
+    start = time.perf_counter()
+    for thrown in live:
+        analytics.add(thrown)
+    add = (time.perf_counter() - start) / len(live)
+
+    def poll_after_throw():
+        for thrown in live[:200]:
+            analytics.add(thrown)
+            analytics.summary()
+    summary = timed(poll_after_throw, repeat=1) / 200 - add
+
+    mb = analytics.count * sum(np.dtype(dtype).itemsize for _, dtype in ThrowAnalytics.COLUMNS) / 1e6
+    print(f"throws: {analytics.count:,}  players: {len(analytics.names)}  columns: {mb:.0f} MB")
+    print(f"load journal       {load * 1000:>9.1f} ms   ({args.throws / load / 1e6:.1f} M throws/s)")
+    print(f"recompute          {recompute * 1000:>9.1f} ms")
+    print(f"naive python loop  {naive * 1000:>9.1f} ms   ({naive / recompute:.0f}x slower)")
+    print(f"add (live throw)   {add * 1e6:>9.2f} us")
+    print(f"summary report     {summary * 1e6:>9.1f} us   ({args.players} players, rebuilt after each throw)")
+
+
+if __name__ == '__main__':
+    main()
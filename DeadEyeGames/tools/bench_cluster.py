@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cluster scale-out - max clients and fan-out latency vs worker count
+
+For each worker count, starts the server (0 = standalone production.py,
+N = cluster.py with N web workers) against the offline simulator and runs
+loadgen rounds with a growing number of browser clients. A round passes when
+every client connects, every throw is delivered and the p99 ingest -> browser
+latency stays under --slo-ms. The largest passing round is the "max clients"
+for that worker count.
+
+Usage:
+    python3 tools/bench_cluster.py [--workers 0,1,2,4] [--clients 250,500,1000,2000] [--boards 8]
+
+The load generator's clients run in this process, so on a machine with few
+cores they compete with the workers for CPU.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from darts_caller_sim import Simulator
+from loadgen import SentLog, board_urls, free_port, run_load, start_server, stop_server, wait_for_http
+
+
+def run_round(simulator, sent_log, url, workers, clients, args):
+    sent_log.throws.clear()
+    options = argparse.Namespace(clients=clients, rate=args.rate, duration=args.duration, drain=args.drain,
+                                 seed=1, workers=workers)
+    return asyncio.run(run_load(options, simulator, sent_log, url))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cluster scale-out benchmark')
+    parser.add_argument('--workers', default='0,1,2,4', help='Worker counts to try (0 = standalone server)')
+    parser.add_argument('--clients', default='250,500,1000,2000', help='Client counts to ramp through')
+    parser.add_argument('--boards', type=int, default=8)
+    parser.add_argument('--rate', type=float, default=2.0, help='Throws per second per board')
+    parser.add_argument('--duration', type=float, default=10.0)
+    parser.add_argument('--drain', type=float, default=10.0)
+    parser.add_argument('--slo-ms', type=float, default=100.0, help='p99 latency a round must stay under')
+    parser.add_argument('--json', metavar='FILE', help='Also write every round as JSON')
+    args = parser.parse_args()
+
+    sent_log = SentLog()
+    simulator = Simulator(args.boards, free_port(), on_sent=sent_log.on_sent)
+    simulator.start_in_thread()
+
+    rounds, summary = [], []
+    for workers in (int(n) for n in args.workers.split(',')):
+        port = free_port()
+        url = f'http://127.0.0.1:{port}'
+        proc = start_server('production.py', simulator.boards_spec(), port, workers=workers)
+        try:
+            urls = set(board_urls(url, list(simulator.boards), workers).values())
+            if not all(wait_for_http(worker_url + '/metrics') for worker_url in urls):
+                raise SystemExit(f'server with {workers} worker(s) did not start')
+            time.sleep(3)  # let every process reach the simulated boards / the bus
+
+            best = None
+            for clients in (int(n) for n in args.clients.split(',')):
+                result = run_round(simulator, sent_log, url, workers, clients, args)
+                result['workers'] = workers
+                rounds.append(result)
+                latency = result['latency_ms']
+                passed = (result['connect_failures'] == 0 and result['delivery_ratio'] == 1.0
+                          and latency['p99'] <= args.slo_ms)
+                print(f"workers {workers}  clients {clients:>5}  delivered {result['delivery_ratio']:.4f}  "
+                      f"p50 {latency['p50']:>7.1f} ms  p99 {latency['p99']:>7.1f} ms  {'ok' if passed else 'FAIL'}")
+                if not passed:
+                    break
+                best = result
+            summary.append((workers, best))
+        finally:
+            stop_server(proc)
+
+    print()
+    print(f"{'workers':>7}  {'max clients':>11}  {'p50 ms':>7}  {'p99 ms':>7}   (p99 <= {args.slo_ms:g} ms, no losses)")
+    for workers, best in summary:
+        label = 'standalone' if workers == 0 else str(workers)
+        if best is None:
+            print(f"{label:>7}  {'-':>11}")
+        else:
+            print(f"{label:>7}  {best['clients']:>11}  {best['latency_ms']['p50']:>7.1f}  {best['latency_ms']['p99']:>7.1f}")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(rounds, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
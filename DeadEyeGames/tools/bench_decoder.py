@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Benchmark: darts-caller message decoding, messages per second
+
+Compares the shared decoder (dart_events.decode_message) with the inline
+parsing that server.py and the CLI used before it, over a message mix that
+looks like a real night: darts-caller sends several non-throw events (turn
+changes, calls, board status) for every dart.
+
+Usage:
+    python3 tools/bench_decoder.py [--messages 200000] [--throw-ratio 0.3]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dart_events import decode_message  # noqa: E402
+
+NON_THROW_EVENTS = ('turn-started', 'darts-pulled', 'call', 'board-status', 'game-started', 'busted')
+
+
+def legacy_decode(data):
+    """The pre-dart_events parsing logic from on_darts_message, minus logging"""
+    event_data = json.loads(data) if isinstance(data, str) else data
+    event_type = event_data.get('event', 'UNKNOWN')
+    if event_type in ['dart1-thrown', 'dart2-thrown', 'dart3-thrown']:
+        game = event_data.get('game', {})
+        return {
+            'event': event_type,
+            'segment': game.get('fieldNumber', 0),
+            'multiplier': game.get('fieldMultiplier', 1),
+            'value': game.get('dartValue', 0),
+            'dartNumber': game.get('dartNumber', '?'),
+            'player': event_data.get('player', 'Unknown'),
+        }
+    return None
+
+
+def build_messages(count, throw_ratio, seed=42):
+    rng = random.Random(seed)
+    messages = []
+    for i in range(count):
+        if rng.random() < throw_ratio:
+            segment = rng.randint(1, 20)
+            multiplier = rng.choice((1, 1, 1, 2, 3))
+            messages.append(json.dumps({
+                'event': f'dart{i % 3 + 1}-thrown',
+                'player': rng.choice(('Alice', 'Bob', 'Carol')),
+                'playerIndex': 0,
+                'game': {
+                    'mode': 'X01',
+                    'pointsLeft': 301,
+                    'dartNumber': i % 3 + 1,
+                    'dartValue': segment * multiplier,
+                    'fieldName': f'S{segment}',
+                    'fieldNumber': segment,
+                    'fieldMultiplier': multiplier,
+                    'coords': {'x': rng.random(), 'y': rng.random()},
+                },
+            }))
+        else:
+            messages.append(json.dumps({
+                'event': rng.choice(NON_THROW_EVENTS),
+                'player': 'Alice',
+                'game': {'mode': 'X01', 'pointsLeft': 301, 'round': i // 10},
+            }))
+    return messages
+
+
+def measure(name, decode, messages, repeat):
+    best = float('inf')
+    throws = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        throws = sum(1 for message in messages if decode(message) is not None)
+        best = min(best, time.perf_counter() - start)
+    rate = len(messages) / best
+    print(f"{name:<22} {rate:>12,.0f} msg/s   ({best * 1e9 / len(messages):>6.0f} ns/msg, {throws} throws)")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description='darts-caller decoding throughput')
+    parser.add_argument('--messages', type=int, default=200000)
+    parser.add_argument('--throw-ratio', type=float, default=0.3, help='Fraction of messages that are dart throws')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    messages = build_messages(args.messages, args.throw_ratio)
+    legacy = measure('legacy inline parse', legacy_decode, messages, args.repeat)
+    shared = measure('dart_events decoder', decode_message, messages, args.repeat)
+    print(f"speedup: {shared / legacy:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark: throw pipeline - dispatch overhead and a slow side effect inline vs pooled
+
+    overhead   the same three no-op steps called directly vs as inline pipeline stages
+    slow       a side effect that takes --slow-ms per throw (an announcer call,
+               a remote database write) placed inline vs on a thread pool:
+               how long the ingest thread is busy per throw and how late the
+               last throw is broadcast when a burst arrives
+
+Usage:
+    python3 tools/bench_pipeline.py [--throws 200000] [--burst 200] [--slow-ms 5]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dart_events import DartThrow  # noqa: E402
+from pipeline import INLINE, THREAD, Pipeline, ThrowEvent  # noqa: E402
+
+DART = DartThrow('dart1-thrown', 20, 3, 60, 1, 'Alice')
+
+
+def noop(event):
+    pass
+
+
+def overhead(throws):
+    start = time.perf_counter()
+    for _ in range(throws):
+        event = ThrowEvent('lane1', DART)
+        noop(event)
+        noop(event)
+        noop(event)
+    direct = (time.perf_counter() - start) / throws
+
+    results = {}
+    for timed in (False, True):
+        pipeline = Pipeline(timed=timed)
+        for name in ('broadcast', 'persist', 'log'):
+            pipeline.add(name, noop)
+        start = time.perf_counter()
+        for _ in range(throws):
+            pipeline.process(ThrowEvent('lane1', DART))
+        results[timed] = (time.perf_counter() - start) / throws
+    return direct, results[False], results[True]
+
+
+def slow_side_effect(pool, burst, slow):
+    broadcast = []
+    pipeline = Pipeline()
+    pipeline.add('broadcast', lambda event: broadcast.append(time.perf_counter()))
+    pipeline.add('announce', lambda event: time.sleep(slow), pool=pool, queue_size=burst)
+    pipeline.start()
+    start = time.perf_counter()
+    for _ in range(burst):
+        pipeline.process(ThrowEvent('lane1', DART))
+    busy = (time.perf_counter() - start) / burst
+    last_broadcast = broadcast[-1] - start
+    pipeline.drain()
+    done = time.perf_counter() - start
+    pipeline.stop()
+    return busy, last_broadcast, done
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Throw pipeline overhead and slow-stage isolation')
+    parser.add_argument('--throws', type=int, default=200000)
+    parser.add_argument('--burst', type=int, default=200, help='Throws arriving at once for the slow-stage test')
+    parser.add_argument('--slow-ms', type=float, default=5.0)
+    args = parser.parse_args()
+
+    direct, untimed, timed = overhead(args.throws)
+    print(f"3 steps called directly      {direct * 1e6:6.2f} us/throw")
+    print(f"3 inline stages, untimed     {untimed * 1e6:6.2f} us/throw")
+    print(f"3 inline stages, timed       {timed * 1e6:6.2f} us/throw")
+    print()
+    print(f"{args.burst} throws at once, a {args.slow_ms:g} ms side effect per throw:")
+    for pool in (INLINE, THREAD):
+        busy, last, done = slow_side_effect(pool, args.burst, args.slow_ms / 1000)
+        print(f"  {pool:<7} ingest busy {busy * 1e6:8.1f} us/throw   last broadcast after {last * 1000:8.1f} ms   "
+              f"side effects done after {done * 1000:7.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
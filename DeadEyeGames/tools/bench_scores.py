@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark: leaderboard store - batched writes and indexed top-N reads
+
+Fills a temporary scores.db with N scores spread over a year, several games,
+modes and players, going through the store's own batching writer. It then
+times each top-10 query shape the REST API uses and prints the SQLite plan,
+so you can see that every shape uses an index and none needs a temp b-tree sort.
+
+Usage:
+    python3 tools/bench_scores.py [--rows 300000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scores import ScoreStore  # noqa: E402
+
+GAMES = ('station-siege', 'zombie-slayer', 'dungeon-crawl', 'dad-bod-olympics', 'heist-crew')
+
+
+def fill(store, rows, seed=42):
+    rng = random.Random(seed)
+    now = time.time()
+    players = [f'Player {n:03d}' for n in range(200)]
+    clock = [now]
+    store.clock = lambda: clock[0]
+    start = time.perf_counter()
+    for _ in range(rows):
+        clock[0] = now - rng.random() * 365 * 86400
+        store.submit_score(rng.choice(GAMES), rng.choice(players), rng.randint(0, 100000),
+                           mode=str(rng.randint(1, 50)), data={'rounds': rng.randint(1, 30)})
+    queued = time.perf_counter() - start
+    while store.count() < rows:
+        time.sleep(0.05)
+    store.clock = time.time
+    return queued, time.perf_counter() - start
+
+
+def best_of(fn, repeat=200):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return times[len(times) // 2], times[int(len(times) * 0.99)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Leaderboard store write/read speed')
+    parser.add_argument('--rows', type=int, default=300000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = ScoreStore(os.path.join(directory, 'scores.db'))
+        queued, written = fill(store, args.rows)
+        print(f"{args.rows:,} scores: queued in {queued:.2f}s ({queued / args.rows * 1e6:.1f} us per request), "
+              f"committed after {written:.2f}s in {store.stats['batches']} batches")
+
+        shapes = (
+            ('game, all time', dict()),
+            ('game + mode', dict(mode='7')),
+            ('game + mode, day', dict(mode='7', period='day')),
+            ('game + mode, week', dict(mode='7', period='week')),
+            ('game + mode, month', dict(mode='7', period='month')),
+            ('game, day', dict(period='day')),
+            ('game, week', dict(period='week')),
+            ('game, month', dict(period='month')),
+            ('game + player', dict(player='Player 042')),
+        )
+        print(f"{'top 10 for':<22} {'p50 us':>8} {'p99 us':>8}  plan")
+        for label, query in shapes:
+            p50, p99 = best_of(lambda: store.top('station-siege', limit=10, **query))
+            with store._reader() as reader:
+                plan = plan_for(reader, query)
+            print(f"{label:<22} {p50 * 1e6:>8.0f} {p99 * 1e6:>8.0f}  {plan}")
+
+        # As the web server runs it: each GET on a thread of its own (thread start/join included)
+        p50, p99 = best_of(lambda: on_new_thread(store.top, 'station-siege', limit=10))
+        print(f"{'game, new thread each':<22} {p50 * 1e6:>8.0f} {p99 * 1e6:>8.0f}  "
+              f"({store.reader_count} read connections opened)")
+        store.close()
+
+
+def on_new_thread(fn, *args, **kwargs):
+    request = threading.Thread(target=fn, args=args, kwargs=kwargs)
+    request.start()
+    request.join()
+
+
+def plan_for(reader, query):
+    """SQLite's plan for the same WHERE/ORDER BY as ScoreStore.top()"""
+    clauses, params = ['game = ?'], ['station-siege']
+    if 'mode' in query:
+        clauses.append('mode = ?')
+        params.append(query['mode'])
+    if query.get('period'):
+        clauses.append(f"{query['period']} = ?")
+        params.append(0)
+    if 'player' in query:
+        clauses.append('player = ?')
+        params.append(query['player'])
+    rows = reader.execute(f"EXPLAIN QUERY PLAN SELECT player, score FROM scores WHERE {' AND '.join(clauses)} "
+                          f"ORDER BY score DESC, created LIMIT 10", params).fetchall()
+    return '; '.join(row[3] for row in rows)
+
+
+if __name__ == '__main__':
+    main()
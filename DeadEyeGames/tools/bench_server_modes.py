@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Benchmark: threaded dev server (server.py) vs eventlet production server (production.py)
+
+For each server mode this script:
+  1. runs a fake darts-caller on a local port,
+  2. starts the server as a subprocess pointed at it,
+  3. connects increasing numbers of headless Socket.IO browser clients,
+  4. fires throws upstream and measures fan-out latency (upstream emit ->
+     browser receive) for every client.
+
+A client level "passes" when every client connected and at least 99.9% of
+throws arrived within the timeout. The highest passing level is reported as
+the max concurrent clients for that mode.
+
+Usage:
+    python3 tools/bench_server_modes.py [--levels 50,100,250,500,1000] [--throws 20]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+
+import socketio
+from aiohttp import web
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GAMES_DIR = os.path.dirname(HERE)
+
+MODES = {
+    'threaded': 'server.py',
+    'eventlet': 'production.py',
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class FakeDartsCaller:
+    """Minimal darts-caller stand-in running on its own asyncio loop thread"""
+
+    def __init__(self, port):
+        self.port = port
+        self.sio = socketio.AsyncServer(async_mode='aiohttp')
+        self.app = web.Application()
+        self.sio.attach(self.app)
+        self.loop = asyncio.new_event_loop()
+        self.sent = {}
+        self.ready = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        self.ready.wait(10)
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        runner = web.AppRunner(self.app)
+        self.loop.run_until_complete(runner.setup())
+        self.loop.run_until_complete(web.TCPSite(runner, '127.0.0.1', self.port).start())
+        self.ready.set()
+        self.loop.run_forever()
+
+    def throw(self, seq):
+        """Emit one dart; the sequence number rides in the player name"""
+        message = json.dumps({
+            'event': 'dart1-thrown',
+            'player': f'bench-{seq}',
+            'game': {'fieldNumber': 20, 'fieldMultiplier': 3, 'dartValue': 60, 'dartNumber': 1},
+        })
+        self.sent[seq] = time.perf_counter()
+        asyncio.run_coroutine_threadsafe(self.sio.emit('message', message), self.loop)
+
+
+def wait_for_http(url, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return True
+        except Exception:
+            time.sleep(0.2)
+    return False
+
+
+async def run_level(url, fake, n_clients, n_throws, seq_start, timeout):
+    """Connect n_clients, fire n_throws, and collect per-delivery latencies"""
+    latencies = []
+    failures = 0
+    clients = []
+
+    async def connect_one():
+        client = socketio.AsyncClient(reconnection=False)
+
+        @client.on('dart_thrown')
+        async def on_dart(dart):
+            received = time.perf_counter()
+            seq = int(dart['player'].split('-')[1])
+            latencies.append(received - fake.sent[seq])
+
+        @client.on('dart_batch')
+        async def on_batch(darts):
+            for dart in darts:
+                await on_dart(dart)
+
+        try:
+            await asyncio.wait_for(client.connect(url, transports=['websocket'], wait_timeout=10), 20)
+        except BaseException:
+            await client.disconnect()
+            raise
+        return client
+
+    # Connect in batches so the server sees a realistic ramp rather than a SYN flood
+    for start in range(0, n_clients, 50):
+        batch = min(50, n_clients - start)
+        results = await asyncio.gather(*(connect_one() for _ in range(batch)), return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                failures += 1
+            else:
+                clients.append(result)
+
+    await asyncio.sleep(1)  # let room joins settle
+
+    expected = len(clients) * n_throws
+    for seq in range(seq_start, seq_start + n_throws):
+        fake.throw(seq)
+        await asyncio.sleep(0.05)
+
+    deadline = time.perf_counter() + timeout
+    while len(latencies) < expected and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(*(client.disconnect() for client in clients), return_exceptions=True), 30)
+    except asyncio.TimeoutError:
+        pass
+
+    delivered = len(latencies) / (n_clients * n_throws) if n_clients else 0
+    return {
+        'clients': n_clients,
+        'connect_failures': failures,
+        'delivered': delivered,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+        'mean_ms': statistics.fmean(latencies) * 1000 if latencies else float('nan'),
+        'passed': failures == 0 and delivered >= 0.999,
+    }
+
+
+def bench_mode(mode, levels, n_throws, timeout, pool_size):
+    upstream_port = free_port()
+    web_port = free_port()
+    fake = FakeDartsCaller(upstream_port)
+    fake.start()
+
+    env = dict(os.environ,
+               DEADEYE_BOARDS=f'default=http://127.0.0.1:{upstream_port}',
+               DEADEYE_LOG_SAMPLE='0')
+    command = [sys.executable, MODES[mode], '--host', '127.0.0.1', '--port', str(web_port)]
+    if mode == 'eventlet':
+        command += ['--pool-size', str(pool_size)]
+    proc = subprocess.Popen(
+        command,
+        cwd=GAMES_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    results = []
+    try:
+        if not wait_for_http(f'http://127.0.0.1:{web_port}/'):
+            raise RuntimeError(f'{mode} server did not start')
+        time.sleep(3)  # give the server time to reach the fake darts-caller
+
+        url = f'http://127.0.0.1:{web_port}'
+        seq = 0
+        for n_clients in levels:
+            result = asyncio.run(run_level(url, fake, n_clients, n_throws, seq, timeout))
+            seq += n_throws
+            result['mode'] = mode
+            results.append(result)
+            print(format_row(result), flush=True)
+            if not result['passed']:
+                break
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return results
+
+
+def format_row(r):
+    return (f"| {r['mode']:<8} | {r['clients']:>7} | {r['connect_failures']:>8} | {r['delivered'] * 100:>8.2f}% "
+            f"| {r['p50_ms']:>8.1f} | {r['p95_ms']:>8.1f} | {r['p99_ms']:>8.1f} | {'yes' if r['passed'] else 'NO':<4} |")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--modes', default='threaded,eventlet', help='Comma separated: threaded,eventlet')
+    parser.add_argument('--levels', default='50,100,250,500,1000', help='Client counts to try, in order')
+    parser.add_argument('--throws', type=int, default=20, help='Throws fired per level')
+    parser.add_argument('--timeout', type=float, default=10.0, help='Seconds to wait for deliveries per level')
+    parser.add_argument('--pool-size', type=int, default=1000, help='production.py --pool-size for eventlet mode')
+    args = parser.parse_args()
+
+    levels = [int(level) for level in args.levels.split(',')]
+    print('| mode     | clients | failures | delivered |  p50 ms  |  p95 ms  |  p99 ms  | pass |')
+    print('|----------|---------|----------|-----------|----------|----------|----------|------|')
+    summary = {}
+    for mode in args.modes.split(','):
+        results = bench_mode(mode, levels, args.throws, args.timeout, args.pool_size)
+        passed = [r['clients'] for r in results if r['passed']]
+        summary[mode] = max(passed) if passed else 0
+
+    print()
+    for mode, max_clients in summary.items():
+        print(f"{mode}: max concurrent clients (all throws delivered) = {max_clients}")
+
+
+if __name__ == '__main__':
+    main()
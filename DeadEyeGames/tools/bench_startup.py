@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Benchmark: cold start and hot restart of the server, against its startup budget
+
+Both runs start the server as a subprocess, pointed at a fake darts-caller
+(see bench_server_modes.py), with its journal, scores and checkpoint in a
+temporary directory:
+
+    cold start    process spawn -> /ready answers 200 (web), and -> /ready
+                  reports the board connected (upstream). Median of --runs.
+                  --journal-throws seeds the journal with earlier runs' throws
+                  for analytics to load (see bench_analytics.py).
+    hot restart   a browser watches a board and a game; throws arrive; the
+                  server gets SIGTERM and a new one starts. Measures SIGTERM ->
+                  process gone (shutdown) and SIGTERM -> new /ready 200
+                  (restart). More throws arrive before the browser is back; it
+                  then reconnects with its last seq and epoch, as darts-client.js
+                  does. Checks it got exactly the throws it missed, with no gap,
+                  and that the game carried on from the same version.
+                  --no-checkpoint runs the same restart with DEADEYE_CHECKPOINT=off.
+
+The median cold start to web-ready is checked against the server's
+STARTUP_BUDGET_MS (or --budget-ms), and a hot restart that loses throws or the game fails too;
+either exits 1.
+
+Usage:
+    python3 tools/bench_startup.py [--runs 5] [--server server.py|production.py] [--budget-ms 1200]
+    python3 tools/bench_startup.py --journal-throws 2000000 --no-checkpoint
+"""
+import argparse
+import json
+import os
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+import socketio
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GAMES_DIR = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+
+from bench_server_modes import FakeDartsCaller, free_port  # noqa: E402
+
+# Spawn -> /ready 200 per server, with headroom for a busy machine. Measured on a 1 vCPU VM
+# (see PERFORMANCE.md): server.py ~0.75 s, most of it importing Flask and Socket.IO;
+# production.py ~1.8 s, of which eventlet's import and monkey patching are ~1 s
+STARTUP_BUDGET_MS = {'server.py': 1200, 'production.py': 2500}
+
+GAME = 'zombie-slayer'
+
+
+class ServerProcess:
+    """server.py (or production.py) on a free port, with its state files in one directory"""
+
+    def __init__(self, script, upstream_port, directory, checkpoint=True):
+        self.script = script
+        self.port = free_port()
+        self.env = dict(os.environ,
+                        DEADEYE_BOARDS=f'default=http://127.0.0.1:{upstream_port}',
+                        DEADEYE_JOURNAL=os.path.join(directory, 'journal'),
+                        DEADEYE_SCORES=os.path.join(directory, 'scores.db'),
+                        DEADEYE_CHECKPOINT=os.path.join(directory, 'checkpoints') if checkpoint else 'off',
+                        DEADEYE_LOG_SAMPLE='0')
+        self.proc = None
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.port}'
+
+    def start(self):
+        self.proc = subprocess.Popen([sys.executable, self.script, '--host', '127.0.0.1', '--port', str(self.port)],
+                                     cwd=GAMES_DIR, env=self.env,
+                                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return time.perf_counter()
+
+    def ready(self):
+        """The /ready body, or None while nothing answers 200"""
+        try:
+            with urllib.request.urlopen(self.url + '/ready', timeout=1) as response:
+                return json.load(response)
+        except (OSError, ValueError):
+            return None
+
+    def wait_ready(self, started, upstream=True, timeout=30):
+        """(seconds to web ready, seconds to upstream ready or None) since `started`"""
+        web = None
+        deadline = started + timeout
+        while time.perf_counter() < deadline:
+            body = self.ready()
+            now = time.perf_counter()
+            if body is not None:
+                if web is None:
+                    web = now - started
+                if not upstream or body['upstream']['ready']:
+                    return web, now - started
+            if self.proc.poll() is not None:
+                raise RuntimeError(f'{self.script} exited with {self.proc.returncode}')
+            time.sleep(0.005)
+        raise RuntimeError(f'{self.script} not ready after {timeout}s')
+
+    def stop(self):
+        """SIGTERM, as a deploy would; returns when the process is gone"""
+        if self.proc is None or self.proc.poll() is not None:
+            return
+        self.proc.send_signal(signal.SIGTERM)
+        try:
+            self.proc.wait(15)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+
+
+def seed_journal(directory, throws):
+    """A journal from earlier runs: synthetic records, listed in the index like JournalWriter's files"""
+    from bench_analytics import write_journal
+    from journal import INDEX_FILE
+    os.makedirs(directory)
+    write_journal(directory, throws, players=40)
+    with open(os.path.join(directory, INDEX_FILE), 'w', encoding='utf-8') as index:
+        for name in sorted(os.listdir(directory)):
+            if name != INDEX_FILE:
+                index.write(json.dumps({'kind': 'file', 'file': name, 'start': 0.0}) + '\n')
+
+
+def cold_start(script, fake, runs, journal=None):
+    """[(web seconds, upstream seconds)] for `runs` fresh starts (each with a copy of `journal`)"""
+    results = []
+    for _ in range(runs):
+        with tempfile.TemporaryDirectory() as directory:
+            if journal is not None:
+                shutil.copytree(journal, os.path.join(directory, 'journal'))
+            server = ServerProcess(script, fake.port, directory)
+            try:
+                results.append(server.wait_ready(server.start()))
+            finally:
+                server.stop()
+    return results
+
+
+class Browser:
+    """A headless page on the default board, following the zombie-slayer game"""
+
+    def __init__(self):
+        self.client = socketio.Client(reconnection=False)
+        self.status = None
+        self.seqs = []
+        self.game_version = None
+        self.lock = threading.Lock()
+        self.client.on('darts_status', self._on_status)
+        self.client.on('dart_thrown', self._on_throw)
+        self.client.on('game_snapshot', self._on_game)
+        self.client.on('game_delta', self._on_game)
+
+    def _on_status(self, status):
+        if 'epoch' in status:
+            self.status = status
+
+    def _on_throw(self, dart):
+        with self.lock:
+            self.seqs.append(dart['seq'])
+
+    def _on_game(self, message):
+        self.game_version = message['version']
+
+    def connect(self, url, last_seq=None, epoch=None):
+        query = 'board=default'
+        if last_seq is not None:
+            query += f'&last_seq={last_seq}&epoch={epoch}'
+        self.client.connect(f'{url}?{query}', transports=['websocket'], wait_timeout=10)
+        self.client.emit('join_game', {'game': GAME})
+
+    def wait_for(self, count, timeout=10):
+        deadline = time.time() + timeout
+        while len(self.seqs) < count and time.time() < deadline:
+            time.sleep(0.01)
+        return len(self.seqs) >= count
+
+
+def fire(fake, start, count):
+    for seq in range(start, start + count):
+        fake.throw(seq)
+        time.sleep(0.02)
+
+
+def hot_restart(script, fake, checkpoint=True, before=20, during=5):
+    """Restart timings plus what a reconnecting browser got back"""
+    with tempfile.TemporaryDirectory() as directory:
+        first = ServerProcess(script, fake.port, directory, checkpoint)
+        first.wait_ready(first.start())
+        browser = Browser()
+        browser.connect(first.url)
+        time.sleep(0.3)
+        browser.client.emit('game_command', {'game': GAME, 'action': 'start'})
+        fire(fake, 0, before)
+        browser.wait_for(before)
+        epoch, last_seq, game_version = browser.status['epoch'], browser.seqs[-1], browser.game_version
+
+        signalled = time.perf_counter()
+        first.stop()
+        gone = time.perf_counter()
+        browser.client.disconnect()
+        second = ServerProcess(script, fake.port, directory, checkpoint)
+        second.port = first.port  # same address, as behind a load balancer
+        second.start()
+        web, upstream = second.wait_ready(signalled)
+        restored = second.ready()['restored']
+        try:
+            fire(fake, before, during)
+            time.sleep(0.3)
+            back = Browser()
+            back.connect(second.url, last_seq, epoch)
+            back.wait_for(during, timeout=3)
+            time.sleep(0.3)
+            back.client.disconnect()
+        finally:
+            second.stop()
+
+    expected = list(range(last_seq + 1, last_seq + during + 1))
+    return {
+        'checkpoint': checkpoint,
+        'shutdown_ms': (gone - signalled) * 1000,
+        'restart_web_ms': web * 1000,
+        'restart_upstream_ms': upstream * 1000,
+        'restored_throws': restored['throws'] if restored else 0,
+        'resumed': back.seqs == expected and not back.status.get('gap'),
+        'same_epoch': back.status['epoch'] == epoch,
+        'game_kept': back.game_version is not None and back.game_version >= game_version > 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--server', default='server.py', help='server.py or production.py')
+    parser.add_argument('--runs', type=int, default=5, help='Cold starts to take the median of')
+    parser.add_argument('--budget-ms', type=float,
+                        help='Cold start (spawn -> /ready 200) budget (default: per server, see STARTUP_BUDGET_MS)')
+    parser.add_argument('--no-checkpoint', action='store_true', help='Also time a restart without a checkpoint')
+    parser.add_argument('--journal-throws', type=int, default=0,
+                        help='Throws from earlier runs in the journal at each cold start (needs NumPy)')
+    args = parser.parse_args()
+    if args.budget_ms is None:
+        args.budget_ms = STARTUP_BUDGET_MS[os.path.basename(args.server)]
+
+    fake = FakeDartsCaller(free_port())
+    fake.start()
+
+    with tempfile.TemporaryDirectory() as template:
+        journal = None
+        if args.journal_throws:
+            journal = os.path.join(template, 'journal')
+            seed_journal(journal, args.journal_throws)
+        starts = cold_start(args.server, fake, args.runs, journal)
+    web = statistics.median(web for web, _ in starts) * 1000
+    upstream = statistics.median(upstream for _, upstream in starts) * 1000
+    print(f"cold start ({args.server}, median of {args.runs}, {args.journal_throws} journal throws): "
+          f"web ready {web:.0f} ms, upstream ready {upstream:.0f} ms (budget {args.budget_ms:g} ms)")
+
+    failures = []
+    if web > args.budget_ms:
+        failures.append(f"cold start {web:.0f} ms is over the budget of {args.budget_ms:g} ms")
+    for checkpoint in (True, False) if args.no_checkpoint else (True,):
+        result = hot_restart(args.server, fake, checkpoint)
+        print(f"hot restart ({'checkpoint' if checkpoint else 'no checkpoint'}): "
+              f"shutdown {result['shutdown_ms']:.0f} ms, web ready {result['restart_web_ms']:.0f} ms, "
+              f"upstream ready {result['restart_upstream_ms']:.0f} ms after SIGTERM; "
+              f"restored {result['restored_throws']} throws; resumed without gap: {result['resumed']}, "
+              f"same epoch: {result['same_epoch']}, game kept: {result['game_kept']}")
+        if checkpoint and not (result['resumed'] and result['same_epoch'] and result['game_kept']):
+            failures.append("hot restart lost throws or the game (see above)")
+
+    for failure in failures:
+        print(f"FAILED {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
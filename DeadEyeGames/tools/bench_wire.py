@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark: bytes per throw and encode/decode time, JSON vs packed wire
+
+Bytes are counted as they go out on the WebSocket: the Socket.IO packet
+(JSON text, or a placeholder packet plus a binary attachment for packed
+frames) with its Engine.IO prefix. WebSocket frame headers are not included.
+Encode time is the server's cost for one frame, from the throw dict to the
+Socket.IO packet. Decode time is the browser's cost from the received message
+to dart objects: JSON.parse vs darts-client.js decodePacked, both run in node.
+Node is optional. Without it only the Python side is measured.
+
+Usage:
+    python3 tools/bench_wire.py [--throws 20000] [--batch 16]
+"""
+import argparse
+import base64
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from socketio import packet as sio_packet  # noqa: E402
+
+from wire import JSON, PACKED  # noqa: E402
+
+CLIENT_JS = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static', 'js',
+                         'darts-client.js')
+
+NODE_BENCH = """
+const c = require(process.argv[1]);
+const input = JSON.parse(require('fs').readFileSync(0, 'utf8'));
+function best(fn, repeat) {
+    let result = Infinity;
+    for (let r = 0; r < repeat; r++) {
+        const start = process.hrtime.bigint();
+        fn();
+        result = Math.min(result, Number(process.hrtime.bigint() - start));
+    }
+    return result;
+}
+const out = {};
+for (const [name, frames] of Object.entries(input.json)) {
+    // Socket.IO hands the packet body to JSON.parse
+    out['json ' + name] = best(() => { for (const f of frames) JSON.parse(f); }, input.repeat);
+}
+for (const [name, frames] of Object.entries(input.packed)) {
+    // The placeholder packet is parsed too, then the attachment decoded
+    const buffers = frames.map(([placeholder, f]) => [placeholder, new Uint8Array(Buffer.from(f, 'base64')).buffer]);
+    out['packed ' + name] = best(() => {
+        for (const [placeholder, b] of buffers) { JSON.parse(placeholder); c.decodePacked(b); }
+    }, input.repeat);
+}
+console.log(JSON.stringify(out));
+"""
+
+
+def build_throws(count, seed=42):
+    rng = random.Random(seed)
+    players = ('Alice', 'Bob', 'Carol', 'Dave')
+    throws = []
+    for seq in range(1, count + 1):
+        segment = rng.choice((rng.randint(1, 20), 25))
+        multiplier = 1 if segment == 25 else rng.choice((1, 1, 1, 2, 3))
+        dart_number = (seq - 1) % 3 + 1
+        throws.append({'event': f'dart{dart_number}-thrown', 'segment': segment, 'multiplier': multiplier,
+                       'value': segment * multiplier, 'dartNumber': dart_number,
+                       'player': players[(seq - 1) // 3 % len(players)], 'board': 'lane1', 'seq': seq})
+    return throws
+
+
+def socketio_frames(event, data):
+    """The WebSocket messages for one Socket.IO event (EIO4: text gets a '4' prefix, binary is raw)"""
+    encoded = sio_packet.Packet(sio_packet.EVENT, namespace='/', data=[event, data]).encode()
+    if not isinstance(encoded, list):
+        encoded = [encoded]
+    return [b'4' + part.encode('utf-8') if isinstance(part, str) else part for part in encoded]
+
+
+def json_body(message):
+    """The JSON text socket.io-parser hands to JSON.parse (the packet minus its type digits)"""
+    text = message[0].decode('utf-8')
+    return text[text.index('['):]
+
+
+def frames_for(codec, throws, batch):
+    if batch == 1:
+        return [socketio_frames(codec.event, codec.encode(t)) for t in throws]
+    return [socketio_frames(codec.batch_event, codec.encode_batch(throws[i:i + batch]))
+            for i in range(0, len(throws), batch)]
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def node_decode_times(frames, repeat):
+    """Browser-side decode, ns per frame, from node (None if node isn't installed)"""
+    node = shutil.which('node')
+    if node is None:
+        return None
+    payload = {'repeat': repeat, 'json': {}, 'packed': {}}
+    for (codec, batch), messages in frames.items():
+        if codec is JSON:
+            payload['json'][str(batch)] = [json_body(m) for m in messages]
+        else:
+            payload['packed'][str(batch)] = [[json_body(m), base64.b64encode(m[-1]).decode()] for m in messages]
+    result = subprocess.run([node, '-e', NODE_BENCH, CLIENT_JS], input=json.dumps(payload),
+                            capture_output=True, text=True, check=True)
+    times = json.loads(result.stdout)
+    return {(codec, batch): times[f'{codec.name} {batch}'] / len(messages)
+            for (codec, batch), messages in frames.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Wire encoding size and speed, JSON vs packed')
+    parser.add_argument('--throws', type=int, default=20000)
+    parser.add_argument('--batch', type=int, default=16, help='Throws per coalesced batch frame')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    throws = build_throws(args.throws)
+    frames = {(codec, batch): frames_for(codec, throws, batch)
+              for batch in (1, args.batch) for codec in (JSON, PACKED)}
+    js_times = node_decode_times(frames, args.repeat)
+
+    print(f"{'encoding':<18} {'bytes/throw':>12} {'encode ns/throw':>16} {'py decode ns':>13} {'js decode ns':>13}")
+    for (codec, batch), messages in frames.items():
+        size = sum(len(part) for message in messages for part in message) / len(throws)
+        encode = best_of(lambda: frames_for(codec, throws, batch), args.repeat) / len(throws)
+        if codec is JSON:
+            bodies = [json_body(m) for m in messages]
+            decode = best_of(lambda: [json.loads(b) for b in bodies], args.repeat)
+        else:
+            bodies = [m[-1] for m in messages]
+            decode = best_of(lambda: [PACKED.decode(b) for b in bodies], args.repeat)
+        js = f"{js_times[(codec, batch)] / batch:>13.0f}" if js_times else f"{'-':>13}"
+        label = f"{codec.name} x{batch}"
+        print(f"{label:<18} {size:>12.1f} {encode * 1e9:>16.0f} {decode * 1e9 / len(throws):>13.0f} {js}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+DeadEyeGames darts-caller Simulator - a local, offline stand-in for darts-caller
+
+Serves the same Socket.IO 'message' events darts-caller sends
+('dart1-thrown' ... 'dart3-thrown' with the 'game' payload, plus
+'darts-pulled' between turns), one Socket.IO server per simulated board.
+
+Throws come from a simple physical model: each player aims at a target and
+lands with Gaussian scatter on a regulation board (scatter depends on skill),
+so segment/multiplier distributions look like real play rather than uniform
+noise. Scripted scenarios (JSON) can replace or mix with the random play.
+
+Usage:
+    python3 tools/darts_caller_sim.py                          # one board on :8079
+    python3 tools/darts_caller_sim.py --boards 4 --port 9001   # lanes on :9001-9004
+    python3 tools/darts_caller_sim.py --scenario scenario.json --speed 5
+
+Then point the server at it (the simulator prints the exact line):
+    DEADEYE_BOARDS="lane1=http://127.0.0.1:9001,..." python3 server.py
+
+Scenario file:
+    {
+      "players": ["Alice", "Bob"],
+      "steps": [
+        {"player": "Alice", "throws": ["T20", "T20", "T20"]},
+        {"event": "darts-pulled"},
+        {"wait": 2.5},
+        {"repeat": 10, "steps": [{"random_turns": 1}]}
+      ]
+    }
+    Throw notation: S20 / D16 / T19 / 20 (single) / BULL / DBULL / MISS
+"""
+import argparse
+import asyncio
+import json
+import math
+import random
+import ssl
+import threading
+import time
+
+import socketio
+from aiohttp import web
+
+# =============================================================================
+# DARTBOARD MODEL
+# =============================================================================
+
+# Clockwise from the top
+SEGMENT_ORDER = (20, 1, 18, 4, 13, 6, 10, 15, 2, 17, 3, 19, 7, 16, 8, 11, 14, 9, 12, 5)
+
+# Regulation board radii in mm
+R_INNER_BULL = 6.35
+R_OUTER_BULL = 15.9
+R_TRIPLE_IN, R_TRIPLE_OUT = 99.0, 107.0
+R_DOUBLE_IN, R_DOUBLE_OUT = 162.0, 170.0
+
+# Standard deviation of where a dart lands around the aim point, in mm
+SKILLS = {
+    'pro': 12.0,
+    'league': 22.0,
+    'pub': 40.0,
+}
+
+MULTIPLIER_PREFIX = {1: 'S', 2: 'D', 3: 'T'}
+
+
+def score_point(x, y):
+    """(segment, multiplier) for a dart landing at (x, y) mm from the centre"""
+    r = math.hypot(x, y)
+    if r <= R_INNER_BULL:
+        return 25, 2
+    if r <= R_OUTER_BULL:
+        return 25, 1
+    if r > R_DOUBLE_OUT:
+        return 0, 0
+    angle = math.degrees(math.atan2(x, y)) % 360
+    segment = SEGMENT_ORDER[int(((angle + 9) % 360) // 18)]
+    if R_TRIPLE_IN <= r <= R_TRIPLE_OUT:
+        return segment, 3
+    if r >= R_DOUBLE_IN:
+        return segment, 2
+    return segment, 1
+
+
+def aim_point(segment, multiplier):
+    """Centre of the bed a player aims at"""
+    if segment == 25:
+        return 0.0, 0.0
+    angle = math.radians(SEGMENT_ORDER.index(segment) * 18)
+    radius = {
+        1: (R_TRIPLE_OUT + R_DOUBLE_IN) / 2,
+        2: (R_DOUBLE_IN + R_DOUBLE_OUT) / 2,
+        3: (R_TRIPLE_IN + R_TRIPLE_OUT) / 2,
+    }[multiplier]
+    return radius * math.sin(angle), radius * math.cos(angle)
+
+
+def parse_target(text):
+    """'T20' -> (20, 3), 'BULL' -> (25, 1), 'MISS' -> (0, 0)"""
+    text = text.strip().upper()
+    if text == 'MISS':
+        return 0, 0
+    if text in ('BULL', 'SBULL', '25'):
+        return 25, 1
+    if text in ('DBULL', 'BULLSEYE', '50'):
+        return 25, 2
+    multiplier = {'S': 1, 'D': 2, 'T': 3}.get(text[0])
+    number = int(text[1:] if multiplier else text)
+    if not 1 <= number <= 20:
+        raise ValueError(f"Invalid target: {text!r}")
+    return number, multiplier or 1
+
+
+def field_name(segment, multiplier):
+    if multiplier == 0:
+        return 'MISS'
+    if segment == 25:
+        return 'DBULL' if multiplier == 2 else 'BULL'
+    return f"{MULTIPLIER_PREFIX[multiplier]}{segment}"
+
+
+def dart_value(segment, multiplier):
+    return segment * multiplier
+
+
+class Player:
+    """A simulated player: a name, a skill (scatter in mm) and a favourite target"""
+
+    def __init__(self, name, skill='league', target='T20', rng=None):
+        self.name = name
+        self.sigma = SKILLS[skill] if isinstance(skill, str) else float(skill)
+        self.target = parse_target(target)
+        self.rng = rng or random.Random()
+
+    def throw(self):
+        x, y = aim_point(*self.target)
+        return score_point(self.rng.gauss(x, self.sigma), self.rng.gauss(y, self.sigma))
+
+
+def make_players(names, skill, seed=None):
+    """Players for a comma separated name list; skill 'mixed' spreads them across levels"""
+    rng = random.Random(seed)
+    levels = list(SKILLS)
+    players = []
+    for i, name in enumerate(names):
+        level = levels[i % len(levels)] if skill == 'mixed' else skill
+        players.append(Player(name, level, rng.choice(('T20', 'T20', 'T20', 'T19')), random.Random(rng.random())))
+    return players
+
+
+def throw_message(player, dart_number, segment, multiplier):
+    """A darts-caller style 'dartN-thrown' message"""
+    return {
+        'event': f'dart{dart_number}-thrown',
+        'player': player,
+        'game': {
+            'mode': 'X01',
+            'dartNumber': dart_number,
+            'dartValue': dart_value(segment, multiplier),
+            'fieldName': field_name(segment, multiplier),
+            'fieldNumber': segment,
+            'fieldMultiplier': multiplier,
+        },
+    }
+
+
+# =============================================================================
+# SIMULATED DARTS-CALLER SERVERS
+# =============================================================================
+
+class SimulatedBoard:
+    """One simulated darts-caller: a Socket.IO server that emits 'message' events"""
+
+    def __init__(self, board_id, port, on_sent=None):
+        self.board_id = board_id
+        self.port = port
+        self.on_sent = on_sent
+        self.sio = socketio.AsyncServer(async_mode='aiohttp', cors_allowed_origins='*')
+        self.app = web.Application()
+        self.sio.attach(self.app)
+        self.runner = None
+        self.sent = 0
+
+    async def start(self, host='127.0.0.1', ssl_context=None):
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, host, self.port, ssl_context=ssl_context).start()
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+
+    async def send(self, message):
+        """Emit one darts-caller message (dict) to every connected client, as JSON text"""
+        payload = json.dumps(message)
+        if self.on_sent is not None:
+            self.on_sent(self.board_id, message, time.perf_counter())
+        self.sent += 1
+        await self.sio.emit('message', payload)
+
+    async def throw(self, player, dart_number, segment, multiplier):
+        await self.send(throw_message(player, dart_number, segment, multiplier))
+
+
+class Simulator:
+    """A set of simulated boards on consecutive ports, sharing one asyncio loop"""
+
+    def __init__(self, boards=1, base_port=8079, host='127.0.0.1', on_sent=None, certfile=None, keyfile=None):
+        self.host = host
+        self.ssl_context = None
+        if certfile:
+            self.ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+            self.ssl_context.load_cert_chain(certfile, keyfile)
+        # A single board keeps the server's default id; several become lane1..laneN
+        board_ids = ['default'] if boards == 1 else [f'lane{i + 1}' for i in range(boards)]
+        self.boards = {board_id: SimulatedBoard(board_id, base_port + i, on_sent)
+                       for i, board_id in enumerate(board_ids)}
+        self.loop = None
+
+    def boards_spec(self):
+        """DEADEYE_BOARDS value that points the server at these boards"""
+        scheme = 'https' if self.ssl_context else 'http'
+        return ','.join(f'{board_id}={scheme}://{self.host}:{board.port}' for board_id, board in self.boards.items())
+
+    async def start(self):
+        self.loop = asyncio.get_running_loop()
+        for board in self.boards.values():
+            await board.start(self.host, self.ssl_context)
+
+    async def stop(self):
+        for board in self.boards.values():
+            await board.stop()
+
+    def start_in_thread(self):
+        """Run the simulator on its own loop thread (so a load generator can't skew its timing)"""
+        started = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start())
+            started.set()
+            loop.run_forever()
+
+        threading.Thread(target=run, name='darts-caller-sim', daemon=True).start()
+        if not started.wait(10):
+            raise RuntimeError('simulator did not start')
+
+    def submit(self, coro):
+        """Schedule a coroutine on the simulator loop from another thread"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+
+# =============================================================================
+# PLAY: RANDOM GAMES AND SCRIPTED SCENARIOS
+# =============================================================================
+
+async def play_turn(board, player, dart_interval, rng, hits=None):
+    """Three darts from one player (modelled, or exactly `hits` if scripted), then darts-pulled"""
+    for dart_number in (1, 2, 3):
+        segment, multiplier = parse_target(hits[dart_number - 1]) if hits else player.throw()
+        await board.throw(player.name, dart_number, segment, multiplier)
+        await asyncio.sleep(dart_interval * rng.uniform(0.6, 1.4))
+    await board.send({'event': 'darts-pulled', 'player': player.name})
+
+
+async def play_random(board, players, dart_interval, turns=None, seed=None):
+    """Players take turns forever (or for `turns` turns)"""
+    rng = random.Random(seed)
+    turn = 0
+    while turns is None or turn < turns:
+        await play_turn(board, players[turn % len(players)], dart_interval, rng)
+        turn += 1
+
+
+async def play_scenario(board, scenario, players, dart_interval, speed=1.0, seed=None):
+    """Run a scripted scenario (see module docstring for the format)"""
+    rng = random.Random(seed)
+    by_name = {player.name: player for player in players}
+    state = {'turn': 0}
+
+    def player_for(name):
+        if name not in by_name:
+            by_name[name] = Player(name, rng=random.Random(rng.random()))
+        return by_name[name]
+
+    async def run(steps):
+        for step in steps:
+            if 'repeat' in step:
+                for _ in range(int(step['repeat'])):
+                    await run(step['steps'])
+            elif 'wait' in step:
+                await asyncio.sleep(float(step['wait']) / speed)
+            elif 'event' in step:
+                await board.send(dict(step))
+            elif 'throws' in step:
+                await play_turn(board, player_for(step['player']), dart_interval, rng, step['throws'])
+            elif 'throw' in step:
+                segment, multiplier = parse_target(step['throw'])
+                await board.throw(step['player'], int(step.get('dartNumber', 1)), segment, multiplier)
+                await asyncio.sleep(dart_interval)
+            elif 'random_turns' in step:
+                for _ in range(int(step['random_turns'])):
+                    player = players[state['turn'] % len(players)]
+                    state['turn'] += 1
+                    await play_turn(board, player, dart_interval, rng)
+            else:
+                raise ValueError(f"Unknown scenario step: {step!r}")
+
+    await run(scenario['steps'])
+
+
+def load_scenario(path):
+    with open(path, encoding='utf-8') as f:
+        scenario = json.load(f)
+    if 'steps' not in scenario:
+        raise ValueError(f"{path}: scenario needs a 'steps' list")
+    return scenario
+
+
+async def main_async(args):
+    simulator = Simulator(args.boards, args.port, host=args.host, certfile=args.certfile, keyfile=args.keyfile)
+    await simulator.start()
+
+    scenario = load_scenario(args.scenario) if args.scenario else None
+    names = scenario.get('players') if scenario and scenario.get('players') else args.players.split(',')
+    dart_interval = args.dart_interval / args.speed
+
+    print(f"Simulating {len(simulator.boards)} darts-caller board(s). Start the server with:")
+    print(f'    DEADEYE_BOARDS="{simulator.boards_spec()}" python3 server.py')
+    if args.start_delay:
+        await asyncio.sleep(args.start_delay)
+
+    tasks = []
+    for i, board in enumerate(simulator.boards.values()):
+        players = make_players(names, args.skill, seed=None if args.seed is None else args.seed + i)
+        if scenario:
+            tasks.append(play_scenario(board, scenario, players, dart_interval, args.speed, args.seed))
+        else:
+            tasks.append(play_random(board, players, dart_interval, args.turns, args.seed))
+    try:
+        await asyncio.gather(*tasks)
+        print("Scenario finished")
+    finally:
+        await simulator.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local darts-caller simulator')
+    parser.add_argument('--boards', type=int, default=1, help='Number of simulated boards (default: 1)')
+    parser.add_argument('--port', type=int, default=8079, help='Port of the first board (default: 8079)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--players', default='Alice,Bob', help='Comma separated player names')
+    parser.add_argument('--skill', default='mixed', choices=list(SKILLS) + ['mixed'])
+    parser.add_argument('--dart-interval', type=float, default=2.0, help='Seconds between darts at 1x (default: 2)')
+    parser.add_argument('--speed', type=float, default=1.0, help='Play speed multiplier (default: 1)')
+    parser.add_argument('--turns', type=int, default=None, help='Stop after N turns per board (random play)')
+    parser.add_argument('--scenario', help='JSON scenario file to play instead of random turns')
+    parser.add_argument('--start-delay', type=float, default=3.0, help='Seconds to wait before the first dart')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for reproducible play')
+    parser.add_argument('--certfile', help='Serve HTTPS like the real darts-caller (with --keyfile)')
+    parser.add_argument('--keyfile')
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(main_async(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
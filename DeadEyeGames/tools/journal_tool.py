@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Inspect a DeadEyeGames throw journal
+
+Usage:
+    python3 tools/journal_tool.py sessions [journal/]
+    python3 tools/journal_tool.py dump [journal/] [--session ID] [--since UNIX_TIME] [--limit N]
+    python3 tools/journal_tool.py stats [journal/]
+
+To replay a journal to the games, run the server with --replay:
+    python3 server.py --replay journal/ --speed 100 --session 20261018-193000
+"""
+import argparse
+import collections
+import itertools
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from journal import JournalReader  # noqa: E402
+
+
+def format_time(timestamp):
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))
+
+
+def cmd_sessions(reader, args):
+    for entry in reader.sessions:
+        print(f"{entry['session']:<20} started {format_time(entry['start'])}  "
+              f"({entry['file']} record {entry['record']})")
+
+
+def cmd_dump(reader, args):
+    records = reader.records(session=args.session, since=args.since)
+    for timestamp, board_id, dart in itertools.islice(records, args.limit):
+        line = dart.to_dict(board_id)
+        line['time'] = timestamp
+        print(json.dumps(line))
+
+
+def cmd_stats(reader, args):
+    total = 0
+    per_board = collections.Counter()
+    first = last = None
+    for timestamp, board_id, dart in reader.records(session=args.session):
+        total += 1
+        per_board[board_id] += 1
+        first = timestamp if first is None else first
+        last = timestamp
+    print(f"files: {len(reader.files)}  sessions: {len(reader.sessions)}  throws: {total}")
+    if total:
+        print(f"from {format_time(first)} to {format_time(last)}")
+        for board_id, count in per_board.most_common():
+            print(f"  {board_id:<16} {count}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect a DeadEyeGames throw journal')
+    parser.add_argument('command', choices=('sessions', 'dump', 'stats'))
+    parser.add_argument('directory', nargs='?', default='journal')
+    parser.add_argument('--session', help='Only this session')
+    parser.add_argument('--since', type=float, help='Only throws at or after this unix time')
+    parser.add_argument('--limit', type=int, default=None, help='Stop after N throws (dump)')
+    args = parser.parse_args()
+
+    reader = JournalReader(args.directory)
+    {'sessions': cmd_sessions, 'dump': cmd_dump, 'stats': cmd_stats}[args.command](reader, args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+DeadEyeGames Load Generator - end-to-end throughput and latency, fully offline
+
+Runs the darts-caller simulator in-process, starts the game server pointed at
+it (or uses one you started yourself), opens hundreds of headless Socket.IO
+browser clients spread across the boards, and fires simulated throws at a
+fixed rate. Every delivery is timed from the moment the simulator emitted the
+throw (ingest) to the moment a browser client received it.
+
+Usage:
+    python3 tools/loadgen.py --clients 300 --boards 4 --rate 5 --duration 30
+    python3 tools/loadgen.py --server production.py --clients 1000 --json results.json
+    python3 tools/loadgen.py --workers 4 --boards 8 --clients 2000   # cluster.py, sticky by board
+
+    # Against a server you started yourself (its DEADEYE_BOARDS must point at the
+    # simulator ports, which this script prints before it starts firing):
+    python3 tools/loadgen.py --server none --url http://127.0.0.1:5001 --port 9001
+
+Throws are matched to deliveries by order: Socket.IO delivers in order per
+connection, so the Nth throw a client receives for its board is the Nth throw
+the simulator sent on that board. Any delivery whose content doesn't match is
+counted as a mismatch instead of a latency sample.
+"""
+import argparse
+import asyncio
+import collections
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+import socketio
+
+from darts_caller_sim import Simulator, make_players
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GAMES_DIR = os.path.dirname(HERE)
+
+sys.path.insert(0, GAMES_DIR)
+from bus import assign_boards  # noqa: E402
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return float('nan')
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def wait_for_http(url, timeout=20):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=1).read()
+            return True
+        except Exception:
+            time.sleep(0.2)
+    return False
+
+
+def start_server(script, boards_spec, port, extra_env=None, workers=0):
+    """Start server.py/production.py (or a cluster.py of `workers` of them) pointed at the simulator"""
+    env = dict(os.environ, DEADEYE_BOARDS=boards_spec, DEADEYE_LOG_SAMPLE='0', DEADEYE_JOURNAL='off',
+               DEADEYE_SCORES='off')
+    env.update(extra_env or {})
+    command = [sys.executable, script, '--host', '127.0.0.1', '--port', str(port)]
+    if workers:
+        command = [sys.executable, 'cluster.py', '--workers', str(workers), '--server', script,
+                   '--host', '127.0.0.1', '--port', str(port)]
+    return subprocess.Popen(command, cwd=GAMES_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def board_urls(url, board_ids, workers):
+    """Board id -> URL its browsers connect to (the board's cluster worker, like the ingest redirect)"""
+    if not workers:
+        return {board_id: url for board_id in board_ids}
+    base, port = url.rsplit(':', 1)
+    routes = assign_boards(board_ids, workers)
+    return {board_id: f'{base}:{int(port) + 1 + routes[board_id]}' for board_id in board_ids}
+
+
+def stop_server(proc):
+    proc.terminate()
+    try:
+        proc.wait(10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+
+
+class SentLog:
+    """Per-board record of what the simulator sent and when (written from the simulator thread)"""
+
+    def __init__(self):
+        self.throws = collections.defaultdict(list)  # board -> [(perf_counter, key)]
+
+    def on_sent(self, board_id, message, sent_at):
+        if message['event'].endswith('-thrown'):
+            game = message['game']
+            key = (message['player'], game['fieldNumber'], game['fieldMultiplier'], game['dartNumber'])
+            self.throws[board_id].append((sent_at, key))
+
+
+class LoadClient:
+    """One headless browser: a Socket.IO client watching a single board"""
+
+    __slots__ = ('board_id', 'client', 'received', 'latencies', 'mismatches', 'sent_log')
+
+    def __init__(self, board_id, sent_log):
+        self.board_id = board_id
+        self.sent_log = sent_log
+        self.received = 0
+        self.latencies = []
+        self.mismatches = 0
+        self.client = socketio.AsyncClient(reconnection=False)
+        self.client.on('dart_thrown', self.on_dart)
+        self.client.on('dart_batch', self.on_batch)
+
+    async def on_dart(self, dart):
+        received_at = time.perf_counter()
+        sent = self.sent_log.throws[self.board_id]
+        index = self.received
+        self.received += 1
+        key = (dart.get('player'), dart.get('segment'), dart.get('multiplier'), dart.get('dartNumber'))
+        if index < len(sent) and sent[index][1] == key:
+            self.latencies.append(received_at - sent[index][0])
+        else:
+            self.mismatches += 1
+
+    async def on_batch(self, darts):
+        for dart in darts:
+            await self.on_dart(dart)
+
+    async def connect(self, url, timeout=20):
+        try:
+            await asyncio.wait_for(
+                self.client.connect(f'{url}?board={self.board_id}', transports=['websocket'], wait_timeout=10),
+                timeout)
+        except BaseException:
+            await self.client.disconnect()
+            raise
+
+
+async def connect_clients(urls, board_ids, count, sent_log, batch=50):
+    """Open `count` clients round-robin across boards, `batch` at a time (urls: board id -> server URL)"""
+    clients, failures = [], 0
+    for start in range(0, count, batch):
+        pending = [LoadClient(board_ids[(start + i) % len(board_ids)], sent_log)
+                   for i in range(min(batch, count - start))]
+        results = await asyncio.gather(*(client.connect(urls[client.board_id]) for client in pending),
+                                       return_exceptions=True)
+        for client, result in zip(pending, results):
+            if isinstance(result, BaseException):
+                failures += 1
+            else:
+                clients.append(client)
+    return clients, failures
+
+
+async def fire(simulator, rate, duration, seed=None):
+    """Each board throws `rate` darts per second for `duration` seconds (runs on the simulator loop)"""
+    async def board_loop(board, players):
+        rng = random.Random(seed)
+        interval = 1.0 / rate
+        deadline = time.perf_counter() + duration
+        turn = 0
+        next_at = time.perf_counter()
+        while time.perf_counter() < deadline:
+            player = players[turn % len(players)]
+            for dart_number in (1, 2, 3):
+                segment, multiplier = player.throw()
+                await board.throw(player.name, dart_number, segment, multiplier)
+                next_at += interval * rng.uniform(0.8, 1.2)
+                await asyncio.sleep(max(0.0, next_at - time.perf_counter()))
+            turn += 1
+
+    await asyncio.gather(*(
+        board_loop(board, make_players(['Alice', 'Bob', 'Carol', 'Dave'], 'mixed', seed=i))
+        for i, board in enumerate(simulator.boards.values())
+    ))
+
+
+async def run_load(args, simulator, sent_log, url):
+    board_ids = list(simulator.boards)
+    started = time.perf_counter()
+    clients, failures = await connect_clients(board_urls(url, board_ids, args.workers), board_ids,
+                                              args.clients, sent_log)
+    connect_seconds = time.perf_counter() - started
+    print(f"Connected {len(clients)}/{args.clients} clients in {connect_seconds:.1f}s ({failures} failed)")
+    await asyncio.sleep(1)  # let room joins settle
+
+    print(f"Firing {args.rate:g} throws/s on each of {len(board_ids)} board(s) for {args.duration:g}s...")
+    fired = time.perf_counter()
+    await asyncio.wrap_future(simulator.submit(fire(simulator, args.rate, args.duration, args.seed)))
+    fire_seconds = time.perf_counter() - fired
+
+    # Each client should get every throw sent on its board
+    sent_counts = {board_id: len(sent_log.throws[board_id]) for board_id in board_ids}
+    expected = sum(sent_counts[client.board_id] for client in clients)
+    deadline = time.perf_counter() + args.drain
+    while sum(client.received for client in clients) < expected and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+    drained = time.perf_counter()
+
+    latencies = [latency for client in clients for latency in client.latencies]
+    received = sum(client.received for client in clients)
+    mismatches = sum(client.mismatches for client in clients)
+
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(*(client.client.disconnect() for client in clients), return_exceptions=True), 30)
+    except asyncio.TimeoutError:
+        pass
+
+    throws_sent = sum(sent_counts.values())
+    return {
+        'clients': args.clients,
+        'connected': len(clients),
+        'connect_failures': failures,
+        'connect_seconds': round(connect_seconds, 2),
+        'boards': len(board_ids),
+        'throws_sent': throws_sent,
+        'ingest_throws_per_s': round(throws_sent / fire_seconds, 1),
+        'deliveries_expected': expected,
+        'deliveries_received': received,
+        'delivery_ratio': round(received / expected, 5) if expected else None,
+        'deliveries_per_s': round(received / (drained - fired), 1),
+        'mismatches': mismatches,
+        'latency_ms': {
+            'p50': round(percentile(latencies, 50) * 1000, 2),
+            'p95': round(percentile(latencies, 95) * 1000, 2),
+            'p99': round(percentile(latencies, 99) * 1000, 2),
+            'max': round(max(latencies) * 1000, 2) if latencies else None,
+        },
+    }
+
+
+def print_report(result):
+    latency = result['latency_ms']
+    print()
+    print(f"clients:        {result['connected']}/{result['clients']} connected "
+          f"({result['connect_failures']} failures, {result['connect_seconds']}s)")
+    print(f"throws sent:    {result['throws_sent']} across {result['boards']} board(s) "
+          f"({result['ingest_throws_per_s']}/s)")
+    print(f"deliveries:     {result['deliveries_received']}/{result['deliveries_expected']} "
+          f"({(result['delivery_ratio'] or 0) * 100:.2f}%, {result['deliveries_per_s']}/s, "
+          f"{result['mismatches']} mismatched)")
+    print(f"latency (ms):   p50 {latency['p50']}  p95 {latency['p95']}  p99 {latency['p99']}  max {latency['max']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DeadEyeGames end-to-end load generator')
+    parser.add_argument('--clients', type=int, default=200, help='Headless browser clients (default: 200)')
+    parser.add_argument('--boards', type=int, default=1, help='Simulated boards (default: 1)')
+    parser.add_argument('--rate', type=float, default=2.0, help='Throws per second per board (default: 2)')
+    parser.add_argument('--duration', type=float, default=20.0, help='Seconds of throwing (default: 20)')
+    parser.add_argument('--drain', type=float, default=15.0, help='Seconds to wait for stragglers (default: 15)')
+    parser.add_argument('--server', default='server.py',
+                        help="Server to start: server.py, production.py or 'none' to use --url (default: server.py)")
+    parser.add_argument('--url', help='URL of an already running server (with --server none)')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='Run --server as a cluster.py of this many web workers (default: 0 = standalone)')
+    parser.add_argument('--port', type=int, default=None, help='First simulator port (default: any free port)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--json', metavar='FILE', help='Also write the results as JSON')
+    args = parser.parse_args()
+
+    base_port = args.port or free_port()
+    sent_log = SentLog()
+    simulator = Simulator(args.boards, base_port, on_sent=sent_log.on_sent)
+    simulator.start_in_thread()
+    print(f'Simulator boards: DEADEYE_BOARDS="{simulator.boards_spec()}"')
+
+    proc = None
+    if args.server != 'none':
+        web_port = free_port()
+        url = f'http://127.0.0.1:{web_port}'
+        proc = start_server(args.server, simulator.boards_spec(), web_port, workers=args.workers)
+        if not all(wait_for_http(worker_url + '/metrics')
+                   for worker_url in set(board_urls(url, list(simulator.boards), args.workers).values())):
+            stop_server(proc)
+            sys.exit(f"{args.server} did not start")
+        time.sleep(3)  # let the server reach every simulated board
+    elif args.url:
+        url = args.url.rstrip('/')
+        input("Start the server with the DEADEYE_BOARDS above, then press Enter...")
+    else:
+        sys.exit('--server none needs --url')
+
+    try:
+        result = asyncio.run(run_load(args, simulator, sent_log, url))
+    finally:
+        if proc is not None:
+            stop_server(proc)
+
+    result['server'] = args.server
+    result['workers'] = args.workers
+    print_report(result)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Performance regression suite: the ingest and fan-out path, in process
+
+Drives server.py's on_darts_message with a fake upstream (darts-caller
+messages built with darts_caller_sim, passed straight in) and connects
+browsers with the Flask-SocketIO test client. No sockets, no network, no
+server on :5001:
+
+    decode          messages decoded per second: decode_message alone, and the
+                    whole on_darts_message path with nobody watching
+    emit_N          on_darts_message latency for one throw with N browsers on the
+                    board (1, 50, 500): decode, pipeline, backlog, emit to each one
+                    (the server's side: see bench_emit)
+    emit_N_filtered the same with each browser subscribed to one of 4 players,
+                    so a throw reaches a quarter of them (see subscriptions.py)
+    client_memory   bytes allocated per connected browser (tracemalloc), server
+                    session plus the test client's own bookkeeping
+
+Results are written to perf-results/latest.json and appended to
+perf-results/history.jsonl, and checked against tools/perf_baseline.json. The
+baseline is checked in and reviewed like code: each metric has the value it
+was measured at and a tolerance, a factor on that value (rates may fall to
+half, p50 latencies may double, p99 latencies get a loose 6x because tail
+latency on a shared host swings several-fold between runs). A regression, or a
+missing baseline, exits 1. run_tests.sh runs this after pytest and fails with
+it.
+
+Usage:
+    python3 tools/perf_suite.py              # run and check against the baseline
+    python3 tools/perf_suite.py --update     # rewrite the baseline from this run (review and commit it)
+    python3 tools/perf_suite.py --quick      # smaller runs, a smoke check (baseline not checked)
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import random
+import sys
+import time
+import tracemalloc
+from urllib.parse import quote
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+GAMES_DIR = os.path.dirname(HERE)
+sys.path.insert(0, GAMES_DIR)
+
+from darts_caller_sim import make_players, throw_message  # noqa: E402
+
+BASELINE = os.path.join(HERE, 'perf_baseline.json')
+RESULTS_DIR = os.path.join(GAMES_DIR, 'perf-results')
+
+CLIENT_LEVELS = (1, 50, 500)
+
+# The filtered level: the most browsers, each subscribed to one of these players
+FILTER_PLAYERS = ('Alice', 'Bob', 'Carol', 'Dave')
+
+# metric -> (direction, unit, default tolerance: the factor on the baseline value a run may reach)
+METRICS = {
+    'decode_msgs_per_s': ('higher', 'msgs/s', 0.5),
+    'ingest_msgs_per_s': ('higher', 'msgs/s', 0.5),
+    **{f'emit_{n}_{q}_us': ('lower', 'us', 2.0 if q == 'p50' else 6.0)
+       for n in CLIENT_LEVELS + (f'{max(CLIENT_LEVELS)}_filtered',) for q in ('p50', 'p99')},
+    'client_memory_bytes': ('lower', 'bytes', 1.5),
+}
+
+NON_THROW_EVENTS = ('turn-started', 'darts-pulled', 'call', 'board-status', 'game-started', 'busted')
+
+
+def upstream_messages(count, throw_ratio=0.3, seed=42):
+    """A night's worth of darts-caller JSON: simulated throws among the non-throw chatter"""
+    rng = random.Random(seed)
+    players = make_players(['Alice', 'Bob', 'Carol'], 'mixed', seed=seed)
+    messages = []
+    dart_number = 0
+    for _ in range(count):
+        if rng.random() < throw_ratio:
+            player = players[dart_number % len(players)]
+            segment, multiplier = player.throw()
+            messages.append(json.dumps(throw_message(player.name, dart_number % 3 + 1, segment, multiplier)))
+            dart_number += 1
+        else:
+            messages.append(json.dumps({'event': rng.choice(NON_THROW_EVENTS), 'player': rng.choice(players).name}))
+    return messages
+
+
+def load_server():
+    """Import server.py quietly: sampled throw and per-connection logging would be measured too"""
+    import server
+    logging.getLogger().setLevel(logging.WARNING)
+    return server
+
+
+def percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+# =============================================================================
+# BENCHMARKS
+# =============================================================================
+
+def bench_decode(server, messages, repeats, board):
+    """Best of `repeats` passes, in messages per second"""
+    from dart_events import decode_message
+    best_decode = best_ingest = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for data in messages:
+            decode_message(data)
+        best_decode = min(best_decode, time.perf_counter() - start)
+
+        on_darts_message = server.on_darts_message
+        start = time.perf_counter()
+        for data in messages:
+            on_darts_message(board, data)
+        best_ingest = min(best_ingest, time.perf_counter() - start)
+    return {'decode_msgs_per_s': round(len(messages) / best_decode),
+            'ingest_msgs_per_s': round(len(messages) / best_ingest)}
+
+
+def connect_clients(server, count, board, players=None):
+    """Test clients on a board; with players, each one subscribes to one of them in turn"""
+    clients = []
+    for i in range(count):
+        query = f'board={board}'
+        if players:
+            query += '&subscribe=' + quote(json.dumps({'players': [players[i % len(players)]]}))
+        client = server.web_socketio.test_client(server.app, query_string=query)
+        client.get_received()  # darts_status
+        clients.append(client)
+    return clients
+
+
+def bench_emit(server, clients, board, throws, players=None, drain_every=50):
+    """
+    Latency of on_darts_message for one throw, with `clients` watching its board
+
+    The test client's transport decodes and re-encodes every packet for every
+    client (about 40 us each), which would bury the server's own fan-out cost.
+    While timing, packets go to a list instead. The last throw goes through
+    the test clients, to check it really reaches every one of them.
+
+    With players (clients from connect_clients(..., players)), throws go round
+    the players and each one should only reach the clients subscribed to its player.
+    """
+    names = players or ('Alice',)
+    messages = [json.dumps(throw_message(names[i % len(names)], i % 3 + 1, 20, 3)) for i in range(throws + 1)]
+    on_darts_message = server.on_darts_message
+    socket_server = server.web_socketio.server
+    test_transport = socket_server._send_eio_packet
+    sent = []
+    socket_server._send_eio_packet = lambda eio_sid, pkt, append=sent.append: append(eio_sid)
+    clock = time.perf_counter
+    samples = []
+    try:
+        for data in messages[:20]:  # warm up
+            on_darts_message(board, data)
+        for i, data in enumerate(messages[:-1]):
+            if i % drain_every == 0:
+                sent.clear()
+            start = clock()
+            on_darts_message(board, data)
+            samples.append(clock() - start)
+    finally:
+        socket_server._send_eio_packet = test_transport
+    window = range(throws - 1 - (throws - 1) % drain_every, throws)
+    expected = sum(recipients(len(clients), names, i) for i in window)
+    if len(sent) != expected:
+        raise RuntimeError(f'Expected {expected} packets for the last {len(window)} throws, got {len(sent)}')
+
+    on_darts_message(board, messages[-1])
+    last = throws % len(names)
+    for i, client in enumerate(clients):
+        got = any(packet['name'] == 'dart_thrown' for packet in client.get_received())
+        if got != (players is None or i % len(names) == last):
+            raise RuntimeError(f'Test client {i} {"got" if got else "missed"} the last throw - are the rooms wired up?')
+    samples.sort()
+    name = f'emit_{len(clients)}{"_filtered" if players else ""}'
+    return {f'{name}_p50_us': round(percentile(samples, 0.5) * 1e6, 1),
+            f'{name}_p99_us': round(percentile(samples, 0.99) * 1e6, 1)}
+
+
+def recipients(clients, players, throw):
+    """Clients that want throw number `throw` when clients subscribe to players in turn"""
+    if len(players) == 1:
+        return clients
+    player = throw % len(players)
+    return sum(1 for i in range(clients) if i % len(players) == player)
+
+
+def bench_memory(server, count, board):
+    """Bytes allocated per connected browser; returns (result, the connected clients)"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    clients = connect_clients(server, count, board)
+    gc.collect()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    grown = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    return {'client_memory_bytes': round(grown / count)}, clients
+
+
+def run_suite(messages=50000, throws=2000, repeats=5, levels=CLIENT_LEVELS, board='default'):
+    """Run every benchmark; returns {metric: value}"""
+    server = load_server()
+    results = bench_decode(server, upstream_messages(messages), repeats, board)
+    for n in levels:
+        if n == max(levels):
+            memory, clients = bench_memory(server, n, board)
+            results.update(memory)
+        else:
+            clients = connect_clients(server, n, board)
+        try:
+            results.update(bench_emit(server, clients, board, throws))
+        finally:
+            for client in clients:
+                client.disconnect()
+
+    n = max(levels)
+    clients = connect_clients(server, n, board, FILTER_PLAYERS)
+    try:
+        results.update(bench_emit(server, clients, board, throws, FILTER_PLAYERS))
+    finally:
+        for client in clients:
+            client.disconnect()
+    return results
+
+
+# =============================================================================
+# THRESHOLDS AND RESULTS
+# =============================================================================
+
+def check(results, thresholds):
+    """Failure messages for every metric past its threshold (metrics without one aren't checked)"""
+    failures = []
+    for name, value in results.items():
+        limit = thresholds.get(name)
+        if limit is None or name not in METRICS:
+            continue
+        direction, unit, _ = METRICS[name]
+        if direction == 'higher' and value < limit:
+            failures.append(f"{name}: {value:g} {unit} is below the threshold of {limit:g}")
+        elif direction == 'lower' and value > limit:
+            failures.append(f"{name}: {value:g} {unit} is above the threshold of {limit:g}")
+    return failures
+
+
+def baseline(results, previous=None):
+    """A baseline record from a run: each measurement with its tolerance (kept from `previous` if it had one)"""
+    kept = (previous or {}).get('metrics', {})
+    return {
+        'python': sys.version.split()[0],
+        'recorded': time.strftime('%Y-%m-%d'),
+        'metrics': {name: {'value': value, 'tolerance': kept.get(name, {}).get('tolerance', METRICS[name][2])}
+                    for name, value in results.items()},
+    }
+
+
+def thresholds_from(record):
+    """Threshold per metric: its baseline value times its tolerance"""
+    thresholds = {}
+    for name, metric in record.get('metrics', {}).items():
+        limit = metric['value'] * metric['tolerance']
+        thresholds[name] = round(limit) if METRICS[name][0] == 'higher' or limit >= 100 else round(limit, 1)
+    return thresholds
+
+
+def load_baseline(path=BASELINE):
+    """The checked-in baseline record, or None if there is none"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def store(results, directory=RESULTS_DIR):
+    """latest.json plus one line per run in history.jsonl"""
+    os.makedirs(directory, exist_ok=True)
+    record = {'time': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': sys.version.split()[0], 'results': results}
+    with open(os.path.join(directory, 'latest.json'), 'w', encoding='utf-8') as f:
+        json.dump(record, f, indent=2)
+    with open(os.path.join(directory, 'history.jsonl'), 'a', encoding='utf-8') as f:
+        f.write(json.dumps(record) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='In-process performance regression suite for ingest and fan-out')
+    parser.add_argument('--update', action='store_true',
+                        help='Rewrite the baseline from this run instead of checking (review and commit it)')
+    parser.add_argument('--quick', action='store_true',
+                        help='Smaller runs: a smoke check, too few samples to check or baseline')
+    parser.add_argument('--baseline', default=BASELINE, help='Baseline file (default: tools/perf_baseline.json)')
+    parser.add_argument('--results', default=RESULTS_DIR, help='Directory for latest.json and history.jsonl')
+    args = parser.parse_args()
+
+    sizes = dict(messages=5000, throws=200, repeats=2) if args.quick else {}
+    results = run_suite(**sizes)
+    store(results, args.results)
+
+    record = load_baseline(args.baseline)
+    thresholds = thresholds_from(record) if record else {}
+    for name, value in results.items():
+        limit = thresholds.get(name)
+        print(f"  {name:<26} {value:>12,g} {METRICS[name][1]:<7}"
+              f"{'' if limit is None else f'  (threshold {limit:,g})'}")
+
+    if args.quick:
+        print("--quick: baseline not checked")
+        return
+    if args.update:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(baseline(results, record), f, indent=2)
+            f.write('\n')
+        print(f"Baseline updated: {args.baseline} (review the change and commit it)")
+        return
+    if record is None:
+        print(f"FAILED no baseline at {args.baseline}: create one with --update and commit it")
+        sys.exit(1)
+
+    failures = check(results, thresholds)
+    missing = sorted(set(results) - set(thresholds))
+    if missing:
+        failures.append(f"no baseline for {', '.join(missing)}: add them with --update")
+    for failure in failures:
+        print(f"REGRESSION {failure}")
+    if failures:
+        sys.exit(1)
+    print("No performance regressions")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+DeadEyeGames Wire - Per-client encodings for dart throws
+
+By default a throw reaches browsers as a JSON 'dart_thrown' object. Most of
+its bytes are key names (event, segment, multiplier, value, dartNumber,
+player, board, seq). A display can ask for the compact 'packed' encoding
+instead at connect time (`?wire=packed` on the Socket.IO URL; darts-client.js
+sends it when the page has ?wire=packed or init({wire: 'packed'})). The server
+confirms the encoding it picked in darts_status.wire. Unknown names fall back to JSON.
+
+Packed throws arrive as binary 'dart_packed' frames. One frame holds one or
+more throws (a coalesced batch is still one frame):
+
+    u8   format version (1)
+    u8   string count, then per string: u8 byte length + UTF-8 bytes
+    u16  throw count, then per throw (12 bytes, +8 with an ack stamp):
+         u32 seq  u8 event  u8 segment  u8 multiplier  u8 value
+         u8 dartNumber (0 = unknown)  u8 board string  u8 player string
+         u8 flags (bit 0: f64 ack stamp follows)
+
+All integers are little-endian. Board and player names are interned per
+frame: each name is stored once, however many throws in the frame use it.
+A frame never depends on an earlier one, so dropped or resumed frames can't
+leave a display with an unknown id. The event is an index into THROW_EVENTS,
+counting from 1.
+
+Game state, status and every other event stay JSON.
+"""
+import struct
+
+from boards import board_room
+from dart_events import THROW_EVENTS
+
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct('<BB')
+_COUNT = struct.Struct('<H')
+_RECORD = struct.Struct('<IBBBBBBBB')
+_STAMP = struct.Struct('<d')
+
+FLAG_ACK = 0x01
+MAX_STRING_BYTES = 255
+_EVENT_CODES = {event: code for code, event in enumerate(THROW_EVENTS, 1)}
+
+
+class JsonCodec:
+    """The default: one JSON object per throw, a JSON list per batch"""
+
+    name = 'json'
+    event = 'dart_thrown'
+    batch_event = 'dart_batch'
+    max_batch = None
+
+    def encode(self, dart_throw):
+        return dart_throw
+
+    def encode_batch(self, dart_throws):
+        return list(dart_throws)
+
+
+class PackedCodec:
+    """Fixed binary layout with per-frame interned names (see module docstring)"""
+
+    name = 'packed'
+    event = 'dart_packed'
+    batch_event = 'dart_packed'
+    # Two names per throw at most, and string indexes are one byte
+    max_batch = 127
+
+    def encode(self, dart_throw):
+        return self.encode_batch((dart_throw,))
+
+    def encode_batch(self, dart_throws):
+        strings = {}
+        records = []
+        for dart_throw in dart_throws:
+            board = strings.setdefault(dart_throw.get('board') or '', len(strings))
+            player = strings.setdefault(dart_throw.get('player') or '', len(strings))
+            dart_number = dart_throw.get('dartNumber')
+            if dart_number.__class__ is not int or not 0 < dart_number < 256:
+                dart_number = 0
+            stamp = dart_throw.get('ack')
+            records.append(_RECORD.pack(
+                dart_throw.get('seq') or 0, _EVENT_CODES.get(dart_throw['event'], 0), dart_throw['segment'],
+                dart_throw['multiplier'], dart_throw['value'], dart_number, board, player,
+                FLAG_ACK if stamp is not None else 0))
+            if stamp is not None:
+                records.append(_STAMP.pack(stamp))
+        if len(strings) > 255:
+            raise ValueError(f"Too many distinct names for one packed frame: {len(strings)}")
+
+        parts = [_HEADER.pack(FORMAT_VERSION, len(strings))]
+        for text in strings:
+            data = text.encode('utf-8')[:MAX_STRING_BYTES]
+            parts.append(bytes((len(data),)))
+            parts.append(data)
+        parts.append(_COUNT.pack(len(dart_throws)))
+        parts.extend(records)
+        return b''.join(parts)
+
+    def decode(self, frame):
+        """Frame bytes -> list of dart_thrown dicts (the same keys darts-client.js rebuilds)"""
+        version, string_count = _HEADER.unpack_from(frame, 0)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported packed frame version {version}")
+        offset = _HEADER.size
+        strings = []
+        for _ in range(string_count):
+            length = frame[offset]
+            strings.append(bytes(frame[offset + 1:offset + 1 + length]).decode('utf-8', 'ignore'))
+            offset += 1 + length
+        count, = _COUNT.unpack_from(frame, offset)
+        offset += _COUNT.size
+
+        dart_throws = []
+        for _ in range(count):
+            seq, event, segment, multiplier, value, dart_number, board, player, flags = \
+                _RECORD.unpack_from(frame, offset)
+            offset += _RECORD.size
+            dart_throw = {
+                'event': THROW_EVENTS[event - 1] if 0 < event <= len(THROW_EVENTS) else 'unknown',
+                'segment': segment,
+                'multiplier': multiplier,
+                'value': value,
+                'dartNumber': dart_number or '?',
+                'player': strings[player],
+                'board': strings[board],
+            }
+            if seq:
+                dart_throw['seq'] = seq
+            if flags & FLAG_ACK:
+                dart_throw['ack'], = _STAMP.unpack_from(frame, offset)
+                offset += _STAMP.size
+            dart_throws.append(dart_throw)
+        return dart_throws
+
+
+JSON = JsonCodec()
+PACKED = PackedCodec()
+
+CODECS = {codec.name: codec for codec in (JSON, PACKED)}
+
+
+def negotiate(requested):
+    """The codec for a client's ?wire= request (JSON for missing or unknown names)"""
+    return CODECS.get((requested or '').lower(), JSON)
+
+
+def wire_room(board_id, codec):
+    """Room for a board's browsers that take throws in one encoding (JSON clients use the board room)"""
+    room = board_room(board_id)
+    return room if codec is JSON else f"{room}:{codec.name}"
+
+
+def board_rooms(board_id):
+    """Every room with browsers watching a board, for events sent to all of them"""
+    return [wire_room(board_id, codec) for codec in CODECS.values()]